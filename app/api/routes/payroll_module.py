@@ -120,6 +120,11 @@ async def get_job_status(jobId: str, request: Request, current_user: dict = Depe
     tenant_id, _ = tenant_context(current_user)
     return handle_service_call(lambda: format_response(True, 200, service.get_job_status(tenant_id, jobId)))
 
+@runs_router.post("/jobs/{jobId}/cancel")
+async def cancel_job(jobId: str, request: Request, current_user: dict = Depends(get_current_user)):
+    tenant_id, _ = tenant_context(current_user)
+    return handle_service_call(lambda: format_response(True, 200, service.cancel_job(tenant_id, jobId)))
+
 # Just in case docs meant root /jobs, I'll allow that logic in main router if needed, but scoping is better.
 
 
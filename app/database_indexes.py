@@ -0,0 +1,109 @@
+"""
+Index registry for the HRMS databases.
+
+`INDEXES` covers the shared `hrms_master` database. `TENANT_INDEXES` is applied
+to every tenant database (one per `tenant_id` listed in `hrms_master.tenants`).
+`scripts/ensure_indexes.py` creates/reconciles these indexes idempotently and
+reports queries that still fall back to a COLLSCAN.
+
+`SEARCH_FIELDS` / `TENANT_SEARCH_FIELDS` list the fields folded into each
+collection's `search_tokens` (see `app/utils/search_tokens.py`).
+"""
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+
+INDEXES = {
+    "hrms_master": {
+        "attendance": [
+            # Monthly attendance views: find({"user_id", "date": {$gte, $lte}})
+            IndexModel([("user_id", ASCENDING), ("date", ASCENDING)], name="user_id_date"),
+        ],
+        "employee_master": [
+            IndexModel([("email", ASCENDING)], name="email"),
+            IndexModel([("employee_id", ASCENDING)], name="employee_id"),
+            IndexModel([("search_tokens", ASCENDING)], name="search_tokens"),
+        ],
+        "leave_applications": [
+            IndexModel([("user_id", ASCENDING), ("applied_at", DESCENDING)], name="user_id_applied_at"),
+            IndexModel([("user_id", ASCENDING), ("status", ASCENDING), ("from_date", ASCENDING)],
+                       name="user_id_status_from_date"),
+        ],
+        "leave_balances": [
+            IndexModel([("user_id", ASCENDING)], name="user_id"),
+        ],
+        "tenants": [
+            IndexModel([("tenant_id", ASCENDING)], name="tenant_id_unique", unique=True),
+        ],
+        "tenant_onboarding": [
+            IndexModel([("business_email", ASCENDING), ("_id", DESCENDING)], name="business_email_id"),
+            IndexModel([("onboarding_id", ASCENDING)], name="onboarding_id"),
+        ],
+        "users": [
+            IndexModel([("email", ASCENDING)], name="email"),
+        ],
+        "jobs": [
+            # JobQueue.claim: oldest runnable job of the worker's types
+            IndexModel([("status", ASCENDING), ("type", ASCENDING), ("run_after", ASCENDING)],
+                       name="status_type_run_after"),
+            IndexModel([("job_id", ASCENDING)], name="job_id_unique", unique=True),
+            # JobQueue.requeue_expired
+            IndexModel([("status", ASCENDING), ("lease_expires_at", ASCENDING)], name="status_lease_expires_at"),
+        ],
+    },
+}
+
+
+TENANT_INDEXES = {
+    "leave_requests": [
+        IndexModel([("tenant_id", ASCENDING), ("status", ASCENDING), ("created_at", DESCENDING)],
+                   name="tenant_id_status_created_at"),
+        IndexModel([("tenant_id", ASCENDING), ("applicant_id", ASCENDING), ("from_date", ASCENDING)],
+                   name="tenant_id_applicant_id_from_date"),
+    ],
+    "leave_balances": [
+        IndexModel([("tenant_id", ASCENDING), ("employee_id", ASCENDING)], name="tenant_id_employee_id"),
+    ],
+    "leave_types": [
+        IndexModel([("tenant_id", ASCENDING)], name="tenant_id"),
+    ],
+    "attendance_daily_summary": [
+        IndexModel([("tenant_id", ASCENDING), ("employee_id", ASCENDING), ("date", ASCENDING)],
+                   name="tenant_id_employee_id_date"),
+        IndexModel([("tenant_id", ASCENDING), ("date", ASCENDING)], name="tenant_id_date"),
+    ],
+    "users": [
+        IndexModel([("tenant_id", ASCENDING), ("status", ASCENDING)], name="tenant_id_status"),
+        IndexModel([("id", ASCENDING)], name="id", sparse=True),
+        IndexModel([("tenant_id", ASCENDING), ("search_tokens", ASCENDING)], name="tenant_id_search_tokens"),
+    ],
+    "holidays": [
+        IndexModel([("tenant_id", ASCENDING), ("date", ASCENDING)], name="tenant_id_date"),
+    ],
+    "announcements": [
+        IndexModel([("tenant_id", ASCENDING), ("created_at", DESCENDING)], name="tenant_id_created_at"),
+    ],
+    "expense_claims": [
+        IndexModel([("tenant_id", ASCENDING), ("status", ASCENDING), ("created_at", DESCENDING)],
+                   name="tenant_id_status_created_at"),
+    ],
+    "payroll_runs": [
+        IndexModel([("tenant_id", ASCENDING), ("created_at", DESCENDING)], name="tenant_id_created_at"),
+    ],
+    "jobs": [
+        IndexModel([("job_id", ASCENDING), ("tenant_id", ASCENDING)], name="job_id_tenant_id"),
+    ],
+}
+
+
+SEARCH_FIELDS = {
+    "hrms_master": {
+        # Employee list searches name/email/id, the attendance report full_name/email/employee_id
+        "employee_master": ["name", "full_name", "email", "id", "employee_id"],
+    },
+}
+
+
+TENANT_SEARCH_FIELDS = {
+    "users": ["display_name", "employee_code"],
+}
@@ -1,13 +1,21 @@
+import json
 import logging
 import time
 from fastapi import Request
 
+from config import settings
+from app.utils.db_profiler import start_profile, stop_profile
+
 async def log_requests(request: Request, call_next):
     # Record start time
     start_time = time.time()
     
     # Log the request details
     logging.info(f"Starting request: {request.method} {request.url}")
+
+    # Profile every Mongo command issued while serving this request
+    trace = settings.DB_TRACE_ENABLED and request.headers.get("X-DB-Trace") == "1"
+    profile, profile_token = start_profile(trace=trace)
     
     # Process the request
     try:
@@ -20,11 +28,23 @@ async def log_requests(request: Request, call_next):
         logging.info(
             f"Request completed: {request.method} {request.url}\n"
             f"Processing time: {process_time:.2f} seconds\n"
+            f"DB calls: {profile.calls}, DB time: {profile.total_ms:.2f} ms\n"
             f"Status code: {response.status_code}"
         )
         
         # Add processing time header to response
         response.headers["X-Process-Time"] = str(process_time)
+
+        # Add DB profile headers to response
+        response.headers["X-DB-Calls"] = str(profile.calls)
+        response.headers["X-DB-Time"] = f"{profile.total_ms:.3f}"
+        if profile.slowest:
+            slowest = profile.slowest
+            response.headers["X-DB-Slowest"] = (
+                f"{slowest['command']} {slowest['database']}.{slowest['collection']} {slowest['ms']}ms"
+            )
+        if trace:
+            logging.info(f"DB trace: {request.method} {request.url.path} {json.dumps(profile.summary(), default=str)}")
         
         return response
     except Exception as exc:
@@ -36,3 +56,5 @@ async def log_requests(request: Request, call_next):
             f"Error: {str(exc)}"
         )
         raise
+    finally:
+        stop_profile(profile_token)
@@ -3,6 +3,8 @@ import secrets
 import string
 from datetime import datetime, timedelta
 from app.database import client1
+from app.database_indexes import SEARCH_FIELDS
+from app.utils.search_tokens import SEARCH_TOKENS_FIELD, document_search_tokens
 from dotenv import load_dotenv
 from bson import ObjectId
 import jwt
@@ -221,6 +223,8 @@ class AppUserAuthService(BaseAuthService):
                 "created_by": "system"
             }
             
+            user_data[SEARCH_TOKENS_FIELD] = document_search_tokens(user_data, SEARCH_FIELDS["hrms_master"]["employee_master"])
+
             # Insert user
             result = self.user_collection.insert_one(user_data)
             
@@ -378,6 +382,11 @@ class AppUserAuthService(BaseAuthService):
             update_data['date_updated'] = datetime.utcnow().isoformat()
             update_data['updated_by'] = email
             
+            search_fields = SEARCH_FIELDS["hrms_master"]["employee_master"]
+            if any(field in update_data for field in search_fields):
+                existing = self.user_collection.find_one({"email": email}) or {}
+                update_data[SEARCH_TOKENS_FIELD] = document_search_tokens({**existing, **update_data}, search_fields)
+
             # Update user
             result = self.user_collection.update_one(
                 {"email": email},
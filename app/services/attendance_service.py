@@ -5,6 +5,9 @@ from bson import ObjectId
 from pymongo import ASCENDING, DESCENDING
 
 from app.database import client1
+from app.utils.batch_resolver import hrms_user_resolver
+from app.database_indexes import TENANT_SEARCH_FIELDS
+from app.utils.search_tokens import matching_ids
 from app.utils.audit_utils import build_audit_fields
 
 
@@ -58,6 +61,12 @@ class AttendanceService:
             match_stage["status"] = query_params["status"]
             
         pipeline.append({"$match": match_stage})
+
+        # Text search 'q' (employee name or code) through the users' search tokens, before the join
+        q = query_params.get("q")
+        if q:
+            employee_ids = matching_ids(db["users"], q, {"tenant_id": tenant_id}, TENANT_SEARCH_FIELDS["users"])
+            pipeline.append({"$match": {"employee_id": {"$in": employee_ids}}})
         
         # Join with Employee (users)
         pipeline.append({
@@ -74,18 +83,6 @@ class AttendanceService:
         if query_params.get("department"):
              pipeline.append({"$match": {"employee_data.department": query_params["department"]}})
 
-        # Text search 'q'
-        q = query_params.get("q")
-        if q:
-             pipeline.append({
-                 "$match": {
-                     "$or": [
-                         {"employee_data.display_name": {"$regex": q, "$options": "i"}},
-                         {"employee_data.employee_code": {"$regex": q, "$options": "i"}}
-                     ]
-                 }
-             })
-
         # Project needed fields
         pipeline.append({
             "$project": {
@@ -694,10 +691,7 @@ class AttendanceService:
         return value
 
     def _get_user(self, db, user_id):
-        try:
-            return db["users"].find_one({"_id": ObjectId(user_id)})
-        except:
-            return None
+        return hrms_user_resolver.resolve_one(db["users"], user_id)
 
     def _sanitize_user(self, user):
         if not user: return {}
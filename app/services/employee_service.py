@@ -2,6 +2,10 @@ from bson import ObjectId
 from datetime import datetime
 from app.database import client1
 from dotenv import load_dotenv
+from app.utils.cursor_pagination import InvalidCursor, paginate
+from app.utils.list_count import InvalidCountMode, count_total
+from app.utils.search_tokens import SEARCH_TOKENS_FIELD, document_search_tokens, search_filter
+from app.database_indexes import SEARCH_FIELDS
 from app.utils.response import format_response
 import pytz
 from passlib.hash import bcrypt
@@ -33,6 +37,7 @@ class EmployeeService(BaseService):
                 "user_data" : existing_user
             }
         else:
+            user_data[SEARCH_TOKENS_FIELD] = self._search_tokens(user_data)
             result = self.user_collection.insert_one(user_data)
             return {
                 "success": True,
@@ -85,7 +90,8 @@ class EmployeeService(BaseService):
                     "user_data": existing_user
                 }
         
-        # If no duplicates found, proceed with update
+        # If no duplicates found, proceed with update (tokens from the merged document)
+        update_data_copy = self._with_search_tokens({"_id": ObjectId(user_id)}, update_data_copy)
         update_result = self.user_collection.update_one({"_id": ObjectId(user_id)}, {"$set": update_data_copy})
         if update_result.modified_count > 0:
             return {
@@ -103,14 +109,14 @@ class EmployeeService(BaseService):
     def update_job_details(self, employee_id, job_details):
         update_result = self.user_collection.update_one(
             {"_id": ObjectId(employee_id)},
-            {"$set": job_details}
+            {"$set": self._with_search_tokens({"_id": ObjectId(employee_id)}, job_details)}
         )
         return update_result.modified_count > 0 or update_result.matched_count > 0
 
     def update_compensation_info(self, employee_id, compensation_details):
         update_result = self.user_collection.update_one(
             {"_id": ObjectId(employee_id)},
-            {"$set": compensation_details}
+            {"$set": self._with_search_tokens({"_id": ObjectId(employee_id)}, compensation_details)}
         )
         return update_result.modified_count > 0 or update_result.matched_count > 0
 
@@ -121,42 +127,42 @@ class EmployeeService(BaseService):
             access_details["password"] = bcrypt.hash(access_details["password"])
         update_result = self.user_collection.update_one(
             {"_id": ObjectId(employee_id)},
-            {"$set": access_details}
+            {"$set": self._with_search_tokens({"_id": ObjectId(employee_id)}, access_details)}
         )
         return update_result.modified_count > 0 or update_result.matched_count > 0
 
     def update_emergency_contact(self, employee_id, contact_details):
         update_result = self.user_collection.update_one(
             {"_id": ObjectId(employee_id)},
-            {"$set": contact_details}
+            {"$set": self._with_search_tokens({"_id": ObjectId(employee_id)}, contact_details)}
         )
         return update_result.modified_count > 0 or update_result.matched_count > 0
 
     def update_address(self, employee_id, address_details):
         update_result = self.user_collection.update_one(
             {"_id": ObjectId(employee_id)},
-            {"$set": address_details}
+            {"$set": self._with_search_tokens({"_id": ObjectId(employee_id)}, address_details)}
         )
         return update_result.modified_count > 0 or update_result.matched_count > 0
 
     def update_hr_notes(self, employee_id, notes_details):
         update_result = self.user_collection.update_one(
             {"_id": ObjectId(employee_id)},
-            {"$set": notes_details}
+            {"$set": self._with_search_tokens({"_id": ObjectId(employee_id)}, notes_details)}
         )
         return update_result.modified_count > 0 or update_result.matched_count > 0
 
     def update_documents(self, employee_id, document_details):
         update_result = self.user_collection.update_one(
             {"_id": ObjectId(employee_id)},
-            {"$set": document_details}
+            {"$set": self._with_search_tokens({"_id": ObjectId(employee_id)}, document_details)}
         )
         return update_result.modified_count > 0 or update_result.matched_count > 0
 
     def final_submit(self, employee_id, all_details):
         update_result = self.user_collection.update_one(
             {"_id": ObjectId(employee_id)},
-            {"$set": all_details}
+            {"$set": self._with_search_tokens({"_id": ObjectId(employee_id)}, all_details)}
         )
         return update_result.modified_count > 0 or update_result.matched_count > 0
 
@@ -206,7 +212,7 @@ class EmployeeService(BaseService):
         df = pd.DataFrame(columns=columns)
         return df.to_csv(index=False)
 
-    def list_employees(self, page=1, limit=20, status=None, department=None, role=None, location=None, search=None):
+    def list_employees(self, page=1, limit=20, status=None, department=None, role=None, location=None, search=None, cursor=None, count_mode=None):
         if page < 1 or limit < 1:
             raise ValueError("Page and limit must be positive integers")
         query = {}
@@ -219,13 +225,14 @@ class EmployeeService(BaseService):
         if location:
             query['location'] = location
         if search:
-            query['$or'] = [
-                {'name': {'$regex': search, '$options': 'i'}},
-                {'email': {'$regex': search, '$options': 'i'}},
-                {'id': {'$regex': search, '$options': 'i'}}
-            ]
-        total = self.user_collection.count_documents(query)
-        employees = list(self.user_collection.find(query).skip((page-1)*limit).limit(limit))
+            query.update(search_filter(search))
+        try:
+            count = count_total(self.user_collection, query, count_mode)
+            total = count['total']
+            # Insertion order; a cursor replaces page
+            employees, next_cursor = paginate(self.user_collection, query, [("_id", 1)], limit, cursor=cursor, skip=(page-1)*limit)
+        except (InvalidCursor, InvalidCountMode) as e:
+            return {"success": False, "message": "Invalid pagination parameters", "error": {"code": "VALIDATION_ERROR", "details": str(e)}}
         for emp in employees:
             emp['id'] = str(emp.get('_id', ''))
             emp.pop('_id', None)
@@ -234,7 +241,11 @@ class EmployeeService(BaseService):
             'data': employees,
             'total': total,
             'page': page,
-            'limit': limit
+            'limit': limit,
+            'next_cursor': next_cursor,
+            'count_mode': count['mode'],
+            'total_is_exact': count['is_exact'],
+            'total_display': count['display']
         }
 
     def get_employee_by_id(self, emp_id):
@@ -246,8 +257,20 @@ class EmployeeService(BaseService):
         emp.pop('_id', None)
         return {"success": True, "data": emp}
 
+    def _search_tokens(self, employee):
+        return document_search_tokens(employee, SEARCH_FIELDS["hrms_master"]["employee_master"])
+
+    def _with_search_tokens(self, query, fields):
+        """`$set` body plus search_tokens rebuilt from the stored document merged
+        with `fields`, when `fields` touches a searchable field"""
+        if not any(field in fields for field in SEARCH_FIELDS["hrms_master"]["employee_master"]):
+            return fields
+        existing = self.user_collection.find_one(query) or {}
+        return {**fields, SEARCH_TOKENS_FIELD: self._search_tokens({**existing, **fields})}
+
     def add_employee(self, employee_data):
         from bson import ObjectId
+        employee_data[SEARCH_TOKENS_FIELD] = self._search_tokens(employee_data)
         result = self.user_collection.insert_one(employee_data)
         return {
             "success": True,
@@ -257,6 +280,7 @@ class EmployeeService(BaseService):
 
     def edit_employee(self, emp_id, employee_data):
         from bson import ObjectId
+        employee_data = self._with_search_tokens({"_id": ObjectId(emp_id)}, employee_data)
         result = self.user_collection.update_one({"_id": ObjectId(emp_id)}, {"$set": employee_data})
         if result.modified_count > 0:
             return {"success": True, "message": "Employee updated successfully"}
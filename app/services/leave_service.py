@@ -3,6 +3,9 @@ from datetime import datetime
 from bson import ObjectId
 
 from app.database import client1
+from app.utils.batch_resolver import hrms_user_resolver
+from app.database_indexes import TENANT_SEARCH_FIELDS
+from app.utils.search_tokens import matching_ids
 from app.utils.audit_utils import build_audit_fields
 
 
@@ -74,6 +77,11 @@ class LeaveService:
         
         pipeline = []
         pipeline.append({"$match": match_query})
+
+        # Search 'q' (applicant name or code) through the users' search tokens, before the join
+        if query_params.get("q"):
+            applicant_ids = matching_ids(db["users"], query_params["q"], {"tenant_id": tenant_id}, TENANT_SEARCH_FIELDS["users"])
+            pipeline.append({"$match": {"applicant_id": {"$in": applicant_ids}}})
         
         # Join applicant
         pipeline.append({
@@ -88,17 +96,7 @@ class LeaveService:
 
         if query_params.get("department"):
             pipeline.append({"$match": {"applicant_data.department": query_params["department"]}})
-        
-        if query_params.get("q"):
-            q = query_params["q"]
-            pipeline.append({
-                 "$match": {
-                     "$or": [
-                         {"applicant_data.display_name": {"$regex": q, "$options": "i"}},
-                         {"applicant_data.employee_code": {"$regex": q, "$options": "i"}}
-                     ]
-                 }
-             })
+
 
         pipeline.append({"$sort": {"created_at": -1}})
         
@@ -431,14 +429,19 @@ class LeaveService:
              query["applicant_id"] = employee_id
              
         # Fetch leaves
-        leaves_cursor = db["leave_requests"].find(query)
+        leaves = list(db["leave_requests"].find(query))
+
+        # Team calendar: resolve all applicants with one lookup
+        applicants = {}
+        if not employee_id:
+            applicants = hrms_user_resolver.resolve(db["users"], [l.get("applicant_id") for l in leaves])
         
         events = []
-        for l in leaves_cursor:
+        for l in leaves:
              evt = self._sanitize(l)
              # populate employee if team calendar
              if not employee_id and l.get("applicant_id"):
-                 u = self._get_user(db, l["applicant_id"])
+                 u = applicants.get(l["applicant_id"])
                  evt["employee"] = self._sanitize_user(u)
              events.append(evt)
              
@@ -529,10 +532,7 @@ class LeaveService:
         return value
 
     def _get_user(self, db, user_id):
-        try:
-            return db["users"].find_one({"_id": ObjectId(user_id)})
-        except:
-            return None
+        return hrms_user_resolver.resolve_one(db["users"], user_id)
 
     def _sanitize_user(self, user):
         if not user: return {}
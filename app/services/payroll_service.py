@@ -6,6 +6,8 @@ from bson import ObjectId
 
 from app.database import client1
 from app.utils.audit_utils import build_audit_fields
+from app.utils.jobs import job_status
+from app.workers.queue import PAYROLL_PREVIEW_JOB, job_queue
 
 
 class PayrollError(Exception):
@@ -60,39 +62,27 @@ class PayrollService:
         return self._sanitize(doc)
 
     def start_preview(self, tenant_id: str, payload: Dict[str, Any], actor: Optional[str]) -> Dict[str, Any]:
-        db = self._get_db(tenant_id)
         self._require(payload.get("period_month"), "period_month")
         self._require(payload.get("period_year"), "period_year")
         
-        job_id = f"job_{uuid.uuid4().hex[:10]}"
-        job_doc = {
-            "job_id": job_id,
-            "tenant_id": tenant_id,
-            "status": "queued",
-            "type": "payroll_preview",
-            "payload": payload,
-            "created_by": actor,
-            "created_at": datetime.utcnow()
-        }
-        db["jobs"].insert_one(job_doc)
-        
-        # Simulate processing
-        self._process_payroll_preview(tenant_id, job_id, payload)
+        # Computed by the job workers (python -m app.workers); poll /payroll/jobs/{job_id}
+        job = job_queue.enqueue(PAYROLL_PREVIEW_JOB, payload, tenant_id=tenant_id, created_by=actor)
         
-        return {"job_id": job_id, "status": "queued", "message": "Preview started"}
+        return {"job_id": job["job_id"], "status": job["status"], "message": "Preview started"}
 
     def get_job_status(self, tenant_id: str, job_id: str) -> Dict[str, Any]:
-        db = self._get_db(tenant_id)
-        doc = db["jobs"].find_one({"job_id": job_id, "tenant_id": tenant_id})
+        doc = self._get_job(tenant_id, job_id)
         if not doc:
              raise PayrollError("Job not found", status_code=404)
         
-        return {
-            "job_id": doc["job_id"],
-            "status": doc["status"],
-            "progress": doc.get("progress", 0),
-            "result_url": f"/payroll/preview/{job_id}/employees" if doc["status"] == "completed" else None
-        }
+        return job_status(doc, f"/payroll/preview/{job_id}/employees")
+
+    def cancel_job(self, tenant_id: str, job_id: str) -> Dict[str, Any]:
+        doc = job_queue.cancel(job_id, tenant_id)
+        if not doc:
+             raise PayrollError("Job not found", status_code=404)
+        
+        return job_status(doc)
 
     def get_preview_results(self, tenant_id: str, job_id: str, query_params: Dict[str, Any]) -> Dict[str, Any]:
         db = self._get_db(tenant_id)
@@ -124,7 +114,7 @@ class PayrollService:
         db = self._get_db(tenant_id)
         job_id = self._require(payload.get("preview_job_id"), "preview_job_id")
         
-        job = db["jobs"].find_one({"job_id": job_id, "tenant_id": tenant_id})
+        job = self._get_job(tenant_id, job_id)
         if not job or job["status"] != "completed":
             raise PayrollError("Preview job not completed or found")
             
@@ -378,9 +368,13 @@ class PayrollService:
     # ------------------------------------------------------------------
     # Helpers
     # ------------------------------------------------------------------
-    def _process_payroll_preview(self, tenant_id, job_id, payload):
+    def _process_payroll_preview(self, tenant_id, job_id, payload, on_progress=None):
         db = self._get_db(tenant_id)
+        # A retried job starts over
+        db["payroll_previews"].delete_many({"job_id": job_id, "tenant_id": tenant_id})
         users = list(db["users"].find({"tenant_id": tenant_id, "status": "active"}))
+        if on_progress:
+            on_progress(10)
         previews = []
         for u in users:
             basic = u.get("salary", 50000) * 0.4
@@ -405,9 +399,18 @@ class PayrollService:
                 "status": "preview",
                 "generated_at": datetime.utcnow()
             })
+        if on_progress:
+            on_progress(50)
         if previews:
             db["payroll_previews"].insert_many(previews)
-        db["jobs"].update_one({"job_id": job_id}, {"$set": {"status": "completed", "progress": 100}})
+        return {"employee_count": len(previews)}
+
+    def _get_job(self, tenant_id: str, job_id: str) -> Optional[Dict[str, Any]]:
+        job = job_queue.get(job_id, tenant_id)
+        if job is None:
+            # Previews run before the job queue were recorded in the tenant database
+            job = self._get_db(tenant_id)["jobs"].find_one({"job_id": job_id, "tenant_id": tenant_id})
+        return job
 
     def _get_db(self, tenant_id: str):
         return self.client[tenant_id]
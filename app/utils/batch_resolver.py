@@ -0,0 +1,85 @@
+"""
+Batched document lookups with a TTL cache.
+
+List endpoints often need one related document per row (the user behind
+`created_by`, the applicant of a leave, ...). `BatchedResolver.resolve` takes
+all keys of a page at once, serves repeats from a bounded TTL cache and fetches
+the rest with a single `$in` query.
+"""
+
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from bson import ObjectId
+
+from app.utils.ttl_cache import TTLCache
+
+
+_NOT_FOUND = {}
+
+
+class BatchedResolver:
+    def __init__(
+        self,
+        key_field: str = "_id",
+        projection: Optional[Dict[str, int]] = None,
+        to_db_key: Optional[Callable[[Any], Any]] = None,
+        ttl_seconds: float = 300,
+        max_entries: int = 5000,
+    ):
+        self.key_field = key_field
+        self.projection = projection
+        self.to_db_key = to_db_key
+        self.cache = TTLCache(ttl_seconds=ttl_seconds, max_entries=max_entries)
+
+    def resolve(self, collection, keys: Iterable[Any]) -> Dict[Any, Dict[str, Any]]:
+        """Return {key: document} for every key that exists in `collection`.
+
+        Keys are returned as passed in (e.g. str ids even when stored as
+        ObjectId). Misses are cached too so unknown ids are not re-queried.
+        """
+        namespace = collection.full_name
+        found: Dict[Any, Dict[str, Any]] = {}
+        missing: Dict[Any, Any] = {}
+
+        for key in keys:
+            if key in (None, "") or key in found or key in missing.values():
+                continue
+            cached = self.cache.get((namespace, key))
+            if cached is not None:
+                if cached is not _NOT_FOUND:
+                    found[key] = cached
+                continue
+            try:
+                db_key = self.to_db_key(key) if self.to_db_key else key
+            except Exception:
+                self.cache.set((namespace, key), _NOT_FOUND)
+                continue
+            missing[db_key] = key
+
+        if missing:
+            cursor = collection.find({self.key_field: {"$in": list(missing)}}, self.projection)
+            for doc in cursor:
+                key = missing.get(doc.get(self.key_field))
+                if key is None:
+                    continue
+                found[key] = doc
+                self.cache.set((namespace, key), doc)
+            for key in missing.values():
+                if key not in found:
+                    self.cache.set((namespace, key), _NOT_FOUND)
+
+        return found
+
+    def resolve_one(self, collection, key: Any) -> Optional[Dict[str, Any]]:
+        return self.resolve(collection, [key]).get(key)
+
+    def invalidate(self, collection, key: Any) -> None:
+        self.cache.delete((collection.full_name, key))
+
+
+# HRMS tenant `users` looked up by ObjectId, limited to the fields `_sanitize_user` exposes
+hrms_user_resolver = BatchedResolver(
+    key_field="_id",
+    projection={"display_name": 1, "employee_code": 1, "department": 1, "designation": 1},
+    to_db_key=lambda key: key if isinstance(key, ObjectId) else ObjectId(key),
+)
@@ -0,0 +1,176 @@
+"""
+Keyset (cursor) pagination for MongoDB list endpoints.
+
+`skip((page-1)*limit)` makes the server walk every skipped document, so deep
+pages get slower as collections grow. A cursor instead encodes the sort key
+values of the last row returned (plus the `_id` tiebreak) and the next page
+starts right after it using the index.
+
+Cursors are opaque, URL-safe tokens. Endpoints keep accepting page/limit; when
+a `cursor` is sent it takes precedence over `page`:
+
+    docs, next_cursor = paginate(collection, query, [("transaction_datetime", -1)],
+                                 limit, cursor=request_data.get("cursor"), skip=skip)
+
+A logical collection split into time partitions (e.g. a hot collection plus
+monthly archives) is paged with `paginate_sources`, which reads the next
+partition only when the current one runs out of rows.
+"""
+
+import base64
+import json
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from bson import json_util
+
+SortSpec = List[Tuple[str, int]]
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor token is malformed or was issued for a different sort"""
+
+
+def normalize_sort(sort: Sequence[Tuple[str, int]]) -> SortSpec:
+    """Append the `_id` tiebreak (in the direction of the last key) so the order is total"""
+    spec = [(field, int(direction)) for field, direction in sort]
+    if not any(field == "_id" for field, _ in spec):
+        spec.append(("_id", spec[-1][1] if spec else -1))
+    return spec
+
+
+def _get_path(doc: Dict[str, Any], path: str) -> Any:
+    value: Any = doc
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def encode_cursor(sort: Sequence[Tuple[str, int]], doc: Dict[str, Any]) -> str:
+    """Cursor pointing just after `doc`; `doc` must still hold the raw sort key values"""
+    spec = normalize_sort(sort)
+    payload = {"s": spec, "v": [_get_path(doc, field) for field, _ in spec]}
+    raw = json_util.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str, sort: Sequence[Tuple[str, int]]) -> List[Any]:
+    """Sort key values stored in `token`; raises InvalidCursor if it does not fit `sort`"""
+    spec = normalize_sort(sort)
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json_util.loads(raw.decode("utf-8"))
+        issued_for = [(field, int(direction)) for field, direction in payload["s"]]
+        values = list(payload["v"])
+    except (ValueError, TypeError, KeyError, json.JSONDecodeError) as e:
+        raise InvalidCursor(f"Malformed cursor: {e}")
+    if issued_for != spec or len(values) != len(spec):
+        raise InvalidCursor("Cursor was issued for a different sort order")
+    return values
+
+
+def _after(field: str, direction: int, value: Any) -> Optional[Dict[str, Any]]:
+    """Condition for rows strictly after `value` on one key; None when no row can be"""
+    if value is None:
+        # null/missing sorts lowest: ascending, everything non-null follows it;
+        # descending, nothing does
+        return {field: {"$ne": None}} if direction == 1 else None
+    if direction == 1:
+        return {field: {"$gt": value}}
+    # Descending, null/missing rows come last and `$lt` never matches them
+    return {"$or": [{field: {"$lt": value}}, {field: None}]}
+
+
+def keyset_filter(sort: Sequence[Tuple[str, int]], values: Sequence[Any]) -> Dict[str, Any]:
+    """Filter for rows that come after `values` in `sort` order.
+
+    For keys (a, b, _id) this is  a > va  OR  (a == va AND b > vb)  OR  (a == va AND b == vb AND _id > vid),
+    with > flipped to < for descending keys.
+    """
+    spec = normalize_sort(sort)
+    branches = []
+    for i, (field, direction) in enumerate(spec):
+        after = _after(field, direction, values[i])
+        if after is None:
+            continue
+        branch = {prev_field: values[j] for j, (prev_field, _) in enumerate(spec[:i])}
+        branch.update(after)
+        branches.append(branch)
+    if not branches:
+        # Nothing can follow the cursor
+        return {"_id": {"$in": []}}
+    return branches[0] if len(branches) == 1 else {"$or": branches}
+
+
+def apply_cursor(query: Dict[str, Any], sort: Sequence[Tuple[str, int]], token: str) -> Dict[str, Any]:
+    """`query` restricted to the rows after `token`"""
+    after = keyset_filter(sort, decode_cursor(token, sort))
+    return {"$and": [query, after]} if query else after
+
+
+def paginate(
+    collection,
+    query: Dict[str, Any],
+    sort: Sequence[Tuple[str, int]],
+    limit: int,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    projection: Optional[Dict[str, Any]] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """One page of `collection` plus the cursor for the next page (None on the last page).
+
+    With a `cursor` the `skip` is ignored. A projection must keep the sort keys.
+    Reads one extra row to know whether another page exists.
+    """
+    spec = normalize_sort(sort)
+    if cursor:
+        query = apply_cursor(query, spec, cursor)
+        skip = 0
+    docs = list(collection.find(query, projection).sort(spec).skip(max(skip, 0)).limit(limit + 1))
+    has_more = len(docs) > limit
+    docs = docs[:limit]
+    next_cursor = encode_cursor(spec, docs[-1]) if has_more and docs else None
+    return docs, next_cursor
+
+
+def paginate_sources(
+    sources: Sequence[Tuple[Any, Dict[str, Any]]],
+    sort: Sequence[Tuple[str, int]],
+    limit: int,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    projection: Optional[Dict[str, Any]] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """`paginate` over several (collection, query) sources that do not interleave.
+
+    `sources` must be in `sort` order: every row of a source sorts before every
+    row of the next one (time partitions, newest first, for a descending time
+    sort). Whole sources are skipped with a count capped at the rows left to
+    skip; later sources are not read once the page is full.
+    """
+    spec = normalize_sort(sort)
+    after = None
+    if cursor:
+        after = keyset_filter(spec, decode_cursor(cursor, spec))
+        skip = 0
+    skip = max(skip, 0)
+
+    docs: List[Dict[str, Any]] = []
+    for collection, query in sources:
+        if after is not None:
+            query = {"$and": [query, after]} if query else after
+        if skip:
+            in_source = collection.count_documents(query, limit=skip + 1)
+            if in_source <= skip:
+                skip -= in_source
+                continue
+        docs.extend(collection.find(query, projection).sort(spec).skip(skip).limit(limit + 1 - len(docs)))
+        skip = 0
+        if len(docs) > limit:
+            break
+
+    has_more = len(docs) > limit
+    docs = docs[:limit]
+    next_cursor = encode_cursor(spec, docs[-1]) if has_more and docs else None
+    return docs, next_cursor
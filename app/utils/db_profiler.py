@@ -0,0 +1,181 @@
+"""
+Per-request MongoDB command profiling.
+
+`db_command_listener` is registered on every MongoClient (see the `database.py`
+modules). While a profile is active in the current context (see
+`start_profile`), each command issued from that context is counted and timed,
+so the middleware can report how many round trips a request made and which
+command was the slowest.
+"""
+
+import json
+import os
+import sys
+import threading
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from pymongo import monitoring
+
+
+# Maximum number of commands kept for the JSON trace of one request
+MAX_TRACED_COMMANDS = 200
+
+# Commands that are driver housekeeping rather than application queries
+IGNORED_COMMANDS = {"hello", "isMaster", "ismaster", "ping", "saslStart", "saslContinue", "endSessions", "killCursors"}
+
+# Call sites are reported relative to the project root; frames outside it
+# (pymongo, stdlib, site-packages) are skipped
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+_SKIPPED_FILES = {os.path.abspath(__file__)}
+
+
+def query_shape(value: Any) -> Any:
+    """Replace literal values with 1 so equal query shapes compare equal"""
+    if isinstance(value, dict):
+        return {k: query_shape(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [query_shape(v) for v in value[:1]]
+    return 1
+
+
+def _command_filter(command_name: str, command: Dict[str, Any]) -> Any:
+    """Extract the filter part of a command document"""
+    if command_name == "find":
+        return command.get("filter", {})
+    if command_name in ("count", "findAndModify", "distinct"):
+        return command.get("query", {})
+    if command_name == "aggregate":
+        pipeline = command.get("pipeline") or []
+        first = pipeline[0] if pipeline else {}
+        return first.get("$match", {"stages": [next(iter(stage), "") for stage in pipeline]})
+    if command_name == "update":
+        updates = command.get("updates") or [{}]
+        return updates[0].get("q", {})
+    if command_name == "delete":
+        deletes = command.get("deletes") or [{}]
+        return deletes[0].get("q", {})
+    return {}
+
+
+def skip_call_site_file(path: str) -> None:
+    """Exclude a helper module from call-site attribution"""
+    _SKIPPED_FILES.add(os.path.abspath(path))
+
+
+def _call_site() -> str:
+    """file:line of the innermost project frame that issued the command"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if (
+            filename.startswith(PROJECT_ROOT)
+            and filename not in _SKIPPED_FILES
+            and "site-packages" not in filename
+        ):
+            return f"{os.path.relpath(filename, PROJECT_ROOT)}:{frame.f_lineno}"
+        frame = frame.f_back
+    return "unknown"
+
+
+class RequestDBProfile:
+    """Mutable command statistics for one request"""
+
+    def __init__(self, trace: bool = False, capture_call_sites: bool = False):
+        self.trace = trace
+        self.capture_call_sites = capture_call_sites
+        # (command, database, collection, shape) -> {"count": n, "call_sites": {site: n}}
+        self.shapes: Dict[tuple, Dict[str, Any]] = {}
+        self.calls = 0
+        self.total_ms = 0.0
+        self.slowest: Optional[Dict[str, Any]] = None
+        self.commands: List[Dict[str, Any]] = []
+        self._pending: Dict[Any, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def command_started(self, key, info: Dict[str, Any]) -> None:
+        with self._lock:
+            self._pending[key] = info
+            if self.capture_call_sites:
+                shape_key = (info["command"], info["database"], info["collection"],
+                             json.dumps(info["shape"], sort_keys=True, default=str))
+                entry = self.shapes.setdefault(shape_key, {"count": 0, "call_sites": {}})
+                entry["count"] += 1
+                site = info.get("call_site", "unknown")
+                entry["call_sites"][site] = entry["call_sites"].get(site, 0) + 1
+
+    def command_finished(self, key, duration_ms: float, failed: bool = False) -> None:
+        with self._lock:
+            info = self._pending.pop(key, None)
+            if info is None:
+                return
+            info["ms"] = round(duration_ms, 3)
+            if failed:
+                info["failed"] = True
+            self.calls += 1
+            self.total_ms += duration_ms
+            if self.slowest is None or duration_ms > self.slowest["ms"]:
+                self.slowest = info
+            if self.trace and len(self.commands) < MAX_TRACED_COMMANDS:
+                self.commands.append(info)
+
+    def summary(self) -> Dict[str, Any]:
+        data = {
+            "calls": self.calls,
+            "total_ms": round(self.total_ms, 3),
+            "slowest": self.slowest,
+        }
+        if self.trace:
+            data["commands"] = self.commands
+            data["truncated"] = self.calls > len(self.commands)
+        return data
+
+
+_current_profile: ContextVar[Optional[RequestDBProfile]] = ContextVar("db_profile", default=None)
+
+
+def start_profile(trace: bool = False, capture_call_sites: bool = False):
+    """Activate a profile for the current context; returns (profile, reset token)"""
+    profile = RequestDBProfile(trace=trace, capture_call_sites=capture_call_sites)
+    token = _current_profile.set(profile)
+    return profile, token
+
+
+def stop_profile(token) -> None:
+    _current_profile.reset(token)
+
+
+def current_profile() -> Optional[RequestDBProfile]:
+    return _current_profile.get()
+
+
+class DBCommandListener(monitoring.CommandListener):
+    """Feeds command timings into the profile of the request that issued them"""
+
+    def started(self, event):
+        profile = _current_profile.get()
+        if profile is None or event.command_name in IGNORED_COMMANDS:
+            return
+        collection = event.command.get("collection" if event.command_name == "getMore" else event.command_name)
+        info = {
+            "command": event.command_name,
+            "database": event.database_name,
+            "collection": collection if isinstance(collection, str) else "",
+            "shape": query_shape(_command_filter(event.command_name, event.command)),
+        }
+        if profile.capture_call_sites or profile.trace:
+            info["call_site"] = _call_site()
+        profile.command_started((event.request_id, event.connection_id), info)
+
+    def succeeded(self, event):
+        profile = _current_profile.get()
+        if profile is not None:
+            profile.command_finished((event.request_id, event.connection_id), event.duration_micros / 1000.0)
+
+    def failed(self, event):
+        profile = _current_profile.get()
+        if profile is not None:
+            profile.command_finished((event.request_id, event.connection_id), event.duration_micros / 1000.0, failed=True)
+
+
+db_command_listener = DBCommandListener()
@@ -0,0 +1,299 @@
+"""
+Shared image upload pipeline.
+
+Uploads are streamed to a temporary file next to their destination (never
+held in memory) while being hashed, and rejected as soon as they exceed the
+size cap. Decoding and resizing run in a process pool, so a large upload
+neither blocks the event loop nor holds the GIL for other requests. Each
+image is stored as WebP and JPEG in three sizes:
+
+    thumb    fits 320x320    list views
+    medium   fits 960x960    detail views
+    full     fits 1920x1080  zoom / download
+
+Files are named after the SHA-256 of the uploaded bytes
+(`<hash>_<variant>.<ext>`), so uploading the same image again reuses the
+stored files instead of decoding and writing them a second time:
+
+    pipeline = ImagePipeline("uploads/trust_rewards/products")
+    stored = pipeline.store(upload_file)      # blocking; call from a worker thread
+    stored["variants"]["thumb"]["jpg_url"]    # "/uploads/trust_rewards/products/<hash>_thumb.jpg"
+
+Without Pillow the upload is stored unprocessed under its hash and every
+variant points at it.
+"""
+
+import atexit
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional, Tuple
+
+# Optional PIL import - uploads are stored unprocessed if not available
+try:
+    from PIL import Image, ImageOps
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+    Image = None
+    ImageOps = None
+
+IMAGE_UPLOAD_MAX_BYTES = int(os.getenv("IMAGE_UPLOAD_MAX_BYTES", str(5 * 1024 * 1024)))
+# 0 processes the image in the calling thread
+IMAGE_PIPELINE_WORKERS = int(os.getenv("IMAGE_PIPELINE_WORKERS", "2"))
+IMAGE_MAX_PIXELS = int(os.getenv("IMAGE_MAX_PIXELS", str(40_000_000)))
+
+VARIANTS: Dict[str, Tuple[int, int]] = {
+    "thumb": (320, 320),
+    "medium": (960, 960),
+    "full": (1920, 1080),
+}
+FORMATS = (
+    ("webp", "WEBP", {"quality": 80, "method": 4}),
+    ("jpg", "JPEG", {"quality": 85, "optimize": True, "progressive": True}),
+)
+_CHUNK_SIZE = 1024 * 1024
+_MANIFEST = "{}.json"
+_EXTENSION = re.compile(r"[a-z0-9]{1,5}")
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+class ImageUploadError(ValueError):
+    """Upload rejected; `code` is the service error detail"""
+
+    def __init__(self, code: str, message: str):
+        super().__init__(message)
+        self.code = code
+
+
+def _executor() -> Optional[ProcessPoolExecutor]:
+    global _pool
+    if IMAGE_PIPELINE_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            # spawn: workers must not inherit the parent's Mongo clients and threads
+            _pool = ProcessPoolExecutor(max_workers=IMAGE_PIPELINE_WORKERS,
+                                        mp_context=multiprocessing.get_context("spawn"))
+            atexit.register(_pool.shutdown, wait=False)
+        return _pool
+
+
+def _reset_executor(broken: ProcessPoolExecutor) -> None:
+    """Drop `broken` so the next call starts a fresh pool (unless another thread already did)"""
+    global _pool
+    with _pool_lock:
+        if _pool is broken:
+            _pool = None
+    broken.shutdown(wait=False)
+
+
+def spool_upload(upload_file, directory: str, max_bytes: int = IMAGE_UPLOAD_MAX_BYTES) -> Tuple[str, str, int]:
+    """Copy an upload to a temporary file in `directory` in chunks.
+
+    Returns (temp_path, sha256 hex digest, size). Raises ImageUploadError
+    (file_too_large) once more than `max_bytes` have been read.
+    """
+    os.makedirs(directory, exist_ok=True)
+    temp_path = os.path.join(directory, f".upload-{uuid.uuid4().hex}.part")
+    digest = hashlib.sha256()
+    size = 0
+    source = upload_file.file
+    source.seek(0)
+    try:
+        with open(temp_path, "wb") as target:
+            while True:
+                chunk = source.read(_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise ImageUploadError(
+                        "file_too_large", f"File size too large. Maximum size is {max_bytes // (1024 * 1024)}MB"
+                    )
+                digest.update(chunk)
+                target.write(chunk)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    if size == 0:
+        os.remove(temp_path)
+        raise ImageUploadError("empty_file", "Image file is empty")
+    return temp_path, digest.hexdigest(), size
+
+
+def _save_atomic(image, path: str, pil_format: str, options: Dict[str, Any]) -> None:
+    temp_path = f"{path}.{uuid.uuid4().hex}.part"
+    image.save(temp_path, pil_format, **options)
+    os.replace(temp_path, path)
+
+
+def render_variants(source_path: str, directory: str, stem: str) -> Dict[str, Any]:
+    """Decode `source_path` and write every variant/format (runs in the pool)"""
+    Image.MAX_IMAGE_PIXELS = IMAGE_MAX_PIXELS
+    with Image.open(source_path) as opened:
+        opened.draft("RGB", VARIANTS["full"])  # JPEG: decode at reduced scale when much larger
+        image = ImageOps.exif_transpose(opened)
+        image.load()
+        if image.mode in ("RGBA", "LA", "P"):
+            image = image.convert("RGBA")
+            background = Image.new("RGB", image.size, (255, 255, 255))
+            background.paste(image, mask=image.getchannel("A"))
+            image = background
+        elif image.mode != "RGB":
+            image = image.convert("RGB")
+
+    variants = {}
+    # Largest first, each variant resized from the previous one
+    current = image
+    for name, box in sorted(VARIANTS.items(), key=lambda item: -item[1][0] * item[1][1]):
+        if current.width > box[0] or current.height > box[1]:
+            current = current.copy()
+            current.thumbnail(box, Image.Resampling.LANCZOS)
+        files = {}
+        for extension, pil_format, options in FORMATS:
+            filename = f"{stem}_{name}.{extension}"
+            _save_atomic(current, os.path.join(directory, filename), pil_format, options)
+            files[extension] = filename
+        variants[name] = {"width": current.width, "height": current.height, "files": files}
+    # Dimensions of the full-size file, which `file_url` points at
+    full = variants["full"]
+    return {"width": full["width"], "height": full["height"], "content_type": "image/jpeg", "variants": variants}
+
+
+def _store_unprocessed(source_path: str, directory: str, stem: str, extension: str) -> Dict[str, Any]:
+    filename = f"{stem}_original.{extension}"
+    os.replace(source_path, os.path.join(directory, filename))
+    files = {"webp": filename, "jpg": filename}
+    return {"width": 0, "height": 0, "variants": {name: {"width": 0, "height": 0, "files": files} for name in VARIANTS}}
+
+
+class ImagePipeline:
+    """Stores uploads for one directory under /uploads"""
+
+    def __init__(self, directory: str, max_bytes: int = IMAGE_UPLOAD_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def _url(self, filename: str) -> str:
+        return "/" + os.path.join(self.directory, filename).replace("\\", "/")
+
+    def _render(self, source_path: str, stem: str) -> Dict[str, Any]:
+        executor = _executor()
+        if executor is None:
+            return render_variants(source_path, self.directory, stem)
+        # A worker that dies (e.g. killed for memory) breaks the pool: retry once
+        # on a fresh one, never decode in the request thread
+        for _ in range(2):
+            try:
+                return executor.submit(render_variants, source_path, self.directory, stem).result()
+            except BrokenProcessPool:
+                _reset_executor(executor)
+                executor = _executor()
+        raise ImageUploadError("invalid_image", "Failed to process image: image worker stopped")
+
+    def _stored_manifest(self, manifest_path: str) -> Optional[Dict[str, Any]]:
+        """The manifest of an earlier upload, or None unless every file it lists exists"""
+        if not os.path.exists(manifest_path):
+            return None
+        try:
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+            filenames = {
+                filename for variant in manifest["variants"].values() for filename in variant["files"].values()
+            }
+        except (OSError, ValueError, KeyError, AttributeError, TypeError):
+            return None
+        if all(os.path.exists(os.path.join(self.directory, filename)) for filename in filenames):
+            return manifest
+        return None
+
+    def store(self, upload_file) -> Dict[str, Any]:
+        """Spool, dedupe and render an upload.
+
+        Returns {"content_hash", "file_size", "image_width", "image_height",
+        "stored_filename", "file_path", "file_url", "content_type", "variants",
+        "deduplicated"} where file_* is the full-size JPEG and `variants` maps each size to
+        {"width", "height", "webp_url", "jpg_url"}. Raises ImageUploadError
+        for uploads that are too large, empty or not decodable images.
+        """
+        temp_path, content_hash, size = spool_upload(upload_file, self.directory, self.max_bytes)
+        stem = content_hash[:32]
+        manifest_path = os.path.join(self.directory, _MANIFEST.format(stem))
+        deduplicated = False
+        try:
+            # Files deleted since (cleanup, restore) are rendered again
+            manifest = self._stored_manifest(manifest_path)
+            deduplicated = manifest is not None
+            if manifest is None:
+                if PIL_AVAILABLE:
+                    try:
+                        manifest = self._render(temp_path, stem)
+                    except ImageUploadError:
+                        raise
+                    except Exception as e:
+                        raise ImageUploadError("invalid_image", f"Failed to process image: {str(e)}")
+                else:
+                    extension = os.path.splitext(upload_file.filename or "")[1].lstrip(".").lower()
+                    extension = extension if _EXTENSION.fullmatch(extension) else "jpg"
+                    manifest = _store_unprocessed(temp_path, self.directory, stem, extension)
+                    manifest["content_type"] = upload_file.content_type
+                manifest["file_size"] = size
+                # Written last: its presence means every variant is in place
+                manifest_temp = f"{manifest_path}.{uuid.uuid4().hex}.part"
+                with open(manifest_temp, "w") as f:
+                    json.dump(manifest, f)
+                os.replace(manifest_temp, manifest_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        variants = {
+            name: {
+                "width": variant["width"],
+                "height": variant["height"],
+                "webp_url": self._url(variant["files"]["webp"]),
+                "jpg_url": self._url(variant["files"]["jpg"]),
+            }
+            for name, variant in manifest["variants"].items()
+        }
+        full_file = manifest["variants"]["full"]["files"]["jpg"]
+        file_path = os.path.join(self.directory, full_file).replace("\\", "/")
+        return {
+            "content_hash": content_hash,
+            "file_size": manifest.get("file_size", size),
+            "image_width": manifest["width"],
+            "image_height": manifest["height"],
+            "stored_filename": full_file,
+            "file_path": file_path,
+            "file_url": f"/{file_path}",
+            "content_type": manifest.get("content_type"),
+            "variants": variants,
+            "deduplicated": deduplicated,
+        }
+
+
+def variant_url(image: Optional[Dict[str, Any]], variant: str = "thumb", fmt: str = "jpg") -> Optional[str]:
+    """URL of one variant of a stored image record; images stored before
+    variants existed fall back to their single `file_url`"""
+    if not image:
+        return None
+    url = ((image.get("variants") or {}).get(variant) or {}).get(f"{fmt}_url")
+    return url or image.get("file_url")
+
+
+def public_image(image: Dict[str, Any]) -> Dict[str, Any]:
+    """The fields of a stored image record that API responses expose"""
+    return {
+        "image_id": image.get("image_id", ""),
+        "file_url": image.get("file_url", ""),
+        "variants": image.get("variants") or {},
+    }
@@ -0,0 +1,369 @@
+"""
+Background jobs backed by a Mongo `jobs` collection.
+
+Long operations (coupon generation, CSV exports, payroll previews) are queued
+by the request and executed by a local worker process pool, so the HTTP call
+returns immediately with a `job_id` that clients poll.
+
+Each module owns one queue (`JobQueue(collection)`) and a registry of handlers
+keyed by job type:
+
+    job_queue = JobQueue(client1["trust_rewards"]["jobs"])
+    HANDLERS = {}
+
+    @job_handler(HANDLERS, "coupon_csv_export")
+    def export_coupon_csv(ctx):
+        ...
+        ctx.progress(50)  # also heartbeats the lease and raises JobCancelled
+        return {"file_path": ...}
+
+    job = job_queue.enqueue("coupon_csv_export", payload)
+
+A job document moves through
+
+    queued -> running -> completed
+                      -> queued (retry with backoff, up to max_attempts)
+                      -> failed
+                      -> cancelled
+
+Workers claim jobs atomically with `find_one_and_update` and hold a lease that
+`ctx.progress()` extends; a job whose worker died is re-queued once its lease
+expires. A worker that finds its lease taken over (it stalled past the lease
+and the job was re-claimed) gets JobLeaseLost from `ctx.progress()` and stops
+without touching the job, which now belongs to the new worker. Cancelling a queued job is immediate; a running job is flagged and
+stops at its next `ctx.progress()` call.
+
+Workers are started per module, e.g. `python -m trust_rewards.workers`.
+"""
+
+import logging
+import multiprocessing
+import os
+import socket
+import time
+import traceback
+import uuid
+from datetime import datetime, timedelta
+from importlib import import_module
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+JOB_FINISHED = (JOB_COMPLETED, JOB_FAILED, JOB_CANCELLED)
+
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_LEASE_SECONDS = 300
+# Retry n waits RETRY_BACKOFF_SECONDS * 2 ** (n - 1)
+RETRY_BACKOFF_SECONDS = 10
+POLL_INTERVAL_SECONDS = 1.0
+
+
+class JobCancelled(Exception):
+    """Raised inside a handler when its job has been cancelled"""
+
+
+class JobLeaseLost(Exception):
+    """Raised inside a handler whose lease expired and whose job another worker now runs"""
+
+
+class JobContext:
+    """What a handler sees: the job document plus progress/cancel hooks"""
+
+    def __init__(self, queue: "JobQueue", job: Dict[str, Any]):
+        self.queue = queue
+        self.job = job
+        self.job_id = job["job_id"]
+        self.payload = job.get("payload") or {}
+        self.tenant_id = job.get("tenant_id")
+        self.attempt = job.get("attempts", 1)
+        self.worker_id = job.get("worker_id")
+
+    def progress(self, percent: float, **fields: Any) -> None:
+        """Record progress (0-100), extend the lease, and stop if cancelled or the lease was lost"""
+        if not self.queue.heartbeat(self.job_id, percent, owner=self.worker_id, **fields):
+            raise JobLeaseLost(f"Job {self.job_id} lease lost by worker {self.worker_id}")
+        self.check_cancelled()
+
+    def check_cancelled(self) -> None:
+        if self.queue.is_cancel_requested(self.job_id):
+            raise JobCancelled(f"Job {self.job_id} was cancelled")
+
+
+def job_handler(registry: Dict[str, Callable], job_type: str):
+    """Register `fn(ctx) -> result` as the handler for `job_type`"""
+    def decorator(fn):
+        registry[job_type] = fn
+        return fn
+    return decorator
+
+
+class JobQueue:
+    """Enqueue, claim, and settle jobs in one Mongo collection"""
+
+    def __init__(self, collection, lease_seconds: int = DEFAULT_LEASE_SECONDS):
+        self.collection = collection
+        self.lease_seconds = lease_seconds
+
+    # ------------------------------------------------------------------
+    # Producer side (request handlers)
+    # ------------------------------------------------------------------
+    def enqueue(
+        self,
+        job_type: str,
+        payload: Optional[Dict[str, Any]] = None,
+        *,
+        tenant_id: Optional[str] = None,
+        created_by: Any = None,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        job_id: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        now = datetime.utcnow()
+        job = {
+            "job_id": job_id or f"job_{uuid.uuid4().hex[:10]}",
+            "type": job_type,
+            "tenant_id": tenant_id,
+            "status": JOB_QUEUED,
+            "payload": payload or {},
+            "progress": 0,
+            "attempts": 0,
+            "max_attempts": max_attempts,
+            "cancel_requested": False,
+            "result": None,
+            "error": None,
+            "run_after": now,
+            "lease_expires_at": None,
+            "worker_id": None,
+            "created_by": created_by,
+            "created_at": now,
+            "updated_at": now,
+        }
+        self.collection.insert_one(job)
+        return job
+
+    def get(self, job_id: str, tenant_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        query = {"job_id": job_id}
+        if tenant_id is not None:
+            query["tenant_id"] = tenant_id
+        return self.collection.find_one(query)
+
+    def cancel(self, job_id: str, tenant_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Cancel a queued job now, or flag a running one; returns the updated job"""
+        query = {"job_id": job_id}
+        if tenant_id is not None:
+            query["tenant_id"] = tenant_id
+        now = datetime.utcnow()
+        job = self.collection.find_one_and_update(
+            {**query, "status": JOB_QUEUED},
+            {"$set": {"status": JOB_CANCELLED, "cancel_requested": True,
+                      "finished_at": now, "updated_at": now}},
+            return_document=ReturnDocument.AFTER,
+        )
+        if job:
+            return job
+        return self.collection.find_one_and_update(
+            {**query, "status": JOB_RUNNING},
+            {"$set": {"cancel_requested": True, "updated_at": now}},
+            return_document=ReturnDocument.AFTER,
+        ) or self.get(job_id, tenant_id)
+
+    # ------------------------------------------------------------------
+    # Worker side
+    # ------------------------------------------------------------------
+    def claim(self, worker_id: str, job_types: Iterable[str]) -> Optional[Dict[str, Any]]:
+        """Atomically take the oldest runnable job of one of `job_types`"""
+        now = datetime.utcnow()
+        return self.collection.find_one_and_update(
+            {"status": JOB_QUEUED, "type": {"$in": list(job_types)}, "run_after": {"$lte": now}},
+            {
+                "$set": {
+                    "status": JOB_RUNNING,
+                    "worker_id": worker_id,
+                    "lease_expires_at": now + timedelta(seconds=self.lease_seconds),
+                    "started_at": now,
+                    "updated_at": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("run_after", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    def heartbeat(self, job_id: str, progress: Optional[float] = None, owner: Optional[str] = None,
+                  **fields: Any) -> bool:
+        """Extend the lease; False if the job is no longer running (under `owner`, if given)"""
+        now = datetime.utcnow()
+        update = {"lease_expires_at": now + timedelta(seconds=self.lease_seconds), "updated_at": now}
+        if progress is not None:
+            update["progress"] = max(0, min(100, round(progress, 1)))
+        update.update(fields)
+        query = {"job_id": job_id, "status": JOB_RUNNING}
+        if owner is not None:
+            query["worker_id"] = owner
+        return self.collection.update_one(query, {"$set": update}).matched_count == 1
+
+    def is_cancel_requested(self, job_id: str) -> bool:
+        return bool(self.collection.find_one({"job_id": job_id, "cancel_requested": True}, {"_id": 1}))
+
+    def complete(self, job_id: str, result: Any = None, owner: Optional[str] = None) -> None:
+        now = datetime.utcnow()
+        query = {"job_id": job_id}
+        if owner is not None:
+            query["worker_id"] = owner
+        self.collection.update_one(
+            query,
+            {"$set": {"status": JOB_COMPLETED, "progress": 100, "result": result, "error": None,
+                      "lease_expires_at": None, "finished_at": now, "updated_at": now}},
+        )
+
+    def mark_cancelled(self, job_id: str, owner: Optional[str] = None) -> None:
+        now = datetime.utcnow()
+        query = {"job_id": job_id}
+        if owner is not None:
+            query["worker_id"] = owner
+        self.collection.update_one(
+            query,
+            {"$set": {"status": JOB_CANCELLED, "lease_expires_at": None, "finished_at": now, "updated_at": now}},
+        )
+
+    def fail(self, job: Dict[str, Any], error: str) -> str:
+        """Re-queue `job` with backoff, or fail it after max_attempts; returns the new status"""
+        now = datetime.utcnow()
+        attempts = job.get("attempts", 1)
+        if attempts < job.get("max_attempts", DEFAULT_MAX_ATTEMPTS):
+            delay = RETRY_BACKOFF_SECONDS * 2 ** (attempts - 1)
+            update = {"status": JOB_QUEUED, "run_after": now + timedelta(seconds=delay)}
+        else:
+            update = {"status": JOB_FAILED, "finished_at": now}
+        update.update({"error": error, "lease_expires_at": None, "worker_id": None, "updated_at": now})
+        query = {"job_id": job["job_id"], "status": JOB_RUNNING}
+        if job.get("worker_id") is not None:
+            # Only the worker holding the lease (or the sweep, with the stored job) settles it
+            query["worker_id"] = job["worker_id"]
+        self.collection.update_one(query, {"$set": update})
+        return update["status"]
+
+    def requeue_expired(self) -> int:
+        """Return jobs whose worker stopped heartbeating to the queue (or fail them)"""
+        now = datetime.utcnow()
+        expired = 0
+        for job in self.collection.find({"status": JOB_RUNNING, "lease_expires_at": {"$lt": now}}):
+            self.fail(job, "Worker lease expired")
+            expired += 1
+        return expired
+
+
+def job_status(job: Dict[str, Any], result_url: Optional[str] = None) -> Dict[str, Any]:
+    """Polling response shared by every job status endpoint"""
+    return {
+        "job_id": job["job_id"],
+        "type": job.get("type"),
+        "status": job["status"],
+        "progress": job.get("progress", 0),
+        "attempts": job.get("attempts", 0),
+        "error": job.get("error"),
+        "result": job.get("result") if job["status"] == JOB_COMPLETED else None,
+        "result_url": result_url if job["status"] == JOB_COMPLETED else None,
+    }
+
+
+# ----------------------------------------------------------------------
+# Worker processes
+# ----------------------------------------------------------------------
+def run_job(queue: JobQueue, handlers: Dict[str, Callable], job: Dict[str, Any]) -> str:
+    """Run one claimed job to a final (or retry) state; returns the new status"""
+    handler = handlers.get(job["type"])
+    if handler is None:
+        return queue.fail({**job, "max_attempts": 0}, f"No handler registered for job type {job['type']}")
+    try:
+        ctx = JobContext(queue, job)
+        ctx.check_cancelled()
+        result = handler(ctx)
+    except JobCancelled:
+        queue.mark_cancelled(job["job_id"], owner=job.get("worker_id"))
+        return JOB_CANCELLED
+    except JobLeaseLost:
+        logger.warning("Job %s (%s) lease lost; left to the worker that re-claimed it", job["job_id"], job["type"])
+        current = queue.get(job["job_id"])
+        return current["status"] if current else JOB_RUNNING
+    except Exception as e:
+        logger.error("Job %s (%s) failed: %s", job["job_id"], job["type"], traceback.format_exc())
+        return queue.fail(job, str(e))
+    queue.complete(job["job_id"], result, owner=job.get("worker_id"))
+    return JOB_COMPLETED
+
+
+def work(module_path: str, stop_after: Optional[int] = None) -> None:
+    """Worker loop: claim and run jobs from the module's `job_queue`/`HANDLERS`.
+
+    `module_path` names a module exposing `job_queue` and `HANDLERS`; it is
+    imported inside the worker process so each process opens its own Mongo
+    client.
+    """
+    module = import_module(module_path)
+    queue: JobQueue = module.job_queue
+    handlers: Dict[str, Callable] = module.HANDLERS
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    processed = 0
+    last_sweep = 0.0
+
+    while stop_after is None or processed < stop_after:
+        if time.monotonic() - last_sweep > queue.lease_seconds / 2:
+            queue.requeue_expired()
+            last_sweep = time.monotonic()
+
+        job = queue.claim(worker_id, handlers.keys())
+        if job is None:
+            time.sleep(POLL_INTERVAL_SECONDS)
+            continue
+        status = run_job(queue, handlers, job)
+        logger.info("Job %s (%s) -> %s", job["job_id"], job["type"], status)
+        processed += 1
+
+
+def run_pool(module_path: str, processes: int = 2) -> None:
+    """Run `processes` worker loops for `module_path` until interrupted.
+
+    Processes are spawned rather than forked: MongoClient is not fork-safe.
+    """
+    context = multiprocessing.get_context("spawn")
+    workers = [context.Process(target=work, args=(module_path,), daemon=True) for _ in range(processes)]
+    for worker in workers:
+        worker.start()
+    try:
+        while True:
+            for i, worker in enumerate(workers):
+                if not worker.is_alive():
+                    logger.warning("Worker %s exited with %s; restarting", worker.pid, worker.exitcode)
+                    workers[i] = context.Process(target=work, args=(module_path,), daemon=True)
+                    workers[i].start()
+            time.sleep(5)
+    except KeyboardInterrupt:
+        for worker in workers:
+            worker.terminate()
+        for worker in workers:
+            worker.join()
+
+
+def main(module_path: str, description: str) -> None:
+    """Command line entry point shared by each module's `workers/__main__.py`"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--processes", type=int, default=int(os.getenv("JOB_WORKER_PROCESSES", "2")),
+                        help="Worker processes to run")
+    parser.add_argument("--once", action="store_true",
+                        help="Run in this process until one job has been handled (for debugging)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(processName)s %(levelname)s %(message)s")
+    if args.once:
+        work(module_path, stop_after=1)
+    else:
+        run_pool(module_path, args.processes)
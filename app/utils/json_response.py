@@ -0,0 +1,72 @@
+"""
+JSON responses that encode BSON/Mongo values natively.
+
+`format_response` returns a `BSONJSONResponse`, so services can hand raw
+documents (ObjectId, datetime, Decimal128, numpy scalars from pandas) straight
+to the route. Returning a Response also skips FastAPI's `jsonable_encoder`
+pass, which would otherwise walk the whole payload a second time.
+
+orjson is used when installed; otherwise the stdlib encoder with the same
+`json_default` hook.
+"""
+
+import datetime
+import decimal
+import enum
+import json
+import uuid
+from typing import Any
+
+from bson import Decimal128, ObjectId
+from starlette.responses import JSONResponse
+
+# Optional orjson import - falls back to the stdlib encoder if not available
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+
+def json_default(value: Any) -> Any:
+    """Encode values the JSON encoder does not know natively"""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, Decimal128):
+        return float(value.to_decimal())
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    if hasattr(value, "item"):
+        # numpy / pandas scalars
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize `content` to UTF-8 JSON bytes"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(content, default=json_default, option=_ORJSON_OPTIONS)
+    return json.dumps(
+        content, default=json_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class BSONJSONResponse(JSONResponse):
+    """JSONResponse that accepts raw Mongo documents"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
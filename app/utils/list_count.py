@@ -0,0 +1,86 @@
+"""
+Total counts for list endpoints.
+
+An exact `count_documents(query)` walks every matching index key, which on
+large collections costs more than fetching the page itself. Endpoints pick a
+default mode and callers can override it per request with `count_mode`:
+
+- "exact"      count_documents(query)
+- "capped"     stop counting after `cap` matches and report "<cap>+"
+- "estimated"  collection metadata count when the filter is empty; a filtered
+               query falls back to "capped"
+
+    count = count_total(collection, query, request_data.get("count_mode"), default_mode=COUNT_CAPPED)
+    total_count = count["total"]
+
+`count_total_sources` does the same over a collection split into partitions.
+"""
+
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+COUNT_EXACT = "exact"
+COUNT_CAPPED = "capped"
+COUNT_ESTIMATED = "estimated"
+COUNT_MODES = (COUNT_EXACT, COUNT_CAPPED, COUNT_ESTIMATED)
+
+# Enough for 100 pages of 100; deeper than that a user is paging with cursors
+DEFAULT_COUNT_CAP = 10000
+
+
+class InvalidCountMode(ValueError):
+    """Raised for an unknown count_mode"""
+
+
+def count_total(
+    collection,
+    query: Dict[str, Any],
+    mode: Optional[str] = None,
+    default_mode: str = COUNT_EXACT,
+    cap: int = DEFAULT_COUNT_CAP,
+) -> Dict[str, Any]:
+    """Count `query` in the requested mode.
+
+    Returns {"total", "is_exact", "display", "mode"}. `total` is a lower bound
+    when `is_exact` is False; `display` is what a UI should show ("10000+").
+    """
+    mode = (mode or default_mode).lower()
+    if mode not in COUNT_MODES:
+        raise InvalidCountMode(f"count_mode must be one of: {', '.join(COUNT_MODES)}")
+
+    if mode == COUNT_ESTIMATED:
+        if not query:
+            total = collection.estimated_document_count()
+            return {"total": total, "is_exact": False, "display": f"~{total}", "mode": COUNT_ESTIMATED}
+        mode = COUNT_CAPPED
+
+    if mode == COUNT_CAPPED:
+        total = collection.count_documents(query, limit=cap + 1)
+        if total > cap:
+            return {"total": cap, "is_exact": False, "display": f"{cap}+", "mode": COUNT_CAPPED}
+        return {"total": total, "is_exact": True, "display": str(total), "mode": COUNT_CAPPED}
+
+    total = collection.count_documents(query)
+    return {"total": total, "is_exact": True, "display": str(total), "mode": COUNT_EXACT}
+
+
+def count_total_sources(
+    sources: Sequence[Tuple[Any, Dict[str, Any]]],
+    mode: Optional[str] = None,
+    default_mode: str = COUNT_EXACT,
+    cap: int = DEFAULT_COUNT_CAP,
+) -> Dict[str, Any]:
+    """`count_total` summed over (collection, query) sources; one cap for all of them"""
+    if (mode or default_mode).lower() not in COUNT_MODES:
+        raise InvalidCountMode(f"count_mode must be one of: {', '.join(COUNT_MODES)}")
+    total, is_exact, resolved = 0, True, None
+    for collection, query in sources:
+        count = count_total(collection, query, mode, default_mode, cap=max(cap - total, 0))
+        total += count["total"]
+        is_exact = is_exact and count["is_exact"]
+        resolved = count["mode"] if resolved in (None, count["mode"]) else COUNT_CAPPED
+        if count["mode"] == COUNT_CAPPED and not count["is_exact"]:
+            return {"total": cap, "is_exact": False, "display": f"{cap}+", "mode": COUNT_CAPPED}
+
+    resolved = resolved or (mode or default_mode).lower()
+    display = str(total) if is_exact else f"~{total}"
+    return {"total": total, "is_exact": is_exact, "display": display, "mode": resolved}
@@ -0,0 +1,116 @@
+"""
+N+1 query detection for tests and benchmarks.
+
+Built on the per-request profiler in `app.utils.db_profiler`: a call is run
+under a profile that records each command's query shape and call site, and the
+helpers below flag query shapes that repeat per row, command counts that grow
+with page size, and calls that exceed a command budget.
+
+Usage in a test:
+
+    with db_call_budget(6, label="category list"):
+        WebMasterService().get_categories_list({"page": 1, "limit": 20})
+"""
+
+import json
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+from app.utils.db_profiler import RequestDBProfile, skip_call_site_file, start_profile, stop_profile
+
+skip_call_site_file(__file__)
+
+
+class DBBudgetExceeded(AssertionError):
+    """Raised when a call issues more DB commands than its budget allows."""
+    def __init__(self, message: str, *, profile: RequestDBProfile):
+        super().__init__(message)
+        self.profile = profile
+
+
+def repeated_queries(profile: RequestDBProfile, min_repeats: int = 3) -> List[Dict[str, Any]]:
+    """Query shapes issued at least `min_repeats` times, most frequent first"""
+    repeated = []
+    for (command, database, collection, shape), entry in profile.shapes.items():
+        if entry["count"] < min_repeats:
+            continue
+        repeated.append({
+            "command": command,
+            "namespace": f"{database}.{collection}",
+            "shape": json.loads(shape),
+            "count": entry["count"],
+            "call_sites": sorted(entry["call_sites"], key=entry["call_sites"].get, reverse=True),
+        })
+    repeated.sort(key=lambda r: r["count"], reverse=True)
+    return repeated
+
+
+def format_repeated(repeated: List[Dict[str, Any]]) -> str:
+    lines = []
+    for r in repeated:
+        lines.append(
+            f"  {r['count']}x {r['command']} {r['namespace']} {json.dumps(r['shape'], default=str)}"
+            f" at {', '.join(r['call_sites'])}"
+        )
+    return "\n".join(lines)
+
+
+def profile_call(fn: Callable, *args, **kwargs):
+    """Run `fn` under a call-site capturing profile; returns (result, profile)"""
+    profile, token = start_profile(capture_call_sites=True)
+    try:
+        result = fn(*args, **kwargs)
+    finally:
+        stop_profile(token)
+    return result, profile
+
+
+@contextmanager
+def db_call_budget(max_calls: int, label: str = "", min_repeats: int = 3):
+    """Fail with DBBudgetExceeded if the block issues more than `max_calls` commands"""
+    profile, token = start_profile(capture_call_sites=True)
+    try:
+        yield profile
+    finally:
+        stop_profile(token)
+    if profile.calls > max_calls:
+        repeated = repeated_queries(profile, min_repeats)
+        message = f"{label or 'block'} issued {profile.calls} DB commands (budget {max_calls})"
+        if repeated:
+            message += "\nRepeated query shapes:\n" + format_repeated(repeated)
+        raise DBBudgetExceeded(message, profile=profile)
+
+
+def check_page_scaling(
+    call: Callable[[int], Any],
+    small_page: int = 5,
+    large_page: int = 20,
+    budget: Optional[int] = None,
+    min_repeats: int = 3,
+) -> Dict[str, Any]:
+    """Run `call(page_size)` at two page sizes and report N+1 symptoms.
+
+    An endpoint is flagged when its command count grows with page size or when
+    the large page exceeds `budget`. Repeated query shapes from the large run
+    are reported with their call sites.
+
+    A discarded `call(large_page)` runs first, so both measured runs see the
+    same warm caches (stats, audit names) instead of the small run filling
+    them for the large one.
+    """
+    call(large_page)
+    _, small = profile_call(call, small_page)
+    _, large = profile_call(call, large_page)
+
+    grows = large.calls > small.calls
+    over_budget = budget is not None and large.calls > budget
+    return {
+        "calls": {str(small_page): small.calls, str(large_page): large.calls},
+        "db_time_ms": {str(small_page): round(small.total_ms, 3), str(large_page): round(large.total_ms, 3)},
+        "grows_with_page_size": grows,
+        "extra_commands_per_row": round((large.calls - small.calls) / float(large_page - small_page), 2),
+        "budget": budget,
+        "over_budget": over_budget,
+        "repeated": repeated_queries(large, min_repeats),
+        "ok": not grows and not over_budget,
+    }
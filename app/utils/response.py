@@ -1,12 +1,14 @@
 from typing import Any, Dict, Optional
 from bson import ObjectId
 
+from app.utils.json_response import BSONJSONResponse
+
 def format_response(
     success: bool = True,
     msg: str = "Operation completed successfully",
     statuscode: int = 200,
     data: Optional[Dict[str, Any]] = None
-) -> Dict[str, Any]:
+) -> BSONJSONResponse:
     """
     Format API response in a consistent structure.
     
@@ -14,10 +16,11 @@ def format_response(
         success (bool): Whether the operation was successful
         msg (str): Message describing the operation result
         statuscode (int): HTTP status code
-        data (Optional[Dict[str, Any]]): Additional data to include in response
+        data (Optional[Dict[str, Any]]): Additional data to include in response;
+            may contain raw Mongo documents (ObjectId, datetime, Decimal128)
         
     Returns:
-        Dict[str, Any]: Formatted response dictionary
+        BSONJSONResponse: The formatted body, already serialized
     """
     response = {
         "success": success,
@@ -28,7 +31,7 @@ def format_response(
     if data is not None:
         response["data"] = data
         
-    return response 
+    return BSONJSONResponse(content=response)
 
 def convert_objectid_to_str(data):
     if isinstance(data, dict):
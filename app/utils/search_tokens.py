@@ -0,0 +1,107 @@
+"""
+Indexed prefix search for list endpoints.
+
+An unanchored, case-insensitive `$regex` cannot use an index, so every search
+scans the collection. Instead, searchable documents carry a `search_tokens`
+array: the lowercased, accent-folded words of their searchable fields plus
+every prefix of each word. With a multikey index on `search_tokens`, a
+typeahead query like "ele wir" becomes
+
+    {"search_tokens": {"$all": ["ele", "wir"]}}
+
+which matches documents having one word starting with "ele" and one starting
+with "wir" ("Electric Wire", "Wiring - electrical").
+
+Searchable fields per collection are declared next to the indexes in each
+module's `database_indexes.py` (`SEARCH_FIELDS`). Services set the tokens on
+insert/update; `scripts/backfill_search_tokens.py` fills existing documents
+and documents written outside the services (`matching_ids` can fall back to
+a regex for documents still missing them).
+"""
+
+import re
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional
+
+SEARCH_TOKENS_FIELD = "search_tokens"
+
+# Longer prefixes are truncated on both the document and the query side
+MAX_PREFIX_LENGTH = 20
+
+_WORD_RE = re.compile(r"[0-9a-z]+")
+
+
+def normalize_words(text: Any) -> List[str]:
+    """Lowercase, accent-folded alphanumeric words of `text`"""
+    if text is None:
+        return []
+    if isinstance(text, (list, tuple)):
+        words: List[str] = []
+        for item in text:
+            words.extend(normalize_words(item))
+        return words
+    folded = unicodedata.normalize("NFKD", str(text))
+    folded = "".join(c for c in folded if not unicodedata.combining(c)).lower()
+    return _WORD_RE.findall(folded)
+
+
+def build_search_tokens(*values: Any) -> List[str]:
+    """Every prefix of every word in `values`, deduplicated and sorted"""
+    tokens = set()
+    for value in values:
+        for word in normalize_words(value):
+            word = word[:MAX_PREFIX_LENGTH]
+            for end in range(1, len(word) + 1):
+                tokens.add(word[:end])
+    return sorted(tokens)
+
+
+def _get_path(doc: Dict[str, Any], path: str) -> Any:
+    value: Any = doc
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def document_search_tokens(doc: Dict[str, Any], fields: Iterable[str]) -> List[str]:
+    """Tokens for the searchable `fields` (dotted paths allowed) of `doc`"""
+    return build_search_tokens(*(_get_path(doc, field) for field in fields))
+
+
+def search_filter(q: Any, field: str = SEARCH_TOKENS_FIELD) -> Dict[str, Any]:
+    """Query matching documents where each word of `q` prefixes one of their words.
+
+    Returns {} for an empty search so callers can merge it unconditionally.
+    """
+    words = [word[:MAX_PREFIX_LENGTH] for word in normalize_words(q)]
+    if not words:
+        return {}
+    return {field: {"$all": sorted(set(words))}}
+
+
+def matching_ids(collection, q: Any, base_query: Dict[str, Any] = None,
+                 fallback_fields: Optional[Iterable[str]] = None) -> List[Any]:
+    """`_id`s of documents in `collection` matching the search `q`.
+
+    Used to filter a collection joined by id (e.g. attendance -> users) before
+    the `$lookup`, instead of regex-matching the joined fields afterwards.
+    With `fallback_fields`, documents that have no `search_tokens` yet (written
+    outside the services since the last backfill) are matched by a
+    case-insensitive regex on those fields instead.
+    """
+    query = dict(base_query or {})
+    tokens = search_filter(q)
+    if not tokens:
+        return [doc["_id"] for doc in collection.find(query, {"_id": 1})]
+    if fallback_fields:
+        pattern = re.escape(str(q).strip())
+        query["$or"] = [
+            tokens,
+            {SEARCH_TOKENS_FIELD: {"$exists": False},
+             "$or": [{field: {"$regex": pattern, "$options": "i"}} for field in fallback_fields]},
+        ]
+    else:
+        query.update(tokens)
+    return [doc["_id"] for doc in collection.find(query, {"_id": 1})]
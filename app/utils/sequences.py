@@ -0,0 +1,57 @@
+"""
+Atomic sequence counters backed by a Mongo `counters` collection.
+
+Each counter is one document `{"_id": key, "sequence": <last issued>}`, the
+same layout SFA's code generator has always used. Numbers are issued with a
+single `$inc`, so concurrent callers never receive the same value:
+
+    sequences = Sequences(client1["trust_rewards"]["counters"])
+
+    sequences.next("coupon_master")            # 42
+    sequences.reserve("coupon_master", 1000)   # range(43, 1043), one round trip
+
+A counter introduced for codes that already exist is seeded once with
+`ensure_at_least(key, current_max)`, which only ever moves it forward.
+"""
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+
+class Sequences:
+    """Named counters stored in one collection"""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def reserve(self, key: str, count: int) -> range:
+        """Take `count` consecutive numbers; returns them as a range"""
+        if count < 1:
+            raise ValueError("count must be at least 1")
+        doc = self.collection.find_one_and_update(
+            {"_id": key},
+            {"$inc": {"sequence": count}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        last = int(doc["sequence"])
+        return range(last - count + 1, last + 1)
+
+    def next(self, key: str) -> int:
+        return self.reserve(key, 1)[0]
+
+    def current(self, key: str) -> int:
+        """Last number issued for `key` (0 if none)"""
+        doc = self.collection.find_one({"_id": key}, {"sequence": 1})
+        return int(doc["sequence"]) if doc else 0
+
+    def exists(self, key: str) -> bool:
+        return self.collection.find_one({"_id": key}, {"_id": 1}) is not None
+
+    def ensure_at_least(self, key: str, value: int) -> None:
+        """Move the counter up to `value` if it is below it (never down)"""
+        try:
+            self.collection.update_one({"_id": key}, {"$max": {"sequence": int(value)}}, upsert=True)
+        except DuplicateKeyError:
+            # Lost an upsert race with another seeder; the document exists now
+            self.collection.update_one({"_id": key}, {"$max": {"sequence": int(value)}})
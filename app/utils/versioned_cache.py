@@ -0,0 +1,98 @@
+"""
+In-process read-through cache invalidated by version stamps shared in Mongo.
+
+Cached values belong to a namespace (usually the collection they were read
+from). Each namespace has a version document `{"_id": namespace, "version": n}`
+in a small collection; writers bump it and every process drops its entries
+for that namespace the next time it checks the versions:
+
+    catalog_cache = VersionedCache(client1["trust_rewards"]["cache_versions"])
+
+    result = catalog_cache.get_or_compute("gift_master", ("list", page, limit), compute)
+    ...
+    catalog_cache.invalidate("gift_master")   # after an admin write
+
+A process reads all versions in one query at most every
+`version_check_seconds`, so another process serves a stale entry for at most
+that long after a write; the process that wrote sees it at once. Entries also
+expire after `ttl_seconds`, which bounds staleness for writes that bypass
+`invalidate`.
+"""
+
+import copy
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from pymongo import ReturnDocument
+
+from app.utils.ttl_cache import TTLCache
+
+_MISSING = object()
+
+
+class VersionedCache:
+    """Read-through cache of values keyed by (namespace, key)"""
+
+    def __init__(self, versions_collection, ttl_seconds: float = 600, max_entries: int = 2000,
+                 version_check_seconds: float = 5):
+        self.versions_collection = versions_collection
+        self.version_check_seconds = version_check_seconds
+        self._entries = TTLCache(ttl_seconds=ttl_seconds, max_entries=max_entries)
+        self._versions: Dict[str, int] = {}
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _refresh_versions(self) -> None:
+        if time.monotonic() - self._checked_at < self.version_check_seconds:
+            return
+        versions = {doc["_id"]: int(doc.get("version", 0)) for doc in self.versions_collection.find({})}
+        with self._lock:
+            self._versions = versions
+            self._checked_at = time.monotonic()
+
+    def version(self, namespace: str) -> int:
+        self._refresh_versions()
+        return self._versions.get(namespace, 0)
+
+    def get_or_compute(self, namespace: str, key: Hashable, compute: Callable[[], Any],
+                       cacheable: Optional[Callable[[Any], bool]] = None) -> Any:
+        """Cached value for `key`, or `compute()` (stored if `cacheable(value)`).
+
+        Callers get a deep copy, so they may modify what they receive.
+        """
+        try:
+            version = self.version(namespace)
+        except Exception as e:
+            # Versions unreadable: serve uncached rather than possibly stale
+            print(f"VersionedCache version check failed: {str(e)}")
+            return compute()
+
+        entry = self._entries.get((namespace, key), _MISSING)
+        if entry is not _MISSING and entry[0] == version:
+            self.hits += 1
+            return copy.deepcopy(entry[1])
+
+        self.misses += 1
+        value = compute()
+        if cacheable is None or cacheable(value):
+            self._entries.set((namespace, key), (version, copy.deepcopy(value)))
+        return value
+
+    def invalidate(self, *namespaces: str) -> None:
+        """Bump the namespaces' versions for every process (this one immediately)"""
+        for namespace in namespaces:
+            doc = self.versions_collection.find_one_and_update(
+                {"_id": namespace},
+                {"$inc": {"version": 1}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+            with self._lock:
+                self._versions[namespace] = int(doc["version"])
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.hits = self.misses = 0
@@ -0,0 +1,4 @@
+from app.utils.jobs import main
+
+if __name__ == "__main__":
+    main("app.workers.tasks", "Run HRMS background job workers")
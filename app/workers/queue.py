@@ -0,0 +1,8 @@
+"""HRMS job queue (see `app/utils/jobs.py`); jobs of every tenant share `hrms_master.jobs`"""
+
+from app.database import client1
+from app.utils.jobs import JobQueue
+
+job_queue = JobQueue(client1["hrms_master"]["jobs"])
+
+PAYROLL_PREVIEW_JOB = "payroll_preview"
@@ -0,0 +1,19 @@
+"""
+HRMS background job handlers.
+
+Run the workers with `python -m app.workers --processes 2`.
+"""
+
+from app.services.payroll_service import PayrollService
+from app.utils.jobs import job_handler
+from app.workers.queue import PAYROLL_PREVIEW_JOB, job_queue
+
+HANDLERS = {}
+
+
+@job_handler(HANDLERS, PAYROLL_PREVIEW_JOB)
+def payroll_preview(ctx):
+    return PayrollService()._process_payroll_preview(ctx.tenant_id, ctx.job_id, ctx.payload, on_progress=ctx.progress)
+
+
+__all__ = ["HANDLERS", "job_queue"]
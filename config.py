@@ -38,6 +38,12 @@ class Settings(BaseSettings):
     # Domain configuration
     DOMAIN: str
 
+    # Allow clients to request a per-request DB command trace with `X-DB-Trace: 1`
+    DB_TRACE_ENABLED: bool = False
+
+    # Create/reconcile the declared MongoDB indexes when the app starts
+    ENSURE_INDEXES_ON_STARTUP: bool = False
+
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -6,6 +6,8 @@ from sfa.api.routes import router as sfa_router
 from trust_rewards.api.routes import router as trust_rewards_router
 import logging
 import os
+import threading
+from config import settings
 from app.middlewares.logging_middleware import log_requests  # We'll move the middleware
 
 app = FastAPI()
@@ -55,4 +57,34 @@ app.include_router(
 app.include_router(
     trust_rewards_router,
     prefix="/trust_rewards"  # This will prefix all routes with /api
-)
\ No newline at end of file
+)
+
+@app.on_event("startup")
+async def bootstrap_indexes():
+    """Reconcile declared indexes in the background when enabled"""
+    if not settings.ENSURE_INDEXES_ON_STARTUP:
+        return
+
+    def _run():
+        from scripts.ensure_indexes import ensure_all_indexes
+        try:
+            actions = ensure_all_indexes()
+            changed = [a for a in actions if a["action"] != "ok"]
+            logging.info(f"Index bootstrap finished: {len(actions)} checked, {len(changed)} changed/flagged")
+            for action in changed:
+                logging.warning(f"Index bootstrap: {action}")
+        except Exception as e:
+            logging.error(f"Index bootstrap failed: {str(e)}")
+
+    threading.Thread(target=_run, name="index-bootstrap", daemon=True).start()
+
+
+@app.on_event("shutdown")
+async def close_database_connections():
+    """Release the Mongo pools of every module"""
+    from app.database import db as hrms_db
+    from sfa.database import db as sfa_db
+    from trust_rewards.database import db as trust_rewards_db
+
+    for database in (hrms_db, sfa_db, trust_rewards_db):
+        database.close_connections()
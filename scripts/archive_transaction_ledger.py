@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Move `transaction_ledger` months older than the hot window to monthly
+archive collections (`transaction_ledger_YYYY_MM`) and write their per-worker
+summaries (see `trust_rewards/utils/ledger_archive.py`).
+
+Meant to run once a month (cron) after the month turns; rerunning is safe
+and finishes a month an interrupted run left half done. `--queue` enqueues
+the archive on the Trust Rewards job queue instead of running it here.
+
+Usage:
+    python -m scripts.archive_transaction_ledger
+    python -m scripts.archive_transaction_ledger --hot-months 3
+    python -m scripts.archive_transaction_ledger --queue
+"""
+
+import argparse
+import time
+
+from trust_rewards.utils.ledger_archive import LEDGER_HOT_MONTHS, LedgerPartitions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive old transaction_ledger months")
+    parser.add_argument("--hot-months", type=int, default=LEDGER_HOT_MONTHS,
+                        help=f"Months kept in transaction_ledger, the current one included (default {LEDGER_HOT_MONTHS})")
+    parser.add_argument("--queue", action="store_true", help="Enqueue a ledger_archive job instead")
+    args = parser.parse_args()
+
+    if args.queue:
+        from trust_rewards.workers.queue import LEDGER_ARCHIVE_JOB, job_queue
+        job = job_queue.enqueue(LEDGER_ARCHIVE_JOB, {"hot_months": args.hot_months}, created_by="script")
+        print(f"Enqueued {job['job_id']}")
+        return
+
+    started = time.perf_counter()
+    months = LedgerPartitions.archive(args.hot_months)
+    for result in months:
+        print(f"{result['month']}: {result['entries']} entries, {result['workers']} workers -> "
+              f"{result['collection']} ({result['removed_from_hot']} removed from transaction_ledger)")
+    print(f"{len(months)} month(s) archived in {time.perf_counter() - started:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
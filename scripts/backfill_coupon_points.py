@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Copy `points_value` and `batch_number` from `coupon_master` onto the coupons
+generated before they were denormalized, so scanning never needs the
+`coupon_master` lookup.
+
+Usage:
+    python -m scripts.backfill_coupon_points
+"""
+
+from trust_rewards.database import client1
+
+
+def main():
+    db = client1["trust_rewards"]
+    total = 0
+    for master in db["coupon_master"].find({}, {"points_value": 1, "batch_number": 1}):
+        result = db["coupon_code"].update_many(
+            {"coupon_master_id": str(master["_id"]), "points_value": {"$exists": False}},
+            {"$set": {"points_value": master.get("points_value"), "batch_number": master.get("batch_number", "")}},
+        )
+        total += result.modified_count
+        if result.modified_count:
+            print(f"{master.get('batch_number')}: {result.modified_count} coupons updated")
+    print(f"Done: {total} coupons updated")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Fill `search_tokens` on every collection registered in a module's
+`SEARCH_FIELDS` (see `app/utils/search_tokens.py`).
+
+Services keep the tokens current on their own writes; run this once after
+deploying indexed search, and periodically for collections that are written
+outside the services (e.g. HRMS tenant `users`).
+
+Usage:
+    python -m scripts.backfill_search_tokens
+    python -m scripts.backfill_search_tokens --only trust_rewards --batch-size 1000
+    python -m scripts.backfill_search_tokens --missing-only
+"""
+
+import argparse
+
+from pymongo import UpdateOne
+
+from app.utils.search_tokens import SEARCH_TOKENS_FIELD, document_search_tokens
+
+
+def _registered_targets(only=None):
+    """Yield (module, collection, fields) for every declared search field set"""
+    from app.database import client1 as hrms_client
+    from app.database_indexes import SEARCH_FIELDS as HRMS_SEARCH_FIELDS, TENANT_SEARCH_FIELDS
+    from trust_rewards.database import client1 as trust_rewards_client
+    from trust_rewards.database_indexes import SEARCH_FIELDS as TRUST_REWARDS_SEARCH_FIELDS
+
+    for module, client, registry in (
+        ("trust_rewards", trust_rewards_client, TRUST_REWARDS_SEARCH_FIELDS),
+        ("hrms", hrms_client, HRMS_SEARCH_FIELDS),
+    ):
+        if only and only != module:
+            continue
+        for db_name, collections in registry.items():
+            for collection_name, fields in collections.items():
+                yield module, client[db_name][collection_name], fields
+
+    if only and only != "hrms":
+        return
+    for tenant_id in hrms_client["hrms_master"]["tenants"].distinct("tenant_id"):
+        if not tenant_id:
+            continue
+        for collection_name, fields in TENANT_SEARCH_FIELDS.items():
+            yield "hrms", hrms_client[str(tenant_id)][collection_name], fields
+
+
+def backfill_collection(collection, fields, batch_size=500, missing_only=False):
+    """Recompute tokens for one collection; returns the number of documents updated"""
+    query = {SEARCH_TOKENS_FIELD: {"$exists": False}} if missing_only else {}
+    projection = {field.split(".")[0]: 1 for field in fields}
+    projection[SEARCH_TOKENS_FIELD] = 1
+
+    updated = 0
+    ops = []
+    for doc in collection.find(query, projection).batch_size(batch_size):
+        tokens = document_search_tokens(doc, fields)
+        if doc.get(SEARCH_TOKENS_FIELD) == tokens:
+            continue
+        ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {SEARCH_TOKENS_FIELD: tokens}}))
+        if len(ops) >= batch_size:
+            updated += collection.bulk_write(ops, ordered=False).modified_count
+            ops = []
+    if ops:
+        updated += collection.bulk_write(ops, ordered=False).modified_count
+    return updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill search_tokens for indexed list search")
+    parser.add_argument("--only", choices=["trust_rewards", "hrms"], help="Limit to one module")
+    parser.add_argument("--batch-size", type=int, default=500, help="Documents per bulk write")
+    parser.add_argument("--missing-only", action="store_true", help="Skip documents that already have tokens")
+    args = parser.parse_args()
+
+    total = 0
+    for module, collection, fields in _registered_targets(args.only):
+        count = backfill_collection(collection, fields, args.batch_size, args.missing_only)
+        total += count
+        print(f"{module} {collection.database.name}.{collection.name}: {count} updated")
+    print(f"Done: {total} documents updated")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Rewards app catalog cache benchmark.
+
+Replays a mix of app catalog requests (categories, sub-categories, products,
+gifts, product/gift detail) against `AppMasterService` with the catalog cache
+off and on, and reports per-request latency and Mongo operations. With
+`--write-every N` an admin write invalidates one catalog namespace every N
+requests, as `WebMasterService` does. Everything runs on a scratch database
+that is dropped afterwards.
+
+Usage:
+    python -m scripts.benchmark_catalog_cache
+    python -m scripts.benchmark_catalog_cache --requests 5000 --products 400 --write-every 500
+"""
+
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime
+
+from app.utils.versioned_cache import VersionedCache
+from trust_rewards.database import client1
+from trust_rewards.services.app_master_services import AppMasterService
+from trust_rewards.utils import catalog_cache as catalog
+from trust_rewards.utils.catalog_cache import CATEGORIES, GIFTS, PRODUCTS, SUB_CATEGORIES
+
+_DB_OPERATIONS = ("find", "find_one", "count_documents", "aggregate", "find_one_and_update")
+
+
+class CountingCollection:
+    """Collection proxy that counts the read operations issued through it"""
+
+    calls = 0
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if name not in _DB_OPERATIONS:
+            return attr
+
+        def counted(*args, **kwargs):
+            CountingCollection.calls += 1
+            return attr(*args, **kwargs)
+        return counted
+
+
+def _seed(db, args):
+    now = datetime.now()
+    stamp = {"status": "active", "created_at": now.strftime("%Y-%m-%d"), "created_time": now.strftime("%H:%M:%S")}
+    image = {"image_id": "img", "file_url": "/uploads/bench.png"}
+    categories = [str(db["category_master"].insert_one({"category_name": f"Category {c}", **stamp}).inserted_id)
+                  for c in range(args.categories)]
+    pairs = []
+    for category_id in categories:
+        for s in range(args.sub_categories):
+            sub_id = str(db["sub_category_master"].insert_one(
+                {"category_id": category_id, "sub_category_name": f"Sub {s}", **stamp}).inserted_id)
+            pairs.append((category_id, sub_id))
+    products = [
+        str(db["product_master"].insert_one({
+            "category_id": category_id, "sub_category_id": sub_id, "product_name": f"Product {p}",
+            "mrp": 100 + p, "images": [image], **stamp
+        }).inserted_id)
+        for p in range(args.products) for category_id, sub_id in [pairs[p % len(pairs)]]
+    ]
+    gifts = [str(db["gift_master"].insert_one({"gift_name": f"Gift {g}", "points_required": 100 * g,
+                                               "images": [image], **stamp}).inserted_id)
+             for g in range(args.gifts)]
+    return categories, pairs, products, gifts
+
+
+def _requests(args, categories, pairs, products, gifts):
+    """The same randomized app session mix for every run"""
+    rng = random.Random(args.seed)
+    calls = []
+    for _ in range(args.requests):
+        kind = rng.choices(["categories", "sub_categories", "products", "gifts", "product", "gift"],
+                           weights=[3, 2, 3, 3, 2, 2])[0]
+        page = rng.choice([1, 1, 1, 2])
+        if kind == "categories":
+            calls.append(("get_categories_list", {"page": page, "limit": 20}))
+        elif kind == "sub_categories":
+            calls.append(("get_sub_categories_list", {"category_id": rng.choice(categories), "page": 1, "limit": 50}))
+        elif kind == "products":
+            category_id, sub_id = rng.choice(pairs)
+            calls.append(("get_products_list", {"category_id": category_id, "sub_category_id": sub_id,
+                                                "page": page, "limit": 20}))
+        elif kind == "gifts":
+            calls.append(("get_gift_list", {"page": page, "limit": 20}))
+        elif kind == "product":
+            calls.append(("get_product_detail", {"product_id": rng.choice(products)}))
+        else:
+            calls.append(("get_gift_detail", {"gift_id": rng.choice(gifts)}))
+    return calls
+
+
+def run(service, calls, write_every):
+    namespaces = [CATEGORIES, SUB_CATEGORIES, PRODUCTS, GIFTS]
+    timings = []
+    CountingCollection.calls = 0
+    for i, (method, request_data) in enumerate(calls, start=1):
+        started = time.perf_counter()
+        result = getattr(service, method)(request_data)
+        timings.append((time.perf_counter() - started) * 1000)
+        if not result.get("success"):
+            raise RuntimeError(f"{method} failed: {result.get('message')}")
+        if write_every and i % write_every == 0:
+            catalog.invalidate_catalog(namespaces[(i // write_every) % len(namespaces)])
+    timings.sort()
+    return {
+        "p50": statistics.median(timings),
+        "p95": timings[int(len(timings) * 0.95) - 1],
+        "mean": statistics.fmean(timings),
+        "ops_per_request": CountingCollection.calls / len(calls),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the rewards app catalog cache")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--categories", type=int, default=8)
+    parser.add_argument("--sub-categories", type=int, default=5, help="per category")
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--gifts", type=int, default=60)
+    parser.add_argument("--write-every", type=int, default=0, help="Invalidate one namespace every N requests")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--db", default="trust_rewards_bench_catalog")
+    args = parser.parse_args()
+
+    client1.drop_database(args.db)
+    db = client1[args.db]
+    saved = catalog.catalog_cache, catalog.CATALOG_CACHE_ENABLED
+    try:
+        ids = _seed(db, args)
+        calls = _requests(args, *ids)
+
+        service = AppMasterService()
+        service.categories = CountingCollection(db["category_master"])
+        service.sub_categories = CountingCollection(db["sub_category_master"])
+        service.product_master = CountingCollection(db["product_master"])
+        service.gift_master = CountingCollection(db["gift_master"])
+        cache = VersionedCache(CountingCollection(db["cache_versions"]),
+                               ttl_seconds=catalog.CATALOG_CACHE_TTL_SECONDS,
+                               version_check_seconds=catalog.CATALOG_CACHE_VERSION_CHECK_SECONDS)
+        catalog.catalog_cache = cache
+
+        print(f"{len(calls)} requests, {args.products} products, {args.gifts} gifts, "
+              f"write every {args.write_every or '-'}")
+        results = {}
+        for label, enabled in (("uncached", False), ("cached", True)):
+            catalog.CATALOG_CACHE_ENABLED = enabled
+            cache.clear()
+            results[label] = run(service, calls, args.write_every)
+            r = results[label]
+            hit_rate = cache.hits / max(cache.hits + cache.misses, 1) * 100 if enabled else 0
+            print(f"{label:>9}: p50 {r['p50']:.3f} ms  p95 {r['p95']:.3f} ms  mean {r['mean']:.3f} ms  "
+                  f"{r['ops_per_request']:.2f} Mongo ops/request" + (f"  hit rate {hit_rate:.1f}%" if enabled else ""))
+
+        before, after = results["uncached"], results["cached"]
+        print(f"mean latency {before['mean'] / max(after['mean'], 1e-9):.1f}x lower, "
+              f"Mongo ops {100 * (1 - after['ops_per_request'] / max(before['ops_per_request'], 1e-9)):.0f}% fewer")
+    finally:
+        catalog.catalog_cache, catalog.CATALOG_CACHE_ENABLED = saved
+        client1.drop_database(args.db)
+
+
+if __name__ == "__main__":
+    main()
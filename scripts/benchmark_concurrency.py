@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Concurrent latency benchmark for API endpoints.
+
+Fires N requests at an endpoint with a fixed concurrency and reports
+p50/p95/p99 latency plus throughput, so the same run can be repeated
+before and after a change to compare numbers. The X-DB-Calls header added by
+the logging middleware is collected too; with --max-db-calls the run exits
+non-zero when any response used more DB commands than the budget.
+
+Needs httpx, which the app itself does not use:
+    pip install -r requirements-dev.txt
+
+Usage:
+    python scripts/benchmark_concurrency.py \
+        --url http://localhost:8000/trust_rewards/api/web/master/category_master_list \
+        --token <JWT> --body '{"page": 1, "limit": 10}' \
+        --requests 500 --concurrency 50 --max-db-calls 8
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import statistics
+import sys
+import time
+
+import httpx
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not values:
+        return 0.0
+    rank = max(0, min(len(values) - 1, math.ceil(pct / 100.0 * len(values)) - 1))
+    return values[rank]
+
+
+async def run_benchmark(url, method, body, token, total_requests, concurrency, timeout, max_db_calls=None):
+    headers = {"Content-Type": "application/json"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+
+    latencies = []
+    db_calls = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(timeout=timeout) as client:
+        async def one_request():
+            nonlocal errors
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    response = await client.request(method, url, headers=headers, json=body)
+                    if response.status_code >= 400:
+                        errors += 1
+                    if "X-DB-Calls" in response.headers:
+                        db_calls.append(int(response.headers["X-DB-Calls"]))
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one_request() for _ in range(total_requests)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    result = {
+        "requests": total_requests,
+        "concurrency": concurrency,
+        "errors": errors,
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_rps": round(total_requests / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(statistics.mean(latencies), 2) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "max_ms": round(latencies[-1], 2) if latencies else 0.0,
+    }
+    if db_calls:
+        result["db_calls_min"] = min(db_calls)
+        result["db_calls_max"] = max(db_calls)
+        if max_db_calls is not None:
+            result["db_calls_budget"] = max_db_calls
+            result["db_calls_over_budget"] = sum(1 for c in db_calls if c > max_db_calls)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent latency benchmark for API endpoints")
+    parser.add_argument("--url", required=True, help="Full endpoint URL")
+    parser.add_argument("--method", default="POST", help="HTTP method (default: POST)")
+    parser.add_argument("--body", default="{}", help="JSON request body")
+    parser.add_argument("--token", default="", help="Bearer token for authenticated endpoints")
+    parser.add_argument("--requests", type=int, default=200, help="Total number of requests")
+    parser.add_argument("--concurrency", type=int, default=20, help="Requests in flight at once")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout in seconds")
+    parser.add_argument("--max-db-calls", type=int, default=None,
+                        help="Fail if any response reports more X-DB-Calls than this")
+    args = parser.parse_args()
+
+    try:
+        body = json.loads(args.body) if args.body else None
+    except json.JSONDecodeError as e:
+        print(f"Invalid --body JSON: {e}")
+        sys.exit(1)
+
+    result = asyncio.run(run_benchmark(
+        args.url, args.method.upper(), body, args.token,
+        args.requests, args.concurrency, args.timeout, args.max_db_calls
+    ))
+    print(json.dumps(result, indent=2))
+
+    if result.get("db_calls_over_budget"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
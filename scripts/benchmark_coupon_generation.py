@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Coupon batch generation benchmark.
+
+Times `CouponService._insert_coupon_codes` (client-side codes, ordered
+`insert_many` chunks) for 10k / 100k / 1M coupon batches, and optionally the
+old per-coupon `insert_one` + `update_one` loop for comparison. Everything is
+written to a scratch database that is dropped afterwards; the scratch
+`coupon_code` collection gets the same unique `coupon_code` index as
+production so the numbers include index maintenance.
+
+Usage:
+    python -m scripts.benchmark_coupon_generation
+    python -m scripts.benchmark_coupon_generation --sizes 10000 100000 --chunk-size 2000 5000 10000
+    python -m scripts.benchmark_coupon_generation --sizes 10000 --legacy
+"""
+
+import argparse
+import time
+from datetime import datetime
+
+from pymongo import ASCENDING
+
+from trust_rewards.database import client1
+from trust_rewards.services.web_coupon_services import COUPON_INSERT_CHUNK_SIZE, CouponService
+
+
+def _template(coupon_master_id):
+    now = datetime.now()
+    return {
+        "coupon_master_id": coupon_master_id,
+        "coupon_value": 50,
+        "points_value": 50,
+        "batch_number": "BENCH",
+        "valid_from": now.strftime("%Y-%m-%d"),
+        "valid_to": now.strftime("%Y-%m-%d"),
+        "status": "active",
+        "is_scanned": False,
+        "scanned_by": None,
+        "scanned_at": None,
+        "created_at": now.strftime("%Y-%m-%d"),
+        "created_time": now.strftime("%H:%M:%S"),
+        "created_by_id": 1,
+    }
+
+
+def _scratch_service(db_name):
+    """A CouponService pointed at an empty scratch database"""
+    client1.drop_database(db_name)
+    service = CouponService()
+    service.client_database = client1[db_name]
+    service.coupon_master = service.client_database["coupon_master"]
+    service.coupon_code = service.client_database["coupon_code"]
+    service.coupon_code.create_index([("coupon_code", ASCENDING)], name="coupon_code_unique", unique=True)
+    return service
+
+
+def bulk_generate(service, size, chunk_size):
+    master_id = service.coupon_master.insert_one({"generation_status": "generating", "generated_count": 0}).inserted_id
+    result = service._insert_coupon_codes(master_id, _template(str(master_id)), size, chunk_size)
+    if not result["success"]:
+        raise RuntimeError(result["error"])
+
+
+def legacy_generate(service, size, chunk_size=None):
+    """The pre-bulk loop: one insert_one plus one update_one per coupon"""
+    master_id = str(service.coupon_master.insert_one({}).inserted_id)
+    template = _template(master_id)
+    for _ in range(size):
+        coupon_id = service.coupon_code.insert_one(dict(template)).inserted_id
+        service.coupon_code.update_one({"_id": coupon_id}, {"$set": {"coupon_code": str(coupon_id)}})
+
+
+def run(label, fn, db_name, size, chunk_size):
+    service = _scratch_service(db_name)
+    started = time.perf_counter()
+    fn(service, size, chunk_size)
+    elapsed = time.perf_counter() - started
+    inserted = service.coupon_code.estimated_document_count()
+    print(f"{label:>22} size {size:>8}  {elapsed:8.2f} s  {size / elapsed:10.0f} coupons/s  inserted {inserted}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark coupon batch generation")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000],
+                        help="Coupons per batch")
+    parser.add_argument("--chunk-size", type=int, nargs="+", default=[COUPON_INSERT_CHUNK_SIZE],
+                        help="insert_many chunk sizes to compare")
+    parser.add_argument("--legacy", action="store_true",
+                        help="Also time the per-coupon insert_one + update_one loop (slow; use small sizes)")
+    parser.add_argument("--db", default="trust_rewards_coupon_bench", help="Scratch database (dropped)")
+    args = parser.parse_args()
+
+    try:
+        for size in args.sizes:
+            for chunk_size in args.chunk_size:
+                run(f"insert_many/{chunk_size}", bulk_generate, args.db, size, chunk_size)
+            if args.legacy:
+                run("insert_one+update_one", legacy_generate, args.db, size, None)
+    finally:
+        client1.drop_database(args.db)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Concurrent coupon scan benchmark / double-award check.
+
+Creates `--coupons` fresh coupons in a scratch database and has `--threads`
+threads scan every one of them `--scans-per-coupon` times at once through
+`AppCouponService._claim_coupons`, `--batch-size` codes per call. Each coupon
+must be awarded exactly once; the run exits non-zero if any coupon was awarded
+more than once (or never). `--legacy` runs the old find_one / check / update_one sequence on the
+same workload for comparison.
+
+Usage:
+    python -m scripts.benchmark_coupon_scan_race
+    python -m scripts.benchmark_coupon_scan_race --coupons 500 --scans-per-coupon 20 --threads 64 --legacy
+    python -m scripts.benchmark_coupon_scan_race --batch-size 10
+"""
+
+import argparse
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from pymongo import ASCENDING
+
+from trust_rewards.database import client1
+from trust_rewards.services.app_coupon_services import AppCouponService
+
+
+def _scratch_service(db_name, coupons):
+    client1.drop_database(db_name)
+    service = AppCouponService()
+    service.client_database = client1[db_name]
+    service.coupon_code = service.client_database["coupon_code"]
+    service.coupon_master = service.client_database["coupon_master"]
+    service.coupon_scanned_history = service.client_database["coupon_scanned_history"]
+    service.coupon_code.create_index([("coupon_code", ASCENDING)], name="coupon_code_unique", unique=True)
+
+    today = datetime.now()
+    docs = []
+    for _ in range(coupons):
+        coupon_id = ObjectId()
+        docs.append({
+            "_id": coupon_id,
+            "coupon_code": str(coupon_id),
+            "coupon_master_id": None,
+            "coupon_value": 50,
+            "points_value": 50,
+            "batch_number": "BENCH",
+            "valid_from": (today - timedelta(days=1)).strftime("%Y-%m-%d"),
+            "valid_to": (today + timedelta(days=1)).strftime("%Y-%m-%d"),
+            "status": "active",
+            "is_scanned": False,
+        })
+    service.coupon_code.insert_many(docs)
+    return service, [doc["coupon_code"] for doc in docs]
+
+
+def legacy_scan(service, coupon_codes, worker):
+    """The pre-fix sequence: per code, read, check is_scanned in Python, unconditional update"""
+    results = []
+    for coupon_code in coupon_codes:
+        coupon = service.coupon_code.find_one({"coupon_code": coupon_code})
+        if not coupon or coupon.get("is_scanned", False) or coupon.get("status") != "active":
+            results.append({"success": False, "coupon_code": coupon_code})
+            continue
+        service.coupon_code.update_one(
+            {"coupon_code": coupon_code},
+            {"$set": {"is_scanned": True, "scanned_by": str(worker["_id"]), "status": "scanned"}},
+        )
+        results.append({"success": True, "coupon_code": coupon_code})
+    return results
+
+
+def run(label, scan, args):
+    service, codes = _scratch_service(args.db, args.coupons)
+    workers = [{"_id": ObjectId(), "name": f"Worker {i}", "mobile": ""} for i in range(args.threads)]
+    attempts = [code for code in codes for _ in range(args.scans_per_coupon)]
+    awarded = Counter()
+    lock = threading.Lock()
+    start_gate = threading.Barrier(args.threads)
+
+    def worker_loop(index):
+        start_gate.wait()
+        worker = workers[index]
+        mine = attempts[index::args.threads]
+        for offset in range(0, len(mine), args.batch_size):
+            for result in scan(service, mine[offset:offset + args.batch_size], worker):
+                if result.get("success"):
+                    with lock:
+                        awarded[result["coupon_code"]] += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        list(pool.map(worker_loop, range(args.threads)))
+    elapsed = time.perf_counter() - started
+
+    double = sum(1 for code in codes if awarded[code] > 1)
+    never = sum(1 for code in codes if awarded[code] == 0)
+    print(f"{label:>8}: {len(attempts)} scans in {elapsed:6.2f} s ({len(attempts) / elapsed:8.0f}/s)  "
+          f"awarded {sum(awarded.values())} for {len(codes)} coupons  double-awarded {double}  never-awarded {never}")
+    return double == 0 and never == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scan the same coupons concurrently and count awards")
+    parser.add_argument("--coupons", type=int, default=200)
+    parser.add_argument("--scans-per-coupon", type=int, default=10)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--batch-size", type=int, default=1, help="Codes per scan request")
+    parser.add_argument("--legacy", action="store_true", help="Also run the old read-then-update scan")
+    parser.add_argument("--db", default="trust_rewards_scan_bench", help="Scratch database (dropped)")
+    args = parser.parse_args()
+
+    try:
+        ok = run("atomic", lambda service, codes, worker: service._claim_coupons(codes, worker), args)
+        if args.legacy:
+            run("legacy", legacy_scan, args)
+    finally:
+        client1.drop_database(args.db)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Serialization benchmark for large list payloads.
+
+Compares the old response path (stringify ObjectIds in the service, then
+FastAPI's jsonable_encoder + json.dumps) with `BSONJSONResponse`, which encodes
+raw documents in one pass. Payloads are either synthetic ledger/coupon-shaped
+documents or real documents read from a collection.
+
+Usage:
+    python -m scripts.benchmark_json_response --rows 1000 --repeat 50
+    python -m scripts.benchmark_json_response --collection transaction_ledger --rows 500
+"""
+
+import argparse
+import copy
+import json
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from bson import Decimal128, ObjectId
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+
+from app.utils.json_response import ORJSON_AVAILABLE, BSONJSONResponse
+
+
+def synthetic_rows(rows):
+    now = datetime.now()
+    docs = []
+    for i in range(rows):
+        docs.append({
+            "_id": ObjectId(),
+            "transaction_id": f"TXN_{ObjectId()}",
+            "worker_id": str(ObjectId()),
+            "transaction_type": "CREDIT" if i % 3 else "DEBIT",
+            "amount": 50 + i % 200,
+            "description": f"Coupon scan reward for batch B{i % 40:04d}",
+            "previous_balance": 1000 + i,
+            "new_balance": 1050 + i,
+            "transaction_date": (now - timedelta(days=i % 90)).strftime("%Y-%m-%d"),
+            "transaction_datetime": now - timedelta(minutes=i),
+            "mrp": Decimal128(f"{199 + i % 50}.50"),
+            "status": "completed",
+            "created_by": str(ObjectId()),
+            "created_by_name": "Admin User",
+        })
+    return docs
+
+
+def collection_rows(collection_name, rows):
+    from trust_rewards.database import client1
+    return list(client1["trust_rewards"][collection_name].find({}).limit(rows))
+
+
+def _stringify_ids(docs):
+    """What the services used to do before handing documents to the route"""
+    for doc in docs:
+        doc["_id"] = str(doc["_id"])
+        for key, value in doc.items():
+            if isinstance(value, ObjectId):
+                doc[key] = str(value)
+            elif isinstance(value, Decimal128):
+                doc[key] = float(value.to_decimal())
+    return docs
+
+
+def old_path(docs):
+    body = {"success": True, "msg": "", "statuscode": 200, "data": {"records": _stringify_ids(docs)}}
+    return JSONResponse(content=jsonable_encoder(body)).body
+
+
+def new_path(docs):
+    body = {"success": True, "msg": "", "statuscode": 200, "data": {"records": docs}}
+    return BSONJSONResponse(content=body).body
+
+
+def time_path(fn, docs, repeat):
+    timings = []
+    size = 0
+    for _ in range(repeat):
+        # Both paths get a fresh copy: the old one mutates its input
+        payload = copy.deepcopy(docs)
+        started = time.perf_counter()
+        size = len(fn(payload))
+        timings.append((time.perf_counter() - started) * 1000.0)
+    return timings, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JSON encoding of large list payloads")
+    parser.add_argument("--rows", type=int, default=1000, help="Documents per payload")
+    parser.add_argument("--repeat", type=int, default=30, help="Encodings per path")
+    parser.add_argument("--collection", help="Read documents from this trust_rewards collection instead")
+    args = parser.parse_args()
+
+    docs = collection_rows(args.collection, args.rows) if args.collection else synthetic_rows(args.rows)
+    if not docs:
+        print("No documents to encode")
+        return
+
+    old_timings, old_size = time_path(old_path, docs, args.repeat)
+    new_timings, new_size = time_path(new_path, docs, args.repeat)
+
+    # Same JSON either way (modulo key order / whitespace)
+    same = json.loads(old_path(copy.deepcopy(docs))) == json.loads(new_path(copy.deepcopy(docs)))
+
+    print(f"Rows: {len(docs)}  repeat: {args.repeat}  orjson: {ORJSON_AVAILABLE}  identical output: {same}")
+    for label, timings, size in (
+        ("jsonable_encoder", old_timings, old_size),
+        ("BSONJSONResponse", new_timings, new_size),
+    ):
+        print(f"{label:>18}: median {statistics.median(timings):8.2f} ms  "
+              f"min {min(timings):8.2f} ms  body {size / 1024:.1f} KiB")
+    print(f"Speedup (median): {statistics.median(old_timings) / statistics.median(new_timings):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
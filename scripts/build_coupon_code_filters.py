@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Build the per-batch filters of issued coupon codes used by scans when
+COUPON_CODE_FILTER=1 (see `trust_rewards/utils/coupon_codes.py`).
+
+New batches get their filter when their generation job ends; run this once
+for the batches that existed before, and with `--all` to rebuild everything.
+The filter only rejects codes while every batch has one.
+
+Usage:
+    python -m scripts.build_coupon_code_filters
+    python -m scripts.build_coupon_code_filters --all
+"""
+
+import argparse
+import time
+
+from trust_rewards.database import client1
+from trust_rewards.utils.coupon_codes import CouponCodeFilter
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build coupon code filters for coupon batches")
+    parser.add_argument("--all", action="store_true", help="Rebuild batches that already have a filter")
+    args = parser.parse_args()
+
+    db = client1["trust_rewards"]
+    built = set() if args.all else {doc["_id"] for doc in db["coupon_code_filters"].find({}, {"_id": 1})}
+    for master in db["coupon_master"].find({}, {"batch_number": 1, "generation_status": 1}):
+        master_id = str(master["_id"])
+        if master_id in built:
+            continue
+        if master.get("generation_status") in ("queued", "generating"):
+            print(f"{master.get('batch_number')}: still generating, skipped (built when its job ends)")
+            continue
+        started = time.perf_counter()
+        count = CouponCodeFilter.build(master_id)
+        print(f"{master.get('batch_number')}: {count} codes in {time.perf_counter() - started:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Catalog list count check.
+
+`WebMasterService.get_categories_list` and `get_sub_categories_list` report
+active sub-category / product counts per row from one grouped aggregation
+per page. This walks every page of both lists and compares each row's
+counts with a `count_documents` per row (the previous implementation).
+
+By default it runs on a scratch database seeded with active and inactive
+sub-categories and products, empty categories and products pointing at
+missing parents, then dropped. `--live` checks the real trust_rewards
+catalog instead (read-only).
+
+Exits non-zero on any mismatch.
+
+Usage:
+    python -m scripts.check_catalog_counts
+    python -m scripts.check_catalog_counts --categories 60 --products 3000
+    python -m scripts.check_catalog_counts --live
+"""
+
+import argparse
+import random
+import sys
+from datetime import datetime
+
+from trust_rewards.database import client1
+from trust_rewards.services.web_master_services import WebMasterService
+
+
+def _seed(db, args):
+    rng = random.Random(args.seed)
+    now = datetime.now()
+    stamp = {"created_at": now.strftime("%Y-%m-%d"), "created_time": now.strftime("%H:%M:%S")}
+    statuses = ["active", "active", "active", "inactive"]
+    categories = [
+        str(db["category_master"].insert_one({"category_name": f"Category {c}", "status": rng.choice(statuses),
+                                              **stamp}).inserted_id)
+        for c in range(args.categories)
+    ]
+    # Every fifth category stays empty
+    sub_categories = [
+        (category_id, str(db["sub_category_master"].insert_one({
+            "category_id": category_id, "sub_category_name": f"Sub {s}", "status": rng.choice(statuses), **stamp
+        }).inserted_id))
+        for i, category_id in enumerate(categories) if i % 5
+        for s in range(rng.randint(0, 6))
+    ]
+    products = []
+    for p in range(args.products):
+        category_id, sub_id = rng.choice(sub_categories)
+        if p % 50 == 0:
+            sub_id = "000000000000000000000000"
+        products.append({"category_id": category_id, "sub_category_id": sub_id, "product_name": f"Product {p}",
+                         "status": rng.choice(statuses), **stamp})
+    if products:
+        db["product_master"].insert_many(products)
+
+
+def _pages(list_method, limit):
+    page = 1
+    while True:
+        result = list_method({"page": page, "limit": limit, "include_stats": False})
+        if not result.get("success"):
+            raise RuntimeError(result.get("message"))
+        yield from result["data"]["records"]
+        if not result["data"]["pagination"]["has_next"]:
+            return
+        page += 1
+
+
+def check(service, limit):
+    mismatches = []
+    categories = 0
+    for record in _pages(service.get_categories_list, limit):
+        categories += 1
+        category_id = str(record["_id"])
+        expected = (
+            service.sub_categories.count_documents({"category_id": category_id, "status": "active"}),
+            service.product_master.count_documents({"category_id": category_id, "status": "active"}),
+        )
+        got = (record["total_sub_category_count"], record["total_product_count"])
+        if got != expected:
+            mismatches.append(f"category {category_id}: (sub_categories, products) {got} != {expected}")
+
+    sub_categories = 0
+    for record in _pages(service.get_sub_categories_list, limit):
+        sub_categories += 1
+        sub_category_id = str(record["_id"])
+        expected = service.product_master.count_documents({"sub_category_id": sub_category_id, "status": "active"})
+        if record["total_product_count"] != expected:
+            mismatches.append(f"sub-category {sub_category_id}: products {record['total_product_count']} != {expected}")
+    return categories, sub_categories, mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare grouped catalog list counts with per-row counts")
+    parser.add_argument("--categories", type=int, default=30)
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=7, help="Page size (small, to cross page boundaries)")
+    parser.add_argument("--seed", type=int, default=11)
+    parser.add_argument("--db", default="trust_rewards_check_catalog_counts")
+    parser.add_argument("--live", action="store_true", help="Check the trust_rewards catalog (read-only)")
+    args = parser.parse_args()
+
+    service = WebMasterService()
+    if not args.live:
+        client1.drop_database(args.db)
+        db = client1[args.db]
+        _seed(db, args)
+        service.categories = db["category_master"]
+        service.sub_categories = db["sub_category_master"]
+        service.product_master = db["product_master"]
+    try:
+        categories, sub_categories, mismatches = check(service, args.limit)
+    finally:
+        if not args.live:
+            client1.drop_database(args.db)
+
+    print(f"Checked {categories} categories and {sub_categories} sub-categories")
+    for mismatch in mismatches:
+        print(f"MISMATCH {mismatch}")
+    if mismatches:
+        sys.exit(1)
+    print("All counts match")
+
+
+if __name__ == "__main__":
+    main()
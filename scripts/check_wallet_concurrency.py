@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Mixed scan / redeem wallet concurrency check.
+
+Runs coupon scans (`AppCouponService.scan_coupon`), gift redemptions
+(`AppRedeemService.redeem_gift`) and cancellations
+(`AppRedeemService.cancel_redemption`) for one worker from many threads at
+once, against a scratch database, then checks the wallet invariants:
+
+- final `wallet_points` == starting balance + sum of ledger amounts
+- no ledger entry records a negative balance, and each entry's
+  new_balance - previous_balance == amount
+- every successful redemption has exactly one debit, every cancellation
+  exactly one refund
+- the counters in `wallet_stats` match a rebuild from the ledger
+- the run did real work: every coupon was scanned exactly once (one
+  COUPON_SCAN ledger entry each) and some redemptions succeeded, so requests
+  failing with validation or OTP errors cannot make it pass vacuously
+
+Exits non-zero on any violation.
+
+Usage:
+    python -m scripts.check_wallet_concurrency
+    python -m scripts.check_wallet_concurrency --threads 32 --coupons 2000 --redeems 400
+"""
+
+import argparse
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from pymongo.collection import Collection
+
+from trust_rewards.database import client1
+from trust_rewards.services.app_coupon_services import AppCouponService
+from trust_rewards.services.app_redeem_services import AppRedeemService
+from trust_rewards.utils.activity import RecentActivityLogger
+from trust_rewards.utils.coupon_codes import CouponCodeFilter
+from trust_rewards.utils.leaderboard import Leaderboard
+from trust_rewards.utils.ledger_archive import LedgerPartitions
+from trust_rewards.utils.rollups import AnalyticsRollups
+from trust_rewards.utils.transaction import TransactionLogger
+from trust_rewards.utils.wallet import Wallet, WalletStats
+
+
+def _point_at(db, *services):
+    """Rebind the services' collections and the shared loggers to the scratch database"""
+    for service in services:
+        for attr, value in list(vars(service).items()):
+            if isinstance(value, Collection):
+                setattr(service, attr, db[value.name])
+    Wallet._collection = staticmethod(lambda: db["skilled_workers"])
+    WalletStats._collection = staticmethod(lambda: db["skilled_workers"])
+    TransactionLogger._collection = staticmethod(lambda: db["transaction_ledger"])
+    LedgerPartitions._collection = staticmethod(lambda: db["transaction_ledger"])
+    RecentActivityLogger._collection = staticmethod(lambda: db["recent_activity"])
+    Leaderboard._collection = staticmethod(lambda: db["leaderboard"])
+    AnalyticsRollups._collection = staticmethod(lambda: db["analytics_rollups"])
+    CouponCodeFilter._db = staticmethod(lambda: db)
+
+
+def _seed(db, args):
+    today = datetime.now()
+    worker_id = db["skilled_workers"].insert_one({
+        "name": "Concurrency Worker", "mobile": "", "status": "Active",
+        "wallet_points": args.starting_balance, "coupons_scanned": 0,
+    }).inserted_id
+    WalletStats.rebuild([str(worker_id)])
+    gift_id = db["gift_master"].insert_one({
+        "name": "Concurrency Gift", "status": "active", "points_required": args.gift_cost,
+    }).inserted_id
+    db["otp_verification"].insert_one({
+        "worker_id": str(worker_id), "purpose": "gift_redemption", "is_used": True,
+        "used_at": today, "verification_token": "check-token",
+    })
+    codes = []
+    for _ in range(args.coupons):
+        coupon_id = ObjectId()
+        codes.append(str(coupon_id))
+        db["coupon_code"].insert_one({
+            "_id": coupon_id, "coupon_code": str(coupon_id), "coupon_master_id": None,
+            "coupon_value": args.coupon_value, "points_value": args.coupon_value, "batch_number": "CHECK",
+            "valid_from": (today - timedelta(days=1)).strftime("%Y-%m-%d"),
+            "valid_to": (today + timedelta(days=1)).strftime("%Y-%m-%d"),
+            "status": "active", "is_scanned": False,
+        })
+    return str(worker_id), str(gift_id), codes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent scans, redemptions and cancellations on one wallet")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--coupons", type=int, default=1000)
+    parser.add_argument("--coupon-value", type=int, default=10)
+    parser.add_argument("--scan-batch", type=int, default=5, help="Codes per scan request")
+    parser.add_argument("--redeems", type=int, default=300, help="Redemption attempts")
+    parser.add_argument("--gift-cost", type=int, default=40)
+    parser.add_argument("--cancel-ratio", type=float, default=0.3, help="Share of redemptions cancelled")
+    parser.add_argument("--starting-balance", type=int, default=100)
+    parser.add_argument("--db", default="trust_rewards_wallet_check", help="Scratch database (dropped)")
+    args = parser.parse_args()
+
+    client1.drop_database(args.db)
+    db = client1[args.db]
+    scan_service, redeem_service = AppCouponService(), AppRedeemService()
+    _point_at(db, scan_service, redeem_service)
+    worker_id, gift_id, codes = _seed(db, args)
+    user = {"worker_id": worker_id}
+    problems = []
+
+    tasks = [("scan", codes[i:i + args.scan_batch]) for i in range(0, len(codes), args.scan_batch)]
+    tasks += [("redeem", None)] * args.redeems
+    random.shuffle(tasks)
+
+    def run(task):
+        kind, batch = task
+        if kind == "scan":
+            return kind, scan_service.scan_coupon({"coupon_code": batch}, user)
+        result = redeem_service.redeem_gift({"gift_id": gift_id, "verification_token": "check-token"}, user)
+        if result.get("success") and random.random() < args.cancel_ratio:
+            cancel = redeem_service.cancel_redemption({"redemption_id": result["data"]["redemption_id"]}, user)
+            return "redeem+cancel", cancel
+        return kind, result
+
+    try:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.threads) as pool:
+            outcomes = list(pool.map(run, tasks))
+        elapsed = time.perf_counter() - started
+
+        errors = [r for _, r in outcomes if not r.get("success") and r.get("error", {}).get("code") == "SERVER_ERROR"]
+        ledger = list(db["transaction_ledger"].find({"worker_id": worker_id}))
+        final = db["skilled_workers"].find_one({"_id": ObjectId(worker_id)})["wallet_points"]
+        debits = [e for e in ledger if e["transaction_type"] == "GIFT_REDEMPTION_REQUEST"]
+        refunds = [e for e in ledger if e["transaction_type"] == "REDEMPTION_CANCELLATION"]
+        scans = [e for e in ledger if e["transaction_type"] == "COUPON_SCAN"]
+        scanned = sum(r["data"]["successful_scans"] for kind, r in outcomes if kind == "scan" and r.get("success"))
+        redemptions = db["gift_redemptions"].count_documents({"worker_id": worker_id})
+        cancelled = db["gift_redemptions"].count_documents({"worker_id": worker_id, "status": "cancelled"})
+
+        if final != args.starting_balance + sum(e["amount"] for e in ledger):
+            problems.append(f"wallet {final} != start {args.starting_balance} + ledger {sum(e['amount'] for e in ledger)}")
+        if any(e["new_balance"] < 0 or e["previous_balance"] < 0 for e in ledger):
+            problems.append("ledger records a negative balance")
+        if any(e["new_balance"] - e["previous_balance"] != e["amount"] for e in ledger):
+            problems.append("ledger entry balances do not match its amount")
+        if len(debits) != redemptions:
+            problems.append(f"{redemptions} redemptions but {len(debits)} debits")
+        if len(refunds) != cancelled:
+            problems.append(f"{cancelled} cancellations but {len(refunds)} refunds")
+        counters = ("earned", "redeemed", "coupon_scans", "redeems", "redeem_pending")
+        live = db["skilled_workers"].find_one({"_id": ObjectId(worker_id)})["wallet_stats"]
+        rebuilt = WalletStats.rebuild([worker_id])[worker_id]
+        drift = {k: (live.get(k), rebuilt[k]) for k in counters if live.get(k) != rebuilt[k]}
+        if drift:
+            problems.append(f"wallet_stats drifted from the ledger (live, rebuilt): {drift}")
+        if scanned != len(codes):
+            problems.append(f"{scanned} of {len(codes)} coupons scanned successfully")
+        if len(scans) != scanned:
+            problems.append(f"{scanned} coupons scanned but {len(scans)} COUPON_SCAN ledger entries")
+        if args.redeems and not redemptions:
+            problems.append(f"none of {args.redeems} redemption attempts succeeded")
+        if errors:
+            problems.append(f"{len(errors)} requests failed with SERVER_ERROR, e.g. {errors[0].get('message')}")
+
+        print(f"{len(tasks)} requests on {args.threads} threads in {elapsed:.2f} s; "
+              f"final balance {final}, {len(ledger)} ledger entries, "
+              f"{scanned} coupons scanned, {redemptions} redemptions ({cancelled} cancelled)")
+        for problem in problems:
+            print(f"FAIL: {problem}")
+        if not problems:
+            print("OK: wallet and ledger are consistent")
+    finally:
+        client1.drop_database(args.db)
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+N+1 query detector for list endpoints.
+
+Runs each registered list endpoint's service call at two page sizes against a
+real database and flags endpoints whose DB command count grows with page size
+or exceeds its command budget. Repeated query shapes are reported with the
+file:line that issued them. Exits non-zero when any endpoint fails, so it can
+gate CI or a benchmark run.
+
+Usage:
+    python -m scripts.detect_n_plus_one
+    python -m scripts.detect_n_plus_one --only trust_rewards --small 5 --large 25
+    python -m scripts.detect_n_plus_one --sfa-user-id <id> --tenant-id <tenant> --coupon-master-id <id>
+
+Growth can only be observed when the collection holds at least `--large` rows
+matching the filter.
+"""
+
+import argparse
+import json
+import sys
+
+from app.utils.n_plus_one import check_page_scaling, format_repeated
+
+
+def _checks(args):
+    """(module, endpoint, budget, call(page_size)) for every endpoint under test"""
+    from trust_rewards.services.web_master_services import WebMasterService
+    from trust_rewards.services.web_coupon_services import CouponService
+
+    master = WebMasterService()
+    checks = [
+        ("trust_rewards", "points_master_list", 8,
+         lambda n: master.get_points_master_list({"page": 1, "limit": n})),
+        ("trust_rewards", "category_master_list", 8,
+         lambda n: master.get_categories_list({"page": 1, "limit": n})),
+        ("trust_rewards", "sub_category_master_list", 8,
+         lambda n: master.get_sub_categories_list({"page": 1, "limit": n})),
+        ("trust_rewards", "product_master_list", 8,
+         lambda n: master.get_product_master_list({"page": 1, "limit": n})),
+        ("trust_rewards", "gift_master_list", 8,
+         lambda n: master.get_gift_master_list({"page": 1, "limit": n})),
+    ]
+
+    if args.coupon_master_id:
+        checks.append(("trust_rewards", "coupon_list", 6,
+                       lambda n: CouponService().get_coupons_list(
+                           {"coupon_master_id": args.coupon_master_id, "page": 1, "limit": n})))
+
+    if args.sfa_user_id:
+        from sfa.services.app_order_services import AppOrderService
+        checks.append(("sfa", "app_order_list", 12,
+                       lambda n: AppOrderService().list_orders(args.sfa_user_id, page=1, limit=n)))
+
+    if args.tenant_id:
+        from app.services.leave_service import LeaveService
+        checks.append(("hrms", "leave_requests", 4,
+                       lambda n: LeaveService().get_leave_requests(args.tenant_id, {"page": 1, "page_size": n})))
+
+    return [c for c in checks if not args.only or c[0] == args.only]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Detect N+1 query patterns in list endpoints")
+    parser.add_argument("--small", type=int, default=5, help="Small page size")
+    parser.add_argument("--large", type=int, default=20, help="Large page size")
+    parser.add_argument("--min-repeats", type=int, default=3, help="Repeats before a query shape is reported")
+    parser.add_argument("--only", choices=["trust_rewards", "sfa", "hrms"], help="Limit to one module")
+    parser.add_argument("--coupon-master-id", default="", help="Coupon batch for the coupon list endpoint")
+    parser.add_argument("--sfa-user-id", default="", help="User id for SFA app endpoints")
+    parser.add_argument("--tenant-id", default="", help="Tenant id for HRMS endpoints")
+    parser.add_argument("--json", action="store_true", help="Print the full report as JSON")
+    args = parser.parse_args()
+
+    report = {}
+    failed = []
+    for module, endpoint, budget, call in _checks(args):
+        name = f"{module}.{endpoint}"
+        result = check_page_scaling(call, args.small, args.large, budget=budget, min_repeats=args.min_repeats)
+        report[name] = result
+        if not result["ok"]:
+            failed.append(name)
+
+        if not args.json:
+            status = "OK  " if result["ok"] else "FAIL"
+            print(f"{status} {name}: calls={result['calls']} budget={budget} "
+                  f"extra/row={result['extra_commands_per_row']}")
+            if result["repeated"]:
+                print(format_repeated(result["repeated"]))
+
+    if args.json:
+        print(json.dumps(report, indent=2, default=str))
+
+    if failed:
+        print(f"\n{len(failed)} endpoint(s) failed: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Create or reconcile the MongoDB indexes declared in each module's
+`database_indexes.py`, and report queries that fell back to a COLLSCAN.
+
+Usage:
+    python -m scripts.ensure_indexes                      # create missing indexes
+    python -m scripts.ensure_indexes --dry-run            # only show what would change
+    python -m scripts.ensure_indexes --drop-conflicting   # rebuild indexes whose definition changed
+    python -m scripts.ensure_indexes --enable-profiling 100
+    python -m scripts.ensure_indexes --report-collscans --since-minutes 60
+
+The COLLSCAN report reads `system.profile`, so profiling has to be enabled on
+the databases first (see --enable-profiling).
+"""
+
+import argparse
+import json
+import sys
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from pymongo.errors import OperationFailure
+
+# Options that change index behaviour; anything else (v, ns, background) is ignored
+# when comparing a declared index with the one on the server
+COMPARED_OPTIONS = ("unique", "sparse", "partialFilterExpression", "expireAfterSeconds")
+
+
+def _registered_targets():
+    """Yield (client, db_name, collection_name, index_models) for every declared index set"""
+    from app.database import client1 as hrms_client
+    from app.database_indexes import INDEXES as HRMS_INDEXES, TENANT_INDEXES
+    from sfa.database import client1 as sfa_client
+    from sfa.database_indexes import INDEXES as SFA_INDEXES
+    from trust_rewards.database import client1 as trust_rewards_client
+    from trust_rewards.database_indexes import INDEXES as TRUST_REWARDS_INDEXES
+
+    for client, registry in (
+        (trust_rewards_client, TRUST_REWARDS_INDEXES),
+        (sfa_client, SFA_INDEXES),
+        (hrms_client, HRMS_INDEXES),
+    ):
+        for db_name, collections in registry.items():
+            for collection_name, models in collections.items():
+                yield client, db_name, collection_name, models
+
+    # Monthly transaction_ledger archives carry the ledger's indexes
+    ledger_models = TRUST_REWARDS_INDEXES["trust_rewards"]["transaction_ledger"]
+    for partition in trust_rewards_client["trust_rewards"]["ledger_partitions"].find({}, {"collection": 1}):
+        yield trust_rewards_client, "trust_rewards", partition["collection"], ledger_models
+
+    tenant_ids = hrms_client["hrms_master"]["tenants"].distinct("tenant_id")
+    for tenant_id in tenant_ids:
+        if not tenant_id:
+            continue
+        for collection_name, models in TENANT_INDEXES.items():
+            yield hrms_client, str(tenant_id), collection_name, models
+
+
+def _normalize_key(key):
+    pairs = key.items() if hasattr(key, "items") else key
+    return [(field, int(direction) if isinstance(direction, (int, float)) else direction) for field, direction in pairs]
+
+
+def _options(spec):
+    return {k: spec[k] for k in COMPARED_OPTIONS if k in spec}
+
+
+def reconcile_collection(collection, models, dry_run=False, drop_conflicting=False):
+    """Bring one collection's indexes in line with the declared models.
+
+    Returns a list of action records: ok / create / conflict / rebuild / error.
+    """
+    actions = []
+    existing = collection.index_information()
+    existing_by_key = {tuple(_normalize_key(spec["key"])): name for name, spec in existing.items()}
+    ns = f"{collection.database.name}.{collection.name}"
+
+    for model in models:
+        document = model.document
+        name = document["name"]
+        key = _normalize_key(document["key"])
+        wanted = _options(document)
+        record = {"ns": ns, "index": name, "key": key}
+
+        current = existing.get(name)
+        if current is None and tuple(key) in existing_by_key:
+            # Same key already indexed under a hand-made name
+            current = existing[existing_by_key[tuple(key)]]
+            record["existing_name"] = existing_by_key[tuple(key)]
+
+        if current is not None:
+            if _normalize_key(current["key"]) == key and _options(current) == wanted:
+                actions.append({**record, "action": "ok"})
+                continue
+            if not drop_conflicting:
+                actions.append({**record, "action": "conflict", "existing": _options(current)})
+                continue
+            record["action"] = "rebuild"
+            if not dry_run:
+                try:
+                    collection.drop_index(record.get("existing_name", name))
+                    collection.create_indexes([model])
+                except OperationFailure as e:
+                    record = {**record, "action": "error", "details": str(e)}
+            actions.append(record)
+            continue
+
+        record["action"] = "create"
+        if not dry_run:
+            try:
+                collection.create_indexes([model])
+            except OperationFailure as e:
+                record = {**record, "action": "error", "details": str(e)}
+        actions.append(record)
+
+    return actions
+
+
+def ensure_all_indexes(dry_run=False, drop_conflicting=False):
+    """Reconcile every registered index; safe to run repeatedly"""
+    actions = []
+    for client, db_name, collection_name, models in _registered_targets():
+        collection = client[db_name][collection_name]
+        actions.extend(reconcile_collection(collection, models, dry_run, drop_conflicting))
+    return actions
+
+
+def _registered_databases():
+    seen = set()
+    for client, db_name, _, _ in _registered_targets():
+        if db_name not in seen:
+            seen.add(db_name)
+            yield client[db_name]
+
+
+def enable_profiling(slowms):
+    """Turn on profiling of slow operations for every registered database"""
+    for database in _registered_databases():
+        database.command("profile", 1, slowms=slowms)
+        print(f"Profiling enabled on {database.name} (slowms={slowms})")
+
+
+def _shape(value):
+    """Replace literal values in a filter with 1 so equal query shapes group together"""
+    if isinstance(value, dict):
+        return {k: _shape(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_shape(v) for v in value[:1]]
+    return 1
+
+
+def collscan_report(since_minutes=60):
+    """Group profiled COLLSCAN operations by namespace and query shape"""
+    since = datetime.utcnow() - timedelta(minutes=since_minutes)
+    groups = defaultdict(lambda: {"count": 0, "max_millis": 0, "total_docs_examined": 0})
+
+    for database in _registered_databases():
+        entries = database["system.profile"].find(
+            {"planSummary": "COLLSCAN", "ts": {"$gte": since}},
+            {"ns": 1, "op": 1, "command": 1, "millis": 1, "docsExamined": 1},
+        )
+        for entry in entries:
+            command = entry.get("command", {})
+            query = command.get("filter") or command.get("query") or command.get("pipeline") or {}
+            shape = json.dumps(_shape(query), sort_keys=True, default=str)
+            group = groups[(entry.get("ns", ""), entry.get("op", ""), shape)]
+            group["count"] += 1
+            group["max_millis"] = max(group["max_millis"], entry.get("millis", 0))
+            group["total_docs_examined"] += entry.get("docsExamined", 0)
+
+    report = [
+        {"ns": ns, "op": op, "shape": json.loads(shape), **stats}
+        for (ns, op, shape), stats in groups.items()
+    ]
+    report.sort(key=lambda r: r["total_docs_examined"], reverse=True)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create/reconcile MongoDB indexes for all modules")
+    parser.add_argument("--dry-run", action="store_true", help="Only print the planned changes")
+    parser.add_argument("--drop-conflicting", action="store_true",
+                        help="Drop and rebuild indexes whose definition differs from the registry")
+    parser.add_argument("--enable-profiling", type=int, metavar="SLOWMS",
+                        help="Enable the profiler for slow operations on every registered database")
+    parser.add_argument("--report-collscans", action="store_true",
+                        help="Report profiled queries that used a COLLSCAN")
+    parser.add_argument("--since-minutes", type=int, default=60, help="Window for --report-collscans")
+    args = parser.parse_args()
+
+    if args.enable_profiling is not None:
+        enable_profiling(args.enable_profiling)
+        return
+
+    if args.report_collscans:
+        report = collscan_report(args.since_minutes)
+        print(json.dumps(report, indent=2, default=str))
+        return
+
+    actions = ensure_all_indexes(dry_run=args.dry_run, drop_conflicting=args.drop_conflicting)
+    summary = defaultdict(int)
+    for action in actions:
+        summary[action["action"]] += 1
+        if action["action"] != "ok":
+            print(json.dumps(action, default=str))
+    print(f"Done{' (dry run)' if args.dry_run else ''}: " + ", ".join(f"{k}={v}" for k, v in sorted(summary.items())))
+
+    if summary.get("error"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
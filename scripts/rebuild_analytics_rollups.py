@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Rebuild the coupon dashboard rollups (`analytics_rollups`) from `coupon_code`.
+
+The dashboards queue the first build themselves and read the live
+collections until it finishes; run this to correct drift (e.g. a scan whose
+rollup update failed) or after editing coupons directly. `--queue` enqueues
+the rebuild on the Trust Rewards job queue instead of running it here.
+
+Usage:
+    python -m scripts.rebuild_analytics_rollups
+    python -m scripts.rebuild_analytics_rollups --queue
+"""
+
+import argparse
+import time
+
+from trust_rewards.utils.rollups import AnalyticsRollups
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild coupon analytics rollups from coupon_code")
+    parser.add_argument("--queue", action="store_true", help="Enqueue an analytics_rollup_rebuild job instead")
+    args = parser.parse_args()
+
+    if args.queue:
+        from trust_rewards.workers.queue import ANALYTICS_ROLLUP_REBUILD_JOB, job_queue
+        job = job_queue.enqueue(ANALYTICS_ROLLUP_REBUILD_JOB, {}, created_by="script")
+        print(f"Enqueued {job['job_id']}")
+        return
+
+    started = time.perf_counter()
+    result = AnalyticsRollups.rebuild()
+    print(f"{result['buckets']} buckets, {result['scanning_workers']} scanning workers "
+          f"in {time.perf_counter() - started:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Rebuild Super30 leaderboard periods from `transaction_ledger`.
+
+Periods are built on first read, so this is only needed to correct drift or
+after editing the ledger. `--queue` enqueues the rebuild on the Trust Rewards
+job queue instead of running it here.
+
+Usage:
+    python -m scripts.rebuild_leaderboard
+    python -m scripts.rebuild_leaderboard --period all_time --period 2025-03
+    python -m scripts.rebuild_leaderboard --queue
+"""
+
+import argparse
+import time
+
+from trust_rewards.utils.leaderboard import ALL_TIME, Leaderboard
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild leaderboard periods from the ledger")
+    parser.add_argument("--period", action="append", dest="periods",
+                        help="all_time or a month (YYYY-MM), repeatable; default all_time and this month")
+    parser.add_argument("--queue", action="store_true", help="Enqueue a leaderboard_rebuild job instead")
+    args = parser.parse_args()
+    periods = args.periods or [ALL_TIME, Leaderboard.month_key()]
+
+    if args.queue:
+        from trust_rewards.workers.queue import LEADERBOARD_REBUILD_JOB, job_queue
+        job = job_queue.enqueue(LEADERBOARD_REBUILD_JOB, {"periods": periods}, created_by="script")
+        print(f"Enqueued {job['job_id']}")
+        return
+
+    for period in periods:
+        started = time.perf_counter()
+        workers = Leaderboard.rebuild(period)
+        print(f"{period}: {workers} workers in {time.perf_counter() - started:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Rebuild the materialized `skilled_workers.wallet_stats` (wallet screen totals,
+counts and recent transactions) from `transaction_ledger` and
+`gift_redemptions`.
+
+Run after restoring data, editing the ledger by hand, or periodically to
+correct drift. `--queue` enqueues the rebuild on the Trust Rewards job queue
+instead of running it here.
+
+Usage:
+    python -m scripts.reconcile_wallet_stats
+    python -m scripts.reconcile_wallet_stats --worker-id 64f... --worker-id 650...
+    python -m scripts.reconcile_wallet_stats --queue
+"""
+
+import argparse
+import time
+
+from trust_rewards.utils.wallet import WalletStats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild wallet_stats from the ledger")
+    parser.add_argument("--worker-id", action="append", dest="worker_ids",
+                        help="Only this worker (repeatable); default all workers")
+    parser.add_argument("--queue", action="store_true", help="Enqueue a wallet_stats_reconcile job instead")
+    args = parser.parse_args()
+
+    if args.queue:
+        from trust_rewards.workers.queue import WALLET_STATS_RECONCILE_JOB, job_queue
+        job = job_queue.enqueue(WALLET_STATS_RECONCILE_JOB, {"worker_ids": args.worker_ids}, created_by="script")
+        print(f"Enqueued {job['job_id']}")
+        return
+
+    started = time.perf_counter()
+    rebuilt = WalletStats.rebuild(args.worker_ids)
+    print(f"Rebuilt wallet_stats for {len(rebuilt)} workers in {time.perf_counter() - started:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Request, Depends, Query
+from fastapi.concurrency import run_in_threadpool
 from sfa.services.app_beat_plan_services import AppBeatPlanService
 from sfa.utils.response import format_response
 from sfa.utils.auth_utils import get_current_user
@@ -13,7 +14,7 @@ async def get_areas(current_user: dict = Depends(get_current_user)):
         user_id = current_user.get("user_id")
         
         service = AppBeatPlanService()
-        result = service.get_areas(user_id)
+        result = await run_in_threadpool(service.get_areas, user_id)
         
         if not result.get("success"):
             return format_response(
@@ -71,7 +72,7 @@ async def get_customers_by_area(
             )
         
         service = AppBeatPlanService()
-        result = service.get_customers_by_area(area_id, user_id, user_lat, user_lng)
+        result = await run_in_threadpool(service.get_customers_by_area, area_id, user_id, user_lat, user_lng)
         
         if not result.get("success"):
             return format_response(
@@ -143,7 +144,8 @@ async def create_beat_plan(request: Request, current_user: dict = Depends(get_cu
             )
         
         service = AppBeatPlanService()
-        result = service.create_beat_plan(
+        result = await run_in_threadpool(
+            service.create_beat_plan,
             user_id=user_id,
             area_id=area_id,
             customer_ids=customer_ids,
@@ -234,7 +236,7 @@ async def get_beat_plan_list(request: Request, current_user: dict = Depends(get_
             )
 
         service = AppBeatPlanService()
-        result = service.get_beat_plan_list(user_id, status=status, active_tab=active_tab, limit=limit, user_lat=user_lat, user_lng=user_lng)
+        result = await run_in_threadpool(service.get_beat_plan_list, user_id, status=status, active_tab=active_tab, limit=limit, user_lat=user_lat, user_lng=user_lng)
         
         if not result.get("success"):
             return format_response(
@@ -277,7 +279,7 @@ async def get_beat_plans_by_day(
         user_id = current_user.get("user_id")
         
         service = AppBeatPlanService()
-        result = service.get_beat_plans_by_day(user_id, day_name, limit, user_lat, user_lng)
+        result = await run_in_threadpool(service.get_beat_plans_by_day, user_id, day_name, limit, user_lat, user_lng)
         
         if not result.get("success"):
             return format_response(
@@ -347,7 +349,8 @@ async def start_checkin(request: Request, current_user: dict = Depends(get_curre
             )
 
         service = AppBeatPlanService()
-        result = service.start_checkin(
+        result = await run_in_threadpool(
+            service.start_checkin,
             user_id=user_id,
             customer_id=customer_id,
             latitude=user_lat,
@@ -420,7 +423,7 @@ async def end_checkin(request: Request, current_user: dict = Depends(get_current
                 )
 
         service = AppBeatPlanService()
-        result = service.end_checkin(user_id, customer_id, plan_date, notes, rating)
+        result = await run_in_threadpool(service.end_checkin, user_id, customer_id, plan_date, notes, rating)
 
         if not result.get("success"):
             return format_response(
@@ -455,7 +458,7 @@ async def get_beat_plan_history(request: Request, current_user: dict = Depends(g
         period = body.get("period", "this_month")
         
         service = AppBeatPlanService()
-        result = service.get_beat_plan_history(user_id, period)
+        result = await run_in_threadpool(service.get_beat_plan_history, user_id, period)
         
         if not result.get("success"):
             return format_response(
@@ -497,7 +500,7 @@ async def get_beat_plan_detail(request: Request, current_user: dict = Depends(ge
             )
         
         service = AppBeatPlanService()
-        result = service.get_beat_plan_detail(user_id, beat_plan_id)
+        result = await run_in_threadpool(service.get_beat_plan_detail, user_id, beat_plan_id)
         
         if not result.get("success"):
             return format_response(
@@ -64,6 +64,8 @@ async def get_followup_list(request: Request, current_user: dict = Depends(get_c
         # Pagination parameters
         page = int(body.get("page", 1))
         limit = int(body.get("limit", 20))
+        cursor = body.get("cursor")
+        count_mode = body.get("count_mode")
         
         # Filter parameters
         status_filter = body.get("status_filter", "all")  # all, pending, completed, cancelled
@@ -73,7 +75,9 @@ async def get_followup_list(request: Request, current_user: dict = Depends(get_c
             user_id=user_id,
             status_filter=status_filter,
             page=page,
-            limit=limit
+            limit=limit,
+            cursor=cursor,
+            count_mode=count_mode
         )
         
         if not result.get("success"):
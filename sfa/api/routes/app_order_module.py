@@ -52,6 +52,8 @@ async def list_orders(request: Request, current_user: dict = Depends(get_current
         customer_id = body.get("customer_id")
         date_from = body.get("date_from")
         date_to = body.get("date_to")
+        cursor = body.get("cursor")
+        count_mode = body.get("count_mode")
 
         service = AppOrderService()
         result = service.list_orders(
@@ -62,6 +64,8 @@ async def list_orders(request: Request, current_user: dict = Depends(get_current
             customer_id=customer_id,
             date_from=date_from,
             date_to=date_to,
+            cursor=cursor,
+            count_mode=count_mode,
         )
         if not result.get("success"):
             return format_response(
@@ -612,8 +612,12 @@ async def employee_lists(request: Request):
         role = payload.get("role")
         location = payload.get("location")
         search = payload.get("search")
+        cursor = payload.get("cursor")
+        count_mode = payload.get("count_mode")
         instanceClass = EmployeeService()
-        result = instanceClass.list_employees(page, limit, status, department, role, location, search)
+        result = instanceClass.list_employees(page, limit, status, department, role, location, search, cursor, count_mode)
+        if not result["success"]:
+            return format_response(success=False, msg=result["message"], statuscode=400, data={"error": result.get("error")})
         # Include pagination data in the response data
         response_data = result["data"]
         if "total" in result:
@@ -622,7 +626,11 @@ async def employee_lists(request: Request):
                 "pagination": {
                     "total": result.get("total", 0),
                     "page": result.get("page", 1),
-                    "limit": result.get("limit", 20)
+                    "limit": result.get("limit", 20),
+                    "next_cursor": result.get("next_cursor"),
+                    "count_mode": result.get("count_mode"),
+                    "total_is_exact": result.get("total_is_exact", True),
+                    "total_display": result.get("total_display")
                 }
             }
         return format_response(success=result["success"], msg="", statuscode=200, data=response_data)
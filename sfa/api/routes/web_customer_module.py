@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Request, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
 from sfa.middlewares.web_customer_middleware import CustomerDataProcessor
 import traceback
 import json
@@ -119,7 +120,7 @@ async def customer_details(request: Request):
 async def customer_image(customer_id: str = Form(...), file: UploadFile = File(...)):
     instance = CustomerDataProcessor()
     try:
-        result = instance.customer_image_update(customer_id, file)
+        result = await run_in_threadpool(instance.customer_image_update, customer_id, file)
         return format_response(
             success=True,
             msg="Customer image updated successfully",
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Request, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
 from sfa.middlewares.web_lead_middleware import LeadDataProcessor
 import traceback
 from sfa.utils.response import format_response
@@ -72,7 +73,7 @@ async def lead_details(request: Request):
 async def lead_image(lead_id: str = Form(...), file: UploadFile = File(...)):
     instance = LeadDataProcessor()
     try:
-        result = instance.lead_image_update(lead_id, file)
+        result = await run_in_threadpool(instance.lead_image_update, lead_id, file)
         return format_response(
             success=True,
             msg="Lead image updated successfully",
@@ -1,6 +1,7 @@
 from pymongo import MongoClient
 from urllib.parse import quote_plus
 from config import settings
+from app.utils.db_profiler import db_command_listener
 
 class Database:
     _instance = None
@@ -16,7 +17,7 @@ class Database:
         self.db1_uri = f"mongodb+srv://{quote_plus(settings.DB1_USERNAME)}:{quote_plus(settings.DB1_PASSWORD)}@{settings.DB1_HOST}/?authSource={settings.DB1_AUTH_SOURCE}&ssl=true&retryWrites=false"
 
         # Create MongoDB clients
-        self.client1 = MongoClient(self.db1_uri)
+        self.client1 = MongoClient(self.db1_uri, event_listeners=[db_command_listener])
     
     def get_client1(self):
         return self.client1
@@ -0,0 +1,76 @@
+"""
+Index registry for the SFA databases (`talbros` and `field_squad`).
+
+Every hot query shape used by the services should be covered by an entry here.
+`scripts/ensure_indexes.py` creates/reconciles these indexes idempotently and
+reports queries that still fall back to a COLLSCAN.
+"""
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+
+INDEXES = {
+    "talbros": {
+        "customers": [
+            # Beat plan area/customer pickers
+            IndexModel([("assign_user_id", ASCENDING), ("status", ASCENDING), ("city", ASCENDING)],
+                       name="assign_user_id_status_city"),
+            IndexModel([("status", ASCENDING), ("created_at", DESCENDING)], name="status_created_at"),
+        ],
+        "beat_plan": [
+            IndexModel([("user_id", ASCENDING), ("is_active", ASCENDING), ("plan_date", DESCENDING)],
+                       name="user_id_is_active_plan_date"),
+            IndexModel([("user_id", ASCENDING), ("plan_day", ASCENDING)], name="user_id_plan_day"),
+        ],
+        "customer_checkins": [
+            # Check-in status per customer on a plan date
+            IndexModel([("user_id", ASCENDING), ("customer_id", ASCENDING), ("plan_date", ASCENDING)],
+                       name="user_id_customer_id_plan_date"),
+            IndexModel([("user_id", ASCENDING), ("plan_date", ASCENDING), ("status", ASCENDING)],
+                       name="user_id_plan_date_status"),
+        ],
+        "attendance": [
+            IndexModel([("user_id", ASCENDING), ("date", ASCENDING)], name="user_id_date"),
+            IndexModel([("user_id", ASCENDING), ("punch_in_at", ASCENDING)], name="user_id_punch_in_at"),
+        ],
+        "orders": [
+            IndexModel([("created_by", ASCENDING), ("created_at", DESCENDING)], name="created_by_created_at"),
+            IndexModel([("customer_id", ASCENDING), ("order_date", DESCENDING)], name="customer_id_order_date"),
+            IndexModel([("status", ASCENDING), ("created_at", DESCENDING)], name="status_created_at"),
+            # Keyset pagination of the order list
+            IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)], name="created_at_id"),
+        ],
+        "leads": [
+            IndexModel([("created_by", ASCENDING), ("status", ASCENDING), ("created_at", DESCENDING)],
+                       name="created_by_status_created_at"),
+            IndexModel([("mobile", ASCENDING)], name="mobile"),
+        ],
+        "followups": [
+            IndexModel([("created_by", ASCENDING), ("status", ASCENDING), ("followup_date", ASCENDING)],
+                       name="created_by_status_followup_date"),
+            # Keyset pagination of a user's followup list
+            IndexModel([("created_by", ASCENDING), ("followup_date", DESCENDING), ("_id", DESCENDING)],
+                       name="created_by_followup_date_id"),
+        ],
+        "followup": [
+            IndexModel([("employee_id", ASCENDING), ("status", ASCENDING), ("followup_date", ASCENDING)],
+                       name="employee_id_status_followup_date"),
+        ],
+        "products": [
+            IndexModel([("category_id", ASCENDING), ("status", ASCENDING)], name="category_id_status"),
+        ],
+        "address_cache": [
+            IndexModel([("latitude", ASCENDING), ("longitude", ASCENDING)], name="latitude_longitude"),
+        ],
+    },
+    "field_squad": {
+        "users": [
+            IndexModel([("user_type", ASCENDING), ("del", ASCENDING)], name="user_type_del"),
+            IndexModel([("email", ASCENDING)], name="email"),
+            IndexModel([("mobile", ASCENDING)], name="mobile"),
+        ],
+        "location_master": [
+            IndexModel([("pincode", ASCENDING)], name="pincode"),
+        ],
+    },
+}
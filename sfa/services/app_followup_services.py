@@ -5,6 +5,9 @@ from datetime import datetime
 from sfa.utils.date_utils import build_audit_fields
 import traceback
 
+from app.utils.cursor_pagination import InvalidCursor, paginate
+from app.utils.list_count import InvalidCountMode, count_total
+
 class AppFollowupService:
     def __init__(self):
         self.talbros_db = client1['talbros']
@@ -130,7 +133,7 @@ class AppFollowupService:
         except Exception as e:
             return {"success": False, "message": f"Failed to add followup: {str(e)}", "error": {"code": "SERVER_ERROR", "details": str(e), "traceback": traceback.format_exc()}}
 
-    def get_followup_list(self, user_id: str, status_filter: str = "all", page: int = 1, limit: int = 20) -> Dict[str, Any]:
+    def get_followup_list(self, user_id: str, status_filter: str = "all", page: int = 1, limit: int = 20, cursor: str = None, count_mode: str = None) -> Dict[str, Any]:
         try:
             # Build query
             query = {
@@ -151,11 +154,11 @@ class AppFollowupService:
             skip = (page - 1) * limit
             
             # Get total count
-            total_count = self.followups.count_documents(query)
+            count = count_total(self.followups, query, count_mode)
+            total_count = count["total"]
             
-            # Get followups with pagination
-            followups_cursor = self.followups.find(query).skip(skip).limit(limit).sort("followup_date", -1)
-            followups = list(followups_cursor)
+            # Get followups with pagination; a cursor replaces page
+            followups, next_cursor = paginate(self.followups, query, [("followup_date", -1)], limit, cursor=cursor, skip=skip)
             
             # Format followup list
             followup_list = []
@@ -217,12 +220,18 @@ class AppFollowupService:
                         "page": page,
                         "limit": limit,
                         "total": total_count,
-                        "total_pages": (total_count + limit - 1) // limit
+                        "total_pages": (total_count + limit - 1) // limit,
+                        "next_cursor": next_cursor,
+                        "count_mode": count["mode"],
+                        "total_is_exact": count["is_exact"],
+                        "total_display": count["display"]
                     },
                     "status_counts": status_counts
                 }
             }
             
+        except (InvalidCursor, InvalidCountMode) as e:
+            return {"success": False, "message": "Invalid pagination parameters", "error": {"code": "VALIDATION_ERROR", "details": str(e)}}
         except Exception as e:
             return {"success": False, "message": f"Failed to get followup list: {str(e)}", "error": {"code": "SERVER_ERROR", "details": str(e), "traceback": traceback.format_exc()}}
 
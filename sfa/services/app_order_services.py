@@ -7,6 +7,8 @@ import pytz
 from sfa.utils.date_utils import build_audit_fields
 from sfa.utils.code_generator import generate_order_code
 from sfa.services.app_otp_services import AppOTPService
+from app.utils.cursor_pagination import InvalidCursor, paginate
+from app.utils.list_count import InvalidCountMode, count_total
 
 
 class AppOrderService:
@@ -335,7 +337,7 @@ class AppOrderService:
             }
 
 
-    def list_orders(self, user_id: str, page: int = 1, limit: int = 20, status: str = "all", customer_id: str = None, date_from: str = None, date_to: str = None) -> Dict[str, Any]:
+    def list_orders(self, user_id: str, page: int = 1, limit: int = 20, status: str = "all", customer_id: str = None, date_from: str = None, date_to: str = None, cursor: str = None, count_mode: str = None) -> Dict[str, Any]:
         try:
             query: Dict[str, Any] = {}
             if customer_id:
@@ -355,9 +357,10 @@ class AppOrderService:
             counts: Dict[str, int] = {s: self.orders_collection.count_documents({**{k: v for k, v in query.items() if k != "status"}, "status": s}) for s in status_list}
             counts_all = self.orders_collection.count_documents({k: v for k, v in query.items() if k != "status"})
 
-            total = self.orders_collection.count_documents(query)
+            count = count_total(self.orders_collection, query, count_mode)
+            total = count["total"]
             skip = (page - 1) * limit
-            orders = list(self.orders_collection.find(query).sort("created_at", -1).skip(skip).limit(limit))
+            orders, next_cursor = paginate(self.orders_collection, query, [("created_at", -1)], limit, cursor=cursor, skip=skip)
 
             # Build UI-ready list items
             data_list: List[Dict[str, Any]] = []
@@ -404,8 +407,12 @@ class AppOrderService:
                 "limit": limit,
                 "total": total,
                 "totalPages": total_pages,
-                "hasNext": page < total_pages,
-                "hasPrev": page > 1
+                "hasNext": next_cursor is not None,
+                "hasPrev": page > 1,
+                "nextCursor": next_cursor,
+                "countMode": count["mode"],
+                "totalIsExact": count["is_exact"],
+                "totalDisplay": count["display"]
             }
 
             return {
@@ -416,6 +423,8 @@ class AppOrderService:
                     "pagination": pagination,
                 }
             }
+        except (InvalidCursor, InvalidCountMode) as e:
+            return {"success": False, "message": "Invalid pagination parameters", "error": {"code": "VALIDATION_ERROR", "details": str(e)}}
         except Exception as e:
             return {"success": False, "message": f"Failed to list orders: {str(e)}", "error": {"code": "SERVER_ERROR", "details": str(e)}}
 
@@ -2,6 +2,7 @@ import os
 import requests
 from datetime import datetime, timedelta, date
 from sfa.database import client1
+from app.utils.search_tokens import search_filter
 from dotenv import load_dotenv
 from bson import ObjectId
 import pytz
@@ -173,11 +174,7 @@ class AttendanceService:
                 if department:
                     employee_query["department"] = department
                 if search:
-                    employee_query["$or"] = [
-                        {"full_name": {"$regex": search, "$options": "i"}},
-                        {"email": {"$regex": search, "$options": "i"}},
-                        {"employee_id": {"$regex": search, "$options": "i"}}
-                    ]
+                    employee_query.update(search_filter(search))
                 
                 all_employees = list(self.employee_collection.find(employee_query))
             else:
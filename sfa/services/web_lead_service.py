@@ -3,7 +3,10 @@ from sfa.database import client1
 from datetime import datetime
 import re
 import os
-import uuid
+
+from app.utils.image_pipeline import ImagePipeline, ImageUploadError
+
+lead_images = ImagePipeline(os.path.join("uploads", "sfa_uploads", "leads"))
 
 
 class lead_tool:
@@ -150,23 +153,20 @@ class lead_tool:
         except Exception as e:
             return {"success": False, "message": f"Invalid lead ID: {e}"}
 
-        base_dir = os.path.join("uploads", "sfa_uploads", "leads")
-        os.makedirs(base_dir, exist_ok=True)
-
-        original = upload_file.filename or "file"
-        _, ext = os.path.splitext(original)
-        unique_name = f"lead_{uuid.uuid4().hex}{ext.lower()}"
-        file_path = os.path.join(base_dir, unique_name)
-
-        with open(file_path, 'wb') as f:
-            f.write(upload_file.file.read())
+        try:
+            stored = lead_images.store(upload_file)
+        except ImageUploadError as e:
+            return {"success": False, "message": str(e)}
 
+        # `image` stays a file name in the same directory (the full-size JPEG)
         res = self.leads_collection.update_one({"_id": ObjectId(lead_id)}, {"$set": {
-            "image": unique_name,
+            "image": stored["stored_filename"],
+            "image_variants": stored["variants"],
             "image_updated_at": self.current_datetime.strftime("%Y-%m-%d %H:%M:%S")
         }})
         if res.matched_count > 0:
-            return {"success": True, "message": "Lead image updated", "file_name": unique_name}
+            return {"success": True, "message": "Lead image updated", "file_name": stored["stored_filename"],
+                    "data": {"file_name": stored["stored_filename"], "variants": stored["variants"]}}
         return {"success": False, "message": "Failed to update image"}
 
 
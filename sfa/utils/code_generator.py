@@ -1,8 +1,24 @@
 from datetime import datetime
 import pytz
-from pymongo import ReturnDocument
+from app.utils.sequences import Sequences
 from sfa.database import client1
 
+sequences = Sequences(client1["talbros"]["counters"])
+
+
+def _year_of(date_value: str = None) -> str:
+    try:
+        if date_value:
+            return str(date_value)[0:4]
+    except Exception:
+        pass
+    timezone = pytz.timezone("Asia/Kolkata")
+    return str(datetime.now(timezone).year)
+
+
+def _counter(db_collection=None) -> Sequences:
+    return sequences if db_collection is None else Sequences(db_collection)
+
 
 def generate_unique_code(
     entity_type: str,
@@ -30,38 +46,13 @@ def generate_unique_code(
         generate_unique_code('lead', 'LD') -> 'LD-2024-001'
         generate_unique_code('customer', 'CUST', '2024-05-20') -> 'CUST-2024-001'
     """
-    # Extract year from date_value or use current year
-    try:
-        if date_value:
-            year_str = str(date_value)[0:4]
-        else:
-            timezone = pytz.timezone("Asia/Kolkata")
-            year_str = str(datetime.now(timezone).year)
-    except Exception:
-        timezone = pytz.timezone("Asia/Kolkata")
-        year_str = str(datetime.now(timezone).year)
-    
-    # Get counter collection
-    if db_collection is None:
-        client_database = client1["talbros"]
-        counters_collection = client_database["counters"]
-    else:
-        counters_collection = db_collection
-    
+    year_str = _year_of(date_value)
+
     # Counter key format: {entity_type}_code_{prefix}_{year}
     # Examples: order_code_PO_2024, lead_code_LD_2024
     counter_key = f"{entity_type}_code_{prefix}_{year_str}"
-    
-    # Atomic increment using findAndModify to get next sequence number
-    counter_doc = counters_collection.find_one_and_update(
-        {"_id": counter_key},
-        {"$inc": {"sequence": 1}},
-        upsert=True,
-        return_document=ReturnDocument.AFTER
-    )
-    
-    sequence_number = counter_doc.get("sequence", 1)
-    
+    sequence_number = _counter(db_collection).next(counter_key)
+
     # Format sequence with leading zeros
     sequence_str = str(sequence_number).zfill(sequence_length)
     
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from trust_rewards.services.app_coupon_services import AppCouponService
 from trust_rewards.utils.response import format_response
 from trust_rewards.utils.auth import get_current_user
@@ -11,7 +12,7 @@ async def scan_coupon(request: Request, current_user: dict = Depends(get_current
     try:
         request_data = await request.json()
         service = AppCouponService()
-        result = service.scan_coupon(request_data, current_user)
+        result = await run_in_threadpool(service.scan_coupon, request_data, current_user)
         
         if result.get("success"):
             return format_response(
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Request, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from trust_rewards.services.web_coupon_services import CouponService
 from trust_rewards.utils.auth import get_current_user
 from trust_rewards.utils.response import format_response
@@ -28,8 +29,8 @@ async def generate_points_coupons(request: Request, current_user: dict = Depends
         
         return format_response(
             success=True,
-            msg=result.get("message", "Points coupons generated successfully"),
-            statuscode=200,
+            msg=result.get("message", "Points coupon generation started"),
+            statuscode=202,
             data=result.get("data", {})
         )
         
@@ -128,6 +129,7 @@ async def get_coupon_code_list_csv(request: Request, current_user: dict = Depend
     """Download coupon codes as CSV for a specific batch"""
     try:
         request_data = await request.json()
+        request_data['created_by_id'] = current_user.get('user_id', 1)
         
         service = CouponService()
         result = service.get_coupon_code_list_csv(request_data)
@@ -136,14 +138,135 @@ async def get_coupon_code_list_csv(request: Request, current_user: dict = Depend
             return format_response(
                 success=False,
                 msg=result.get("message", "Failed to generate CSV"),
-                statuscode=400,
+                statuscode=404 if result.get("error", {}).get("code") == "NOT_FOUND" else 400,
+                data={"error": result.get("error", {})}
+            )
+        
+        # Poll /coupon_job_status with the returned job_id for the file URL
+        return format_response(
+            success=True,
+            msg=result.get("message", "CSV export started"),
+            statuscode=202,
+            data=result.get("data", {})
+        )
+        
+    except Exception as e:
+        tb = traceback.format_exc()
+        return format_response(
+            success=False,
+            msg="Internal server error",
+            statuscode=500,
+            data={
+                "error": {
+                    "code": "SERVER_ERROR",
+                    "details": str(e),
+                    "traceback": tb
+                }
+            }
+        )
+
+@router.post("/coupon_code_list_csv/stream")
+async def stream_coupon_code_list_csv(request: Request, current_user: dict = Depends(get_current_user)):
+    """Stream the unused coupon codes of a batch as CSV (gzip with "compress": true).
+
+    Rows are written as they are read from the cursor. For a resumable
+    download use /coupon_code_list_csv, whose file is served with Range support.
+    """
+    try:
+        request_data = await request.json()
+        coupon_master_id = request_data.get('coupon_master_id')
+        service = CouponService()
+        error = service.csv_batch_error(coupon_master_id)
+        if error:
+            return format_response(
+                success=False,
+                msg=error["message"],
+                statuscode=404 if error["error"]["code"] == "NOT_FOUND" else 400,
+                data={"error": error["error"]}
+            )
+        compress = bool(request_data.get('compress', False))
+
+        filename, _ = service.coupon_csv_filename(coupon_master_id, compress)
+        return StreamingResponse(
+            service.iter_coupon_code_csv(coupon_master_id, compress),
+            media_type="application/gzip" if compress else "text/csv",
+            headers={"Content-Disposition": f"attachment; filename={filename}"}
+        )
+
+    except Exception as e:
+        tb = traceback.format_exc()
+        return format_response(
+            success=False,
+            msg="Internal server error",
+            statuscode=500,
+            data={
+                "error": {
+                    "code": "SERVER_ERROR",
+                    "details": str(e),
+                    "traceback": tb
+                }
+            }
+        )
+
+@router.post("/coupon_job_status")
+async def get_coupon_job_status(request: Request, current_user: dict = Depends(get_current_user)):
+    """Poll a coupon generation or CSV export job"""
+    try:
+        request_data = await request.json()
+        
+        service = CouponService()
+        result = service.get_job_status(request_data)
+        
+        if not result.get("success"):
+            return format_response(
+                success=False,
+                msg=result.get("message", "Failed to get job status"),
+                statuscode=404 if result.get("error", {}).get("code") == "NOT_FOUND" else 400,
+                data={"error": result.get("error", {})}
+            )
+        
+        return format_response(
+            success=True,
+            msg=result.get("message", "Job status fetched successfully"),
+            statuscode=200,
+            data=result.get("data", {})
+        )
+        
+    except Exception as e:
+        tb = traceback.format_exc()
+        return format_response(
+            success=False,
+            msg="Internal server error",
+            statuscode=500,
+            data={
+                "error": {
+                    "code": "SERVER_ERROR",
+                    "details": str(e),
+                    "traceback": tb
+                }
+            }
+        )
+
+@router.post("/cancel_coupon_job")
+async def cancel_coupon_job(request: Request, current_user: dict = Depends(get_current_user)):
+    """Cancel a queued or running coupon generation / CSV export job"""
+    try:
+        request_data = await request.json()
+        
+        service = CouponService()
+        result = service.cancel_job(request_data)
+        
+        if not result.get("success"):
+            return format_response(
+                success=False,
+                msg=result.get("message", "Failed to cancel job"),
+                statuscode=404 if result.get("error", {}).get("code") == "NOT_FOUND" else 400,
                 data={"error": result.get("error", {})}
             )
         
-        # Return CSV data using format_response
         return format_response(
             success=True,
-            msg=result.get("message", "CSV generated successfully"),
+            msg=result.get("message", "Cancellation requested"),
             statuscode=200,
             data=result.get("data", {})
         )
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, Depends, Request, File, UploadFile, Form
+from fastapi.concurrency import run_in_threadpool
 
 from trust_rewards.utils.response import format_response
 from trust_rewards.utils.auth import get_current_user
@@ -54,7 +55,7 @@ async def get_points_master_list(request: Request, current_user: dict = Depends(
             body = {}
 
         service = WebMasterService()
-        result = service.get_points_master_list(body)
+        result = await run_in_threadpool(service.get_points_master_list, body)
 
         if not result.get("success"):
             return format_response(
@@ -161,7 +162,7 @@ async def get_categories_list(request: Request, current_user: dict = Depends(get
             body = {}
 
         service = WebMasterService()
-        result = service.get_categories_list(body)
+        result = await run_in_threadpool(service.get_categories_list, body)
 
         if not result.get("success"):
             return format_response(
@@ -268,7 +269,7 @@ async def get_sub_categories_list(request: Request, current_user: dict = Depends
             body = {}
 
         service = WebMasterService()
-        result = service.get_sub_categories_list(body)
+        result = await run_in_threadpool(service.get_sub_categories_list, body)
 
         if not result.get("success"):
             return format_response(
@@ -375,7 +376,7 @@ async def get_product_master_list(request: Request, current_user: dict = Depends
             body = {}
 
         service = WebMasterService()
-        result = service.get_product_master_list(body)
+        result = await run_in_threadpool(service.get_product_master_list, body)
 
         if not result.get("success"):
             return format_response(
@@ -490,7 +491,7 @@ async def upload_product_image(
     try:
         service = WebMasterService()
         created_by = current_user.get("user_id", 1)  # Get user_id from JWT payload
-        result = service.upload_product_image(product_id, image, created_by=created_by)
+        result = await run_in_threadpool(service.upload_product_image, product_id, image, created_by=created_by)
 
         if not result.get("success"):
             return format_response(
@@ -668,7 +669,7 @@ async def upload_gift_image(
     try:
         service = WebMasterService()
         created_by = current_user.get("user_id", 1)  # Get user_id from JWT payload
-        result = service.upload_gift_image(gift_id, image, created_by=created_by)
+        result = await run_in_threadpool(service.upload_gift_image, gift_id, image, created_by=created_by)
 
         if not result.get("success"):
             return format_response(
@@ -703,7 +704,7 @@ async def get_gift_master_list(request: Request, current_user: dict = Depends(ge
             body = {}
 
         service = WebMasterService()
-        result = service.get_gift_master_list(body)
+        result = await run_in_threadpool(service.get_gift_master_list, body)
 
         if not result.get("success"):
             return format_response(
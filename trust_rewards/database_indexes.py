@@ -0,0 +1,149 @@
+"""
+Index registry for the Trust Rewards databases.
+
+Every hot query shape used by the services should be covered by an entry here.
+`scripts/ensure_indexes.py` creates/reconciles these indexes idempotently and
+reports queries that still fall back to a COLLSCAN.
+
+`SEARCH_FIELDS` lists the fields folded into each collection's `search_tokens`
+(see `app/utils/search_tokens.py`).
+"""
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+
+INDEXES = {
+    "trust_rewards": {
+        "coupon_code": [
+            # AppCouponService._claim_coupons -> find({"coupon_code": {"$in": ...}})
+            IndexModel([("coupon_code", ASCENDING)], name="coupon_code_unique", unique=True),
+            # Batch listings / CSV export / analytics per batch
+            IndexModel([("coupon_master_id", ASCENDING), ("is_scanned", ASCENDING), ("_id", DESCENDING)],
+                       name="coupon_master_id_is_scanned_id"),
+            # Keyset pagination of a batch's coupons (sort _id desc)
+            IndexModel([("coupon_master_id", ASCENDING), ("_id", DESCENDING)], name="coupon_master_id_id"),
+            # CouponService._insert_coupon_codes: a chunk written twice fails instead of duplicating coupons
+            IndexModel([("coupon_master_id", ASCENDING), ("batch_seq", ASCENDING)],
+                       name="coupon_master_id_batch_seq_unique", unique=True,
+                       partialFilterExpression={"batch_seq": {"$exists": True}}),
+            IndexModel([("scanned_by", ASCENDING), ("scanned_at", DESCENDING)], name="scanned_by_scanned_at"),
+        ],
+        "coupon_master": [
+            IndexModel([("batch_number", ASCENDING)], name="batch_number"),
+            IndexModel([("coupon_id", ASCENDING)], name="coupon_id"),
+        ],
+        "jobs": [
+            # JobQueue.claim: oldest runnable job of the worker's types
+            IndexModel([("status", ASCENDING), ("type", ASCENDING), ("run_after", ASCENDING)],
+                       name="status_type_run_after"),
+            IndexModel([("job_id", ASCENDING)], name="job_id_unique", unique=True),
+            # JobQueue.requeue_expired
+            IndexModel([("status", ASCENDING), ("lease_expires_at", ASCENDING)], name="status_lease_expires_at"),
+        ],
+        "coupon_scanned_history": [
+            IndexModel([("worker_id", ASCENDING), ("scanned_at", DESCENDING)], name="worker_id_scanned_at"),
+            IndexModel([("coupon_master_id", ASCENDING)], name="coupon_master_id"),
+        ],
+        # Also applied to the monthly archives (transaction_ledger_YYYY_MM, see LedgerPartitions)
+        "transaction_ledger": [
+            # Worker ledger screens: find({"worker_id"}).sort("transaction_datetime", -1)
+            IndexModel([("worker_id", ASCENDING), ("transaction_datetime", DESCENDING)],
+                       name="worker_id_transaction_datetime"),
+            IndexModel([("worker_id", ASCENDING), ("transaction_type", ASCENDING), ("transaction_date", DESCENDING)],
+                       name="worker_id_transaction_type_transaction_date"),
+            IndexModel([("transaction_type", ASCENDING), ("transaction_date", DESCENDING)],
+                       name="transaction_type_transaction_date"),
+            IndexModel([("transaction_id", ASCENDING)], name="transaction_id_unique", unique=True),
+            # Keyset pagination of the admin ledger list
+            IndexModel([("transaction_datetime", DESCENDING), ("_id", DESCENDING)], name="transaction_datetime_id"),
+        ],
+        # LedgerPartitions: per-worker totals of archived months
+        "ledger_monthly_summaries": [
+            IndexModel([("worker_id", ASCENDING), ("month", ASCENDING)], name="worker_id_month"),
+            IndexModel([("month", ASCENDING)], name="month"),
+        ],
+        "skilled_workers": [
+            IndexModel([("mobile", ASCENDING)], name="mobile"),
+            IndexModel([("worker_id", ASCENDING)], name="worker_id", sparse=True),
+            IndexModel([("status", ASCENDING), ("state", ASCENDING)], name="status_state"),
+        ],
+        "gift_redemptions": [
+            IndexModel([("redemption_id", ASCENDING)], name="redemption_id_unique", unique=True),
+            IndexModel([("worker_id", ASCENDING), ("redemption_datetime", DESCENDING)],
+                       name="worker_id_redemption_datetime"),
+            IndexModel([("status", ASCENDING), ("redemption_datetime", DESCENDING)],
+                       name="status_redemption_datetime"),
+            IndexModel([("search_tokens", ASCENDING)], name="search_tokens"),
+            # Keyset pagination of the admin redemption requests list
+            IndexModel([("request_datetime", DESCENDING), ("_id", DESCENDING)], name="request_datetime_id"),
+        ],
+        "leaderboard": [
+            IndexModel([("period", ASCENDING), ("worker_id", ASCENDING)], name="period_worker_id_unique", unique=True),
+            # Leaderboard.top / standing: rank order within a period
+            IndexModel([("period", ASCENDING), ("points", DESCENDING), ("scans", DESCENDING), ("worker_id", ASCENDING)],
+                       name="period_points_scans_worker_id"),
+        ],
+        "recent_activity": [
+            IndexModel([("worker_id", ASCENDING), ("created_at", DESCENDING)], name="worker_id_created_at"),
+        ],
+        "analytics_rollups": [
+            # AnalyticsRollups upserts, one document per bucket
+            IndexModel([("granularity", ASCENDING), ("bucket", ASCENDING), ("state", ASCENDING),
+                        ("batch_number", ASCENDING), ("worker_type", ASCENDING)],
+                       name="granularity_bucket_state_batch_worker_type_unique", unique=True),
+            # Dashboard totals / statewise reads over month buckets
+            IndexModel([("granularity", ASCENDING), ("state", ASCENDING)], name="granularity_state"),
+        ],
+        "analytics_rollup_workers": [
+            # Active-worker markers only matter for the current day and month
+            IndexModel([("created_at", ASCENDING)], name="created_at_ttl", expireAfterSeconds=35 * 24 * 3600),
+        ],
+        "otp_verification": [
+            IndexModel([("mobile", ASCENDING), ("purpose", ASCENDING), ("is_used", ASCENDING)],
+                       name="mobile_purpose_is_used"),
+            IndexModel([("otp_id", ASCENDING)], name="otp_id"),
+        ],
+        "users": [
+            IndexModel([("user_id", ASCENDING)], name="user_id"),
+        ],
+        "category_master": [
+            IndexModel([("status", ASCENDING), ("_id", DESCENDING)], name="status_id"),
+            IndexModel([("category_name_lower", ASCENDING)], name="category_name_lower"),
+            IndexModel([("search_tokens", ASCENDING)], name="search_tokens"),
+        ],
+        "sub_category_master": [
+            IndexModel([("category_id", ASCENDING), ("status", ASCENDING)], name="category_id_status"),
+            IndexModel([("status", ASCENDING), ("_id", DESCENDING)], name="status_id"),
+            IndexModel([("search_tokens", ASCENDING)], name="search_tokens"),
+        ],
+        "product_master": [
+            IndexModel([("category_id", ASCENDING), ("status", ASCENDING)], name="category_id_status"),
+            IndexModel([("sub_category_id", ASCENDING), ("status", ASCENDING)], name="sub_category_id_status"),
+            IndexModel([("status", ASCENDING), ("_id", DESCENDING)], name="status_id"),
+            IndexModel([("search_tokens", ASCENDING)], name="search_tokens"),
+        ],
+        "gift_master": [
+            IndexModel([("status", ASCENDING), ("_id", DESCENDING)], name="status_id"),
+            IndexModel([("search_tokens", ASCENDING)], name="search_tokens"),
+        ],
+        "points_master": [
+            IndexModel([("status", ASCENDING), ("_id", DESCENDING)], name="status_id"),
+            IndexModel([("search_tokens", ASCENDING)], name="search_tokens"),
+        ],
+        "location_master": [
+            IndexModel([("pincode", ASCENDING)], name="pincode"),
+        ],
+    },
+}
+
+
+SEARCH_FIELDS = {
+    "trust_rewards": {
+        "points_master": ["name", "description"],
+        "category_master": ["category_name", "description"],
+        "sub_category_master": ["sub_category_name", "description"],
+        "product_master": ["product_name", "description"],
+        "gift_master": ["gift_name", "description"],
+        "gift_redemptions": ["worker_name", "gift_name"],
+    },
+}
@@ -1,9 +1,17 @@
 from datetime import datetime
 from bson import ObjectId
+from typing import List, Optional
+from pymongo import UpdateOne
+from app.utils.cursor_pagination import paginate_sources
+from app.utils.list_count import COUNT_EXACT, count_total_sources
 from trust_rewards.database import client1
 from trust_rewards.utils.common import DateUtils, ValidationUtils
+from trust_rewards.utils.coupon_codes import CouponCodeFilter, CouponCodes
+from trust_rewards.utils.ledger_archive import LedgerPartitions
 from trust_rewards.utils.transaction import TransactionLogger
 from trust_rewards.utils.activity import RecentActivityLogger
+from trust_rewards.utils.rollups import AnalyticsRollups
+from trust_rewards.utils.wallet import Wallet
 
 class AppCouponService:
     def __init__(self):
@@ -61,73 +69,74 @@ class AppCouponService:
                     "error": {"code": "ACCOUNT_INACTIVE", "details": "Worker account is not active"}
                 }
 
-            # Process each coupon and create individual transactions
-            results = []
-            total_points_earned = 0
-            successful_scans = 0
-            failed_scans = 0
-            current_balance = self._get_worker_balance(worker_id)
+            # Claim every coupon in one batch, then credit the wallet once
+            scan_id = str(ObjectId())
+            results = self._claim_coupons(coupon_codes, worker, scan_id)
+            claimed = [r for r in results if r['success']]
+            successful_scans = len(claimed)
+            failed_scans = len(results) - successful_scans
+            total_points_earned = sum(r['points_earned'] for r in claimed)
+
+            current_balance = worker.get('wallet_points', 0)
+            total_coupons_scanned = worker.get('coupons_scanned', 0)
+            if claimed:
+                wallet_change = Wallet.credit(worker_id, total_points_earned,
+                                              inc={"coupons_scanned": successful_scans})
+                if wallet_change is None:
+                    # Worker deleted since it was read: nothing was credited, so
+                    # the coupons go back to being scannable
+                    self._release_claims(scan_id, [r['coupon_id'] for r in claimed], worker_id)
+                    return {
+                        "success": False,
+                        "message": "Worker not found",
+                        "error": {"code": "USER_NOT_FOUND", "details": "Worker not found while crediting points"}
+                    }
+                # The $inc is atomic, so this batch owns the balances
+                # [previous_balance, new_balance]; ledger entries walk up that range
+                current_balance = wallet_change["previous_balance"]
+                total_coupons_scanned = wallet_change["worker"].get('coupons_scanned', 0)
+
+            ledger_docs = []
+            activity_docs = []
+            for coupon_result in claimed:
+                coupon_code = coupon_result['coupon_code']
+                points_earned = coupon_result['points_earned']
+                new_balance = current_balance + points_earned
+                ledger_docs.append(TransactionLogger.build(
+                    worker_id=worker_id,
+                    transaction_type="COUPON_SCAN",
+                    amount=points_earned,
+                    description=f"Scanned coupon: {coupon_code}",
+                    previous_balance=current_balance,
+                    new_balance=new_balance,
+                    reference_id=coupon_result.get('coupon_id', ''),
+                    reference_type="coupon_code",
+                    batch_number=coupon_result.get('batch_number', ''),
+                    created_by=worker_id
+                ))
+                current_balance = new_balance
+
+                activity_docs.append(RecentActivityLogger.build(
+                    worker_id=worker_id,
+                    title=f"Scanned coupon for {coupon_result.get('batch_number', 'coupon')}",
+                    points_change=points_earned,
+                    activity_type="COUPON_SCAN",
+                    description=f"Scanned coupon: {coupon_code}",
+                    reference_id=coupon_result.get('coupon_id', ''),
+                    reference_type="coupon_code",
+                    metadata={
+                        "coupon_code": coupon_code,
+                        "batch_number": coupon_result.get('batch_number', '')
+                    }
+                ))
 
-            for coupon_code in coupon_codes:
-                coupon_result = self._process_single_coupon(coupon_code, worker)
-                results.append(coupon_result)
-                
-                if coupon_result['success']:
-                    successful_scans += 1
-                    points_earned = coupon_result.get('points_earned', 0)
-                    total_points_earned += points_earned
-                    
-                    # Update worker's wallet points for this single coupon
-                    self.skilled_workers.update_one(
-                        {"_id": ObjectId(worker_id)},
-                        {
-                            "$inc": {
-                                "wallet_points": points_earned,
-                                "coupons_scanned": 1
-                            },
-                            "$set": {
-                                "last_activity": DateUtils.get_current_date()
-                            }
-                        }
-                    )
-                    
-                    # Record individual transaction for this coupon
-                    new_balance = current_balance + points_earned
-                    TransactionLogger.record(
-                        worker_id=worker_id,
-                        transaction_type="COUPON_SCAN",
-                        amount=points_earned,
-                        description=f"Scanned coupon: {coupon_code}",
-                        previous_balance=current_balance,
-                        new_balance=new_balance,
-                        reference_id=coupon_result.get('coupon_id', ''),
-                        reference_type="coupon_code",
-                        batch_number=coupon_result.get('batch_number', ''),
-                        created_by=worker_id
-                    )
-                    
-                    # Update current balance for next transaction
-                    current_balance = new_balance
-
-                    # Log recent activity for this successful scan (non-blocking)
-                    try:
-                        RecentActivityLogger.log_activity(
-                            worker_id=worker_id,
-                            title=f"Scanned coupon for {coupon_result.get('batch_number', 'coupon')}",
-                            points_change=points_earned,
-                            activity_type="COUPON_SCAN",
-                            description=f"Scanned coupon: {coupon_code}",
-                            reference_id=coupon_result.get('coupon_id', ''),
-                            reference_type="coupon_code",
-                            metadata={
-                                "coupon_code": coupon_code,
-                                "batch_number": coupon_result.get('batch_number', '')
-                            }
-                        )
-                    except Exception as _e:
-                        print(f"Activity log failed (coupon scan): {_e}")
-                else:
-                    failed_scans += 1
+            TransactionLogger.record_many(ledger_docs)
+            RecentActivityLogger.log_many(activity_docs)
+            try:
+                AnalyticsRollups.record_scans(worker, claimed, DateUtils.get_current_datetime())
+            except Exception as e:
+                # Dashboards catch up on the next rollup rebuild
+                print(f"Error updating analytics rollups: {str(e)}")
 
             return {
                 "success": True,
@@ -143,7 +152,7 @@ class AppCouponService:
                         "name": worker.get('name', ''),
                         "worker_type": worker.get('worker_type', ''),
                         "new_wallet_balance": current_balance,
-                        "total_coupons_scanned": worker.get('coupons_scanned', 0) + successful_scans
+                        "total_coupons_scanned": total_coupons_scanned
                     }
                 }
             }
@@ -155,130 +164,188 @@ class AppCouponService:
                 "error": {"code": "SERVER_ERROR", "details": str(e)}
             }
 
-    def _process_single_coupon(self, coupon_code: str, worker: dict) -> dict:
-        """Process a single coupon scan"""
-        try:
-            # Find coupon in database by coupon_code
-            coupon = self.coupon_code.find_one({"coupon_code": coupon_code})
-            if not coupon:
-                return {
-                    "success": False,
-                    "coupon_code": coupon_code,
-                    "error": "Coupon not found",
-                    "points_earned": 0
-                }
-
-            # Check if coupon is already scanned
-            if coupon.get('is_scanned', False):
-                return {
-                    "success": False,
-                    "coupon_code": coupon_code,
-                    "error": "Coupon already scanned",
-                    "points_earned": 0
-                }
-
-            # Check coupon status
-            if coupon.get('status') != 'active':
-                return {
-                    "success": False,
-                    "coupon_code": coupon_code,
-                    "error": f"Coupon status is {coupon.get('status', 'unknown')}",
-                    "points_earned": 0
+    @staticmethod
+    def _scannable_filter(current_date: str) -> dict:
+        """Coupons a scan may claim: unscanned, active, inside the validity window"""
+        return {
+            "is_scanned": {"$ne": True},
+            "status": "active",
+            # Missing dates mean no limit
+            "valid_from": {"$not": {"$gt": current_date}},
+            "valid_to": {"$not": {"$lt": current_date}}
+        }
+
+    @staticmethod
+    def _rejection_reason(coupon: Optional[dict], current_date: str) -> Optional[str]:
+        """Why `coupon` cannot be scanned, or None if it can"""
+        if not coupon:
+            return "Coupon not found"
+        if coupon.get('is_scanned', False):
+            return "Coupon already scanned"
+        if coupon.get('status') != 'active':
+            return f"Coupon status is {coupon.get('status', 'unknown')}"
+        if coupon.get('valid_from') and current_date < coupon['valid_from']:
+            return "Coupon not yet valid"
+        if coupon.get('valid_to') and current_date > coupon['valid_to']:
+            return "Coupon has expired"
+        return None
+
+    def _release_claims(self, scan_id: str, coupon_ids: List[str], worker_id: str) -> None:
+        """Undo the claims of one scan request: the coupons claimed with
+        `scan_id` become scannable again and their scan history is removed"""
+        if not coupon_ids:
+            return
+        self.coupon_code.update_many(
+            # scan_id guards against releasing a later claim of the same coupon
+            {"_id": {"$in": [ObjectId(coupon_id) for coupon_id in coupon_ids]}, "scan_id": scan_id},
+            {
+                "$set": {"is_scanned": False, "scanned_by": None, "scanned_at": None, "status": "active"},
+                "$unset": {"scan_id": ""}
+            }
+        )
+        self.coupon_scanned_history.delete_many({"coupon_id": {"$in": coupon_ids}, "worker_id": worker_id})
+
+    def _claim_coupons(self, coupon_codes: List[str], worker: dict, scan_id: Optional[str] = None) -> List[dict]:
+        """Claim a batch of coupons for `worker`; one result per requested code, in order.
+
+        All codes are resolved with a single $in query and the eligible ones are
+        claimed with one unordered bulk_write. Every claim is conditional on the
+        coupon still being scannable, so concurrent scans of the same code cannot
+        both succeed; each claimed coupon is stamped with this batch's scan_id to
+        tell which claims won (see `_release_claims`). Scan history is written
+        with one insert_many.
+        """
+        current_date = DateUtils.get_current_date()
+        scanned_at = DateUtils.get_current_datetime()
+        worker_id = str(worker['_id'])
+        scan_id = scan_id or str(ObjectId())
+
+        unique_codes = list(dict.fromkeys(coupon_codes))
+        # Malformed codes (bad check symbol) and codes the issued-code filter
+        # has never seen are "not found" without a lookup
+        canonical = {code: CouponCodes.canonical(code) for code in unique_codes}
+        lookup_codes = list(CouponCodeFilter.might_exist_many(stored for stored in canonical.values() if stored))
+        found = {}
+        if lookup_codes:
+            found = {
+                coupon['coupon_code']: coupon
+                for coupon in self.coupon_code.find(
+                    {"coupon_code": {"$in": lookup_codes}},
+                    {"coupon_code": 1, "coupon_master_id": 1, "coupon_value": 1, "points_value": 1,
+                     "batch_number": 1, "is_scanned": 1, "status": 1, "valid_from": 1, "valid_to": 1}
+                )
+            }
+        # Keyed by the code as sent; spellings of one code share the coupon
+        coupons = {code: found[canonical[code]] for code in unique_codes if canonical[code] in found}
+
+        eligible = []
+        eligible_seen = set()
+        for code in unique_codes:
+            coupon = coupons.get(code)
+            if self._rejection_reason(coupon, current_date) is None and coupon['_id'] not in eligible_seen:
+                eligible_seen.add(coupon['_id'])
+                eligible.append(code)
+        claimed_ids = set()
+        if eligible:
+            claims = [
+                UpdateOne(
+                    {"_id": coupons[code]['_id'], **self._scannable_filter(current_date)},
+                    {"$set": {
+                        "is_scanned": True,
+                        "scanned_by": worker_id,
+                        "scanned_at": scanned_at,
+                        "status": "scanned",
+                        "scan_id": scan_id
+                    }}
+                )
+                for code in eligible
+            ]
+            modified = self.coupon_code.bulk_write(claims, ordered=False).modified_count
+            eligible_ids = [coupons[code]['_id'] for code in eligible]
+            if modified == len(eligible):
+                claimed_ids = set(eligible_ids)
+            else:
+                # A concurrent scan won some of them
+                claimed_ids = {
+                    doc['_id'] for doc in self.coupon_code.find(
+                        {"_id": {"$in": eligible_ids}, "scan_id": scan_id}, {"_id": 1}
+                    )
                 }
 
-            # Check coupon validity dates
-            current_date = DateUtils.get_current_date()
-            valid_from = coupon.get('valid_from')
-            valid_to = coupon.get('valid_to')
-
-            if valid_from and current_date < valid_from:
-                return {
-                    "success": False,
-                    "coupon_code": coupon_code,
-                    "error": "Coupon not yet valid",
-                    "points_earned": 0
-                }
+        # points_value/batch_number are copied onto the coupon at generation;
+        # coupons generated before that still need their batch
+        legacy_master_ids = {
+            coupon['coupon_master_id'] for coupon in coupons.values()
+            if coupon['_id'] in claimed_ids and coupon.get('coupon_master_id')
+            and (coupon.get('points_value') is None or coupon.get('batch_number') is None)
+        }
+        masters = {}
+        if legacy_master_ids:
+            masters = {
+                str(master['_id']): master
+                for master in self.coupon_master.find(
+                    {"_id": {"$in": [ObjectId(master_id) for master_id in legacy_master_ids]}},
+                    {"points_value": 1, "batch_number": 1}
+                )
+            }
 
-            if valid_to and current_date > valid_to:
-                return {
+        results = []
+        history_docs = []
+        seen = set()
+        for coupon_code in coupon_codes:
+            coupon = coupons.get(coupon_code)
+            is_claimed = coupon is not None and coupon['_id'] in claimed_ids and coupon['_id'] not in seen
+            if coupon is not None:
+                seen.add(coupon['_id'])
+            if not is_claimed:
+                results.append({
                     "success": False,
                     "coupon_code": coupon_code,
-                    "error": "Coupon has expired",
+                    # No reason from the pre-claim read: repeated in this request,
+                    # or claimed by a concurrent scan
+                    "error": self._rejection_reason(coupon, current_date) or "Coupon already scanned",
                     "points_earned": 0
-                }
+                })
+                continue
 
-            # Get coupon master details
             coupon_master_id = coupon.get('coupon_master_id')
-            coupon_master = None
-            if coupon_master_id:
-                coupon_master = self.coupon_master.find_one({"_id": ObjectId(coupon_master_id)})
-
-            # Calculate points to award
-            points_earned = coupon.get('coupon_value', 0)
-            if coupon_master:
-                points_earned = coupon_master.get('points_value', points_earned)
-
-            # Mark coupon as scanned
-            scanned_data = {
+            master = masters.get(coupon_master_id, {})
+            points_earned = coupon.get('points_value')
+            if points_earned is None:
+                points_earned = master.get('points_value', coupon.get('coupon_value', 0))
+            batch_number = coupon.get('batch_number')
+            if batch_number is None:
+                batch_number = master.get('batch_number', '')
+
+            history_docs.append({
                 "coupon_id": str(coupon['_id']),
-                "coupon_code": coupon_code,
-                "worker_id": str(worker['_id']),
+                "coupon_code": coupon['coupon_code'],
+                "worker_id": worker_id,
                 "worker_name": worker.get('name', ''),
                 "worker_mobile": worker.get('mobile', ''),
                 "points_earned": points_earned,
-                "scanned_at": DateUtils.get_current_datetime(),
-                "scanned_date": DateUtils.get_current_date(),
+                "scanned_at": scanned_at,
+                "scanned_date": current_date,
                 "scanned_time": DateUtils.get_current_time(),
                 "coupon_master_id": coupon_master_id,
-                "batch_number": coupon_master.get('batch_number', '') if coupon_master else ''
-            }
-
-            # Update coupon as scanned
-            self.coupon_code.update_one(
-                {"coupon_code": coupon_code},
-                {
-                    "$set": {
-                        "is_scanned": True,
-                        "scanned_by": str(worker['_id']),
-                        "scanned_at": DateUtils.get_current_datetime(),
-                        "status": "scanned"
-                    }
-                }
-            )
-
-            # Record scan history
-            self.coupon_scanned_history.insert_one(scanned_data)
-
-            # Record transaction in ledger (will be called from main scan_coupon method)
-            # Transaction will be recorded after all coupons are processed
-
-            return {
+                "batch_number": batch_number or ''
+            })
+            results.append({
                 "success": True,
                 "coupon_code": coupon_code,
                 "coupon_id": str(coupon['_id']),  # Add coupon ID for reference
                 "points_earned": points_earned,
-                "batch_number": coupon_master.get('batch_number', '') if coupon_master else '',
+                "batch_number": batch_number or '',
                 "message": "Coupon scanned successfully"
-            }
+            })
 
-        except Exception as e:
-            return {
-                "success": False,
-                "coupon_code": coupon_code,
-                "error": f"Processing error: {str(e)}",
-                "points_earned": 0
-            }
+        if history_docs:
+            self.coupon_scanned_history.insert_many(history_docs, ordered=False)
+        return results
 
     # _record_transaction removed; use TransactionLogger.record instead
 
-    def _get_worker_balance(self, worker_id: str) -> int:
-        """Get current wallet balance of worker"""
-        try:
-            worker = self.skilled_workers.find_one({"_id": ObjectId(worker_id)})
-            return worker.get('wallet_points', 0) if worker else 0
-        except Exception as e:
-            print(f"Error getting worker balance: {str(e)}")
-            return 0
+    # _get_worker_balance removed; using Wallet.balance
 
     def get_transaction_ledger(self, request_data: dict, current_user: dict) -> dict:
         """Get transaction ledger for worker"""
@@ -312,20 +379,18 @@ class AppCouponService:
                     "$gte": start_date,
                     "$lte": end_date
                 }
+                sources = LedgerPartitions.sources(query, start_date, end_date)
+            else:
+                sources = LedgerPartitions.sources(query)
 
-            # Get transactions
-            transactions = list(
-                self.transaction_ledger.find(query)
-                .sort("transaction_datetime", -1)
-                .skip(skip)
-                .limit(limit)
-            )
+            # Get transactions (hot ledger first, archived months only if the page reaches them)
+            transactions, _ = paginate_sources(sources, [("transaction_datetime", -1)], limit, skip=skip)
 
             # Get total count
-            total_count = self.transaction_ledger.count_documents(query)
+            total_count = count_total_sources(sources, COUNT_EXACT)["total"]
 
             # Get current balance
-            current_balance = self._get_worker_balance(worker_id)
+            current_balance = Wallet.balance(worker_id)
 
             # Format transactions
             formatted_transactions = []
@@ -381,27 +446,14 @@ class AppCouponService:
                 }
 
             # Get current balance
-            current_balance = self._get_worker_balance(worker_id)
-
-            # Get transaction statistics
-            pipeline = [
-                {"$match": {"worker_id": worker_id}},
-                {
-                    "$group": {
-                        "_id": "$transaction_type",
-                        "count": {"$sum": 1},
-                        "total_amount": {"$sum": "$amount"}
-                    }
-                }
-            ]
+            current_balance = Wallet.balance(worker_id)
 
-            stats = list(self.transaction_ledger.aggregate(pipeline))
+            # Get transaction statistics (hot ledger plus monthly summaries of archived months)
+            stats = LedgerPartitions.type_totals(worker_id)
 
             # Get recent transactions (last 5)
-            recent_transactions = list(
-                self.transaction_ledger.find({"worker_id": worker_id})
-                .sort("transaction_datetime", -1)
-                .limit(5)
+            recent_transactions, _ = paginate_sources(
+                LedgerPartitions.sources({"worker_id": worker_id}), [("transaction_datetime", -1)], 5
             )
 
             # Format recent transactions
@@ -1,10 +1,17 @@
 from bson import ObjectId
+from app.utils.image_pipeline import public_image, variant_url
 from trust_rewards.database import client1
+from trust_rewards.utils.catalog_cache import CATEGORIES, GIFTS, PRODUCTS, SUB_CATEGORIES, cached_catalog
 from datetime import datetime
 from typing import Optional, List, Dict, Any
 import os
 import uuid
 
+def _cache_key(kind: str, request_data: dict, *fields: str) -> tuple:
+    # repr keeps 1 and "1" apart; they are answered differently
+    return (kind,) + tuple(repr(request_data.get(field)) for field in fields)
+
+
 class AppMasterService:
     def __init__(self):
         self.client_database = client1['trust_rewards']
@@ -14,6 +21,36 @@ class AppMasterService:
         self.gift_master = self.client_database["gift_master"]
 
     def get_categories_list(self, request_data: dict) -> dict:
+        """Get list of active categories for app users (cached)"""
+        return cached_catalog(CATEGORIES, _cache_key("list", request_data, 'page', 'limit'),
+                              lambda: self._get_categories_list(request_data))
+
+    def get_sub_categories_list(self, request_data: dict) -> dict:
+        """Get list of active sub-categories for a specific category (cached)"""
+        return cached_catalog(SUB_CATEGORIES, _cache_key("list", request_data, 'category_id', 'page', 'limit'),
+                              lambda: self._get_sub_categories_list(request_data))
+
+    def get_products_list(self, request_data: dict) -> dict:
+        """Get list of active products for specific category and sub-category (cached)"""
+        return cached_catalog(PRODUCTS, _cache_key("list", request_data, 'category_id', 'sub_category_id', 'page', 'limit'),
+                              lambda: self._get_products_list(request_data))
+
+    def get_gift_list(self, request_data: dict) -> dict:
+        """Get list of active gifts for app users (cached)"""
+        return cached_catalog(GIFTS, _cache_key("list", request_data, 'page', 'limit'),
+                              lambda: self._get_gift_list(request_data))
+
+    def get_product_detail(self, request_data: dict) -> dict:
+        """Get details of a specific product for app users (cached)"""
+        return cached_catalog(PRODUCTS, _cache_key("detail", request_data, 'product_id'),
+                              lambda: self._get_product_detail(request_data))
+
+    def get_gift_detail(self, request_data: dict) -> dict:
+        """Get details of a specific gift for app users (cached)"""
+        return cached_catalog(GIFTS, _cache_key("detail", request_data, 'gift_id'),
+                              lambda: self._get_gift_detail(request_data))
+
+    def _get_categories_list(self, request_data: dict) -> dict:
         """Get list of active categories for app users"""
         try:
             # Extract pagination parameters
@@ -68,7 +105,7 @@ class AppMasterService:
                 "error": {"code": "SERVER_ERROR", "details": str(e)}
             }
 
-    def get_sub_categories_list(self, request_data: dict) -> dict:
+    def _get_sub_categories_list(self, request_data: dict) -> dict:
         """Get list of active sub-categories for a specific category"""
         try:
             # Extract pagination parameters
@@ -145,7 +182,7 @@ class AppMasterService:
                 "error": {"code": "SERVER_ERROR", "details": str(e)}
             }
 
-    def get_products_list(self, request_data: dict) -> dict:
+    def _get_products_list(self, request_data: dict) -> dict:
         """Get list of active products for specific category and sub-category"""
         try:
             # Extract pagination parameters
@@ -206,11 +243,13 @@ class AppMasterService:
                 product['created_datetime'] = f"{product.get('created_at', '')} {product.get('created_time', '')}"
                 product['updated_datetime'] = f"{product.get('updated_at', '')} {product.get('updated_time', '')}"
                 
-                # Add thumbnail (first image file_url) and remove images array
+                # Add thumbnail (thumb variant of the first image) and remove images array
                 if product.get('images') and len(product['images']) > 0:
-                    product['thumbnail'] = product['images'][0].get('file_url', '')
+                    product['thumbnail'] = variant_url(product['images'][0]) or ''
+                    product['thumbnail_webp'] = variant_url(product['images'][0], fmt="webp") or ''
                 else:
                     product['thumbnail'] = ''
+                    product['thumbnail_webp'] = ''
                 
                 # Remove images array from response
                 if 'images' in product:
@@ -243,7 +282,7 @@ class AppMasterService:
                 "error": {"code": "SERVER_ERROR", "details": str(e)}
             }
 
-    def get_gift_list(self, request_data: dict) -> dict:
+    def _get_gift_list(self, request_data: dict) -> dict:
         """Get list of active gifts for app users"""
         try:
             # Extract pagination parameters
@@ -271,11 +310,13 @@ class AppMasterService:
                 gift['created_datetime'] = f"{gift.get('created_at', '')} {gift.get('created_time', '')}"
                 gift['updated_datetime'] = f"{gift.get('updated_at', '')} {gift.get('updated_time', '')}"
                 
-                # Add thumbnail (first image file_url) and remove images array
+                # Add thumbnail (thumb variant of the first image) and remove images array
                 if gift.get('images') and len(gift['images']) > 0:
-                    gift['thumbnail'] = gift['images'][0].get('file_url', '')
+                    gift['thumbnail'] = variant_url(gift['images'][0]) or ''
+                    gift['thumbnail_webp'] = variant_url(gift['images'][0], fmt="webp") or ''
                 else:
                     gift['thumbnail'] = ''
+                    gift['thumbnail_webp'] = ''
                 
                 # Remove images array from response
                 if 'images' in gift:
@@ -308,7 +349,7 @@ class AppMasterService:
                 "error": {"code": "SERVER_ERROR", "details": str(e)}
             }
 
-    def get_product_detail(self, request_data: dict) -> dict:
+    def _get_product_detail(self, request_data: dict) -> dict:
         """Get details of a specific product for app users"""
         try:
             # Extract product_id from request
@@ -345,15 +386,9 @@ class AppMasterService:
             product['created_datetime'] = f"{product.get('created_at', '')} {product.get('created_time', '')}"
             product['updated_datetime'] = f"{product.get('updated_at', '')} {product.get('updated_time', '')}"
             
-            # Simplify images array to only include image_id and file_url
+            # Simplify images array to image_id, file_url and the size variants
             if product.get('images'):
-                simplified_images = []
-                for img in product['images']:
-                    simplified_images.append({
-                        'image_id': img.get('image_id', ''),
-                        'file_url': img.get('file_url', '')
-                    })
-                product['images'] = simplified_images
+                product['images'] = [public_image(img) for img in product['images']]
             else:
                 product['images'] = []
 
@@ -369,7 +404,7 @@ class AppMasterService:
                 "error": {"code": "SERVER_ERROR", "details": str(e)}
             }
 
-    def get_gift_detail(self, request_data: dict) -> dict:
+    def _get_gift_detail(self, request_data: dict) -> dict:
         """Get details of a specific gift for app users"""
         try:
             # Extract gift_id from request
@@ -406,15 +441,9 @@ class AppMasterService:
             gift['created_datetime'] = f"{gift.get('created_at', '')} {gift.get('created_time', '')}"
             gift['updated_datetime'] = f"{gift.get('updated_at', '')} {gift.get('updated_time', '')}"
             
-            # Simplify images array to only include image_id and file_url
+            # Simplify images array to image_id, file_url and the size variants
             if gift.get('images'):
-                simplified_images = []
-                for img in gift['images']:
-                    simplified_images.append({
-                        'image_id': img.get('image_id', ''),
-                        'file_url': img.get('file_url', '')
-                    })
-                gift['images'] = simplified_images
+                gift['images'] = [public_image(img) for img in gift['images']]
             else:
                 gift['images'] = []
 
@@ -1,9 +1,10 @@
 from datetime import datetime
 from bson import ObjectId
 from trust_rewards.database import client1
-from trust_rewards.utils.common import DateUtils, ValidationUtils, AuditUtils
+from trust_rewards.utils.common import DateUtils, ValidationUtils, AuditUtils, SearchUtils
 from trust_rewards.utils.activity import RecentActivityLogger
 from trust_rewards.utils.transaction import TransactionLogger
+from trust_rewards.utils.wallet import Wallet, WalletStats
 import random
 import string
 
@@ -152,12 +153,10 @@ class AppRedeemService:
                     "error": {"code": "VALIDATION_ERROR", "details": "Gift has invalid points requirement"}
                 }
 
-            # Get current wallet balance
-            current_balance = self._get_worker_balance(worker_id)
-            print(f"DEBUG: Worker ID: {worker_id}, Current Balance: {current_balance}, Points Required: {points_required}")
-            
-            # Check if worker has sufficient balance
-            if current_balance < points_required:
+            # Deduct points immediately; the debit only applies if the balance covers it
+            wallet_change = Wallet.debit(worker_id, points_required)
+            if wallet_change is None:
+                current_balance = Wallet.balance(worker_id)
                 return {
                     "success": False,
                     "message": "Insufficient wallet balance",
@@ -166,31 +165,8 @@ class AppRedeemService:
                         "details": f"Required: {points_required} points, Available: {current_balance} points"
                     }
                 }
-
-            # Calculate new balance and deduct points immediately
-            new_balance = current_balance - points_required
-            # Ensure new_balance is an integer
-            new_balance = int(new_balance)
-            print(f"DEBUG: Balance calculation - Current: {current_balance} (type: {type(current_balance)}), Required: {points_required} (type: {type(points_required)}), New: {new_balance} (type: {type(new_balance)})")
-
-            # Update worker's wallet balance immediately
-            update_result = self.skilled_workers.update_one(
-                {"_id": ObjectId(worker_id)},
-                {
-                    "$set": {
-                        "wallet_points": new_balance,
-                        "last_activity": DateUtils.get_current_date()
-                    }
-                }
-            )
-            
-            # Check if update was successful
-            if update_result.modified_count == 0:
-                return {
-                    "success": False,
-                    "message": "Failed to update wallet balance",
-                    "error": {"code": "UPDATE_ERROR", "details": "Could not update worker wallet points"}
-                }
+            current_balance = wallet_change["previous_balance"]
+            new_balance = wallet_change["new_balance"]
 
             # Get gift name from multiple possible fields
             gift_name = gift.get('name') or gift.get('title') or gift.get('gift_name') or gift.get('product_name') or 'Unknown Gift'
@@ -227,7 +203,14 @@ class AppRedeemService:
             
             print(f"DEBUG: Redemption data - Gift Name: {redemption_data['gift_name']}, Points Used: {redemption_data['points_used']}")
 
-            self.gift_redemptions.insert_one(redemption_data)
+            SearchUtils.set_tokens("gift_redemptions", redemption_data)
+            try:
+                self.gift_redemptions.insert_one(redemption_data)
+            except Exception:
+                # No redemption to cancel later, so give the points back now
+                Wallet.credit(worker_id, points_required)
+                raise
+            WalletStats.redemption_status_changed(worker_id, None, "pending")
 
             # Record transaction in ledger (points already deducted)
             TransactionLogger.record(
@@ -327,7 +310,7 @@ class AppRedeemService:
             has_prev = page > 1
 
             # Get current balance
-            current_balance = self._get_worker_balance(worker_id)
+            current_balance = Wallet.balance(worker_id)
 
             return {
                 "success": True,
@@ -381,34 +364,22 @@ class AppRedeemService:
                     "error": {"code": "AUTH_ERROR", "details": "Invalid user session"}
                 }
 
-            # Current balance from worker document
-            balance = self._get_worker_balance(worker_id)
-
-            # Aggregate totals from transaction_ledger
-            pipeline = [
-                {"$match": {"worker_id": worker_id}},
-                {
-                    "$group": {
-                        "_id": None,
-                        "earned": {"$sum": {"$cond": [{"$gt": ["$amount", 0]}, "$amount", 0]}},
-                        "redeemed": {"$sum": {"$cond": [{"$lt": ["$amount", 0]}, "$amount", 0]}},
-                    }
+            # Balance and totals are materialized on the worker document
+            # (see WalletStats), so this is a single read
+            worker = WalletStats.get(worker_id)
+            if worker is None:
+                return {
+                    "success": False,
+                    "message": "Worker not found",
+                    "error": {"code": "NOT_FOUND", "details": "Skilled worker not found"}
                 }
-            ]
+            balance = worker["wallet_points"]
+            stats = worker[WalletStats.FIELD]
+            earned_total = int(stats.get("earned", 0) or 0)
+            redeemed_total = int(stats.get("redeemed", 0) or 0)  # negative sum
 
-            agg = list(self.transaction_ledger.aggregate(pipeline))
-            earned_total = 0
-            redeemed_total = 0
-            if agg:
-                earned_total = int(agg[0].get("earned", 0) or 0)
-                redeemed_total = int(agg[0].get("redeemed", 0) or 0)  # negative sum
-
-            # Recent transactions (last 10)
-            recent = list(
-                self.transaction_ledger.find({"worker_id": worker_id})
-                .sort("transaction_datetime", -1)
-                .limit(10)
-            )
+            # Kept oldest first; the screen shows newest first
+            recent = list(reversed(stats.get("recent_transactions", [])))
 
             # Build friendly list
             today = DateUtils.get_current_date()
@@ -451,18 +422,9 @@ class AppRedeemService:
                         "redeemed_abs": abs(redeemed_total),
                     },
                     "counts": {
-                        "coupon_scans": int(self.transaction_ledger.count_documents({
-                            "worker_id": worker_id,
-                            "transaction_type": "COUPON_SCAN"
-                        })),
-                        "redeems": int(self.gift_redemptions.count_documents({
-                            "worker_id": worker_id,
-                            "status": "redeemed"
-                        })),
-                        "redeem_pending": int(self.gift_redemptions.count_documents({
-                            "worker_id": worker_id,
-                            "status": "pending"
-                        })),
+                        "coupon_scans": int(stats.get("coupon_scans", 0) or 0),
+                        "redeems": int(stats.get("redeems", 0) or 0),
+                        "redeem_pending": int(stats.get("redeem_pending", 0) or 0),
                     },
                     "recent_transactions": recent_list,
                 },
@@ -476,23 +438,7 @@ class AppRedeemService:
             }
 
     # _record_transaction removed; using TransactionLogger.record
-
-    def _get_worker_balance(self, worker_id: str) -> int:
-        """Get current wallet balance of worker"""
-        try:
-            worker = self.skilled_workers.find_one({"_id": ObjectId(worker_id)})
-            if worker:
-                balance = worker.get('wallet_points', 0)
-                # Ensure balance is an integer
-                try:
-                    return int(balance)
-                except (ValueError, TypeError):
-                    print(f"Warning: Invalid wallet_points value: {balance}, defaulting to 0")
-                    return 0
-            return 0
-        except Exception as e:
-            print(f"Error getting worker balance: {str(e)}")
-            return 0
+    # _get_worker_balance removed; using Wallet.balance
 
     def send_otp_for_redemption(self, request_data: dict, current_user: dict) -> dict:
         """Send OTP to worker's mobile for gift redemption verification"""
@@ -760,28 +706,6 @@ class AppRedeemService:
                     "error": {"code": "VALIDATION_ERROR", "details": "No points to return"}
                 }
 
-            # Get current wallet balance and calculate new balance after returning points
-            current_balance = self._get_worker_balance(worker_id)
-            new_balance = current_balance + points_to_return
-
-            # Update worker's wallet balance (return the points)
-            update_result = self.skilled_workers.update_one(
-                {"_id": ObjectId(worker_id)},
-                {
-                    "$set": {
-                        "wallet_points": new_balance,
-                        "last_activity": DateUtils.get_current_date()
-                    }
-                }
-            )
-
-            if update_result.modified_count == 0:
-                return {
-                    "success": False,
-                    "message": "Failed to update wallet balance",
-                    "error": {"code": "UPDATE_ERROR", "details": "Could not update worker wallet points"}
-                }
-
             # Update redemption status to cancelled and add status history entry
             cancellation_history_entry = {
                 "status": "cancelled",
@@ -793,8 +717,10 @@ class AppRedeemService:
                 "comments": f"Redemption cancelled by {redemption.get('worker_name', 'Worker')}"
             }
             
-            self.gift_redemptions.update_one(
-                {"redemption_id": redemption_id},
+            # Conditional on still being pending, so a concurrent cancel (or admin
+            # status change) cannot return the points twice
+            cancel_result = self.gift_redemptions.update_one(
+                {"redemption_id": redemption_id, "status": "pending"},
                 {
                     "$set": {
                         "status": "cancelled",
@@ -808,6 +734,27 @@ class AppRedeemService:
                     }
                 }
             )
+            if cancel_result.modified_count == 0:
+                return {
+                    "success": False,
+                    "message": "Cannot cancel redemption in current status",
+                    "error": {
+                        "code": "INVALID_STATUS",
+                        "details": "Redemption status changed while cancelling. Only 'pending' redemptions can be cancelled."
+                    }
+                }
+            WalletStats.redemption_status_changed(worker_id, "pending", "cancelled")
+
+            # Return the points
+            wallet_change = Wallet.credit(worker_id, points_to_return)
+            if wallet_change is None:
+                return {
+                    "success": False,
+                    "message": "Failed to update wallet balance",
+                    "error": {"code": "UPDATE_ERROR", "details": "Could not update worker wallet points"}
+                }
+            current_balance = wallet_change["previous_balance"]
+            new_balance = wallet_change["new_balance"]
 
             # Record transaction in ledger for points return
             TransactionLogger.record(
@@ -1,6 +1,6 @@
 from bson import ObjectId
-from datetime import datetime
 from trust_rewards.database import client1
+from trust_rewards.utils.leaderboard import ALL_TIME, THIS_MONTH, Leaderboard
 
 
 class AppWorkerService:
@@ -9,40 +9,18 @@ class AppWorkerService:
         self.skilled_workers = db['skilled_workers']
         self.transaction_ledger = db['transaction_ledger']
 
-    def _period_filter(self, period: str):
-        if period == 'all_time':
-            return {}
-        # this_month default
-        now = datetime.now()
-        start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        return {
-            "transaction_datetime": {"$gte": start}
-        }
-
     def get_super30_leaderboard(self, request_data: dict, current_user: dict = None) -> dict:
         try:
-            period = (request_data.get('period') or 'this_month').lower()
-            if period not in ['this_month', 'all_time']:
-                period = 'this_month'
-
-            match_stage = {**self._period_filter(period)}
-
-            # Aggregate earned points and scan counts per worker
-            pipeline = [
-                {"$match": match_stage} if match_stage else {"$match": {}},
-                {"$group": {
-                    "_id": "$worker_id",
-                    "earned_points": {"$sum": {"$cond": [{"$gt": ["$amount", 0]}, "$amount", 0]}},
-                    "scans": {"$sum": {"$cond": [{"$eq": ["$transaction_type", "COUPON_SCAN"]}, 1, 0]}}
-                }},
-                {"$sort": {"earned_points": -1, "scans": -1}},
-                {"$limit": 30}
-            ]
+            period = (request_data.get('period') or THIS_MONTH).lower()
+            if period not in [THIS_MONTH, ALL_TIME]:
+                period = THIS_MONTH
 
-            agg = list(self.transaction_ledger.aggregate(pipeline))
+            # Standings are maintained per period as entries are recorded
+            period_key = Leaderboard.period_key(period)
+            agg = Leaderboard.top(period_key, 30)
 
             # Fetch worker names for top 30
-            worker_ids = [ObjectId(w) for w in [a['_id'] for a in agg] if ObjectId.is_valid(w)]
+            worker_ids = [ObjectId(w) for w in [a['worker_id'] for a in agg] if ObjectId.is_valid(w)]
             workers_map = {}
             if worker_ids:
                 for w in self.skilled_workers.find({"_id": {"$in": worker_ids}}, {"name": 1}):
@@ -53,21 +31,24 @@ class AppWorkerService:
             current_user_rank = None
             current_user_in_top30 = False
             
-            for idx, a in enumerate(agg, start=1):
-                wid = a['_id']
-                record = {
-                    "rank": idx,
+            for a in agg:
+                wid = a['worker_id']
+                records.append({
+                    "rank": a['rank'],
                     "worker_id": wid,
                     "worker_name": workers_map.get(wid, ""),
-                    "points": int(a.get('earned_points', 0) or 0),
+                    "points": int(a.get('points', 0) or 0),
                     "scans": int(a.get('scans', 0) or 0),
-                }
-                records.append(record)
-                
-                # Check if current user is in top 30
-                if current_user and current_user.get('worker_id') == wid:
-                    current_user_rank = idx
-                    current_user_in_top30 = True
+                })
+
+            # Exact rank of the current worker, inside the top 30 or not
+            current_user_points = 0
+            if current_user and current_user.get('worker_id'):
+                standing = Leaderboard.standing(period_key, current_user['worker_id'])
+                if standing:
+                    current_user_rank = standing['rank']
+                    current_user_points = int(standing.get('points', 0) or 0)
+                    current_user_in_top30 = current_user_rank <= 30
 
             top3 = records[:3]
             rankings = records[3:]
@@ -80,7 +61,8 @@ class AppWorkerService:
                     "rankings": rankings,
                     "current_user": {
                         "is_in_top30": current_user_in_top30,
-                        "rank": current_user_rank
+                        "rank": current_user_rank,
+                        "points": current_user_points
                     }
                 }
             }
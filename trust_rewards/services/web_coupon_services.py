@@ -1,8 +1,31 @@
+import os
+import zlib
 from bson import ObjectId
+from pymongo.errors import BulkWriteError
 from trust_rewards.database import client1
 from datetime import datetime, timedelta
 from typing import Optional
 
+from app.utils.cursor_pagination import InvalidCursor, paginate
+from app.utils.jobs import JobCancelled, JobLeaseLost, job_status
+from app.utils.list_count import COUNT_CAPPED, InvalidCountMode, count_total
+from trust_rewards.workers.queue import (
+    ANALYTICS_ROLLUP_REBUILD_JOB, COUPON_CSV_EXPORT_JOB, COUPON_GENERATION_JOB, job_queue
+)
+from trust_rewards.utils.coupon_codes import COUPON_CODE_FILTER_ENABLED, CouponCodeFilter, CouponCodes
+from trust_rewards.utils.rollups import AnalyticsRollups
+from trust_rewards.utils.sequences import COUPON_MASTER_SEQUENCE, sequences
+
+# Coupons per ordered insert_many; tune with COUPON_INSERT_CHUNK_SIZE or per request (chunk_size)
+COUPON_INSERT_CHUNK_SIZE = int(os.getenv("COUPON_INSERT_CHUNK_SIZE", "5000"))
+MAX_COUPON_INSERT_CHUNK_SIZE = 50000
+MAX_COUPONS_PER_BATCH = int(os.getenv("MAX_COUPONS_PER_BATCH", "100000"))
+# Coupon codes per cursor batch / write when exporting CSVs
+COUPON_CSV_BATCH_SIZE = int(os.getenv("COUPON_CSV_BATCH_SIZE", "10000"))
+COUPON_CSV_DIR = "uploads/trust_rewards/coupons"
+# Prefix of the download URLs returned for exported files
+PUBLIC_BASE_URL = os.getenv("PUBLIC_BASE_URL", "http://getpe.shop").rstrip("/")
+
 class CouponService:
     def __init__(self):
         self.client_database = client1['trust_rewards']
@@ -21,6 +44,7 @@ class CouponService:
             valid_from = request_data.get('valid_from')
             valid_to = request_data.get('valid_to')
             created_by_id = request_data.get('created_by_id', 1)
+            chunk_size = request_data.get('chunk_size') or COUPON_INSERT_CHUNK_SIZE
 
             # Validate required fields
             if not points_value or not isinstance(points_value, int) or points_value < 1 or points_value > 10000:
@@ -37,13 +61,20 @@ class CouponService:
                     "error": {"code": "VALIDATION_ERROR", "details": "Invalid batch number"}
                 }
 
-            if not number_of_coupons or not isinstance(number_of_coupons, int) or number_of_coupons < 1 or number_of_coupons > 1000:
+            if not number_of_coupons or not isinstance(number_of_coupons, int) or number_of_coupons < 1 or number_of_coupons > MAX_COUPONS_PER_BATCH:
                 return {
                     "success": False,
-                    "message": "Number of coupons must be between 1 and 1000",
+                    "message": f"Number of coupons must be between 1 and {MAX_COUPONS_PER_BATCH}",
                     "error": {"code": "VALIDATION_ERROR", "details": "Invalid number of coupons"}
                 }
 
+            if not isinstance(chunk_size, int) or chunk_size < 1 or chunk_size > MAX_COUPON_INSERT_CHUNK_SIZE:
+                return {
+                    "success": False,
+                    "message": f"Chunk size must be between 1 and {MAX_COUPON_INSERT_CHUNK_SIZE}",
+                    "error": {"code": "VALIDATION_ERROR", "details": "Invalid chunk size"}
+                }
+
             if not valid_from or not valid_to:
                 return {
                     "success": False,
@@ -101,51 +132,35 @@ class CouponService:
                 "status": "active",
                 "created_at": self.current_datetime.strftime("%Y-%m-%d"),
                 "created_time": self.current_datetime.strftime("%H:%M:%S"),
-                "created_by_id": created_by_id
+                "created_by_id": created_by_id,
+                # Progress of the background coupon_code inserts
+                "generation_status": "queued",
+                "generated_count": 0
             }
             
             master_result = self.coupon_master.insert_one(master_doc)
             coupon_master_id = str(master_result.inserted_id)
+            # Scanners re-check their code filters before rejecting codes of the new batch
+            CouponCodeFilter.bump_stamp()
 
-            # Step 2: Generate individual coupon codes
-            generated_coupons = []
-            for i in range(number_of_coupons):
-                # Generate unique coupon code using MongoDB _id for guaranteed uniqueness
-                coupon_doc = {
-                    "coupon_master_id": coupon_master_id,
-                    "coupon_value": points_value,
-                    "valid_from": valid_from_date.strftime("%Y-%m-%d"),
-                    "valid_to": valid_to_date.strftime("%Y-%m-%d"),
-                    "status": "active",
-                    "is_scanned": False,
-                    "scanned_by": None,
-                    "scanned_at": None,
-                    "created_at": self.current_datetime.strftime("%Y-%m-%d"),
-                    "created_time": self.current_datetime.strftime("%H:%M:%S"),
-                    "created_by_id": created_by_id
-                }
-                
-                # Insert coupon to get unique _id
-                coupon_result = self.coupon_code.insert_one(coupon_doc)
-                coupon_id = coupon_result.inserted_id
-                
-                # Use ObjectId as coupon_code for guaranteed uniqueness
-                coupon_code = str(coupon_id)
-                
-                # Update coupon with coupon_code
-                self.coupon_code.update_one(
-                    {"_id": coupon_id},
-                    {
-                        "$set": {
-                            "coupon_code": coupon_code
-                        }
-                    }
-                )
+            # Step 3: Queue the coupon_code inserts for the job workers
+            job = job_queue.enqueue(
+                COUPON_GENERATION_JOB,
+                {"coupon_master_id": coupon_master_id, "number_of_coupons": number_of_coupons,
+                 "chunk_size": chunk_size},
+                created_by=created_by_id
+            )
+            self.coupon_master.update_one(
+                {"_id": master_result.inserted_id},
+                {"$set": {"generation_job_id": job["job_id"]}}
+            )
 
             return {
                 "success": True,
-                "message": f"Successfully generated {number_of_coupons} points redemption coupons",
+                "message": f"Generation of {number_of_coupons} points redemption coupons started",
                 "data": {
+                    "job_id": job["job_id"],
+                    "status": job["status"],
                     "coupon_id": next_coupon_id,
                     "coupon_master_id": str(coupon_master_id),
                     "batch_number": batch_number,
@@ -153,7 +168,7 @@ class CouponService:
                     "number_of_coupons": number_of_coupons,
                     "valid_from": valid_from,
                     "valid_to": valid_to,
-                    "summary": f"This generated {number_of_coupons} points redemption coupons with {points_value} points each for batch {batch_number}. Skilled workers can scan these coupons to add points to their wallet."
+                    "summary": f"This generates {number_of_coupons} points redemption coupons with {points_value} points each for batch {batch_number}. Skilled workers can scan these coupons to add points to their wallet."
                 }
             }
 
@@ -164,6 +179,151 @@ class CouponService:
                 "error": {"code": "SERVER_ERROR", "details": str(e)}
             }
 
+    def run_coupon_generation(self, coupon_master_id: str, chunk_size: Optional[int] = None,
+                              on_progress=None) -> dict:
+        """Insert the coupon codes of a queued batch (runs in the job workers).
+
+        Coupons already inserted by an earlier, failed attempt are kept and only
+        the remainder is generated.
+        """
+        master = self.coupon_master.find_one({"_id": ObjectId(coupon_master_id)})
+        if not master:
+            return {
+                "success": False,
+                "message": "Coupon batch not found",
+                "error": {"code": "NOT_FOUND", "details": coupon_master_id}
+            }
+
+        coupon_template = {
+            "coupon_master_id": coupon_master_id,
+            "coupon_value": master["points_value"],
+            # Denormalized so a scan needs no coupon_master lookup
+            "points_value": master["points_value"],
+            "batch_number": master["batch_number"],
+            "valid_from": master["valid_from"],
+            "valid_to": master["valid_to"],
+            "status": "active",
+            "is_scanned": False,
+            "scanned_by": None,
+            "scanned_at": None,
+            "created_at": master["created_at"],
+            "created_time": master["created_time"],
+            "created_by_id": master.get("created_by_id")
+        }
+        already_generated = self.coupon_code.count_documents({"coupon_master_id": coupon_master_id})
+        recorded = already_generated
+
+        def chunk_inserted(generated):
+            nonlocal recorded
+            AnalyticsRollups.record_issued(master["batch_number"], master["created_at"], generated - recorded)
+            recorded = generated
+            if on_progress:
+                on_progress(generated)
+
+        try:
+            generation = self._insert_coupon_codes(master["_id"], coupon_template, master["number_of_coupons"],
+                                                   chunk_size or COUPON_INSERT_CHUNK_SIZE,
+                                                   already_generated=already_generated, on_progress=chunk_inserted)
+            # Part of a failed chunk may have been written
+            AnalyticsRollups.record_issued(master["batch_number"], master["created_at"],
+                                           generation["generated_count"] - recorded)
+        finally:
+            if COUPON_CODE_FILTER_ENABLED:
+                # Whatever was inserted is scannable, including after a failure or cancel
+                CouponCodeFilter.build(coupon_master_id)
+        if not generation["success"]:
+            return {
+                "success": False,
+                "message": f"Coupon generation stopped after {generation['generated_count']} of {master['number_of_coupons']} coupons",
+                "error": {"code": "SERVER_ERROR", "details": generation["error"]}
+            }
+        return {
+            "success": True,
+            "message": f"Successfully generated {master['number_of_coupons']} points redemption coupons",
+            "data": {
+                "coupon_master_id": coupon_master_id,
+                "batch_number": master["batch_number"],
+                "generated_count": generation["generated_count"]
+            }
+        }
+
+    def _insert_coupon_codes(self, master_id: ObjectId, coupon_template: dict, number_of_coupons: int,
+                             chunk_size: int = COUPON_INSERT_CHUNK_SIZE, already_generated: int = 0,
+                             on_progress=None) -> dict:
+        """Insert a batch's coupon_code documents with ordered insert_many chunks.
+
+        The _id is generated client-side and the coupon_code is derived from it
+        (see CouponCodes), so each coupon is a single write instead of an insert
+        followed by an update.
+        `generated_count` on the coupon_master document is advanced after every
+        chunk; on failure it holds the number of coupons actually inserted.
+        `on_progress(generated)` is called after each chunk and may raise
+        JobCancelled to stop the batch, or JobLeaseLost when another worker has
+        taken the job over (the batch is then left to that worker).
+        Each coupon carries its position in the batch (`batch_seq`, unique per
+        batch), so re-inserting a chunk another attempt already wrote fails on
+        the duplicate keys and the loop continues after what the batch holds.
+        """
+        generated = already_generated
+        try:
+            self.coupon_master.update_one(
+                {"_id": master_id},
+                {"$set": {"generation_status": "generating", "generated_count": generated}}
+            )
+            while generated < number_of_coupons:
+                chunk_start = generated
+                batch = []
+                for batch_seq in range(chunk_start, min(chunk_start + chunk_size, number_of_coupons)):
+                    coupon_id = ObjectId()
+                    coupon_doc = dict(coupon_template)
+                    coupon_doc["_id"] = coupon_id
+                    coupon_doc["coupon_code"] = CouponCodes.encode(coupon_id)
+                    coupon_doc["batch_seq"] = batch_seq
+                    batch.append(coupon_doc)
+
+                try:
+                    self.coupon_code.insert_many(batch, ordered=True)
+                    generated += len(batch)
+                except BulkWriteError as e:
+                    if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+                        raise
+                    # Another attempt already wrote (part of) this chunk
+                    stored = self.coupon_code.count_documents({"coupon_master_id": coupon_template["coupon_master_id"]})
+                    if stored <= chunk_start:
+                        raise
+                    generated = stored
+                self.coupon_master.update_one(
+                    {"_id": master_id},
+                    {"$set": {"generated_count": generated}}
+                )
+                if on_progress:
+                    on_progress(generated)
+
+            self.coupon_master.update_one(
+                {"_id": master_id},
+                {"$set": {"generation_status": "completed", "generated_count": generated}}
+            )
+            return {"success": True, "generated_count": generated}
+
+        except JobLeaseLost:
+            raise
+        except JobCancelled:
+            self.coupon_master.update_one(
+                {"_id": master_id},
+                {"$set": {"generation_status": "cancelled", "generated_count": generated}}
+            )
+            raise
+        except Exception as e:
+            if isinstance(e, BulkWriteError):
+                # Ordered insert: everything before the failing document was written
+                generated += e.details.get("nInserted", 0)
+            self.coupon_master.update_one(
+                {"_id": master_id},
+                {"$set": {"generation_status": "failed", "generated_count": generated,
+                          "generation_error": str(e)}}
+            )
+            return {"success": False, "generated_count": generated, "error": str(e)}
+
     def get_coupons_list(self, request_data: dict) -> dict:
         """Get paginated list of individual coupons for a specific batch"""
         try:
@@ -241,16 +401,16 @@ class CouponService:
                         }
                     }
 
-            # Get total count
-            total_count = self.coupon_code.count_documents(match_conditions)
+            # Get total count (capped by default: batches can hold millions of coupons)
+            count = count_total(self.coupon_code, match_conditions, request_data.get('count_mode'), default_mode=COUNT_CAPPED)
+            total_count = count["total"]
             
-            # Get coupons with pagination (sort first, then paginate)
-            coupons = list(self.coupon_code.find(match_conditions).sort("_id", -1).skip(skip).limit(limit))
+            # Get coupons with pagination (sort first, then paginate); a cursor replaces page
+            coupons, next_cursor = paginate(
+                self.coupon_code, match_conditions, [("_id", -1)], limit,
+                cursor=request_data.get('cursor'), skip=skip
+            )
             
-            # Convert ObjectId to string
-            for coupon in coupons:
-                coupon['_id'] = str(coupon['_id'])
-
             # Enrich coupons with scanned_by_name by joining to skilled_workers using scanned_by (stored as string id)
             scanned_ids = list({c.get("scanned_by") for c in coupons if c.get("scanned_by")})
             if scanned_ids:
@@ -286,7 +446,7 @@ class CouponService:
 
             # Calculate pagination info
             total_pages = (total_count + limit - 1) // limit
-            has_next = page < total_pages
+            has_next = next_cursor is not None
             has_prev = page > 1
 
             return {
@@ -310,11 +470,21 @@ class CouponService:
                         "total_count": total_count,
                         "limit": limit,
                         "has_next": has_next,
-                        "has_prev": has_prev
+                        "has_prev": has_prev,
+                        "next_cursor": next_cursor,
+                        "count_mode": count["mode"],
+                        "total_is_exact": count["is_exact"],
+                        "total_display": count["display"]
                     }
                 }
             }
 
+        except (InvalidCursor, InvalidCountMode) as e:
+            return {
+                "success": False,
+                "message": "Invalid pagination parameters",
+                "error": {"code": "VALIDATION_ERROR", "details": str(e)}
+            }
         except Exception as e:
             return {
                 "success": False,
@@ -322,85 +492,218 @@ class CouponService:
                 "error": {"code": "SERVER_ERROR", "details": str(e)}
             }
 
+    def csv_batch_error(self, coupon_master_id) -> Optional[dict]:
+        """Error result if `coupon_master_id` is missing, malformed or not a batch; None if it can be exported"""
+        if not coupon_master_id:
+            return {
+                "success": False,
+                "message": "coupon_master_id is required",
+                "error": {"code": "VALIDATION_ERROR", "details": "Missing coupon_master_id"}
+            }
+        if not ObjectId.is_valid(coupon_master_id):
+            return {
+                "success": False,
+                "message": "Invalid coupon_master_id",
+                "error": {"code": "VALIDATION_ERROR", "details": f"Invalid coupon_master_id: {coupon_master_id}"}
+            }
+        if self.coupon_master.find_one({"_id": ObjectId(coupon_master_id)}, {"_id": 1}) is None:
+            return {
+                "success": False,
+                "message": "Coupon batch not found",
+                "error": {"code": "NOT_FOUND", "details": coupon_master_id}
+            }
+        return None
+
     def get_coupon_code_list_csv(self, request_data: dict) -> dict:
-        """Get coupon codes as CSV for a specific batch"""
+        """Queue a CSV export of the unused coupon codes of a batch"""
         try:
             # Extract mandatory coupon_master_id
             coupon_master_id = request_data.get('coupon_master_id')
-            if not coupon_master_id:
-                return {
-                    "success": False,
-                    "message": "coupon_master_id is required",
-                    "error": {"code": "VALIDATION_ERROR", "details": "Missing coupon_master_id"}
-                }
+            error = self.csv_batch_error(coupon_master_id)
+            if error:
+                return error
 
-            # Extract filters
-            filters = request_data.get('filters', {})
-            status = filters.get('status', 'active')
-            is_scanned = filters.get('is_scanned', False)  # Default to unused coupons only
+            job = job_queue.enqueue(
+                COUPON_CSV_EXPORT_JOB,
+                {"coupon_master_id": coupon_master_id, "compress": bool(request_data.get('compress', False))},
+                created_by=request_data.get('created_by_id')
+            )
+            return {
+                "success": True,
+                "message": "CSV export started",
+                "data": {
+                    "job_id": job["job_id"],
+                    "status": job["status"],
+                    "coupon_master_id": coupon_master_id
+                }
+            }
 
-            # Build query with mandatory coupon_master_id - only unused coupons by default
-            query = {
-                "coupon_master_id": coupon_master_id,
-                "is_scanned": False,  # Only unused coupons
-                "status": "active"     # Only active coupons
+        except Exception as e:
+            return {
+                "success": False,
+                "message": f"Failed to start CSV export: {str(e)}",
+                "error": {"code": "SERVER_ERROR", "details": str(e)}
             }
 
-            # Get all coupon codes for the batch (sort first)
-            coupons = list(self.coupon_code.find(query, {"coupon_code": 1, "_id": 0}).sort("_id", -1))
-            
-            # Extract only coupon codes
-            coupon_codes = [coupon['coupon_code'] for coupon in coupons]
-            
-            # Get batch info for filename
-            batch_info = self.coupon_master.find_one({"_id": ObjectId(coupon_master_id)})
-            batch_number = batch_info.get('batch_number', 'unknown') if batch_info else 'unknown'
-            
-            # Generate filename
-            filename = f"coupon_codes_{batch_number}_{self.current_datetime.strftime('%Y%m%d_%H%M%S')}.csv"
-            
-            # Create uploads directory if it doesn't exist
-            import os
-            upload_dir = "uploads/trust_rewards/coupons"
-            os.makedirs(upload_dir, exist_ok=True)
-            
-            # Full file path
-            file_path = os.path.join(upload_dir, filename)
-            
-            # Create CSV content and save to file
-            csv_content = "Coupon Code\n" + "\n".join(coupon_codes)
-            
-            # Write CSV file
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(csv_content)
-            
+    def iter_coupon_code_csv(self, coupon_master_id: str, compress: bool = False, on_rows=None):
+        """Yield the CSV of a batch's unused coupon codes as bytes, one cursor batch at a time.
+
+        Memory stays flat whatever the batch size: only COUPON_CSV_BATCH_SIZE
+        codes are held at once. With `compress` the output is a gzip stream.
+        `on_rows(written)` is called after each batch and may raise JobCancelled.
+        """
+        query = {
+            "coupon_master_id": coupon_master_id,
+            "is_scanned": False,  # Only unused coupons
+            "status": "active"     # Only active coupons
+        }
+        # coupon_master_id_is_scanned_id index: filter and sort without an in-memory sort
+        cursor = self.coupon_code.find(query, {"coupon_code": 1, "_id": 0}) \
+            .sort("_id", -1).batch_size(COUPON_CSV_BATCH_SIZE)
+        gzip = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS) if compress else None
+
+        def encode(text: str) -> bytes:
+            data = text.encode("utf-8")
+            return gzip.compress(data) if gzip else data
+
+        yield encode("Coupon Code\n")
+        written = 0
+        lines = []
+        for coupon in cursor:
+            lines.append(coupon["coupon_code"])
+            if len(lines) >= COUPON_CSV_BATCH_SIZE:
+                written += len(lines)
+                yield encode("\n".join(lines) + "\n")
+                lines = []
+                if on_rows:
+                    on_rows(written)
+        if lines:
+            written += len(lines)
+            yield encode("\n".join(lines) + "\n")
+        if gzip:
+            yield gzip.flush()
+        if on_rows:
+            on_rows(written)
+
+    def coupon_csv_filename(self, coupon_master_id: str, compress: bool = False) -> tuple:
+        """(filename, batch_number) for a batch's CSV export"""
+        batch_info = self.coupon_master.find_one({"_id": ObjectId(coupon_master_id)}, {"batch_number": 1})
+        batch_number = batch_info.get('batch_number', 'unknown') if batch_info else 'unknown'
+        suffix = ".csv.gz" if compress else ".csv"
+        return f"coupon_codes_{batch_number}_{self.current_datetime.strftime('%Y%m%d_%H%M%S')}{suffix}", batch_number
+
+    def build_coupon_code_csv(self, coupon_master_id: str, on_progress=None, compress: bool = False) -> dict:
+        """Write the CSV of a batch's unused coupon codes to a file (runs in the job workers).
+
+        The file is streamed to disk in batches and renamed into place when
+        complete; it is served from /uploads, which supports Range requests,
+        so clients can resume an interrupted download.
+        """
+        part_path = None
+        try:
+            expected = self.coupon_code.count_documents({
+                "coupon_master_id": coupon_master_id, "is_scanned": False, "status": "active"
+            })
+            filename, batch_number = self.coupon_csv_filename(coupon_master_id, compress)
+            os.makedirs(COUPON_CSV_DIR, exist_ok=True)
+            file_path = os.path.join(COUPON_CSV_DIR, filename)
+            part_path = file_path + ".part"
+
+            total_codes = 0
+
+            def on_rows(written):
+                nonlocal total_codes
+                total_codes = written
+                if on_progress and expected:
+                    on_progress(min(99.0, written * 100.0 / expected))
+
+            with open(part_path, "wb") as f:
+                for chunk in self.iter_coupon_code_csv(coupon_master_id, compress, on_rows=on_rows):
+                    f.write(chunk)
+            os.replace(part_path, file_path)
+            part_path = None
+
             # Convert file path to use forward slashes for response
             response_file_path = file_path.replace('\\', '/')
-            
-            # Create full URL for file access
-            # base_url = "http://127.0.0.1:8000"  # You can make this configurable
-            base_url = "http://getpe.shop"
-            full_url = f"{base_url}/{response_file_path}"
+            full_url = f"{PUBLIC_BASE_URL}/{response_file_path}"
             
             return {
                 "success": True,
-                "message": f"Successfully generated CSV with {len(coupon_codes)} coupon codes",
+                "message": f"Successfully generated CSV with {total_codes} coupon codes",
                 "data": {
                     "filename": filename,
                     "file_path": response_file_path,
                     "full_url": full_url,
-                    "total_codes": len(coupon_codes),
+                    "total_codes": total_codes,
+                    "compressed": compress,
+                    "file_size": os.path.getsize(file_path),
                     "batch_number": batch_number,
                     "coupon_master_id": coupon_master_id
                 }
             }
 
+        except JobCancelled:
+            raise
         except Exception as e:
             return {
                 "success": False,
                 "message": f"Failed to generate CSV: {str(e)}",
                 "error": {"code": "SERVER_ERROR", "details": str(e)}
             }
+        finally:
+            if part_path and os.path.exists(part_path):
+                os.remove(part_path)
+
+    def get_job_status(self, request_data: dict) -> dict:
+        """Poll a coupon generation / CSV export job"""
+        job_id = request_data.get('job_id')
+        if not job_id:
+            return {
+                "success": False,
+                "message": "job_id is required",
+                "error": {"code": "VALIDATION_ERROR", "details": "Missing job_id"}
+            }
+        job = job_queue.get(job_id)
+        if not job:
+            return {
+                "success": False,
+                "message": "Job not found",
+                "error": {"code": "NOT_FOUND", "details": job_id}
+            }
+        result_url = (job.get("result") or {}).get("full_url") if job["type"] == COUPON_CSV_EXPORT_JOB else None
+        return {
+            "success": True,
+            "message": f"Job is {job['status']}",
+            "data": job_status(job, result_url)
+        }
+
+    def cancel_job(self, request_data: dict) -> dict:
+        """Cancel a queued or running coupon job"""
+        job_id = request_data.get('job_id')
+        if not job_id:
+            return {
+                "success": False,
+                "message": "job_id is required",
+                "error": {"code": "VALIDATION_ERROR", "details": "Missing job_id"}
+            }
+        job = job_queue.cancel(job_id)
+        if not job:
+            return {
+                "success": False,
+                "message": "Job not found",
+                "error": {"code": "NOT_FOUND", "details": job_id}
+            }
+        if job["type"] == COUPON_GENERATION_JOB and job["status"] == "cancelled":
+            # Cancelled before a worker picked it up
+            self.coupon_master.update_one(
+                {"_id": ObjectId(job["payload"]["coupon_master_id"])},
+                {"$set": {"generation_status": "cancelled"}}
+            )
+        return {
+            "success": True,
+            "message": "Cancellation requested" if job["status"] == "running" else f"Job is {job['status']}",
+            "data": job_status(job)
+        }
 
     def get_coupon_master_list(self, request_data: dict) -> dict:
         """Get list of coupon master batches"""
@@ -559,64 +862,23 @@ class CouponService:
 
     def _get_next_coupon_id(self) -> str:
         """Get next auto-incrementing coupon_id like COU-1, COU-2, etc."""
-        try:
-            # Find the highest coupon_id
-            pipeline = [
-                {
-                    "$project": {
-                        "coupon_id": 1,
-                        "numeric_part": {
-                            "$toInt": {
-                                "$substr": [
-                                    "$coupon_id",
-                                    4,  # Skip "COU-"
-                                    -1
-                                ]
-                            }
-                        }
-                    }
-                },
-                {"$sort": {"numeric_part": -1}},
-                {"$limit": 1}
-            ]
-            
-            result = list(self.coupon_master.aggregate(pipeline))
-            
-            if result and result[0].get('coupon_id'):
-                # Extract numeric part and increment
-                last_coupon_id = result[0]['coupon_id']
-                numeric_part = int(last_coupon_id.split('-')[1])
-                next_number = numeric_part + 1
-            else:
-                # First coupon
-                next_number = 1
-            
-            return f"COU-{next_number}"
-            
-        except Exception as e:
-            # Fallback: use timestamp-based ID
-            timestamp = int(self.current_datetime.timestamp())
-            return f"COU-{timestamp}"
+        if not sequences.exists(COUPON_MASTER_SEQUENCE):
+            # First use: continue after the batches created before the counter
+            highest = 0
+            for master in self.coupon_master.find({"coupon_id": {"$regex": "^COU-"}}, {"coupon_id": 1, "_id": 0}):
+                suffix = master["coupon_id"][4:]
+                if suffix.isdigit():
+                    highest = max(highest, int(suffix))
+            sequences.ensure_at_least(COUPON_MASTER_SEQUENCE, highest)
+        return f"COU-{sequences.next(COUPON_MASTER_SEQUENCE)}"
 
     def get_analytics_overview(self) -> dict:
         """Get analytics overview for common header stats."""
         try:
-            # Total coupons
-            total_coupons = self.coupon_code.count_documents({})
+            total_coupons, used_coupons, total_points = self._coupon_totals()
 
             # Active coupons (not scanned)
-            active_coupons = self.coupon_code.count_documents({"is_scanned": False})
-
-            # Used coupons (scanned)
-            used_coupons = self.coupon_code.count_documents({"is_scanned": True})
-
-            # Total points from used coupons (sum of coupon_value where is_scanned = True)
-            points_pipeline = [
-                {"$match": {"is_scanned": True}},
-                {"$group": {"_id": None, "total_points": {"$sum": "$coupon_value"}}}
-            ]
-            points_result = list(self.coupon_code.aggregate(points_pipeline))
-            total_points = points_result[0]["total_points"] if points_result else 0
+            active_coupons = total_coupons - used_coupons
 
             # Total workers (only Active) from skilled_workers collection
             total_workers = self.skilled_workers.count_documents({"status": "Active"})
@@ -640,48 +902,28 @@ class CouponService:
             }
 
     def get_statewise_analytics(self, metric: str = "used_coupons") -> dict:
-        """Get statewise analytics for selected metric: used_coupons | total_points | workers."""
+        """Get statewise analytics for selected metric: used_coupons | total_points | workers | active_workers."""
         try:
-            # Aggregate used coupons and total points by state using coupon_code joined to skilled_workers
-            coupon_pipeline = [
-                {"$match": {"is_scanned": True, "scanned_by": {"$ne": None}}},
-                {"$addFields": {"scanned_by_obj": {"$toObjectId": "$scanned_by"}}},
-                {
-                    "$lookup": {
-                        "from": "skilled_workers",
-                        "localField": "scanned_by_obj",
-                        "foreignField": "_id",
-                        "as": "worker"
-                    }
-                },
-                {"$unwind": "$worker"},
-                {
-                    "$group": {
-                        "_id": "$worker.state",
-                        "used_coupons": {"$sum": 1},
-                        "total_points": {"$sum": "$coupon_value"}
-                    }
-                }
-            ]
-            coupon_stats = list(self.coupon_code.aggregate(coupon_pipeline))
+            coupons_by_state = self._coupons_by_state()
 
-            # Aggregate active workers by state
+            # Aggregate active workers by state (status_state index)
             workers_pipeline = [
                 {"$match": {"status": "Active"}},
                 {"$group": {"_id": "$state", "workers": {"$sum": 1}}}
             ]
             worker_stats = list(self.skilled_workers.aggregate(workers_pipeline))
-
-            # Build maps for quick merge
-            coupons_by_state = { (doc.get("_id") or "Unknown"): {
-                "used_coupons": doc.get("used_coupons", 0),
-                "total_points": doc.get("total_points", 0)
-            } for doc in coupon_stats }
-
             workers_by_state = { (doc.get("_id") or "Unknown"): doc.get("workers", 0) for doc in worker_stats }
 
+            # Workers who scanned this month, by state (rollups only)
+            scanning_by_state = {}
+            if metric == "active_workers" and self._analytics_rollups_ready():
+                scanning_by_state = {
+                    (row["state"] or "Unknown"): row["active_workers"]
+                    for row in AnalyticsRollups.by_state({"bucket": self.current_datetime.strftime("%Y-%m")})
+                }
+
             # Union of states from both datasets
-            all_states = set(coupons_by_state.keys()) | set(workers_by_state.keys())
+            all_states = set(coupons_by_state.keys()) | set(workers_by_state.keys()) | set(scanning_by_state.keys())
 
             states_output = []
             totals_used = 0
@@ -693,6 +935,7 @@ class CouponService:
                 used = coupons_by_state.get(state_key, {}).get("used_coupons", 0)
                 points = coupons_by_state.get(state_key, {}).get("total_points", 0)
                 workers = workers_by_state.get(state_key, 0)
+                active_workers = scanning_by_state.get(state_key, 0)
 
                 totals_used += used
                 totals_points += points
@@ -702,14 +945,16 @@ class CouponService:
                     "state": state_key or "Unknown",
                     "used_coupons": used,
                     "total_points": points,
-                    "workers": workers
+                    "workers": workers,
+                    "active_workers": active_workers
                 })
 
             # Prepare response based on selected metric
             metric_map = {
                 "used_coupons": ("used_coupons", totals_used),
                 "total_points": ("total_points", totals_points),
-                "workers": ("workers", totals_workers)
+                "workers": ("workers", totals_workers),
+                "active_workers": ("active_workers", sum(scanning_by_state.values()))
             }
             if metric not in metric_map:
                 metric = "used_coupons"
@@ -739,14 +984,7 @@ class CouponService:
         """
         try:
             # Compute all totals
-            used_total = self.coupon_code.count_documents({"is_scanned": True})
-
-            points_pipeline = [
-                {"$match": {"is_scanned": True}},
-                {"$group": {"_id": None, "total_points": {"$sum": "$coupon_value"}}}
-            ]
-            points_result = list(self.coupon_code.aggregate(points_pipeline))
-            points_total = points_result[0]["total_points"] if points_result else 0
+            _, used_total, points_total = self._coupon_totals()
 
             workers_total = self.skilled_workers.count_documents({"status": "Active"})
 
@@ -782,3 +1020,62 @@ class CouponService:
                 "message": f"Failed to get totals: {str(e)}",
                 "error": {"code": "SERVER_ERROR", "details": str(e)}
             }
+
+    def _analytics_rollups_ready(self) -> bool:
+        """Whether the analytics rollups can be read; queues their first build otherwise"""
+        if AnalyticsRollups.is_built():
+            return True
+        if AnalyticsRollups.claim_first_build():
+            job_queue.enqueue(ANALYTICS_ROLLUP_REBUILD_JOB, {})
+        return False
+
+    def _coupon_totals(self) -> tuple:
+        """(issued, used, points) from the rollups, or from coupon_code until they are built"""
+        if self._analytics_rollups_ready():
+            totals = AnalyticsRollups.totals()
+            return totals["issued_coupons"], totals["used_coupons"], totals["points"]
+
+        total_coupons = self.coupon_code.count_documents({})
+        used_coupons = self.coupon_code.count_documents({"is_scanned": True})
+        points_result = list(self.coupon_code.aggregate([
+            {"$match": {"is_scanned": True}},
+            {"$group": {"_id": None, "total_points": {"$sum": "$coupon_value"}}}
+        ]))
+        total_points = points_result[0]["total_points"] if points_result else 0
+        return total_coupons, used_coupons, total_points
+
+    def _coupons_by_state(self) -> dict:
+        """{state: {used_coupons, total_points}} from the rollups, or from coupon_code until they are built"""
+        if self._analytics_rollups_ready():
+            coupons_by_state = {}
+            for row in AnalyticsRollups.by_state():
+                entry = coupons_by_state.setdefault(row["state"] or "Unknown", {"used_coupons": 0, "total_points": 0})
+                entry["used_coupons"] += row["used_coupons"]
+                entry["total_points"] += row["points"]
+            return coupons_by_state
+
+        # Aggregate used coupons and total points by state using coupon_code joined to skilled_workers
+        coupon_pipeline = [
+            {"$match": {"is_scanned": True, "scanned_by": {"$ne": None}}},
+            {"$addFields": {"scanned_by_obj": {"$toObjectId": "$scanned_by"}}},
+            {
+                "$lookup": {
+                    "from": "skilled_workers",
+                    "localField": "scanned_by_obj",
+                    "foreignField": "_id",
+                    "as": "worker"
+                }
+            },
+            {"$unwind": "$worker"},
+            {
+                "$group": {
+                    "_id": "$worker.state",
+                    "used_coupons": {"$sum": 1},
+                    "total_points": {"$sum": "$coupon_value"}
+                }
+            }
+        ]
+        return { (doc.get("_id") or "Unknown"): {
+            "used_coupons": doc.get("used_coupons", 0),
+            "total_points": doc.get("total_points", 0)
+        } for doc in self.coupon_code.aggregate(coupon_pipeline) }
@@ -1,22 +1,17 @@
 from datetime import datetime
 from typing import Dict, Any
-import os
 import uuid
-import io
 
 from bson import ObjectId
 
-# Optional PIL import - will be handled gracefully if not available
-try:
-    from PIL import Image
-    PIL_AVAILABLE = True
-except ImportError:
-    PIL_AVAILABLE = False
-    Image = None
-
+from app.utils.image_pipeline import ImagePipeline, ImageUploadError, public_image, variant_url
 from trust_rewards.database import client1
 from trust_rewards.utils.datetime_utils import important_utilities
-from trust_rewards.utils.common import AuditUtils
+from trust_rewards.utils.common import AuditUtils, SearchUtils, StatsCache, facet_count, facet_sum, grouped_count
+from trust_rewards.utils.catalog_cache import CATEGORIES, GIFTS, PRODUCTS, SUB_CATEGORIES, invalidate_catalog
+
+product_images = ImagePipeline("uploads/trust_rewards/products")
+gift_images = ImagePipeline("uploads/trust_rewards/gifts")
 
 
 class WebMasterService:
@@ -129,7 +124,9 @@ class WebMasterService:
                 **create_meta  # Spread created_at, created_time, created_by
             }
 
+            SearchUtils.set_tokens("points_master", doc)
             result = self.points_master.insert_one(doc)
+            StatsCache.invalidate("points_master")
 
             return {
                 "success": True,
@@ -279,10 +276,12 @@ class WebMasterService:
                 **update_meta  # Spread updated_at, updated_time, updated_by
             }
 
+            SearchUtils.set_tokens("points_master", update_doc)
             result = self.points_master.update_one(
                 {"_id": ObjectId(record_id)},
                 {"$set": update_doc}
             )
+            StatsCache.invalidate("points_master")
 
             if result.modified_count == 0:
                 return {
@@ -296,15 +295,7 @@ class WebMasterService:
             updated_record['_id'] = str(updated_record['_id'])
 
             # Add created_by_name
-            created_by_id = updated_record.get('created_by')
-            if created_by_id:
-                user = self.users.find_one({"user_id": created_by_id})
-                if user:
-                    updated_record['created_by_name'] = user.get('username', 'Unknown')
-                else:
-                    updated_record['created_by_name'] = 'Unknown'
-            else:
-                updated_record['created_by_name'] = 'Unknown'
+            updated_record['created_by_name'] = AuditUtils.get_user_name(self.users, updated_record.get('created_by'))
 
             return {
                 "success": True,
@@ -362,10 +353,7 @@ class WebMasterService:
             
             # Search filter (search in name and description)
             if search:
-                query['$or'] = [
-                    {"name": {"$regex": search, "$options": "i"}},
-                    {"description": {"$regex": search, "$options": "i"}}
-                ]
+                query.update(SearchUtils.filter(search))
 
             # Get total count
             total_count = self.points_master.count_documents(query)
@@ -381,8 +369,10 @@ class WebMasterService:
             # Convert ObjectId to string and add created_by_name / updated_by_name
             datetime_utils = important_utilities()
             
+            # Resolve created_by_name / updated_by_name for the whole page in one lookup
+            AuditUtils.attach_audit_names(self.users, records)
+
             for record in records:
-                record['_id'] = str(record['_id'])
                 
                 # Combine created_at and created_time into created_datetime
                 created_at = record.get('created_at', '')
@@ -407,28 +397,6 @@ class WebMasterService:
                         record['updated_datetime'] = f"{updated_at} {updated_time}"
                 else:
                     record['updated_datetime'] = None
-                
-                # Get created_by_name from users collection
-                created_by_id = record.get('created_by')
-                if created_by_id:
-                    user = self.users.find_one({"user_id": created_by_id})
-                    if user:
-                        record['created_by_name'] = user.get('username', 'Unknown')
-                    else:
-                        record['created_by_name'] = 'Unknown'
-                else:
-                    record['created_by_name'] = 'Unknown'
-
-                # Get updated_by_name from users collection if available
-                updated_by_id = record.get('updated_by')
-                if updated_by_id:
-                    upd_user = self.users.find_one({"user_id": updated_by_id})
-                    if upd_user:
-                        record['updated_by_name'] = upd_user.get('username', 'Unknown')
-                    else:
-                        record['updated_by_name'] = 'Unknown'
-                else:
-                    record['updated_by_name'] = None
 
             # Calculate pagination info
             total_pages = (total_count + limit - 1) // limit
@@ -436,7 +404,7 @@ class WebMasterService:
             has_prev = page > 1
 
             # Get stats data
-            stats = self.get_points_master_stats()
+            stats = self.get_points_master_stats() if request_data.get('include_stats', True) else None
 
             return {
                 "success": True,
@@ -462,40 +430,9 @@ class WebMasterService:
             }
 
     def get_points_master_stats(self) -> Dict[str, Any]:
-        """Get points master statistics for dashboard."""
+        """Get points master statistics for dashboard (one `$facet`, cached briefly)."""
         try:
-            # Total points master records
-            total_records = self.points_master.count_documents({})
-            
-            # Active records
-            active_records = self.points_master.count_documents({"status": "active"})
-            
-            # Inactive records
-            inactive_records = self.points_master.count_documents({"status": "inactive"})
-            
-            # Total points value (sum of all active records)
-            pipeline = [
-                {"$match": {"status": "active"}},
-                {"$group": {"_id": None, "total_points": {"$sum": "$value"}}}
-            ]
-            points_result = list(self.points_master.aggregate(pipeline))
-            total_points = points_result[0]["total_points"] if points_result else 0
-            
-            # Categories count
-            categories_pipeline = [
-                {"$group": {"_id": "$category", "count": {"$sum": 1}}},
-                {"$sort": {"count": -1}}
-            ]
-            categories = list(self.points_master.aggregate(categories_pipeline))
-            
-            return {
-                "total_records": total_records,
-                "active_records": active_records,
-                "inactive_records": inactive_records,
-                "total_points": total_points,
-                "categories": categories
-            }
-            
+            return StatsCache.get_or_compute("points_master", self._compute_points_master_stats)
         except Exception as e:
             return {
                 "total_records": 0,
@@ -505,6 +442,32 @@ class WebMasterService:
                 "categories": []
             }
 
+    def _compute_points_master_stats(self) -> Dict[str, Any]:
+        pipeline = [
+            {"$facet": {
+                "total": [{"$count": "total"}],
+                "active": [{"$match": {"status": "active"}}, {"$count": "active"}],
+                "inactive": [{"$match": {"status": "inactive"}}, {"$count": "inactive"}],
+                # Total points value (sum of all active records)
+                "total_points": [
+                    {"$match": {"status": "active"}},
+                    {"$group": {"_id": None, "total": {"$sum": "$value"}}}
+                ],
+                "categories": [
+                    {"$group": {"_id": "$category", "count": {"$sum": 1}}},
+                    {"$sort": {"count": -1}}
+                ],
+            }}
+        ]
+        result = next(self.points_master.aggregate(pipeline), {})
+        return {
+            "total_records": facet_count(result, "total"),
+            "active_records": facet_count(result, "active"),
+            "inactive_records": facet_count(result, "inactive"),
+            "total_points": facet_sum(result, "total_points"),
+            "categories": result.get("categories", [])
+        }
+
     def add_category(self, payload: Dict[str, Any], created_by: int = 1) -> Dict[str, Any]:
         """Add a new category with validations."""
         try:
@@ -547,7 +510,10 @@ class WebMasterService:
                 **create_meta  # Spread created_at, created_time, created_by
             }
 
+            SearchUtils.set_tokens("category_master", doc)
             result = self.categories.insert_one(doc)
+            StatsCache.invalidate("category_master")
+            invalidate_catalog(CATEGORIES)
 
             return {
                 "success": True,
@@ -592,10 +558,7 @@ class WebMasterService:
             
             # Search filter (search in category_name and description)
             if search:
-                query['$or'] = [
-                    {"category_name": {"$regex": search, "$options": "i"}},
-                    {"description": {"$regex": search, "$options": "i"}}
-                ]
+                query.update(SearchUtils.filter(search))
 
             # Get total count
             total_count = self.categories.count_documents(query)
@@ -611,8 +574,15 @@ class WebMasterService:
             # Convert ObjectId to string and add created_by_name / updated_by_name
             datetime_utils = important_utilities()
             
+            # Resolve created_by_name / updated_by_name for the whole page in one lookup
+            AuditUtils.attach_audit_names(self.users, records)
+
+            # Active sub-category and product counts for the whole page, one $group each
+            category_ids = [str(record['_id']) for record in records]
+            sub_category_counts = grouped_count(self.sub_categories, "category_id", category_ids, {"status": "active"})
+            product_counts = grouped_count(self.product_master, "category_id", category_ids, {"status": "active"})
+
             for record in records:
-                record['_id'] = str(record['_id'])
                 
                 # Combine created_at and created_time into created_datetime
                 created_at = record.get('created_at', '')
@@ -637,48 +607,14 @@ class WebMasterService:
                         record['updated_datetime'] = f"{updated_at} {updated_time}"
                 else:
                     record['updated_datetime'] = None
-                
-                # Get created_by_name from users collection
-                created_by_id = record.get('created_by')
-                if created_by_id:
-                    user = self.users.find_one({"user_id": created_by_id})
-                    if user:
-                        record['created_by_name'] = user.get('username', 'Unknown')
-                    else:
-                        record['created_by_name'] = 'Unknown'
-                else:
-                    record['created_by_name'] = 'Unknown'
-
-                # Get updated_by_name from users collection if available
-                updated_by_id = record.get('updated_by')
-                if updated_by_id:
-                    upd_user = self.users.find_one({"user_id": updated_by_id})
-                    if upd_user:
-                        record['updated_by_name'] = upd_user.get('username', 'Unknown')
-                    else:
-                        record['updated_by_name'] = 'Unknown'
-                else:
-                    record['updated_by_name'] = None
 
                 # category_name_lower ye remove
                 record.pop('category_name_lower', None)
 
                 # Add sub_category_count and product_count for each category
                 category_id = str(record['_id'])
-                
-                # Count sub-categories for this category
-                sub_category_count = self.sub_categories.count_documents({
-                    "category_id": category_id,
-                    "status": "active"
-                })
-                record['total_sub_category_count'] = sub_category_count
-                
-                # Count products for this category
-                product_count = self.product_master.count_documents({
-                    "category_id": category_id,
-                    "status": "active"
-                })
-                record['total_product_count'] = product_count
+                record['total_sub_category_count'] = sub_category_counts[category_id]
+                record['total_product_count'] = product_counts[category_id]
 
             # Calculate pagination info
             total_pages = (total_count + limit - 1) // limit
@@ -686,7 +622,7 @@ class WebMasterService:
             has_prev = page > 1
 
             # Get stats data
-            stats = self.get_categories_stats()
+            stats = self.get_categories_stats() if request_data.get('include_stats', True) else None
 
             return {
                 "success": True,
@@ -785,10 +721,13 @@ class WebMasterService:
                 **update_meta  # Spread updated_at, updated_time, updated_by
             }
 
+            SearchUtils.set_tokens("category_master", update_doc)
             result = self.categories.update_one(
                 {"_id": ObjectId(record_id)},
                 {"$set": update_doc}
             )
+            StatsCache.invalidate("category_master")
+            invalidate_catalog(CATEGORIES)
 
             if result.modified_count == 0:
                 return {
@@ -802,15 +741,7 @@ class WebMasterService:
             updated_record['_id'] = str(updated_record['_id'])
 
             # Add created_by_name
-            created_by_id = updated_record.get('created_by')
-            if created_by_id:
-                user = self.users.find_one({"user_id": created_by_id})
-                if user:
-                    updated_record['created_by_name'] = user.get('username', 'Unknown')
-                else:
-                    updated_record['created_by_name'] = 'Unknown'
-            else:
-                updated_record['created_by_name'] = 'Unknown'
+            updated_record['created_by_name'] = AuditUtils.get_user_name(self.users, updated_record.get('created_by'))
 
             return {
                 "success": True,
@@ -838,23 +769,9 @@ class WebMasterService:
             }
 
     def get_categories_stats(self) -> Dict[str, Any]:
-        """Get categories statistics for dashboard."""
+        """Get categories statistics for dashboard (one `$facet`, cached briefly)."""
         try:
-            # Total categories
-            total_categories = self.categories.count_documents({})
-            
-            # Active categories
-            active_categories = self.categories.count_documents({"status": "active"})
-            
-            # Inactive categories
-            inactive_categories = self.categories.count_documents({"status": "inactive"})
-            
-            return {
-                "total_categories": total_categories,
-                "active_categories": active_categories,
-                "inactive_categories": inactive_categories,
-            }
-            
+            return StatsCache.get_or_compute("category_master", self._compute_categories_stats)
         except Exception as e:
             return {
                 "total_categories": 0,
@@ -862,6 +779,21 @@ class WebMasterService:
                 "inactive_categories": 0,
             }
 
+    def _compute_categories_stats(self) -> Dict[str, Any]:
+        pipeline = [
+            {"$facet": {
+                "total": [{"$count": "total"}],
+                "active": [{"$match": {"status": "active"}}, {"$count": "active"}],
+                "inactive": [{"$match": {"status": "inactive"}}, {"$count": "inactive"}],
+            }}
+        ]
+        result = next(self.categories.aggregate(pipeline), {})
+        return {
+            "total_categories": facet_count(result, "total"),
+            "active_categories": facet_count(result, "active"),
+            "inactive_categories": facet_count(result, "inactive"),
+        }
+
     def add_sub_category(self, payload: Dict[str, Any], created_by: int = 1) -> Dict[str, Any]:
         """Add a new sub category with validations."""
         try:
@@ -927,7 +859,10 @@ class WebMasterService:
                 **create_meta  # Spread created_at, created_time, created_by
             }
 
+            SearchUtils.set_tokens("sub_category_master", doc)
             result = self.sub_categories.insert_one(doc)
+            StatsCache.invalidate("sub_category_master")
+            invalidate_catalog(SUB_CATEGORIES)
 
             return {
                 "success": True,
@@ -979,10 +914,7 @@ class WebMasterService:
             
             # Search filter (search in sub_category_name and description)
             if search:
-                query['$or'] = [
-                    {"sub_category_name": {"$regex": search, "$options": "i"}},
-                    {"description": {"$regex": search, "$options": "i"}}
-                ]
+                query.update(SearchUtils.filter(search))
 
             # Get total count
             total_count = self.sub_categories.count_documents(query)
@@ -998,8 +930,14 @@ class WebMasterService:
             # Convert ObjectId to string and add created_by_name / updated_by_name
             datetime_utils = important_utilities()
             
+            # Resolve created_by_name / updated_by_name for the whole page in one lookup
+            AuditUtils.attach_audit_names(self.users, records)
+
+            # Active product counts for the whole page in one $group
+            product_counts = grouped_count(self.product_master, "sub_category_id",
+                                           [str(record['_id']) for record in records], {"status": "active"})
+
             for record in records:
-                record['_id'] = str(record['_id'])
                 
                 # Combine created_at and created_time into created_datetime
                 created_at = record.get('created_at', '')
@@ -1024,41 +962,12 @@ class WebMasterService:
                         record['updated_datetime'] = f"{updated_at} {updated_time}"
                 else:
                     record['updated_datetime'] = None
-                
-                # Get created_by_name from users collection
-                created_by_id = record.get('created_by')
-                if created_by_id:
-                    user = self.users.find_one({"user_id": created_by_id})
-                    if user:
-                        record['created_by_name'] = user.get('username', 'Unknown')
-                    else:
-                        record['created_by_name'] = 'Unknown'
-                else:
-                    record['created_by_name'] = 'Unknown'
-
-                # Get updated_by_name from users collection if available
-                updated_by_id = record.get('updated_by')
-                if updated_by_id:
-                    upd_user = self.users.find_one({"user_id": updated_by_id})
-                    if upd_user:
-                        record['updated_by_name'] = upd_user.get('username', 'Unknown')
-                    else:
-                        record['updated_by_name'] = 'Unknown'
-                else:
-                    record['updated_by_name'] = None
 
                 # Remove internal fields
                 record.pop('sub_category_name_lower', None)
 
                 # Add product_count for this sub-category
-                sub_category_id = str(record['_id'])
-                
-                # Count products for this sub-category
-                product_count = self.product_master.count_documents({
-                    "sub_category_id": sub_category_id,
-                    "status": "active"
-                })
-                record['total_product_count'] = product_count
+                record['total_product_count'] = product_counts[str(record['_id'])]
 
             # Calculate pagination info
             total_pages = (total_count + limit - 1) // limit
@@ -1066,7 +975,7 @@ class WebMasterService:
             has_prev = page > 1
 
             # Get stats data
-            stats = self.get_sub_categories_stats()
+            stats = self.get_sub_categories_stats() if request_data.get('include_stats', True) else None
 
             return {
                 "success": True,
@@ -1183,10 +1092,13 @@ class WebMasterService:
                 **update_meta  # Spread updated_at, updated_time, updated_by
             }
 
+            SearchUtils.set_tokens("sub_category_master", update_doc)
             result = self.sub_categories.update_one(
                 {"_id": ObjectId(record_id)},
                 {"$set": update_doc}
             )
+            StatsCache.invalidate("sub_category_master")
+            invalidate_catalog(SUB_CATEGORIES)
 
             if result.modified_count == 0:
                 return {
@@ -1200,15 +1112,7 @@ class WebMasterService:
             updated_record['_id'] = str(updated_record['_id'])
 
             # Add created_by_name
-            created_by_id = updated_record.get('created_by')
-            if created_by_id:
-                user = self.users.find_one({"user_id": created_by_id})
-                if user:
-                    updated_record['created_by_name'] = user.get('username', 'Unknown')
-                else:
-                    updated_record['created_by_name'] = 'Unknown'
-            else:
-                updated_record['created_by_name'] = 'Unknown'
+            updated_record['created_by_name'] = AuditUtils.get_user_name(self.users, updated_record.get('created_by'))
 
             return {
                 "success": True,
@@ -1238,23 +1142,9 @@ class WebMasterService:
             }
 
     def get_sub_categories_stats(self) -> Dict[str, Any]:
-        """Get sub categories statistics for dashboard."""
+        """Get sub categories statistics for dashboard (one `$facet`, cached briefly)."""
         try:
-            # Total sub categories
-            total_sub_categories = self.sub_categories.count_documents({})
-            
-            # Active sub categories
-            active_sub_categories = self.sub_categories.count_documents({"status": "active"})
-            
-            # Inactive sub categories
-            inactive_sub_categories = self.sub_categories.count_documents({"status": "inactive"})
-            
-            return {
-                "total_sub_categories": total_sub_categories,
-                "active_sub_categories": active_sub_categories,
-                "inactive_sub_categories": inactive_sub_categories,
-            }
-            
+            return StatsCache.get_or_compute("sub_category_master", self._compute_sub_categories_stats)
         except Exception as e:
             return {
                 "total_sub_categories": 0,
@@ -1262,6 +1152,21 @@ class WebMasterService:
                 "inactive_sub_categories": 0,
             }
 
+    def _compute_sub_categories_stats(self) -> Dict[str, Any]:
+        pipeline = [
+            {"$facet": {
+                "total": [{"$count": "total"}],
+                "active": [{"$match": {"status": "active"}}, {"$count": "active"}],
+                "inactive": [{"$match": {"status": "inactive"}}, {"$count": "inactive"}],
+            }}
+        ]
+        result = next(self.sub_categories.aggregate(pipeline), {})
+        return {
+            "total_sub_categories": facet_count(result, "total"),
+            "active_sub_categories": facet_count(result, "active"),
+            "inactive_sub_categories": facet_count(result, "inactive"),
+        }
+
     def add_product_master(self, payload: Dict[str, Any], created_by: int = 1) -> Dict[str, Any]:
         """Add a new product master with validations."""
         try:
@@ -1383,7 +1288,10 @@ class WebMasterService:
                 **create_meta  # Spread created_at, created_time, created_by
             }
 
+            SearchUtils.set_tokens("product_master", doc)
             result = self.product_master.insert_one(doc)
+            StatsCache.invalidate("product_master")
+            invalidate_catalog(PRODUCTS)
 
             return {
                 "success": True,
@@ -1444,10 +1352,7 @@ class WebMasterService:
             
             # Search filter (search in product_name and description)
             if search and search.strip():
-                query['$or'] = [
-                    {"product_name": {"$regex": search, "$options": "i"}},
-                    {"description": {"$regex": search, "$options": "i"}}
-                ]
+                query.update(SearchUtils.filter(search))
 
             # Get total count
             total_count = self.product_master.count_documents(query)
@@ -1463,8 +1368,10 @@ class WebMasterService:
             # Convert ObjectId to string and add created_by_name / updated_by_name
             datetime_utils = important_utilities()
             
+            # Resolve created_by_name / updated_by_name for the whole page in one lookup
+            AuditUtils.attach_audit_names(self.users, records)
+
             for record in records:
-                record['_id'] = str(record['_id'])
                 
                 # Combine created_at and created_time into created_datetime
                 created_at = record.get('created_at', '')
@@ -1489,37 +1396,11 @@ class WebMasterService:
                         record['updated_datetime'] = f"{updated_at} {updated_time}"
                 else:
                     record['updated_datetime'] = None
-                
-                # Get created_by_name from users collection
-                created_by_id = record.get('created_by')
-                if created_by_id:
-                    user = self.users.find_one({"user_id": created_by_id})
-                    if user:
-                        record['created_by_name'] = user.get('username', 'Unknown')
-                    else:
-                        record['created_by_name'] = 'Unknown'
-                else:
-                    record['created_by_name'] = 'Unknown'
-
-                # Get updated_by_name from users collection if available
-                updated_by_id = record.get('updated_by')
-                if updated_by_id:
-                    upd_user = self.users.find_one({"user_id": updated_by_id})
-                    if upd_user:
-                        record['updated_by_name'] = upd_user.get('username', 'Unknown')
-                    else:
-                        record['updated_by_name'] = 'Unknown'
-                else:
-                    record['updated_by_name'] = None
 
-                # Add thumbnail image (first image from images array)
+                # Add thumbnail image (thumb variant of the first image)
                 images = record.get('images', [])
-                if images and len(images) > 0:
-                    # Get only the file_url from the first image
-                    thumbnail = images[0]
-                    record['thumbnail'] = thumbnail.get('file_url')
-                else:
-                    record['thumbnail'] = None
+                record['thumbnail'] = variant_url(images[0]) if images else None
+                record['thumbnail_webp'] = variant_url(images[0], fmt="webp") if images else None
 
                 # Remove internal fields
                 record.pop('product_name_lower', None)
@@ -1532,7 +1413,7 @@ class WebMasterService:
             has_prev = page > 1
 
             # Get stats data
-            stats = self.get_product_master_stats()
+            stats = self.get_product_master_stats() if request_data.get('include_stats', True) else None
 
             return {
                 "success": True,
@@ -1707,10 +1588,13 @@ class WebMasterService:
             if images:
                 update_doc["images"] = images
 
+            SearchUtils.set_tokens("product_master", update_doc)
             result = self.product_master.update_one(
                 {"_id": ObjectId(record_id)},
                 {"$set": update_doc}
             )
+            StatsCache.invalidate("product_master")
+            invalidate_catalog(PRODUCTS)
 
             if result.modified_count == 0:
                 return {
@@ -1724,15 +1608,7 @@ class WebMasterService:
             updated_record['_id'] = str(updated_record['_id'])
 
             # Add created_by_name
-            created_by_id = updated_record.get('created_by')
-            if created_by_id:
-                user = self.users.find_one({"user_id": created_by_id})
-                if user:
-                    updated_record['created_by_name'] = user.get('username', 'Unknown')
-                else:
-                    updated_record['created_by_name'] = 'Unknown'
-            else:
-                updated_record['created_by_name'] = 'Unknown'
+            updated_record['created_by_name'] = AuditUtils.get_user_name(self.users, updated_record.get('created_by'))
 
             return {
                 "success": True,
@@ -1813,40 +1689,15 @@ class WebMasterService:
             else:
                 product['updated_datetime'] = None
 
-            # Get created_by_name from users collection
-            created_by_id = product.get('created_by')
-            if created_by_id:
-                user = self.users.find_one({"user_id": created_by_id})
-                if user:
-                    product['created_by_name'] = user.get('username', 'Unknown')
-                else:
-                    product['created_by_name'] = 'Unknown'
-            else:
-                product['created_by_name'] = 'Unknown'
-
-            # Get updated_by_name from users collection if available
-            updated_by_id = product.get('updated_by')
-            if updated_by_id:
-                upd_user = self.users.find_one({"user_id": updated_by_id})
-                if upd_user:
-                    product['updated_by_name'] = upd_user.get('username', 'Unknown')
-                else:
-                    product['updated_by_name'] = 'Unknown'
-            else:
-                product['updated_by_name'] = None
+            # Add created_by_name / updated_by_name from users collection
+            AuditUtils.attach_audit_names(self.users, [product])
 
             # Remove internal fields
             product.pop('product_name_lower', None)
 
-            # Simplify images array to only include image_id and file_url
+            # Simplify images array to image_id, file_url and the size variants
             if 'images' in product and product['images']:
-                simplified_images = []
-                for image in product['images']:
-                    simplified_images.append({
-                        'image_id': image.get('image_id'),
-                        'file_url': image.get('file_url')
-                    })
-                product['images'] = simplified_images
+                product['images'] = [public_image(image) for image in product['images']]
 
             return {
                 "success": True,
@@ -1862,40 +1713,9 @@ class WebMasterService:
             }
 
     def get_product_master_stats(self) -> Dict[str, Any]:
-        """Get product master statistics for dashboard."""
+        """Get product master statistics for dashboard (one `$facet`, cached briefly)."""
         try:
-            # Total products
-            total_products = self.product_master.count_documents({})
-            
-            # Active products
-            active_products = self.product_master.count_documents({"status": "active"})
-            
-            # Inactive products
-            inactive_products = self.product_master.count_documents({"status": "inactive"})
-            
-            # Total MRP value (sum of all active products)
-            pipeline = [
-                {"$match": {"status": "active"}},
-                {"$group": {"_id": None, "total_mrp": {"$sum": "$mrp"}}}
-            ]
-            mrp_result = list(self.product_master.aggregate(pipeline))
-            total_mrp = mrp_result[0]["total_mrp"] if mrp_result else 0
-            
-            # Categories count
-            categories_pipeline = [
-                {"$group": {"_id": "$category_name", "count": {"$sum": 1}}},
-                {"$sort": {"count": -1}}
-            ]
-            categories = list(self.product_master.aggregate(categories_pipeline))
-            
-            return {
-                "total_products": total_products,
-                "active_products": active_products,
-                "inactive_products": inactive_products,
-                "total_mrp": total_mrp,
-                "categories": categories
-            }
-            
+            return StatsCache.get_or_compute("product_master", self._compute_product_master_stats)
         except Exception as e:
             return {
                 "total_products": 0,
@@ -1905,6 +1725,32 @@ class WebMasterService:
                 "categories": []
             }
 
+    def _compute_product_master_stats(self) -> Dict[str, Any]:
+        pipeline = [
+            {"$facet": {
+                "total": [{"$count": "total"}],
+                "active": [{"$match": {"status": "active"}}, {"$count": "active"}],
+                "inactive": [{"$match": {"status": "inactive"}}, {"$count": "inactive"}],
+                # Total MRP value (sum of all active products)
+                "total_mrp": [
+                    {"$match": {"status": "active"}},
+                    {"$group": {"_id": None, "total": {"$sum": "$mrp"}}}
+                ],
+                "categories": [
+                    {"$group": {"_id": "$category_name", "count": {"$sum": 1}}},
+                    {"$sort": {"count": -1}}
+                ],
+            }}
+        ]
+        result = next(self.product_master.aggregate(pipeline), {})
+        return {
+            "total_products": facet_count(result, "total"),
+            "active_products": facet_count(result, "active"),
+            "inactive_products": facet_count(result, "inactive"),
+            "total_mrp": facet_sum(result, "total_mrp"),
+            "categories": result.get("categories", [])
+        }
+
     def upload_product_image(self, product_id: str, image_file, created_by: int = 1) -> Dict[str, Any]:
         """Upload product image and save file details in product_master images array."""
         try:
@@ -1943,80 +1789,44 @@ class WebMasterService:
                     "error": {"code": "VALIDATION_ERROR", "details": "invalid_file_type"},
                 }
 
-            # Check file size (max 5MB)
-            max_size = 5 * 1024 * 1024  # 5MB in bytes
-            if len(image_file.file.read()) > max_size:
-                return {
-                    "success": False,
-                    "message": "File size too large. Maximum size is 5MB",
-                    "error": {"code": "VALIDATION_ERROR", "details": "file_too_large"},
-                }
-
-            # Reset file pointer
-            image_file.file.seek(0)
-
-            # Generate unique filename
-            file_extension = image_file.filename.split('.')[-1] if '.' in image_file.filename else 'jpg'
-            unique_filename = f"{uuid.uuid4()}.{file_extension}"
-            
-            # Create upload directory if it doesn't exist
-            upload_dir = "uploads/trust_rewards/products"
-            os.makedirs(upload_dir, exist_ok=True)
-            
-            # Save file path
-            file_path = os.path.join(upload_dir, unique_filename)
-            
-            # Process and save image
+            # Stream to disk, dedupe by content hash and render the size variants
             try:
-                if PIL_AVAILABLE:
-                    # Use PIL for image processing
-                    image = Image.open(io.BytesIO(image_file.file.read()))
-                    
-                    # Convert to RGB if necessary (for JPEG compatibility)
-                    if image.mode in ('RGBA', 'LA', 'P'):
-                        image = image.convert('RGB')
-                    
-                    # Resize image if too large (max 1920x1080)
-                    max_width, max_height = 1920, 1080
-                    if image.width > max_width or image.height > max_height:
-                        image.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
-                    
-                    # Save processed image
-                    image.save(file_path, 'JPEG', quality=85, optimize=True)
-                    
-                    # Get image dimensions
-                    image_width, image_height = image.size
-                else:
-                    # Fallback: Save file without processing if PIL is not available
-                    with open(file_path, 'wb') as f:
-                        f.write(image_file.file.read())
-                    
-                    # Set default dimensions if PIL is not available
-                    image_width, image_height = 0, 0
-                
-            except Exception as e:
+                stored = product_images.store(image_file)
+            except ImageUploadError as e:
                 return {
                     "success": False,
-                    "message": f"Failed to process image: {str(e)}",
-                    "error": {"code": "PROCESSING_ERROR", "details": str(e)},
+                    "message": str(e),
+                    "error": {"code": "VALIDATION_ERROR" if e.code == "file_too_large" else "PROCESSING_ERROR",
+                              "details": e.code},
                 }
 
-            file_size = os.path.getsize(file_path)
+            # The same image uploaded again for this product
+            for existing in product.get("images", []):
+                if existing.get("content_hash") == stored["content_hash"]:
+                    return {
+                        "success": True,
+                        "message": "Product image already uploaded",
+                        "data": {
+                            "product_id": product_id,
+                            "product_name": product.get("product_name", ""),
+                            "image_data": existing,
+                            "total_images": len(product.get("images", []))
+                        },
+                    }
 
-            # Use AuditUtils for consistent audit fields
-            create_meta = AuditUtils.build_create_meta(created_by)
-            
             # Prepare image data for array
             image_data = {
                 "image_id": str(uuid.uuid4()),  # Unique ID for each image
                 "original_filename": image_file.filename,
-                "stored_filename": unique_filename,
-                "file_path": file_path.replace("\\", "/"),  # Use forward slashes
-                "file_url": f"/{file_path.replace(chr(92), '/')}",  # URL for frontend
-                "content_type": image_file.content_type,  # Use original content type
-                "file_size": file_size,
-                "image_width": image_width,
-                "image_height": image_height,
+                "stored_filename": stored["stored_filename"],
+                "file_path": stored["file_path"],
+                "file_url": stored["file_url"],  # Full-size JPEG
+                "variants": stored["variants"],  # thumb / medium / full, WebP and JPEG URLs
+                "content_hash": stored["content_hash"],
+                "content_type": stored["content_type"] or image_file.content_type,
+                "file_size": stored["file_size"],
+                "image_width": stored["image_width"],
+                "image_height": stored["image_height"],
                 "is_primary": False,  # Default to False, can be updated later
             }
 
@@ -2039,6 +1849,8 @@ class WebMasterService:
                     "error": {"code": "UPDATE_ERROR", "details": "no_changes"},
                 }
 
+            invalidate_catalog(PRODUCTS)
+
             return {
                 "success": True,
                 "message": "Product image uploaded successfully",
@@ -2252,7 +2064,10 @@ class WebMasterService:
                 **create_meta  # Spread created_at, created_time, created_by
             }
 
+            SearchUtils.set_tokens("gift_master", doc)
             result = self.gift_master.insert_one(doc)
+            StatsCache.invalidate("gift_master")
+            invalidate_catalog(GIFTS)
 
             return {
                 "success": True,
@@ -2298,10 +2113,7 @@ class WebMasterService:
             
             # Search filter (search in gift_name and description)
             if search and search.strip():
-                query['$or'] = [
-                    {"gift_name": {"$regex": search, "$options": "i"}},
-                    {"description": {"$regex": search, "$options": "i"}}
-                ]
+                query.update(SearchUtils.filter(search))
 
             # Get total count
             total_count = self.gift_master.count_documents(query)
@@ -2317,8 +2129,10 @@ class WebMasterService:
             # Convert ObjectId to string and add created_by_name / updated_by_name
             datetime_utils = important_utilities()
             
+            # Resolve created_by_name / updated_by_name for the whole page in one lookup
+            AuditUtils.attach_audit_names(self.users, records)
+
             for record in records:
-                record['_id'] = str(record['_id'])
                 
                 # Combine created_at and created_time into created_datetime
                 created_at = record.get('created_at', '')
@@ -2343,37 +2157,11 @@ class WebMasterService:
                         record['updated_datetime'] = f"{updated_at} {updated_time}"
                 else:
                     record['updated_datetime'] = None
-                
-                # Get created_by_name from users collection
-                created_by_id = record.get('created_by')
-                if created_by_id:
-                    user = self.users.find_one({"user_id": created_by_id})
-                    if user:
-                        record['created_by_name'] = user.get('username', 'Unknown')
-                    else:
-                        record['created_by_name'] = 'Unknown'
-                else:
-                    record['created_by_name'] = 'Unknown'
-
-                # Get updated_by_name from users collection if available
-                updated_by_id = record.get('updated_by')
-                if updated_by_id:
-                    upd_user = self.users.find_one({"user_id": updated_by_id})
-                    if upd_user:
-                        record['updated_by_name'] = upd_user.get('username', 'Unknown')
-                    else:
-                        record['updated_by_name'] = 'Unknown'
-                else:
-                    record['updated_by_name'] = None
 
-                # Add thumbnail image (first image from images array)
+                # Add thumbnail image (thumb variant of the first image)
                 images = record.get('images', [])
-                if images and len(images) > 0:
-                    # Get only the file_url from the first image
-                    thumbnail = images[0]
-                    record['thumbnail'] = thumbnail.get('file_url')
-                else:
-                    record['thumbnail'] = None
+                record['thumbnail'] = variant_url(images[0]) if images else None
+                record['thumbnail_webp'] = variant_url(images[0], fmt="webp") if images else None
 
                 # Remove internal fields
                 record.pop('gift_name_lower', None)
@@ -2386,7 +2174,7 @@ class WebMasterService:
             has_prev = page > 1
 
             # Get stats data
-            stats = self.get_gift_master_stats()
+            stats = self.get_gift_master_stats() if request_data.get('include_stats', True) else None
 
             return {
                 "success": True,
@@ -2508,10 +2296,13 @@ class WebMasterService:
             if images:
                 update_doc["images"] = images
 
+            SearchUtils.set_tokens("gift_master", update_doc)
             result = self.gift_master.update_one(
                 {"_id": ObjectId(record_id)},
                 {"$set": update_doc}
             )
+            StatsCache.invalidate("gift_master")
+            invalidate_catalog(GIFTS)
 
             if result.modified_count == 0:
                 return {
@@ -2525,15 +2316,7 @@ class WebMasterService:
             updated_record['_id'] = str(updated_record['_id'])
 
             # Add created_by_name
-            created_by_id = updated_record.get('created_by')
-            if created_by_id:
-                user = self.users.find_one({"user_id": created_by_id})
-                if user:
-                    updated_record['created_by_name'] = user.get('username', 'Unknown')
-                else:
-                    updated_record['created_by_name'] = 'Unknown'
-            else:
-                updated_record['created_by_name'] = 'Unknown'
+            updated_record['created_by_name'] = AuditUtils.get_user_name(self.users, updated_record.get('created_by'))
 
             return {
                 "success": True,
@@ -2609,40 +2392,15 @@ class WebMasterService:
             else:
                 gift['updated_datetime'] = None
 
-            # Get created_by_name from users collection
-            created_by_id = gift.get('created_by')
-            if created_by_id:
-                user = self.users.find_one({"user_id": created_by_id})
-                if user:
-                    gift['created_by_name'] = user.get('username', 'Unknown')
-                else:
-                    gift['created_by_name'] = 'Unknown'
-            else:
-                gift['created_by_name'] = 'Unknown'
-
-            # Get updated_by_name from users collection if available
-            updated_by_id = gift.get('updated_by')
-            if updated_by_id:
-                upd_user = self.users.find_one({"user_id": updated_by_id})
-                if upd_user:
-                    gift['updated_by_name'] = upd_user.get('username', 'Unknown')
-                else:
-                    gift['updated_by_name'] = 'Unknown'
-            else:
-                gift['updated_by_name'] = None
+            # Add created_by_name / updated_by_name from users collection
+            AuditUtils.attach_audit_names(self.users, [gift])
 
             # Remove internal fields
             gift.pop('gift_name_lower', None)
 
-            # Simplify images array to only include image_id and file_url
+            # Simplify images array to image_id, file_url and the size variants
             if 'images' in gift and gift['images']:
-                simplified_images = []
-                for image in gift['images']:
-                    simplified_images.append({
-                        'image_id': image.get('image_id'),
-                        'file_url': image.get('file_url')
-                    })
-                gift['images'] = simplified_images
+                gift['images'] = [public_image(image) for image in gift['images']]
 
             return {
                 "success": True,
@@ -2658,32 +2416,9 @@ class WebMasterService:
             }
 
     def get_gift_master_stats(self) -> Dict[str, Any]:
-        """Get gift master statistics for dashboard."""
+        """Get gift master statistics for dashboard (one `$facet`, cached briefly)."""
         try:
-            # Total gifts
-            total_gifts = self.gift_master.count_documents({})
-            
-            # Active gifts
-            active_gifts = self.gift_master.count_documents({"status": "active"})
-            
-            # Inactive gifts
-            inactive_gifts = self.gift_master.count_documents({"status": "inactive"})
-            
-            # Total points required (sum of all active gifts)
-            points_pipeline = [
-                {"$match": {"status": "active"}},
-                {"$group": {"_id": None, "total_points": {"$sum": "$points_required"}}}
-            ]
-            points_result = list(self.gift_master.aggregate(points_pipeline))
-            total_points = points_result[0]["total_points"] if points_result else 0
-            
-            return {
-                "total_gifts": total_gifts,
-                "active_gifts": active_gifts,
-                "inactive_gifts": inactive_gifts,
-                "total_points": total_points,
-            }
-            
+            return StatsCache.get_or_compute("gift_master", self._compute_gift_master_stats)
         except Exception as e:
             return {
                 "total_gifts": 0,
@@ -2692,6 +2427,27 @@ class WebMasterService:
                 "total_points": 0,
             }
 
+    def _compute_gift_master_stats(self) -> Dict[str, Any]:
+        pipeline = [
+            {"$facet": {
+                "total": [{"$count": "total"}],
+                "active": [{"$match": {"status": "active"}}, {"$count": "active"}],
+                "inactive": [{"$match": {"status": "inactive"}}, {"$count": "inactive"}],
+                # Total points required (sum of all active gifts)
+                "total_points": [
+                    {"$match": {"status": "active"}},
+                    {"$group": {"_id": None, "total": {"$sum": "$points_required"}}}
+                ],
+            }}
+        ]
+        result = next(self.gift_master.aggregate(pipeline), {})
+        return {
+            "total_gifts": facet_count(result, "total"),
+            "active_gifts": facet_count(result, "active"),
+            "inactive_gifts": facet_count(result, "inactive"),
+            "total_points": facet_sum(result, "total_points"),
+        }
+
     def upload_gift_image(self, gift_id: str, image_file, created_by: int = 1) -> Dict[str, Any]:
         """Upload gift image and save file details in gift_master images array."""
         try:
@@ -2729,80 +2485,44 @@ class WebMasterService:
                     "error": {"code": "VALIDATION_ERROR", "details": "invalid_file_type"},
                 }
 
-            # Check file size (max 5MB)
-            max_size = 5 * 1024 * 1024  # 5MB in bytes
-            if len(image_file.file.read()) > max_size:
-                return {
-                    "success": False,
-                    "message": "File size too large. Maximum size is 5MB",
-                    "error": {"code": "VALIDATION_ERROR", "details": "file_too_large"},
-                }
-
-            # Reset file pointer
-            image_file.file.seek(0)
-
-            # Generate unique filename
-            file_extension = image_file.filename.split('.')[-1] if '.' in image_file.filename else 'jpg'
-            unique_filename = f"{uuid.uuid4()}.{file_extension}"
-            
-            # Create upload directory if it doesn't exist
-            upload_dir = "uploads/trust_rewards/gifts"
-            os.makedirs(upload_dir, exist_ok=True)
-            
-            # Save file path
-            file_path = os.path.join(upload_dir, unique_filename)
-            
-            # Process and save image
+            # Stream to disk, dedupe by content hash and render the size variants
             try:
-                if PIL_AVAILABLE:
-                    # Use PIL for image processing
-                    image = Image.open(io.BytesIO(image_file.file.read()))
-                    
-                    # Convert to RGB if necessary (for JPEG compatibility)
-                    if image.mode in ('RGBA', 'LA', 'P'):
-                        image = image.convert('RGB')
-                    
-                    # Resize image if too large (max 1920x1080)
-                    max_width, max_height = 1920, 1080
-                    if image.width > max_width or image.height > max_height:
-                        image.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
-                    
-                    # Save processed image
-                    image.save(file_path, 'JPEG', quality=85, optimize=True)
-                    
-                    # Get image dimensions
-                    image_width, image_height = image.size
-                else:
-                    # Fallback: Save file without processing if PIL is not available
-                    with open(file_path, 'wb') as f:
-                        f.write(image_file.file.read())
-                    
-                    # Set default dimensions if PIL is not available
-                    image_width, image_height = 0, 0
-                
-            except Exception as e:
+                stored = gift_images.store(image_file)
+            except ImageUploadError as e:
                 return {
                     "success": False,
-                    "message": f"Failed to process image: {str(e)}",
-                    "error": {"code": "PROCESSING_ERROR", "details": str(e)},
+                    "message": str(e),
+                    "error": {"code": "VALIDATION_ERROR" if e.code == "file_too_large" else "PROCESSING_ERROR",
+                              "details": e.code},
                 }
 
-            file_size = os.path.getsize(file_path)
+            # The same image uploaded again for this gift
+            for existing in gift.get("images", []):
+                if existing.get("content_hash") == stored["content_hash"]:
+                    return {
+                        "success": True,
+                        "message": "Gift image already uploaded",
+                        "data": {
+                            "gift_id": gift_id,
+                            "gift_name": gift.get("gift_name", ""),
+                            "image_data": existing,
+                            "total_images": len(gift.get("images", []))
+                        },
+                    }
 
-            # Use AuditUtils for consistent audit fields
-            create_meta = AuditUtils.build_create_meta(created_by)
-            
             # Prepare image data for array
             image_data = {
                 "image_id": str(uuid.uuid4()),  # Unique ID for each image
                 "original_filename": image_file.filename,
-                "stored_filename": unique_filename,
-                "file_path": file_path.replace("\\", "/"),  # Use forward slashes
-                "file_url": f"/{file_path.replace(chr(92), '/')}",  # URL for frontend
-                "content_type": image_file.content_type,  # Use original content type
-                "file_size": file_size,
-                "image_width": image_width,
-                "image_height": image_height,
+                "stored_filename": stored["stored_filename"],
+                "file_path": stored["file_path"],
+                "file_url": stored["file_url"],  # Full-size JPEG
+                "variants": stored["variants"],  # thumb / medium / full, WebP and JPEG URLs
+                "content_hash": stored["content_hash"],
+                "content_type": stored["content_type"] or image_file.content_type,
+                "file_size": stored["file_size"],
+                "image_width": stored["image_width"],
+                "image_height": stored["image_height"],
                 "is_primary": False,  # Default to False, can be updated later
             }
 
@@ -2825,6 +2545,8 @@ class WebMasterService:
                     "error": {"code": "UPDATE_ERROR", "details": "no_changes"},
                 }
 
+            invalidate_catalog(GIFTS)
+
             return {
                 "success": True,
                 "message": "Gift image uploaded successfully",
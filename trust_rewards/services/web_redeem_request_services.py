@@ -2,8 +2,11 @@ from datetime import datetime
 from typing import Dict, Any, List
 from bson import ObjectId
 from trust_rewards.database import client1
-from trust_rewards.utils.common import DateUtils, ValidationUtils, AuditUtils
+from trust_rewards.utils.common import DateUtils, ValidationUtils, AuditUtils, SearchUtils
 from trust_rewards.utils.transaction import TransactionLogger
+from trust_rewards.utils.wallet import Wallet, WalletStats
+from app.utils.cursor_pagination import InvalidCursor, paginate
+from app.utils.list_count import InvalidCountMode, count_total
 
 class WebRedeemRequestService:
     def __init__(self):
@@ -44,12 +47,9 @@ class WebRedeemRequestService:
             if gift_id and gift_id.strip():
                 query['gift_id'] = gift_id.strip()
             
-            # Handle search filter (searches in worker_name and gift_name)
+            # Handle search filter (word prefixes of worker_name and gift_name)
             if search and search.strip():
-                query['$or'] = [
-                    {'worker_name': {"$regex": search.strip(), "$options": "i"}},
-                    {'gift_name': {"$regex": search.strip(), "$options": "i"}}
-                ]
+                query.update(SearchUtils.filter(search))
             
             # Handle date range filters
             if date_from and date_from.strip():
@@ -61,24 +61,19 @@ class WebRedeemRequestService:
                 else:
                     query['request_date'] = {"$lte": date_to.strip()}
 
-            # Get redemption requests with pagination (sort first, then paginate)
-            redemptions = list(
-                self.gift_redemptions.find(query)
-                .sort("request_datetime", -1)  # Latest requests first
-                .skip(skip)
-                .limit(limit)
+            # Get redemption requests with pagination (latest first); a cursor replaces page
+            redemptions, next_cursor = paginate(
+                self.gift_redemptions, query, [("request_datetime", -1)], limit,
+                cursor=request_data.get('cursor'), skip=skip
             )
 
             # Get total count
-            total_count = self.gift_redemptions.count_documents(query)
-
-            # Convert ObjectId to string
-            for redemption in redemptions:
-                redemption['_id'] = str(redemption['_id'])
+            count = count_total(self.gift_redemptions, query, request_data.get('count_mode'))
+            total_count = count["total"]
 
             # Calculate pagination info
             total_pages = (total_count + limit - 1) // limit
-            has_next = page < total_pages
+            has_next = next_cursor is not None
             has_prev = page > 1
 
             # Get statistics
@@ -95,11 +90,21 @@ class WebRedeemRequestService:
                         "total_count": total_count,
                         "limit": limit,
                         "has_next": has_next,
-                        "has_prev": has_prev
+                        "has_prev": has_prev,
+                        "next_cursor": next_cursor,
+                        "count_mode": count["mode"],
+                        "total_is_exact": count["is_exact"],
+                        "total_display": count["display"]
                     }
                 }
             }
 
+        except (InvalidCursor, InvalidCountMode) as e:
+            return {
+                "success": False,
+                "message": "Invalid pagination parameters",
+                "error": {"code": "VALIDATION_ERROR", "details": str(e)}
+            }
         except Exception as e:
             return {
                 "success": False,
@@ -240,9 +245,10 @@ class WebRedeemRequestService:
                     "redeemed_time": DateUtils.get_current_time()
                 })
             
-            # Update redemption with status history
+            # Update redemption with status history; conditional on the status
+            # read above so the wallet_stats counters move exactly once
             update_result = self.gift_redemptions.update_one(
-                {"redemption_id": redemption_id},
+                {"redemption_id": redemption_id, "status": redemption.get('status')},
                 {
                     "$set": update_data,
                     "$push": {
@@ -257,6 +263,7 @@ class WebRedeemRequestService:
                     "message": "Failed to update redemption status",
                     "error": {"code": "UPDATE_ERROR", "details": "Could not update redemption status"}
                 }
+            WalletStats.redemption_status_changed(redemption.get('worker_id'), current_status, new_status)
             
             return {
                 "success": True,
@@ -434,8 +441,8 @@ class WebRedeemRequestService:
             
             # Handle specific status changes
             if new_status == 'cancelled':
-                # Return points to worker's wallet (following app_redeem_services pattern)
-                worker = self.skilled_workers.find_one({"_id": ObjectId(worker_id)})
+                # Points go back to the worker's wallet after the status change below
+                worker = self.skilled_workers.find_one({"_id": ObjectId(worker_id)}, {"_id": 1})
                 if not worker:
                     return {
                         "success": False,
@@ -443,42 +450,6 @@ class WebRedeemRequestService:
                         "error": {"code": "NOT_FOUND", "details": "Worker record not found"}
                     }
                 
-                # Get current wallet balance and calculate new balance after returning points
-                current_balance = int(worker.get('wallet_points', 0))
-                new_balance = current_balance + int(points_used)
-                
-                # Update worker's wallet balance (return the points)
-                update_result = self.skilled_workers.update_one(
-                    {"_id": ObjectId(worker_id)},
-                    {
-                        "$set": {
-                            "wallet_points": new_balance,
-                            "last_activity": current_date
-                        }
-                    }
-                )
-                
-                if update_result.modified_count == 0:
-                    return {
-                        "success": False,
-                        "message": "Failed to update wallet balance",
-                        "error": {"code": "UPDATE_ERROR", "details": "Could not update worker wallet points"}
-                    }
-                
-                # Record transaction in ledger for points return (following app pattern)
-                TransactionLogger.record(
-                    worker_id=worker_id,
-                    transaction_type="REDEMPTION_CANCELLATION",
-                    amount=int(points_used),
-                    description=f"Redemption cancellation: {redemption.get('gift_name', 'Unknown Gift')}",
-                    previous_balance=current_balance,
-                    new_balance=new_balance,
-                    reference_id=redemption.get('gift_id'),
-                    reference_type="gift_master",
-                    redemption_id=redemption_id,
-                    created_by=admin_id
-                )
-                
                 # Add cancellation timestamp
                 update_data.update({
                     "cancelled_at": current_datetime,
@@ -505,9 +476,10 @@ class WebRedeemRequestService:
                 "comments": comments or f"Status changed to {new_status} by admin"
             }
             
-            # Update redemption record
+            # Update redemption record; conditional on the status read above so a
+            # concurrent change (e.g. the worker cancelling) cannot refund twice
             result = self.gift_redemptions.update_one(
-                {"_id": ObjectId(redemption_id)},
+                {"_id": ObjectId(redemption_id), "status": redemption.get('status')},
                 {
                     "$set": update_data,
                     "$push": {"status_history": status_history_entry}
@@ -518,8 +490,35 @@ class WebRedeemRequestService:
                 return {
                     "success": False,
                     "message": "Failed to update redemption status",
-                    "error": {"code": "UPDATE_FAILED", "details": "No records were updated"}
+                    "error": {"code": "UPDATE_FAILED", "details": "Redemption was not updated; its status may have changed"}
                 }
+            WalletStats.redemption_status_changed(worker_id, redemption.get('status'), new_status)
+
+            if new_status == 'cancelled':
+                # Return points to worker's wallet
+                wallet_change = Wallet.credit(worker_id, int(points_used))
+                if wallet_change is None:
+                    return {
+                        "success": False,
+                        "message": "Failed to update wallet balance",
+                        "error": {"code": "UPDATE_ERROR", "details": "Could not update worker wallet points"}
+                    }
+                current_balance = wallet_change["previous_balance"]
+                new_balance = wallet_change["new_balance"]
+                
+                # Record transaction in ledger for points return (following app pattern)
+                TransactionLogger.record(
+                    worker_id=worker_id,
+                    transaction_type="REDEMPTION_CANCELLATION",
+                    amount=int(points_used),
+                    description=f"Redemption cancellation: {redemption.get('gift_name', 'Unknown Gift')}",
+                    previous_balance=current_balance,
+                    new_balance=new_balance,
+                    reference_id=redemption.get('gift_id'),
+                    reference_type="gift_master",
+                    redemption_id=redemption_id,
+                    created_by=admin_id
+                )
             
             # Prepare response data based on status change
             response_data = {
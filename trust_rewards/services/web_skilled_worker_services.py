@@ -1,5 +1,8 @@
 from bson import ObjectId
 from trust_rewards.database import client1
+from trust_rewards.utils.common import AuditUtils, StatsCache, facet_count, facet_sum
+from trust_rewards.utils.leaderboard import ALL_TIME, Leaderboard
+from app.utils.list_count import InvalidCountMode, count_total
 from datetime import datetime, timedelta
 from typing import Optional
 import pandas as pd
@@ -27,7 +30,7 @@ class SkilledWorkerService:
 
             # Build query from request data
             query = request_data.copy()
-            for k in ['page', 'limit', 'filters']:
+            for k in ['page', 'limit', 'filters', 'include_stats', 'count_mode']:
                 if k in query:
                     del query[k]
 
@@ -36,10 +39,12 @@ class SkilledWorkerService:
                 query['status'] = status
 
             # Get total count
-            total_count = self.skilled_workers.count_documents(query)
+            count = count_total(self.skilled_workers, query, request_data.get('count_mode'))
+            total_count = count["total"]
             
             # Get workers with pagination (sort first, then paginate)
-            workers = list(self.skilled_workers.find(query).sort("_id", -1).skip(skip).limit(limit))
+            # wallet_stats is the app wallet screen's materialized view, not worker data
+            workers = list(self.skilled_workers.find(query, {"wallet_stats": 0}).sort("_id", -1).skip(skip).limit(limit))
             
             # Convert to DataFrame for efficient join
             if workers:
@@ -60,7 +65,6 @@ class SkilledWorkerService:
                 
                 # Add created_by_name information to workers
                 for worker in workers:
-                    worker['_id'] = str(worker['_id'])
                     created_by_id = worker.get('created_by_id')
                     if created_by_id and created_by_id in user_mapping:
                         worker['created_by_name'] = user_mapping[created_by_id]
@@ -69,11 +73,11 @@ class SkilledWorkerService:
 
             # Calculate pagination info
             total_pages = (total_count + limit - 1) // limit
-            has_next = page < total_pages
+            has_next = page < total_pages or not count["is_exact"]
             has_prev = page > 1
 
             # Get stats card data
-            stats = self.get_stats_data()
+            stats = self.get_stats_data() if request_data.get('include_stats', True) else None
 
             return {
                 "success": True,
@@ -85,12 +89,21 @@ class SkilledWorkerService:
                         "total_count": total_count,
                         "limit": limit,
                         "has_next": has_next,
-                        "has_prev": has_prev
+                        "has_prev": has_prev,
+                        "count_mode": count["mode"],
+                        "total_is_exact": count["is_exact"],
+                        "total_display": count["display"]
                     },
                     "stats": stats
                 }
             }
 
+        except InvalidCountMode as e:
+            return {
+                "success": False,
+                "message": "Invalid pagination parameters",
+                "error": {"code": "VALIDATION_ERROR", "details": str(e)}
+            }
         except Exception as e:
             return {
                 "success": False,
@@ -99,73 +112,9 @@ class SkilledWorkerService:
             }
 
     def get_stats_data(self) -> dict:
-        """Get statistics data for dashboard cards"""
+        """Get statistics data for dashboard cards (one `$facet`, cached briefly)"""
         try:
-            # Get current month and last month for comparison
-            current_date = self.current_datetime
-            last_month = current_date.replace(day=1) - timedelta(days=1)
-            last_month_start = last_month.replace(day=1)
-            current_month_start = current_date.replace(day=1)
-            
-            # Total Workers (all time)
-            total_workers = self.skilled_workers.count_documents({})
-            
-            # Active Workers (current)
-            active_workers = self.skilled_workers.count_documents({"status": "Active"})
-            
-            # KYC Pending Workers
-            kyc_pending = self.skilled_workers.count_documents({"status": "KYC Pending"})
-            
-            # Total Redemptions (sum of redemption_count for all workers)
-            redemption_pipeline = [
-                {"$group": {"_id": None, "total_redemptions": {"$sum": "$redemption_count"}}}
-            ]
-            redemption_result = list(self.skilled_workers.aggregate(redemption_pipeline))
-            total_redemptions = redemption_result[0]["total_redemptions"] if redemption_result else 0
-            
-            # Calculate trends (comparing with last month)
-            # Workers created this month
-            current_month_workers = self.skilled_workers.count_documents({
-                "created_date": {"$gte": current_month_start.strftime("%Y-%m-%d")}
-            })
-            
-            # Workers created last month
-            last_month_workers = self.skilled_workers.count_documents({
-                "created_date": {
-                    "$gte": last_month_start.strftime("%Y-%m-%d"),
-                    "$lt": current_month_start.strftime("%Y-%m-%d")
-                }
-            })
-            
-            # Calculate percentage changes
-            total_workers_trend = self._calculate_percentage_change(total_workers - current_month_workers, total_workers)
-            active_workers_trend = self._calculate_percentage_change(active_workers, total_workers)
-            kyc_pending_trend = self._calculate_percentage_change(kyc_pending, total_workers)
-            total_redemptions_trend = self._calculate_percentage_change(total_redemptions, total_redemptions)
-            
-            return {
-                "total_workers": {
-                    "value": total_workers,
-                    "trend": f"+{total_workers_trend}% from last month",
-                    "trend_type": "positive" if total_workers_trend > 0 else "negative"
-                },
-                "active_workers": {
-                    "value": active_workers,
-                    "trend": f"+{active_workers_trend}% from last month",
-                    "trend_type": "positive" if active_workers_trend > 0 else "negative"
-                },
-                "kyc_pending": {
-                    "value": kyc_pending,
-                    "trend": "Requires attention" if kyc_pending > 0 else "All clear",
-                    "trend_type": "warning" if kyc_pending > 0 else "positive"
-                },
-                "total_redemptions": {
-                    "value": total_redemptions,
-                    "trend": f"+{total_redemptions_trend}% from last month",
-                    "trend_type": "positive" if total_redemptions_trend > 0 else "negative"
-                }
-            }
-            
+            return StatsCache.get_or_compute("skilled_workers", self._compute_stats_data)
         except Exception as e:
             # Return default stats if calculation fails
             return {
@@ -175,6 +124,60 @@ class SkilledWorkerService:
                 "total_redemptions": {"value": 0, "trend": "N/A", "trend_type": "neutral"}
             }
 
+    def _compute_stats_data(self) -> dict:
+        current_month_start = self.current_datetime.replace(day=1)
+
+        pipeline = [
+            {"$facet": {
+                # Total Workers (all time)
+                "total": [{"$count": "total"}],
+                "active": [{"$match": {"status": "Active"}}, {"$count": "active"}],
+                "kyc_pending": [{"$match": {"status": "KYC Pending"}}, {"$count": "kyc_pending"}],
+                # Total Redemptions (sum of redemption_count for all workers)
+                "total_redemptions": [{"$group": {"_id": None, "total": {"$sum": "$redemption_count"}}}],
+                # Workers created this month
+                "current_month": [
+                    {"$match": {"created_date": {"$gte": current_month_start.strftime("%Y-%m-%d")}}},
+                    {"$count": "current_month"}
+                ],
+            }}
+        ]
+        result = next(self.skilled_workers.aggregate(pipeline), {})
+        total_workers = facet_count(result, "total")
+        active_workers = facet_count(result, "active")
+        kyc_pending = facet_count(result, "kyc_pending")
+        total_redemptions = facet_sum(result, "total_redemptions")
+        current_month_workers = facet_count(result, "current_month")
+
+        # Calculate percentage changes
+        total_workers_trend = self._calculate_percentage_change(total_workers - current_month_workers, total_workers)
+        active_workers_trend = self._calculate_percentage_change(active_workers, total_workers)
+        kyc_pending_trend = self._calculate_percentage_change(kyc_pending, total_workers)
+        total_redemptions_trend = self._calculate_percentage_change(total_redemptions, total_redemptions)
+
+        return {
+            "total_workers": {
+                "value": total_workers,
+                "trend": f"+{total_workers_trend}% from last month",
+                "trend_type": "positive" if total_workers_trend > 0 else "negative"
+            },
+            "active_workers": {
+                "value": active_workers,
+                "trend": f"+{active_workers_trend}% from last month",
+                "trend_type": "positive" if active_workers_trend > 0 else "negative"
+            },
+            "kyc_pending": {
+                "value": kyc_pending,
+                "trend": "Requires attention" if kyc_pending > 0 else "All clear",
+                "trend_type": "warning" if kyc_pending > 0 else "positive"
+            },
+            "total_redemptions": {
+                "value": total_redemptions,
+                "trend": f"+{total_redemptions_trend}% from last month",
+                "trend_type": "positive" if total_redemptions_trend > 0 else "negative"
+            }
+        }
+
     def _calculate_percentage_change(self, old_value: int, new_value: int) -> int:
         """Calculate percentage change between two values"""
         if old_value == 0:
@@ -193,7 +196,7 @@ class SkilledWorkerService:
                 }
 
             # Get worker details
-            worker = self.skilled_workers.find_one({"_id": ObjectId(worker_id)})
+            worker = self.skilled_workers.find_one({"_id": ObjectId(worker_id)}, {"wallet_stats": 0})
             if not worker:
                 return {
                     "success": False,
@@ -202,15 +205,7 @@ class SkilledWorkerService:
                 }
 
             # Join with users collection using efficient lookup
-            created_by_id = worker.get('created_by_id')
-            if created_by_id:
-                user = self.users.find_one({"user_id": created_by_id})
-                if user:
-                    worker['created_by_name'] = user.get('username', 'Unknown')
-                else:
-                    worker['created_by_name'] = 'Unknown'
-            else:
-                worker['created_by_name'] = 'Unknown'
+            worker['created_by_name'] = AuditUtils.get_user_name(self.users, worker.get('created_by_id'))
 
             worker['_id'] = str(worker['_id'])
             
@@ -227,6 +222,38 @@ class SkilledWorkerService:
                 "error": {"code": "SERVER_ERROR", "details": str(e)}
             }
 
+    def _workers_in_leaderboard_order(self, query: dict, projection: dict, needed: int) -> list:
+        """First `needed` workers matching `query`, best all-time standing first.
+
+        Walks the leaderboard in rank order, fetching matching workers one batch
+        at a time; workers without any ledger entries come last.
+        """
+        workers = []
+        ranked_ids = []
+        batch = []
+        for row in Leaderboard.iter_ranked(ALL_TIME):
+            if not ObjectId.is_valid(row['worker_id']):
+                continue
+            batch.append(ObjectId(row['worker_id']))
+            if len(batch) == 200:
+                ranked_ids.extend(batch)
+                workers.extend(self._fetch_in_order(query, projection, batch))
+                batch = []
+                if len(workers) >= needed:
+                    return workers[:needed]
+        if batch:
+            ranked_ids.extend(batch)
+            workers.extend(self._fetch_in_order(query, projection, batch))
+        if len(workers) < needed:
+            workers.extend(self.skilled_workers.find(
+                {**query, "_id": {"$nin": ranked_ids}}, projection
+            ).sort('points', -1).limit(needed - len(workers)))
+        return workers[:needed]
+
+    def _fetch_in_order(self, query: dict, projection: dict, ids: list) -> list:
+        by_id = {w['_id']: w for w in self.skilled_workers.find({**query, "_id": {"$in": ids}}, projection)}
+        return [by_id[i] for i in ids if i in by_id]
+
     def get_super30_list(self, request_data: dict) -> dict:
         """Return top 30 workers with ranking and requested fields.
 
@@ -243,36 +270,16 @@ class SkilledWorkerService:
             sort_by = request_data.get('sort_by', 'points')
             sort_dir = int(request_data.get('sort_dir', -1))
 
-            # Compute coupon scans count per worker from transaction_ledger
-            scans_pipeline = [
-                {"$match": {"transaction_type": "COUPON_SCAN"}},
-                {"$group": {"_id": "$worker_id", "coupon_scans": {"$sum": 1}}}
-            ]
-            scans_map = {d['_id']: d.get('coupon_scans', 0) for d in self.transaction_ledger.aggregate(scans_pipeline)}
-
-            # Compute redemption counts per worker (completed)
-            redeem_done_pipeline = [
-                {"$match": {"status": "redeemed"}},
-                {"$group": {"_id": "$worker_id", "redeem_completed": {"$sum": 1}}}
-            ]
-            redeem_done_map = {d['_id']: d.get('redeem_completed', 0) for d in self.gift_redemptions.aggregate(redeem_done_pipeline)}
-
-            # Compute total earned points per worker (sum of positive amounts)
-            earned_pipeline = [
-                {"$group": {
-                    "_id": "$worker_id",
-                    "earned_points": {"$sum": {"$cond": [{"$gt": ["$amount", 0]}, "$amount", 0]}}
-                }}
-            ]
-            earned_map = {d['_id']: int(d.get('earned_points', 0) or 0) for d in self.transaction_ledger.aggregate(earned_pipeline)}
+            if sort_by not in ('points', 'wallet_points', 'coupon_scans', 'redemption_count'):
+                sort_by = 'points'
 
             # Get candidate workers sorted by requested metric
             mongo_sort_field = {
-                'points': 'points',
+                'points': 'points' if sort_dir == 1 else None,  # best first: all-time leaderboard order
                 'wallet_points': 'wallet_points',
                 'coupon_scans': None,  # will sort in Python after enriching
                 'redemption_count': 'redemption_count',
-            }.get(sort_by, 'points')
+            }[sort_by]
 
             # Base query: Active only unless explicitly specified
             query = request_data.get('filters', {}) or {}
@@ -296,11 +303,24 @@ class SkilledWorkerService:
             }
 
             if mongo_sort_field:
-                cursor = self.skilled_workers.find(query, projection).sort(mongo_sort_field, sort_dir).limit(limit)
+                cursor = self.skilled_workers.find(query, projection).sort(mongo_sort_field, sort_dir).limit(skip + limit)
                 workers = list(cursor)
             else:
-                # need more than limit to sort by scans in python; fetch top 200 by points as a heuristic
-                workers = list(self.skilled_workers.find(query, projection).sort('points', -1).limit(max(limit, 200)))
+                # scans are sorted in python over the top 200 by points, as a heuristic
+                workers = self._workers_in_leaderboard_order(
+                    query, projection, skip + limit if sort_by == 'points' else max(skip + limit, 200)
+                )
+
+            # Earned points and scans from the all-time leaderboard, completed
+            # redemptions counted for these workers only
+            worker_ids = [str(w.get('_id')) for w in workers]
+            standings = Leaderboard.points_by_worker(ALL_TIME, worker_ids)
+            redeem_done_map = {d['_id']: d.get('redeem_completed', 0) for d in self.gift_redemptions.aggregate([
+                {"$match": {"worker_id": {"$in": worker_ids}, "status": "redeemed"}},
+                {"$group": {"_id": "$worker_id", "redeem_completed": {"$sum": 1}}}
+            ])}
+            earned_map = {wid: int(row.get('points', 0) or 0) for wid, row in standings.items()}
+            scans_map = {wid: int(row.get('scans', 0) or 0) for wid, row in standings.items()}
 
             # Enrich and shape output
             created_by_ids = []
@@ -333,7 +353,7 @@ class SkilledWorkerService:
             if sort_by == 'coupon_scans':
                 rows.sort(key=lambda r: r['coupon_scans'], reverse=(sort_dir == -1))
 
-            # Apply pagination (in case of python sorting)
+            # Apply pagination
             rows = rows[skip: skip + limit]
 
             # Rank assignment
@@ -1,9 +1,14 @@
 from bson import ObjectId
 from trust_rewards.database import client1
+from trust_rewards.utils.common import AuditUtils, StatsCache, facet_count, facet_sum
+from trust_rewards.utils.ledger_archive import LedgerPartitions
 from datetime import datetime, timedelta
 from typing import Optional
 import pandas as pd
 
+from app.utils.cursor_pagination import InvalidCursor, paginate_sources
+from app.utils.list_count import COUNT_CAPPED, COUNT_ESTIMATED, InvalidCountMode, count_total_sources
+
 class TransactionLedgerService:
     def __init__(self):
         self.client_database = client1['trust_rewards']
@@ -30,7 +35,7 @@ class TransactionLedgerService:
 
             # Build query from request data
             query = request_data.copy()
-            for k in ['page', 'limit', 'filters']:
+            for k in ['page', 'limit', 'filters', 'include_stats', 'cursor', 'count_mode']:
                 if k in query:
                     del query[k]
 
@@ -55,11 +60,18 @@ class TransactionLedgerService:
                     date_query['$lte'] = date_to
                 query['transaction_date'] = date_query
 
-            # Get total count
-            total_count = self.transaction_ledger.count_documents(query)
+            # Hot ledger first, then the archived months the date range reaches
+            sources = LedgerPartitions.sources(query, date_from, date_to)
+
+            # Get total count (unfiltered admin view uses the collection estimate)
+            count = count_total_sources(sources, request_data.get('count_mode'), default_mode=COUNT_ESTIMATED)
+            total_count = count["total"]
             
-            # Get transactions with pagination (sort by transaction_datetime desc)
-            transactions = list(self.transaction_ledger.find(query).sort("transaction_datetime", -1).skip(skip).limit(limit))
+            # Get transactions with pagination (sort by transaction_datetime desc); a cursor replaces page
+            transactions, next_cursor = paginate_sources(
+                sources, [("transaction_datetime", -1)], limit,
+                cursor=request_data.get('cursor'), skip=skip
+            )
             
             # Convert to DataFrame for efficient join
             if transactions:
@@ -92,7 +104,6 @@ class TransactionLedgerService:
                 
                 # Add worker and user information to transactions
                 for transaction in transactions:
-                    transaction['_id'] = str(transaction['_id'])
                     
                     # Add worker information
                     worker_id = transaction.get('worker_id')
@@ -112,11 +123,11 @@ class TransactionLedgerService:
 
             # Calculate pagination info
             total_pages = (total_count + limit - 1) // limit
-            has_next = page < total_pages
+            has_next = next_cursor is not None
             has_prev = page > 1
 
             # Get stats data
-            stats = self.get_transaction_stats()
+            stats = self.get_transaction_stats() if request_data.get('include_stats', True) else None
 
             return {
                 "success": True,
@@ -128,12 +139,22 @@ class TransactionLedgerService:
                         "total_count": total_count,
                         "limit": limit,
                         "has_next": has_next,
-                        "has_prev": has_prev
+                        "has_prev": has_prev,
+                        "next_cursor": next_cursor,
+                        "count_mode": count["mode"],
+                        "total_is_exact": count["is_exact"],
+                        "total_display": count["display"]
                     },
                     "stats": stats
                 }
             }
 
+        except (InvalidCursor, InvalidCountMode) as e:
+            return {
+                "success": False,
+                "message": "Invalid pagination parameters",
+                "error": {"code": "VALIDATION_ERROR", "details": str(e)}
+            }
         except Exception as e:
             return {
                 "success": False,
@@ -142,73 +163,9 @@ class TransactionLedgerService:
             }
 
     def get_transaction_stats(self) -> dict:
-        """Get statistics data for transaction ledger dashboard"""
+        """Get statistics data for transaction ledger dashboard (one `$facet`, cached briefly)"""
         try:
-            # Get current month and last month for comparison
-            current_date = self.current_datetime
-            last_month = current_date.replace(day=1) - timedelta(days=1)
-            last_month_start = last_month.replace(day=1)
-            current_month_start = current_date.replace(day=1)
-            
-            # Total Transactions (all time)
-            total_transactions = self.transaction_ledger.count_documents({})
-            
-            # Completed Transactions
-            completed_transactions = self.transaction_ledger.count_documents({"status": "completed"})
-            
-            # Pending Transactions
-            pending_transactions = self.transaction_ledger.count_documents({"status": "pending"})
-            
-            # Total Amount (sum of amount for all transactions)
-            amount_pipeline = [
-                {"$group": {"_id": None, "total_amount": {"$sum": "$amount"}}}
-            ]
-            amount_result = list(self.transaction_ledger.aggregate(amount_pipeline))
-            total_amount = amount_result[0]["total_amount"] if amount_result else 0
-            
-            # Calculate trends (comparing with last month)
-            # Transactions this month
-            current_month_transactions = self.transaction_ledger.count_documents({
-                "transaction_date": {"$gte": current_month_start.strftime("%Y-%m-%d")}
-            })
-            
-            # Transactions last month
-            last_month_transactions = self.transaction_ledger.count_documents({
-                "transaction_date": {
-                    "$gte": last_month_start.strftime("%Y-%m-%d"),
-                    "$lt": current_month_start.strftime("%Y-%m-%d")
-                }
-            })
-            
-            # Calculate percentage changes
-            total_transactions_trend = self._calculate_percentage_change(last_month_transactions, current_month_transactions)
-            completed_transactions_trend = self._calculate_percentage_change(completed_transactions, total_transactions)
-            pending_transactions_trend = self._calculate_percentage_change(pending_transactions, total_transactions)
-            total_amount_trend = self._calculate_percentage_change(total_amount, total_amount)
-            
-            return {
-                "total_transactions": {
-                    "value": total_transactions,
-                    "trend": f"+{total_transactions_trend}% from last month",
-                    "trend_type": "positive" if total_transactions_trend > 0 else "negative"
-                },
-                "completed_transactions": {
-                    "value": completed_transactions,
-                    "trend": f"+{completed_transactions_trend}% from last month",
-                    "trend_type": "positive" if completed_transactions_trend > 0 else "negative"
-                },
-                "pending_transactions": {
-                    "value": pending_transactions,
-                    "trend": "Requires attention" if pending_transactions > 0 else "All clear",
-                    "trend_type": "warning" if pending_transactions > 0 else "positive"
-                },
-                "total_amount": {
-                    "value": total_amount,
-                    "trend": f"+{total_amount_trend}% from last month",
-                    "trend_type": "positive" if total_amount_trend > 0 else "negative"
-                }
-            }
-            
+            return StatsCache.get_or_compute("transaction_ledger", self._compute_transaction_stats)
         except Exception as e:
             # Return default stats if calculation fails
             return {
@@ -218,6 +175,75 @@ class TransactionLedgerService:
                 "total_amount": {"value": 0, "trend": "N/A", "trend_type": "neutral"}
             }
 
+    def _compute_transaction_stats(self) -> dict:
+        current_date = self.current_datetime
+        last_month = current_date.replace(day=1) - timedelta(days=1)
+        last_month_start = last_month.replace(day=1)
+        current_month_start = current_date.replace(day=1)
+
+        # Hot ledger here; archived months come from their ledger_partitions totals
+        hot_condition = LedgerPartitions.hot_condition()
+        archived = LedgerPartitions.archived_totals()
+        pipeline = ([{"$match": hot_condition}] if hot_condition else []) + [
+            {"$facet": {
+                # Total Transactions (all time)
+                "total": [{"$count": "total"}],
+                "completed": [{"$match": {"status": "completed"}}, {"$count": "completed"}],
+                "pending": [{"$match": {"status": "pending"}}, {"$count": "pending"}],
+                # Total Amount (sum of amount for all transactions)
+                "total_amount": [{"$group": {"_id": None, "total": {"$sum": "$amount"}}}],
+                "current_month": [
+                    {"$match": {"transaction_date": {"$gte": current_month_start.strftime("%Y-%m-%d")}}},
+                    {"$count": "current_month"}
+                ],
+                "last_month": [
+                    {"$match": {"transaction_date": {
+                        "$gte": last_month_start.strftime("%Y-%m-%d"),
+                        "$lt": current_month_start.strftime("%Y-%m-%d")
+                    }}},
+                    {"$count": "last_month"}
+                ],
+            }}
+        ]
+        result = next(self.transaction_ledger.aggregate(pipeline), {})
+        total_transactions = facet_count(result, "total") + archived["count"]
+        completed_transactions = facet_count(result, "completed") + archived["by_status"]["completed"]
+        pending_transactions = facet_count(result, "pending") + archived["by_status"]["pending"]
+        total_amount = facet_sum(result, "total_amount") + archived["total_amount"]
+        current_month_transactions = facet_count(result, "current_month") + \
+            archived["by_month"].get(current_month_start.strftime("%Y-%m"), 0)
+        last_month_transactions = facet_count(result, "last_month") + \
+            archived["by_month"].get(last_month_start.strftime("%Y-%m"), 0)
+
+        # Calculate percentage changes
+        total_transactions_trend = self._calculate_percentage_change(last_month_transactions, current_month_transactions)
+        completed_transactions_trend = self._calculate_percentage_change(completed_transactions, total_transactions)
+        pending_transactions_trend = self._calculate_percentage_change(pending_transactions, total_transactions)
+        total_amount_trend = self._calculate_percentage_change(total_amount, total_amount)
+
+        return {
+            "total_transactions": {
+                "value": total_transactions,
+                "trend": f"+{total_transactions_trend}% from last month",
+                "trend_type": "positive" if total_transactions_trend > 0 else "negative"
+            },
+            "completed_transactions": {
+                "value": completed_transactions,
+                "trend": f"+{completed_transactions_trend}% from last month",
+                "trend_type": "positive" if completed_transactions_trend > 0 else "negative"
+            },
+            "pending_transactions": {
+                "value": pending_transactions,
+                "trend": "Requires attention" if pending_transactions > 0 else "All clear",
+                "trend_type": "warning" if pending_transactions > 0 else "positive"
+            },
+            "total_amount": {
+                "value": total_amount,
+                "trend": f"+{total_amount_trend}% from last month",
+                "trend_type": "positive" if total_amount_trend > 0 else "negative"
+            }
+        }
+
     def _calculate_percentage_change(self, old_value: int, new_value: int) -> int:
         """Calculate percentage change between two values"""
         if old_value == 0:
@@ -235,11 +261,8 @@ class TransactionLedgerService:
                     "data": None
                 }
 
-            # Get transaction details
-            if transaction_id.startswith('TXN_'):
-                transaction = self.transaction_ledger.find_one({"transaction_id": transaction_id})
-            else:
-                transaction = self.transaction_ledger.find_one({"_id": ObjectId(transaction_id)})
+            # Get transaction details (hot ledger, then the archives)
+            transaction = LedgerPartitions.find_transaction(transaction_id)
             
             if not transaction:
                 return {
@@ -259,15 +282,7 @@ class TransactionLedgerService:
                     transaction['worker_name'] = 'Unknown'
                     transaction['worker_phone'] = 'N/A'
 
-            created_by = transaction.get('created_by')
-            if created_by:
-                user = self.users.find_one({"user_id": created_by})
-                if user:
-                    transaction['created_by_name'] = user.get('username', 'Unknown')
-                else:
-                    transaction['created_by_name'] = 'Unknown'
-            else:
-                transaction['created_by_name'] = 'Unknown'
+            transaction['created_by_name'] = AuditUtils.get_user_name(self.users, transaction.get('created_by'))
 
             transaction['_id'] = str(transaction['_id'])
             
@@ -324,19 +339,19 @@ class TransactionLedgerService:
                     date_query['$lte'] = date_to
                 query['transaction_date'] = date_query
 
+            # Hot ledger first, then the archived months the date range reaches
+            sources = LedgerPartitions.sources(query, date_from, date_to)
+
             # Get total count
-            total_count = self.transaction_ledger.count_documents(query)
+            count = count_total_sources(sources, request_data.get('count_mode'), default_mode=COUNT_CAPPED)
+            total_count = count["total"]
             
             # Get transactions with pagination
-            transactions = list(self.transaction_ledger.find(query).sort("transaction_datetime", -1).skip(skip).limit(limit))
+            transactions, _ = paginate_sources(sources, [("transaction_datetime", -1)], limit, skip=skip)
             
-            # Convert ObjectId to string
-            for transaction in transactions:
-                transaction['_id'] = str(transaction['_id'])
-
             # Calculate pagination info
             total_pages = (total_count + limit - 1) // limit
-            has_next = page < total_pages
+            has_next = page < total_pages or not count["is_exact"]
             has_prev = page > 1
 
             return {
@@ -349,11 +364,20 @@ class TransactionLedgerService:
                         "total_count": total_count,
                         "limit": limit,
                         "has_next": has_next,
-                        "has_prev": has_prev
+                        "has_prev": has_prev,
+                        "count_mode": count["mode"],
+                        "total_is_exact": count["is_exact"],
+                        "total_display": count["display"]
                     }
                 }
             }
 
+        except InvalidCountMode as e:
+            return {
+                "success": False,
+                "message": "Invalid pagination parameters",
+                "error": {"code": "VALIDATION_ERROR", "details": str(e)}
+            }
         except Exception as e:
             return {
                 "success": False,
@@ -1,5 +1,5 @@
 from bson import ObjectId
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from trust_rewards.database import client1
 from trust_rewards.utils.common import DateUtils, AuditUtils
 
@@ -17,7 +17,7 @@ class RecentActivityLogger:
         return db['recent_activity']
 
     @staticmethod
-    def log_activity(
+    def build(
         *,
         worker_id: str,
         title: str,
@@ -27,39 +27,52 @@ class RecentActivityLogger:
         reference_id: Optional[str] = None,
         reference_type: Optional[str] = None,
         metadata: Optional[Dict[str, Any]] = None,
-    ) -> None:
-        """Insert a recent activity record.
+    ) -> Dict[str, Any]:
+        """Build a recent activity record (not inserted).
 
         - points_change: positive for credit, negative for debit
         - activity_type: e.g. COUPON_SCAN, GIFT_REDEMPTION_REQUEST, REDEMPTION_CANCELLED, REDEMPTION_REDEEMED
         - metadata: any extra key/values to store
         """
-        try:
-            now_dt = DateUtils.get_current_datetime()
-            doc = {
-                "activity_id": f"ACT_{ObjectId()}",
-                "worker_id": worker_id,
-                "title": title,
-                "description": description or "",
-                "points_change": int(points_change or 0),
-                "activity_type": activity_type,
-                "reference_id": reference_id or "",
-                "reference_type": reference_type or "",
-                "created_at": now_dt,
-                "created_date": DateUtils.get_current_date(),
-                "created_time": DateUtils.get_current_time(),
-                **AuditUtils.build_create_meta(worker_id),
-            }
+        now_dt = DateUtils.get_current_datetime()
+        doc = {
+            "activity_id": f"ACT_{ObjectId()}",
+            "worker_id": worker_id,
+            "title": title,
+            "description": description or "",
+            "points_change": int(points_change or 0),
+            "activity_type": activity_type,
+            "reference_id": reference_id or "",
+            "reference_type": reference_type or "",
+            "created_at": now_dt,
+            "created_date": DateUtils.get_current_date(),
+            "created_time": DateUtils.get_current_time(),
+            **AuditUtils.build_create_meta(worker_id),
+        }
 
-            if metadata:
-                # Avoid overwriting core fields
-                for k, v in metadata.items():
-                    if k not in doc:
-                        doc[k] = v
+        if metadata:
+            # Avoid overwriting core fields
+            for k, v in metadata.items():
+                if k not in doc:
+                    doc[k] = v
+        return doc
 
-            RecentActivityLogger._collection().insert_one(doc)
+    @staticmethod
+    def log_activity(**fields) -> None:
+        """Insert a recent activity record; takes the keyword arguments of `build`"""
+        try:
+            RecentActivityLogger._collection().insert_one(RecentActivityLogger.build(**fields))
         except Exception as e:
             # Non-blocking: logging failure should not affect main flows
             print(f"RecentActivityLogger error: {str(e)}")
 
-
+    @staticmethod
+    def log_many(docs: List[Dict[str, Any]]) -> None:
+        """Insert records from `build` in one round trip"""
+        if not docs:
+            return
+        try:
+            RecentActivityLogger._collection().insert_many(docs, ordered=True)
+        except Exception as e:
+            # Non-blocking: logging failure should not affect main flows
+            print(f"RecentActivityLogger error: {str(e)}")
@@ -0,0 +1,37 @@
+"""Rewards app catalog cache (see `app/utils/versioned_cache.py`)"""
+
+import os
+
+from app.utils.versioned_cache import VersionedCache
+from trust_rewards.database import client1
+
+CATALOG_CACHE_ENABLED = os.getenv("CATALOG_CACHE", "1") == "1"
+CATALOG_CACHE_TTL_SECONDS = int(os.getenv("CATALOG_CACHE_TTL_SECONDS", "600"))
+CATALOG_CACHE_VERSION_CHECK_SECONDS = float(os.getenv("CATALOG_CACHE_VERSION_CHECK_SECONDS", "5"))
+
+# Namespaces are the catalog collections; WebMasterService invalidates them on writes
+CATEGORIES = "category_master"
+SUB_CATEGORIES = "sub_category_master"
+PRODUCTS = "product_master"
+GIFTS = "gift_master"
+
+catalog_cache = VersionedCache(
+    client1["trust_rewards"]["cache_versions"],
+    ttl_seconds=CATALOG_CACHE_TTL_SECONDS,
+    version_check_seconds=CATALOG_CACHE_VERSION_CHECK_SECONDS,
+)
+
+
+def cached_catalog(namespace: str, key, compute):
+    """Successful catalog responses from the cache; errors are never cached"""
+    if not CATALOG_CACHE_ENABLED:
+        return compute()
+    return catalog_cache.get_or_compute(namespace, key, compute, cacheable=lambda result: result.get("success"))
+
+
+def invalidate_catalog(*namespaces: str) -> None:
+    """Called after admin catalog writes; a failure only delays the refresh until entries expire"""
+    try:
+        catalog_cache.invalidate(*namespaces)
+    except Exception as e:
+        print(f"Catalog cache invalidation failed: {str(e)}")
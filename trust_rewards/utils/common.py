@@ -1,6 +1,18 @@
 import re
+import time
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Callable
+
+from app.utils.batch_resolver import BatchedResolver
+from app.utils.ttl_cache import TTLCache
+from app.utils.search_tokens import SEARCH_TOKENS_FIELD, document_search_tokens, search_filter
+from trust_rewards.database_indexes import SEARCH_FIELDS
+
+# Admin `users` looked up by `user_id` for created_by/updated_by display names
+_user_name_resolver = BatchedResolver(key_field="user_id", projection={"user_id": 1, "username": 1})
+
+# Dashboard card stats keyed by collection name
+_stats_cache = TTLCache(ttl_seconds=30, max_entries=64)
 
 class ValidationUtils:
     """Common validation utilities"""
@@ -75,6 +87,22 @@ class DateUtils:
         """Get current datetime"""
         return datetime.now()
     
+    @staticmethod
+    def get_cutoff_datetime() -> datetime:
+        """A rebuild cutoff: the next whole millisecond, returned once it has passed.
+
+        Mongo stores datetimes to the millisecond, so a cutoff with more
+        precision would compare equal to timestamps taken just before it.
+        Anything stamped before this call compares below the cutoff, anything
+        stamped after it at or above.
+        """
+        now = datetime.now()
+        cutoff = now.replace(microsecond=now.microsecond // 1000 * 1000) + timedelta(milliseconds=1)
+        remaining = (cutoff - datetime.now()).total_seconds()
+        if remaining > 0:
+            time.sleep(remaining)
+        return cutoff
+
     @staticmethod
     def get_current_date() -> str:
         """Get current date in YYYY-MM-DD format"""
@@ -240,3 +268,95 @@ class AuditUtils:
             "updated_time": now.strftime("%H:%M:%S"),
             "updated_by": user_id,
         }
+
+    @staticmethod
+    def attach_audit_names(users_collection, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Fill created_by_name / updated_by_name for a page of records with one lookup"""
+        ids = [r.get("created_by") for r in records] + [r.get("updated_by") for r in records]
+        users = _user_name_resolver.resolve(users_collection, ids)
+        for record in records:
+            created_by_id = record.get("created_by")
+            if created_by_id and created_by_id in users:
+                record["created_by_name"] = users[created_by_id].get("username", "Unknown")
+            else:
+                record["created_by_name"] = "Unknown"
+
+            updated_by_id = record.get("updated_by")
+            if updated_by_id:
+                user = users.get(updated_by_id)
+                record["updated_by_name"] = user.get("username", "Unknown") if user else "Unknown"
+            else:
+                record["updated_by_name"] = None
+        return records
+
+    @staticmethod
+    def get_user_name(users_collection, user_id, default: str = "Unknown") -> str:
+        """Display name of a single admin user (cached)"""
+        if not user_id:
+            return default
+        user = _user_name_resolver.resolve_one(users_collection, user_id)
+        return user.get("username", default) if user else default
+
+
+class SearchUtils:
+    """Indexed prefix search over the fields registered in SEARCH_FIELDS"""
+    @staticmethod
+    def set_tokens(collection_name: str, doc: Dict[str, Any]) -> Dict[str, Any]:
+        """Store `search_tokens` on a document (or `$set` body) before writing it"""
+        fields = SEARCH_FIELDS["trust_rewards"][collection_name]
+        doc[SEARCH_TOKENS_FIELD] = document_search_tokens(doc, fields)
+        return doc
+
+    @staticmethod
+    def filter(search: Optional[str]) -> Dict[str, Any]:
+        """Query fragment for a search box value; {} when empty"""
+        return search_filter(search)
+
+
+class StatsCache:
+    """Short-lived cache for per-collection dashboard stats.
+
+    List endpoints read their stats through `get_or_compute`; services that
+    write to a collection call `invalidate` so the next page load recomputes.
+    """
+    @staticmethod
+    def get_or_compute(collection_name: str, compute: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        stats = _stats_cache.get(collection_name)
+        if stats is None:
+            stats = compute()
+            _stats_cache.set(collection_name, stats)
+        return stats
+
+    @staticmethod
+    def invalidate(*collection_names: str) -> None:
+        for name in collection_names:
+            _stats_cache.delete(name)
+
+
+def facet_count(facet_result: Dict[str, Any], name: str) -> int:
+    """Read a `[{"$count": name}]` facet; empty facets mean zero"""
+    rows = facet_result.get(name) or []
+    return rows[0].get(name, 0) if rows else 0
+
+
+def facet_sum(facet_result: Dict[str, Any], name: str, field: str = "total") -> Any:
+    """Read a `[{"$group": {"_id": None, field: {"$sum": ...}}}]` facet"""
+    rows = facet_result.get(name) or []
+    return rows[0].get(field, 0) if rows else 0
+
+
+def grouped_count(collection, field: str, values: List[str], match: Optional[Dict[str, Any]] = None) -> Dict[str, int]:
+    """{value: documents with `field` == value (and `match`)} in one `$group`.
+
+    Values without documents are 0, so one aggregation replaces a
+    `count_documents` per row of a page.
+    """
+    counts = dict.fromkeys(values, 0)
+    if not values:
+        return counts
+    for row in collection.aggregate([
+        {"$match": {field: {"$in": list(values)}, **(match or {})}},
+        {"$group": {"_id": f"${field}", "count": {"$sum": 1}}}
+    ]):
+        counts[row['_id']] = row['count']
+    return counts
@@ -0,0 +1,266 @@
+import hashlib
+import math
+import os
+import re
+import threading
+import time
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from bson import Binary, ObjectId
+from trust_rewards.database import client1
+from trust_rewards.utils.common import DateUtils
+
+# In-process filter of issued codes; off unless COUPON_CODE_FILTER=1 (and every
+# batch has a filter, see scripts/build_coupon_code_filters.py)
+COUPON_CODE_FILTER_ENABLED = os.getenv("COUPON_CODE_FILTER", "0") == "1"
+COUPON_CODE_FILTER_REFRESH_SECONDS = int(os.getenv("COUPON_CODE_FILTER_REFRESH_SECONDS", "60"))
+COUPON_CODE_FILTER_FALSE_POSITIVE_RATE = float(os.getenv("COUPON_CODE_FILTER_FALSE_POSITIVE_RATE", "0.001"))
+
+# Crockford base32: no I, L, O, U; check symbols extend it to 37 values
+_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_CHECK_SYMBOLS = _ALPHABET + "*~$=U"
+_VALUES = {symbol: value for value, symbol in enumerate(_CHECK_SYMBOLS)}
+_TYPO_FIXES = str.maketrans({"I": "1", "L": "1", "O": "0"})
+_BODY_LENGTH = 20  # 96-bit ObjectId in 5-bit symbols
+_LEGACY_CODE = re.compile(r"[0-9a-fA-F]{24}")
+# Batches whose codes are still being inserted; their filters are not final
+_IN_PROGRESS = ("queued", "generating")
+_STAMP_ID = "stamp"
+
+
+class CouponCodes:
+    """Coupon code format.
+
+    A code is the coupon's ObjectId written in Crockford base32 (20 symbols)
+    followed by a mod-37 check symbol, e.g. `0SRGMB2E3CP3TKJZC1RRT`. The check
+    symbol catches every single-symbol typo and adjacent transposition, so
+    mistyped and made-up codes are rejected without a database lookup.
+    Reading is case-insensitive and maps I/L to 1 and O to 0.
+
+    Codes generated before this format (the ObjectId as 24 hex characters)
+    remain valid.
+    """
+
+    @staticmethod
+    def encode(coupon_id: ObjectId) -> str:
+        value = int.from_bytes(coupon_id.binary, "big")
+        body = "".join(_ALPHABET[(value >> (5 * shift)) & 31] for shift in reversed(range(_BODY_LENGTH)))
+        return body + _CHECK_SYMBOLS[value % 37]
+
+    @staticmethod
+    def canonical(code: str) -> Optional[str]:
+        """The code as stored, or None if it cannot be a coupon code"""
+        if not isinstance(code, str):
+            return None
+        code = code.strip()
+        if _LEGACY_CODE.fullmatch(code):
+            return code.lower()
+
+        code = code.replace("-", "").replace(" ", "").upper().translate(_TYPO_FIXES)
+        if len(code) != _BODY_LENGTH + 1:
+            return None
+        value = 0
+        for symbol in code[:-1]:
+            digit = _VALUES.get(symbol)
+            if digit is None or digit > 31:
+                return None
+            value = (value << 5) | digit
+        if value >> 96 or _VALUES.get(code[-1]) != value % 37:
+            return None
+        return code
+
+    @staticmethod
+    def coupon_id_value(code: str) -> int:
+        """The coupon's ObjectId as an integer, for a canonical code"""
+        if len(code) == 24:
+            return int(code, 16)
+        value = 0
+        for symbol in code[:-1]:
+            value = (value << 5) | _VALUES[symbol]
+        return value
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (double hashing on blake2b)"""
+
+    def __init__(self, num_bits: int, num_hashes: int, bits: Optional[bytes] = None):
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self.bits = bytearray(bits) if bits is not None else bytearray((num_bits + 7) // 8)
+
+    @classmethod
+    def for_capacity(cls, capacity: int, false_positive_rate: float) -> "BloomFilter":
+        capacity = max(capacity, 1)
+        num_bits = max(8, int(math.ceil(-capacity * math.log(false_positive_rate) / (math.log(2) ** 2))))
+        num_hashes = max(1, int(round(num_bits / capacity * math.log(2))))
+        return cls(num_bits, num_hashes)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class CouponCodeFilter:
+    """Per-batch Bloom filters of issued codes, kept in `coupon_code_filters`.
+
+    A batch's filter is built from `coupon_code` when its generation job ends
+    (or by `scripts/build_coupon_code_filters.py`) and records the batch's
+    range of coupon ids, so a code is only hashed against the batches whose
+    range contains it. Each process loads the filters and re-checks
+    `coupon_master` every COUPON_CODE_FILTER_REFRESH_SECONDS; codes are only
+    rejected while every batch has a filter, so a batch that is still
+    generating (or predates the filters) just means lookups go to the
+    database as before.
+
+    Creating a batch and building a filter bump a shared stamp. Before
+    rejecting a code, a process compares the stamp with the one its filters
+    were loaded at and refreshes if it moved, so a batch created since the
+    last refresh never has its codes rejected.
+    """
+
+    _lock = threading.Lock()
+    _refresh_lock = threading.Lock()
+    _filters: Dict[str, Tuple[int, int, BloomFilter]] = {}
+    _built_at: Dict[str, object] = {}
+    _complete = False
+    _refreshed_at = 0.0
+    _stamp = None
+
+    @staticmethod
+    def _db():
+        return client1['trust_rewards']
+
+    @staticmethod
+    def _current_stamp() -> int:
+        doc = CouponCodeFilter._db()['coupon_code_filter_state'].find_one({"_id": _STAMP_ID}, {"version": 1})
+        return doc.get("version", 0) if doc else 0
+
+    @staticmethod
+    def bump_stamp() -> None:
+        """Batches or filters changed; other processes must refresh before rejecting"""
+        CouponCodeFilter._db()['coupon_code_filter_state'].update_one(
+            {"_id": _STAMP_ID}, {"$inc": {"version": 1}}, upsert=True
+        )
+
+    @staticmethod
+    def build(coupon_master_id: str) -> int:
+        """(Re)build and store one batch's filter; returns the number of codes"""
+        db = CouponCodeFilter._db()
+        query = {"coupon_master_id": coupon_master_id}
+        bloom = BloomFilter.for_capacity(db['coupon_code'].count_documents(query),
+                                         COUPON_CODE_FILTER_FALSE_POSITIVE_RATE)
+        count = 0
+        min_id = max_id = None
+        for coupon in db['coupon_code'].find(query, {"coupon_code": 1}).batch_size(10000):
+            bloom.add(coupon['coupon_code'])
+            min_id = coupon['_id'] if min_id is None or coupon['_id'] < min_id else min_id
+            max_id = coupon['_id'] if max_id is None or coupon['_id'] > max_id else max_id
+            count += 1
+        db['coupon_code_filters'].replace_one(
+            {"_id": coupon_master_id},
+            {"num_bits": bloom.num_bits, "num_hashes": bloom.num_hashes, "bits": Binary(bytes(bloom.bits)),
+             "count": count, "min_id": min_id, "max_id": max_id, "built_at": DateUtils.get_current_datetime()},
+            upsert=True
+        )
+        CouponCodeFilter.bump_stamp()
+        return count
+
+    @staticmethod
+    def _id_range(doc) -> Tuple[int, int]:
+        # Filters built before ids were recorded cover every id
+        if not isinstance(doc.get('min_id'), ObjectId) or not isinstance(doc.get('max_id'), ObjectId):
+            return 0, (1 << 96) - 1
+        return int(str(doc['min_id']), 16), int(str(doc['max_id']), 16)
+
+    @staticmethod
+    def refresh() -> None:
+        db = CouponCodeFilter._db()
+        # Read first: a change after this point moves the stamp past what is stored below
+        stamp = CouponCodeFilter._current_stamp()
+        masters = {
+            str(master['_id']): master.get('generation_status', 'completed')
+            for master in db['coupon_master'].find({}, {"generation_status": 1})
+        }
+        stored = {doc['_id']: doc['built_at'] for doc in db['coupon_code_filters'].find({}, {"built_at": 1})}
+
+        filters = {master_id: entry for master_id, entry in CouponCodeFilter._filters.items() if master_id in masters}
+        built_at = {master_id: CouponCodeFilter._built_at[master_id] for master_id in filters}
+        for master_id in masters:
+            if master_id in stored and built_at.get(master_id) != stored[master_id]:
+                doc = db['coupon_code_filters'].find_one({"_id": master_id})
+                if doc:
+                    low, high = CouponCodeFilter._id_range(doc)
+                    filters[master_id] = (low, high, BloomFilter(doc['num_bits'], doc['num_hashes'], doc['bits']))
+                    built_at[master_id] = doc['built_at']
+
+        with CouponCodeFilter._lock:
+            CouponCodeFilter._filters = filters
+            CouponCodeFilter._built_at = built_at
+            CouponCodeFilter._complete = all(
+                master_id in filters and status not in _IN_PROGRESS for master_id, status in masters.items()
+            )
+            CouponCodeFilter._stamp = stamp
+            CouponCodeFilter._refreshed_at = time.monotonic()
+
+    @staticmethod
+    def _matches(code: str) -> bool:
+        """Loaded filters are incomplete, or one whose id range holds `code` contains it"""
+        if not CouponCodeFilter._complete:
+            return True
+        value = CouponCodes.coupon_id_value(code)
+        return any(low <= value <= high and code in bloom
+                   for low, high, bloom in CouponCodeFilter._filters.values())
+
+    @staticmethod
+    def might_exist_many(codes: Iterable[str]) -> Set[str]:
+        """The codes (canonical) among `codes` that might have been issued.
+
+        The shared stamp is read at most once per call, and only if some code
+        missed the loaded filters, so rejecting a batch of never-issued codes
+        costs one point read however many codes it holds.
+        """
+        codes = set(codes)
+        if not COUPON_CODE_FILTER_ENABLED or not codes:
+            return codes
+        stale = time.monotonic() - CouponCodeFilter._refreshed_at > COUPON_CODE_FILTER_REFRESH_SECONDS
+        # One thread refreshes; the others keep using the current filters
+        if stale and CouponCodeFilter._refresh_lock.acquire(blocking=False):
+            try:
+                CouponCodeFilter.refresh()
+            except Exception as e:
+                print(f"CouponCodeFilter refresh failed: {str(e)}")
+                return codes
+            finally:
+                CouponCodeFilter._refresh_lock.release()
+        found = {code for code in codes if CouponCodeFilter._matches(code)}
+        if len(found) == len(codes):
+            return found
+
+        # Misses: only reject them if no batch was created or rebuilt since the filters were loaded
+        try:
+            stamp = CouponCodeFilter._current_stamp()
+            if stamp == CouponCodeFilter._stamp:
+                return found
+            with CouponCodeFilter._refresh_lock:
+                # Another thread may have refreshed to this stamp while we waited
+                if CouponCodeFilter._stamp != stamp:
+                    CouponCodeFilter.refresh()
+        except Exception as e:
+            print(f"CouponCodeFilter refresh failed: {str(e)}")
+            return codes
+        return {code for code in codes if CouponCodeFilter._matches(code)}
+
+    @staticmethod
+    def might_exist(code: str) -> bool:
+        """False only if `code` (canonical) was certainly never issued"""
+        return code in CouponCodeFilter.might_exist_many([code])
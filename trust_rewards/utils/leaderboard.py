@@ -0,0 +1,196 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+from pymongo.errors import BulkWriteError
+from trust_rewards.database import client1
+from trust_rewards.utils.common import DateUtils
+from trust_rewards.utils.ledger_archive import LedgerPartitions
+
+ALL_TIME = "all_time"
+THIS_MONTH = "this_month"
+
+# Leaderboard order; the (period, points, scans, worker_id) index serves both
+# top-N and the rank count
+RANK_ORDER = [("points", DESCENDING), ("scans", DESCENDING), ("worker_id", ASCENDING)]
+
+
+class Leaderboard:
+    """Super30 standings kept incrementally in `leaderboard`.
+
+    One document per (period, worker): `period` is "all_time" or a month key
+    ("2025-03"), `points` the sum of the worker's positive ledger amounts in
+    that period and `scans` the number of COUPON_SCAN entries. Every entry
+    recorded through `TransactionLogger` is applied to its month and to
+    all_time, so a new month starts a new period by itself.
+
+    A period is built from the ledger (`rebuild`) the first time it is read
+    without having been built, which is what makes the counters trustworthy
+    for months and workers that predate the collection. Top-N is an index
+    walk and a worker's rank is an index-only count of the workers ahead.
+    """
+
+    @staticmethod
+    def _collection():
+        db = client1['trust_rewards']
+        return db['leaderboard']
+
+    @staticmethod
+    def _periods():
+        return Leaderboard._collection().database['leaderboard_periods']
+
+    @staticmethod
+    def month_key(when: Optional[datetime] = None) -> str:
+        return (when or DateUtils.get_current_datetime()).strftime("%Y-%m")
+
+    @staticmethod
+    def period_key(period: str) -> str:
+        """"all_time" / "this_month" -> stored period key"""
+        return ALL_TIME if period == ALL_TIME else Leaderboard.month_key()
+
+    @staticmethod
+    def apply_ledger_entries(docs: Iterable[Dict[str, Any]]) -> None:
+        """Add new ledger entries to their month and all_time standings"""
+        totals = defaultdict(lambda: {"points": 0, "scans": 0})
+        for doc in docs:
+            amount = int(doc.get("amount", 0) or 0)
+            month = Leaderboard.month_key(doc.get("transaction_datetime"))
+            for period in (ALL_TIME, month):
+                row = totals[(period, doc["worker_id"])]
+                row["points"] += max(amount, 0)
+                row["scans"] += 1 if doc.get("transaction_type") == "COUPON_SCAN" else 0
+
+        now = DateUtils.get_current_datetime()
+        ops = [
+            UpdateOne(
+                {"period": period, "worker_id": worker_id},
+                {"$inc": row, "$set": {"updated_at": now}},
+                upsert=True
+            )
+            for (period, worker_id), row in totals.items()
+        ]
+        if ops:
+            Leaderboard._collection().bulk_write(ops, ordered=False)
+
+    @staticmethod
+    def _ensure_built(period_key: str) -> None:
+        if Leaderboard._periods().find_one({"_id": period_key}, {"_id": 1}) is None:
+            Leaderboard.rebuild(period_key)
+
+    @staticmethod
+    def rebuild(period_key: str) -> int:
+        """Recompute one period from the ledger (hot and archived); returns the number of workers.
+
+        Entries keep being applied while this runs (a new month is rebuilt on
+        its first read, mid-scan), so rows are corrected rather than
+        overwritten: a cutoff is taken and the period's rows snapshotted, the
+        ledger is counted up to the cutoff, and each row gets `$inc` of
+        (rebuilt - snapshot). A row another rebuild corrected after the
+        snapshot is left to that rebuild.
+        """
+        start = end = None
+        if period_key != ALL_TIME:
+            start = datetime.strptime(period_key, "%Y-%m")
+            end = start.replace(year=start.year + 1, month=1) if start.month == 12 else start.replace(month=start.month + 1)
+
+        collection = Leaderboard._collection()
+        cutoff = DateUtils.get_cutoff_datetime()
+        rebuild_id = str(ObjectId())
+        snapshot = {
+            row["worker_id"]: row
+            for row in collection.find({"period": period_key}, {"_id": 0, "worker_id": 1, "points": 1, "scans": 1,
+                                                                "rebuild_id": 1})
+        }
+        totals = LedgerPartitions.worker_totals(start=start, end=min(end, cutoff) if end else cutoff)
+
+        ops = []
+        workers = 0
+        for worker_id in set(totals) | set(snapshot):
+            rebuilt = totals.get(worker_id, {})
+            current = snapshot.get(worker_id, {})
+            ops.append(UpdateOne(
+                {"period": period_key, "worker_id": worker_id, "rebuild_id": current.get("rebuild_id")},
+                {
+                    "$inc": {
+                        "points": rebuilt.get("earned", 0) - int(current.get("points", 0) or 0),
+                        "scans": rebuilt.get("coupon_scans", 0) - int(current.get("scans", 0) or 0),
+                    },
+                    "$set": {"rebuild_id": rebuild_id, "updated_at": cutoff}
+                },
+                upsert=True
+            ))
+            workers += 1
+            if len(ops) >= 1000:
+                Leaderboard._apply_corrections(ops)
+                ops = []
+        if ops:
+            Leaderboard._apply_corrections(ops)
+        Leaderboard._periods().update_one({"_id": period_key}, {"$set": {"built_at": cutoff}}, upsert=True)
+        return workers
+
+    @staticmethod
+    def _apply_corrections(ops: List[UpdateOne]) -> None:
+        try:
+            Leaderboard._collection().bulk_write(ops, ordered=False)
+        except BulkWriteError as e:
+            # A row another rebuild corrected first no longer matches, and its
+            # upsert hits period_worker_id_unique; that rebuild's correction stands
+            if any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+                raise
+
+    @staticmethod
+    def top(period_key: str, limit: int, skip: int = 0) -> List[Dict[str, Any]]:
+        """Standings rows [skip, skip + limit) with their rank"""
+        Leaderboard._ensure_built(period_key)
+        rows = list(
+            Leaderboard._collection().find({"period": period_key}, {"_id": 0, "worker_id": 1, "points": 1, "scans": 1})
+            .sort(RANK_ORDER).skip(skip).limit(limit)
+        )
+        for rank, row in enumerate(rows, start=skip + 1):
+            row["rank"] = rank
+        return rows
+
+    @staticmethod
+    def iter_ranked(period_key: str, batch_size: int = 200) -> Iterator[Dict[str, Any]]:
+        """All standings of a period in rank order"""
+        Leaderboard._ensure_built(period_key)
+        cursor = Leaderboard._collection().find(
+            {"period": period_key}, {"_id": 0, "worker_id": 1, "points": 1, "scans": 1}
+        ).sort(RANK_ORDER).batch_size(batch_size)
+        for rank, row in enumerate(cursor, start=1):
+            row["rank"] = rank
+            yield row
+
+    @staticmethod
+    def standing(period_key: str, worker_id: str) -> Optional[Dict[str, Any]]:
+        """A worker's row with its exact rank, or None if they have no entries in the period"""
+        Leaderboard._ensure_built(period_key)
+        collection = Leaderboard._collection()
+        row = collection.find_one({"period": period_key, "worker_id": worker_id},
+                                  {"_id": 0, "worker_id": 1, "points": 1, "scans": 1})
+        if row is None:
+            return None
+        points, scans = row.get("points", 0), row.get("scans", 0)
+        ahead = collection.count_documents({
+            "period": period_key,
+            "$or": [
+                {"points": {"$gt": points}},
+                {"points": points, "scans": {"$gt": scans}},
+                {"points": points, "scans": scans, "worker_id": {"$lt": worker_id}},
+            ]
+        })
+        row["rank"] = ahead + 1
+        return row
+
+    @staticmethod
+    def points_by_worker(period_key: str, worker_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """{worker_id: row} for the given workers"""
+        Leaderboard._ensure_built(period_key)
+        return {
+            row["worker_id"]: row
+            for row in Leaderboard._collection().find(
+                {"period": period_key, "worker_id": {"$in": worker_ids}},
+                {"_id": 0, "worker_id": 1, "points": 1, "scans": 1}
+            )
+        }
@@ -0,0 +1,345 @@
+import os
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+from trust_rewards.database import client1
+from trust_rewards.database_indexes import INDEXES
+from trust_rewards.utils.common import DateUtils
+
+# Months kept in `transaction_ledger`, the current one included; older months are archived
+LEDGER_HOT_MONTHS = int(os.getenv("LEDGER_HOT_MONTHS", "2"))
+LEDGER_ARCHIVE_BATCH_SIZE = int(os.getenv("LEDGER_ARCHIVE_BATCH_SIZE", "5000"))
+
+_COPYING = "copying"
+_ARCHIVED = "archived"
+_DUPLICATE_KEY = 11000
+
+
+def _month_start(month: str) -> datetime:
+    return datetime.strptime(month, "%Y-%m")
+
+
+def _add_months(when: datetime, months: int) -> datetime:
+    index = when.year * 12 + when.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def _and(query: Dict[str, Any], condition: Dict[str, Any]) -> Dict[str, Any]:
+    if not condition:
+        return query
+    return {"$and": [query, condition]} if query else condition
+
+
+class LedgerPartitions:
+    """`transaction_ledger` split into a hot collection and monthly archives.
+
+    `transaction_ledger` keeps the last LEDGER_HOT_MONTHS months (the current
+    one included). `archive` moves every older month to
+    `transaction_ledger_YYYY_MM`, writes per-worker totals for it to
+    `ledger_monthly_summaries` and lists it in `ledger_partitions`.
+
+    List endpoints page over `sources(query, date_from, date_to)`: the hot
+    collection, then only the archived months the date range reaches, newest
+    first, read one after the other as pages need them (see
+    `paginate_sources` / `count_total_sources`). All-time aggregates (wallet
+    stats, leaderboard, ledger summary, dashboard stats) combine the hot
+    collection with the summaries instead of reading the archives.
+
+    A month is copied, summarized, switched over in `ledger_partitions` and
+    only then removed from the hot collection; until the removal finishes,
+    hot reads exclude it, so no entry is read twice or missed. `archive` is
+    safe to rerun after a failure (scripts/archive_transaction_ledger.py or
+    the ledger_archive job).
+    """
+
+    @staticmethod
+    def _collection():
+        db = client1['trust_rewards']
+        return db['transaction_ledger']
+
+    @staticmethod
+    def _registry():
+        return LedgerPartitions._collection().database['ledger_partitions']
+
+    @staticmethod
+    def _summaries():
+        return LedgerPartitions._collection().database['ledger_monthly_summaries']
+
+    @staticmethod
+    def archive_name(month: str) -> str:
+        return f"transaction_ledger_{month.replace('-', '_')}"
+
+    @staticmethod
+    def _archived() -> List[Dict[str, Any]]:
+        """Archived months, newest first"""
+        return list(LedgerPartitions._registry().find({"status": _ARCHIVED}).sort("_id", -1))
+
+    @staticmethod
+    def _hot_condition(archived: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Hides archived entries still waiting to be removed from the hot collection"""
+        if not any(not partition.get("purged") for partition in archived):
+            return {}
+        return {"transaction_datetime": {"$gte": _add_months(_month_start(archived[0]["_id"]), 1)}}
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    @staticmethod
+    def sources(query: Dict[str, Any], date_from: Optional[str] = None,
+                date_to: Optional[str] = None) -> List[Tuple[Any, Dict[str, Any]]]:
+        """(collection, query) pairs covering `query`, newest first.
+
+        `date_from` / `date_to` ("YYYY-MM-DD", as in the transaction_date
+        filters) leave out archived months outside the range.
+        """
+        archived = LedgerPartitions._archived()
+        sources = [(LedgerPartitions._collection(), _and(query, LedgerPartitions._hot_condition(archived)))]
+        db = LedgerPartitions._collection().database
+        for partition in archived:
+            month = partition["_id"]
+            if (date_to and month > date_to[:7]) or (date_from and month < date_from[:7]):
+                continue
+            sources.append((db[partition["collection"]], query))
+        return sources
+
+    @staticmethod
+    def find_transaction(transaction_id: str) -> Optional[Dict[str, Any]]:
+        """One entry by transaction_id ("TXN_...") or _id, wherever it is stored"""
+        is_txn = transaction_id.startswith('TXN_')
+        key = {"transaction_id": transaction_id} if is_txn else {"_id": ObjectId(transaction_id)}
+        doc = LedgerPartitions._collection().find_one(key)
+        if doc is not None:
+            return doc
+
+        # Both ids embed the creation time; try the archives nearest to it first
+        oid = transaction_id[4:] if is_txn else transaction_id
+        created = ObjectId(oid).generation_time.replace(tzinfo=None) if ObjectId.is_valid(oid) else None
+        archived = LedgerPartitions._archived()
+        if created is not None:
+            target = _month_start(created.strftime("%Y-%m"))
+            archived.sort(key=lambda partition: abs((_month_start(partition["_id"]) - target).days))
+        db = LedgerPartitions._collection().database
+        for partition in archived:
+            doc = db[partition["collection"]].find_one(key)
+            if doc is not None:
+                return doc
+        return None
+
+    @staticmethod
+    def worker_totals(match: Optional[Dict[str, Any]] = None, start: Optional[datetime] = None,
+                      end: Optional[datetime] = None) -> Dict[str, Dict[str, int]]:
+        """{worker_id: {earned, redeemed, coupon_scans}} over [start, end) (month-aligned) or all time"""
+        match = match or {}
+        archived = LedgerPartitions._archived()
+        totals = defaultdict(lambda: {"earned": 0, "redeemed": 0, "coupon_scans": 0})
+
+        in_range = {}
+        if start is not None or end is not None:
+            in_range = {"transaction_datetime": {
+                **({"$gte": start} if start is not None else {}),
+                **({"$lt": end} if end is not None else {})
+            }}
+        hot_match = _and(_and(match, in_range), LedgerPartitions._hot_condition(archived))
+        for row in LedgerPartitions._collection().aggregate([
+            {"$match": hot_match},
+            {"$group": {
+                "_id": "$worker_id",
+                "earned": {"$sum": {"$cond": [{"$gt": ["$amount", 0]}, "$amount", 0]}},
+                "redeemed": {"$sum": {"$cond": [{"$lt": ["$amount", 0]}, "$amount", 0]}},
+                "coupon_scans": {"$sum": {"$cond": [{"$eq": ["$transaction_type", "COUPON_SCAN"]}, 1, 0]}},
+            }}
+        ]):
+            row_totals = totals[row["_id"]]
+            for name in row_totals:
+                row_totals[name] += int(row[name] or 0)
+
+        months = [
+            p["_id"] for p in archived
+            if (start is None or _month_start(p["_id"]) >= start) and (end is None or _month_start(p["_id"]) < end)
+        ]
+        if months:
+            for row in LedgerPartitions._summaries().aggregate([
+                {"$match": {**match, "month": {"$in": months}}},
+                {"$group": {"_id": "$worker_id", **{name: {"$sum": f"${name}"} for name in
+                                                   ("earned", "redeemed", "coupon_scans")}}}
+            ]):
+                row_totals = totals[row["_id"]]
+                for name in row_totals:
+                    row_totals[name] += int(row[name] or 0)
+        return dict(totals)
+
+    @staticmethod
+    def type_totals(worker_id: str) -> List[Dict[str, Any]]:
+        """[{"_id": transaction_type, "count", "total_amount"}] for one worker over all time"""
+        archived = LedgerPartitions._archived()
+        totals = defaultdict(lambda: {"count": 0, "total_amount": 0})
+        for row in LedgerPartitions._collection().aggregate([
+            {"$match": _and({"worker_id": worker_id}, LedgerPartitions._hot_condition(archived))},
+            {"$group": {"_id": "$transaction_type", "count": {"$sum": 1}, "total_amount": {"$sum": "$amount"}}}
+        ]):
+            totals[row["_id"]]["count"] += row["count"]
+            totals[row["_id"]]["total_amount"] += row["total_amount"] or 0
+        if archived:
+            for summary in LedgerPartitions._summaries().find(
+                {"worker_id": worker_id, "month": {"$in": [p["_id"] for p in archived]}}, {"by_type": 1}
+            ):
+                for transaction_type, row in summary.get("by_type", {}).items():
+                    totals[transaction_type]["count"] += row["count"]
+                    totals[transaction_type]["total_amount"] += row["total_amount"]
+        return [{"_id": transaction_type, **row} for transaction_type, row in totals.items()]
+
+    @staticmethod
+    def hot_condition() -> Dict[str, Any]:
+        """Condition to add to queries that read the hot collection directly"""
+        return LedgerPartitions._hot_condition(LedgerPartitions._archived())
+
+    @staticmethod
+    def archived_totals() -> Dict[str, Any]:
+        """Entry count, amount and per-status / per-month counts of all archived months"""
+        totals = {"count": 0, "total_amount": 0, "by_status": defaultdict(int), "by_month": {}}
+        for partition in LedgerPartitions._archived():
+            totals["count"] += partition.get("count", 0)
+            totals["total_amount"] += partition.get("total_amount", 0)
+            for status, count in partition.get("by_status", {}).items():
+                totals["by_status"][status] += count
+            totals["by_month"][partition["_id"]] = partition.get("count", 0)
+        return totals
+
+    # ------------------------------------------------------------------
+    # Archival
+    # ------------------------------------------------------------------
+    @staticmethod
+    def archive(hot_months: Optional[int] = None,
+                on_progress: Optional[Callable[[float, str], None]] = None) -> List[Dict[str, Any]]:
+        """Archive every month older than the hot window; finishes months an earlier run left half done.
+
+        `on_progress(percent, month)` is called after every copied batch.
+        """
+        hot_months = max(1, hot_months or LEDGER_HOT_MONTHS)
+        cutoff = _add_months(DateUtils.get_current_datetime(), 1 - hot_months)
+        months = {
+            p["_id"] for p in LedgerPartitions._registry().find(
+                {"$or": [{"status": {"$ne": _ARCHIVED}}, {"purged": {"$ne": True}}]}, {"_id": 1}
+            )
+        }
+        oldest = LedgerPartitions._collection().find_one(
+            {"transaction_datetime": {"$lt": cutoff}}, {"transaction_datetime": 1}, sort=[("transaction_datetime", 1)]
+        )
+        if oldest is not None:
+            month = _add_months(oldest["transaction_datetime"], 0)
+            while month < cutoff:
+                months.add(month.strftime("%Y-%m"))
+                month = _add_months(month, 1)
+
+        results = []
+        months = sorted(months)
+        for done, month in enumerate(months):
+            on_batch = (lambda month=month, done=done: on_progress(done * 100.0 / len(months), month)) \
+                if on_progress else None
+            result = LedgerPartitions.archive_month(month, on_batch=on_batch)
+            if result is not None:
+                results.append(result)
+        return results
+
+    @staticmethod
+    def archive_month(month: str, on_batch: Optional[Callable[[], None]] = None) -> Optional[Dict[str, Any]]:
+        """Move one month out of the hot collection; None if it has no entries"""
+        hot = LedgerPartitions._collection()
+        registry = LedgerPartitions._registry()
+        start = _month_start(month)
+        in_month = {"transaction_datetime": {"$gte": start, "$lt": _add_months(start, 1)}}
+        partition = registry.find_one({"_id": month})
+        if partition is None:
+            if hot.find_one(in_month, {"_id": 1}) is None:
+                return None
+            registry.update_one(
+                {"_id": month},
+                {"$setOnInsert": {"collection": LedgerPartitions.archive_name(month), "status": _COPYING,
+                                  "purged": False, "started_at": DateUtils.get_current_datetime()}},
+                upsert=True
+            )
+            partition = registry.find_one({"_id": month})
+        archive = hot.database[partition["collection"]]
+
+        if partition["status"] != _ARCHIVED:
+            archive.create_indexes(INDEXES["trust_rewards"]["transaction_ledger"])
+            batch = []
+            for doc in hot.find(in_month).sort([("transaction_datetime", 1), ("_id", 1)]).batch_size(LEDGER_ARCHIVE_BATCH_SIZE):
+                batch.append(doc)
+                if len(batch) >= LEDGER_ARCHIVE_BATCH_SIZE:
+                    LedgerPartitions._copy(archive, batch)
+                    batch = []
+                    if on_batch:
+                        on_batch()
+            if batch:
+                LedgerPartitions._copy(archive, batch)
+            totals = LedgerPartitions._summarize(month, archive)
+            # Readers switch to the archive here
+            registry.update_one(
+                {"_id": month},
+                {"$set": {"status": _ARCHIVED, **totals, "archived_at": DateUtils.get_current_datetime()}}
+            )
+            partition = registry.find_one({"_id": month})
+
+        removed = 0
+        while True:
+            ids = [doc["_id"] for doc in hot.find(in_month, {"_id": 1}).limit(LEDGER_ARCHIVE_BATCH_SIZE)]
+            if not ids:
+                break
+            removed += hot.delete_many({"_id": {"$in": ids}}).deleted_count
+        registry.update_one({"_id": month}, {"$set": {"purged": True, "purged_at": DateUtils.get_current_datetime()}})
+        return {"month": month, "collection": partition["collection"], "entries": partition.get("count", 0),
+                "workers": partition.get("workers", 0), "removed_from_hot": removed}
+
+    @staticmethod
+    def _copy(archive, docs: List[Dict[str, Any]]) -> None:
+        try:
+            archive.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            # Entries copied by an earlier, interrupted run are already there
+            if any(error.get("code") != _DUPLICATE_KEY for error in e.details.get("writeErrors", [])):
+                raise
+
+    @staticmethod
+    def _summarize(month: str, archive) -> Dict[str, Any]:
+        """Write the month's per-worker summaries; returns the month totals for ledger_partitions"""
+        summaries = {}
+        totals = {"count": 0, "total_amount": 0, "by_status": defaultdict(int)}
+        for row in archive.aggregate([
+            {"$group": {
+                "_id": {"worker_id": "$worker_id", "type": "$transaction_type", "status": "$status"},
+                "count": {"$sum": 1},
+                "total_amount": {"$sum": "$amount"},
+                "earned": {"$sum": {"$cond": [{"$gt": ["$amount", 0]}, "$amount", 0]}},
+                "redeemed": {"$sum": {"$cond": [{"$lt": ["$amount", 0]}, "$amount", 0]}},
+            }}
+        ], allowDiskUse=True):
+            key = row["_id"]
+            worker_id, transaction_type = key.get("worker_id"), key.get("type") or "UNKNOWN"
+            summary = summaries.setdefault(worker_id, {
+                "_id": f"{month}|{worker_id}", "worker_id": worker_id, "month": month,
+                "count": 0, "earned": 0, "redeemed": 0, "coupon_scans": 0, "by_type": {}
+            })
+            count, amount = row["count"], int(row["total_amount"] or 0)
+            summary["count"] += count
+            summary["earned"] += int(row["earned"] or 0)
+            summary["redeemed"] += int(row["redeemed"] or 0)
+            if transaction_type == "COUPON_SCAN":
+                summary["coupon_scans"] += count
+            by_type = summary["by_type"].setdefault(transaction_type, {"count": 0, "total_amount": 0})
+            by_type["count"] += count
+            by_type["total_amount"] += amount
+
+            totals["count"] += count
+            totals["total_amount"] += amount
+            totals["by_status"][key.get("status") or "unknown"] += count
+
+        collection = LedgerPartitions._summaries()
+        collection.delete_many({"month": month})
+        docs = list(summaries.values())
+        for offset in range(0, len(docs), LEDGER_ARCHIVE_BATCH_SIZE):
+            collection.insert_many(docs[offset:offset + LEDGER_ARCHIVE_BATCH_SIZE], ordered=False)
+        return {**totals, "by_status": dict(totals["by_status"]), "workers": len(docs)}
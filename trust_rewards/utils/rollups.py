@@ -0,0 +1,298 @@
+import os
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from trust_rewards.database import client1
+from trust_rewards.utils.common import DateUtils
+
+DAY = "day"
+MONTH = "month"
+COUNTERS = ("issued_coupons", "used_coupons", "points", "active_workers")
+_BUILD_STATE_ID = "build"
+_UNKNOWN_BUCKET = "unknown"
+# A first build still queued/building after this long (job failed for good,
+# worker crashed) is queued again by the next dashboard read
+ANALYTICS_ROLLUP_BUILD_TIMEOUT_SECONDS = int(os.getenv("ANALYTICS_ROLLUP_BUILD_TIMEOUT_SECONDS", "3600"))
+
+
+class AnalyticsRollups:
+    """Coupon dashboard counters kept in day and month buckets.
+
+    `analytics_rollups` holds one document per
+    (granularity, bucket, state, batch_number, worker_type) with
+
+        issued_coupons   coupons generated (state/worker_type None)
+        used_coupons     coupons scanned, by the scanning worker's state and type
+        points           points awarded for those scans
+        active_workers   distinct workers scanning in the bucket (batch_number None)
+
+    Generation and `scan_coupon` increment the buckets as they write; the
+    dashboards only read buckets, so their cost depends on the number of
+    states, batches and months, not on coupon volume. `rebuild` recomputes
+    everything from `coupon_code` (scripts/rebuild_analytics_rollups.py or
+    the analytics_rollup_rebuild job). Scans are attributed to the worker's
+    state at scan time.
+
+    `analytics_rollup_state` tracks the first build: "queued" -> "building"
+    -> "built". Once built the rollups stay readable; later rebuilds only
+    correct them and leave the status alone.
+    """
+
+    @staticmethod
+    def _collection():
+        db = client1['trust_rewards']
+        return db['analytics_rollups']
+
+    @staticmethod
+    def _workers_seen():
+        return AnalyticsRollups._collection().database['analytics_rollup_workers']
+
+    @staticmethod
+    def _state():
+        return AnalyticsRollups._collection().database['analytics_rollup_state']
+
+    @staticmethod
+    def _buckets(when: Any) -> Dict[str, str]:
+        if isinstance(when, datetime):
+            return {DAY: when.strftime("%Y-%m-%d"), MONTH: when.strftime("%Y-%m")}
+        if isinstance(when, str) and len(when) >= 10:
+            return {DAY: when[:10], MONTH: when[:7]}
+        return {DAY: _UNKNOWN_BUCKET, MONTH: _UNKNOWN_BUCKET}
+
+    @staticmethod
+    def _inc_op(granularity: str, bucket: str, state: Optional[str], batch_number: Optional[str],
+                worker_type: Optional[str], inc: Dict[str, int]) -> UpdateOne:
+        return UpdateOne(
+            {"granularity": granularity, "bucket": bucket, "state": state,
+             "batch_number": batch_number, "worker_type": worker_type},
+            {"$inc": inc},
+            upsert=True
+        )
+
+    # ------------------------------------------------------------------
+    # Write paths
+    # ------------------------------------------------------------------
+    @staticmethod
+    def record_issued(batch_number: str, created_at: Any, count: int) -> None:
+        """`count` coupons of a batch were generated"""
+        if count <= 0:
+            return
+        ops = [
+            AnalyticsRollups._inc_op(granularity, bucket, None, batch_number, None, {"issued_coupons": count})
+            for granularity, bucket in AnalyticsRollups._buckets(created_at).items()
+        ]
+        AnalyticsRollups._collection().bulk_write(ops, ordered=False)
+
+    @staticmethod
+    def record_scans(worker: Dict[str, Any], claimed: Iterable[Dict[str, Any]], scanned_at: datetime) -> None:
+        """Coupons claimed by one scan request (results of AppCouponService._claim_coupons)"""
+        by_batch = defaultdict(lambda: {"used_coupons": 0, "points": 0})
+        for result in claimed:
+            row = by_batch[result.get('batch_number') or '']
+            row["used_coupons"] += 1
+            row["points"] += int(result.get('points_earned', 0) or 0)
+        if not by_batch:
+            return
+
+        state = worker.get('state') or None
+        worker_type = worker.get('worker_type') or None
+        buckets = AnalyticsRollups._buckets(scanned_at)
+        ops = [
+            AnalyticsRollups._inc_op(granularity, bucket, state, batch_number, worker_type, row)
+            for granularity, bucket in buckets.items()
+            for batch_number, row in by_batch.items()
+        ]
+
+        # First scan of this worker in the day / month counts them as active
+        seen = AnalyticsRollups._workers_seen()
+        for granularity, bucket in buckets.items():
+            marker = seen.update_one(
+                {"_id": f"{granularity}|{bucket}|{worker['_id']}"},
+                {"$setOnInsert": {"created_at": scanned_at}},
+                upsert=True
+            )
+            if marker.upserted_id is not None:
+                ops.append(AnalyticsRollups._inc_op(granularity, bucket, state, None, worker_type,
+                                                    {"active_workers": 1}))
+        AnalyticsRollups._collection().bulk_write(ops, ordered=False)
+
+    # ------------------------------------------------------------------
+    # Rebuild
+    # ------------------------------------------------------------------
+    @staticmethod
+    def rebuild() -> Dict[str, int]:
+        """Recompute every bucket from coupon_code and skilled_workers.
+
+        Counts the coupons issued and scanned before a cutoff and applies the
+        difference to a snapshot of the buckets taken at that cutoff as
+        `$inc`, so increments written by scans and generation while the
+        rebuild runs are kept rather than overwritten. Only a scan in flight
+        at the cutoff itself can be counted twice; the next rebuild corrects it.
+        """
+        db = AnalyticsRollups._collection().database
+        collection = AnalyticsRollups._collection()
+        build_state = AnalyticsRollups._state()
+        try:
+            # Readiness only moves forward: a rebuild of built rollups keeps them readable
+            build_state.update_one(
+                {"_id": _BUILD_STATE_ID, "status": {"$ne": "built"}},
+                {"$set": {"status": "building", "status_at": DateUtils.get_current_datetime()}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            # Already built: the upsert found no unbuilt state to update
+            pass
+
+        # Events before the cutoff are recounted; later ones are only in the live increments.
+        # ObjectIds from different processes only order by their second, so
+        # coupons are cut at the next whole second once it has passed
+        id_cutoff_at = int(time.time()) + 1
+        time.sleep(max(0.0, id_cutoff_at - time.time()))
+        id_cutoff = ObjectId.from_datetime(datetime.fromtimestamp(id_cutoff_at, timezone.utc))
+        cutoff = DateUtils.get_cutoff_datetime()
+        snapshot = {
+            (doc['granularity'], doc['bucket'], doc.get('state'), doc.get('batch_number'), doc.get('worker_type')):
+                {name: int(doc.get(name, 0) or 0) for name in COUNTERS}
+            for doc in collection.find({})
+        }
+
+        batches = {str(m['_id']): m.get('batch_number', '') for m in db['coupon_master'].find({}, {"batch_number": 1})}
+        counters = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+        active = defaultdict(set)
+
+        # Issued coupons per batch and creation day
+        for row in db['coupon_code'].aggregate([
+            {"$match": {"_id": {"$lt": id_cutoff}}},
+            {"$group": {"_id": {"master": "$coupon_master_id", "created_at": "$created_at",
+                                "batch_number": "$batch_number"}, "count": {"$sum": 1}}}
+        ], allowDiskUse=True):
+            key = row['_id']
+            batch_number = key.get('batch_number') or batches.get(key.get('master'), '')
+            for granularity, bucket in AnalyticsRollups._buckets(key.get('created_at')).items():
+                counters[(granularity, bucket, None, batch_number, None)]["issued_coupons"] += row['count']
+
+        # Scans per day, worker and batch
+        scan_rows = list(db['coupon_code'].aggregate([
+            {"$match": {"is_scanned": True, "$or": [{"scanned_at": {"$lt": cutoff}},
+                                                    {"scanned_at": {"$not": {"$type": "date"}}}]}},
+            {"$group": {
+                "_id": {
+                    "day": {"$cond": [{"$eq": [{"$type": "$scanned_at"}, "date"]},
+                                      {"$dateToString": {"format": "%Y-%m-%d", "date": "$scanned_at"}},
+                                      _UNKNOWN_BUCKET]},
+                    "worker": "$scanned_by", "master": "$coupon_master_id", "batch_number": "$batch_number"
+                },
+                "used": {"$sum": 1},
+                "points": {"$sum": {"$ifNull": ["$points_value", "$coupon_value"]}}
+            }}
+        ], allowDiskUse=True))
+        worker_ids = list({row['_id'].get('worker') for row in scan_rows if ObjectId.is_valid(row['_id'].get('worker') or '')})
+        workers = {}
+        for offset in range(0, len(worker_ids), 1000):
+            chunk = [ObjectId(w) for w in worker_ids[offset:offset + 1000]]
+            for worker in db['skilled_workers'].find({"_id": {"$in": chunk}}, {"state": 1, "worker_type": 1}):
+                workers[str(worker['_id'])] = worker
+
+        for row in scan_rows:
+            key = row['_id']
+            worker_id = key.get('worker')
+            worker = workers.get(worker_id, {})
+            state, worker_type = worker.get('state') or None, worker.get('worker_type') or None
+            batch_number = key.get('batch_number') or batches.get(key.get('master'), '')
+            for granularity, bucket in AnalyticsRollups._buckets(key['day'] if key['day'] != _UNKNOWN_BUCKET else None).items():
+                bucket_counters = counters[(granularity, bucket, state, batch_number, worker_type)]
+                bucket_counters["used_coupons"] += row['used']
+                bucket_counters["points"] += int(row['points'] or 0)
+                if worker_id:
+                    active[(granularity, bucket, state, worker_type)].add(worker_id)
+
+        for (granularity, bucket, state, worker_type), worker_set in active.items():
+            counters[(granularity, bucket, state, None, worker_type)]["active_workers"] += len(worker_set)
+
+        now = DateUtils.get_current_datetime()
+        ops = []
+        for key in set(counters) | set(snapshot):
+            rebuilt, before = counters.get(key, {}), snapshot.get(key, {})
+            delta = {name: rebuilt.get(name, 0) - before.get(name, 0) for name in COUNTERS}
+            delta = {name: value for name, value in delta.items() if value}
+            if not delta:
+                continue
+            granularity, bucket, state, batch_number, worker_type = key
+            ops.append(UpdateOne(
+                {"granularity": granularity, "bucket": bucket, "state": state,
+                 "batch_number": batch_number, "worker_type": worker_type},
+                {"$inc": delta, "$set": {"rebuilt_at": now}},
+                upsert=True
+            ))
+        for offset in range(0, len(ops), 5000):
+            collection.bulk_write(ops[offset:offset + 5000], ordered=False)
+
+        # Markers for the workers counted above; existing ones (written by scans) stay
+        markers = [
+            {"_id": f"{g}|{b}|{worker_id}", "created_at": now}
+            for (g, b, _, _), worker_set in active.items() for worker_id in worker_set
+        ]
+        for offset in range(0, len(markers), 5000):
+            try:
+                AnalyticsRollups._workers_seen().insert_many(markers[offset:offset + 5000], ordered=False)
+            except BulkWriteError:
+                # Already marked
+                pass
+
+        build_state.update_one({"_id": _BUILD_STATE_ID},
+                               {"$set": {"status": "built", "status_at": now, "built_at": now}}, upsert=True)
+        return {"buckets": len(counters), "corrected_buckets": len(ops), "scanning_workers": len(workers)}
+
+    @staticmethod
+    def is_built() -> bool:
+        doc = AnalyticsRollups._state().find_one({"_id": _BUILD_STATE_ID}, {"status": 1})
+        return bool(doc) and doc.get("status") == "built"
+
+    @staticmethod
+    def claim_first_build() -> bool:
+        """True for exactly one caller while the rollups have never been built.
+
+        A first build left queued or building for longer than
+        ANALYTICS_ROLLUP_BUILD_TIMEOUT_SECONDS is claimed again.
+        """
+        now = DateUtils.get_current_datetime()
+        try:
+            AnalyticsRollups._state().insert_one({"_id": _BUILD_STATE_ID, "status": "queued", "status_at": now})
+            return True
+        except DuplicateKeyError:
+            pass
+        stale = now - timedelta(seconds=ANALYTICS_ROLLUP_BUILD_TIMEOUT_SECONDS)
+        reclaimed = AnalyticsRollups._state().update_one(
+            {"_id": _BUILD_STATE_ID, "status": {"$in": ["queued", "building"]},
+             # States written before status_at was recorded count as stale
+             "$or": [{"status_at": {"$lt": stale}}, {"status_at": {"$exists": False}}]},
+            {"$set": {"status": "queued", "status_at": now}}
+        )
+        return reclaimed.modified_count == 1
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    @staticmethod
+    def totals(match: Optional[Dict[str, Any]] = None) -> Dict[str, int]:
+        """Counters summed over month buckets (optionally filtered)"""
+        rows = list(AnalyticsRollups._collection().aggregate([
+            {"$match": {"granularity": MONTH, **(match or {})}},
+            {"$group": {"_id": None, **{name: {"$sum": f"${name}"} for name in COUNTERS}}}
+        ]))
+        return {name: int(rows[0].get(name, 0) or 0) if rows else 0 for name in COUNTERS}
+
+    @staticmethod
+    def by_state(match: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """[{"state", <counters>}] summed over month buckets (optionally filtered)"""
+        return [
+            {"state": row['_id'], **{name: int(row.get(name, 0) or 0) for name in COUNTERS}}
+            for row in AnalyticsRollups._collection().aggregate([
+                {"$match": {"granularity": MONTH, **(match or {})}},
+                {"$group": {"_id": "$state", **{name: {"$sum": f"${name}"} for name in COUNTERS}}}
+            ])
+        ]
@@ -0,0 +1,9 @@
+"""Trust Rewards sequence counters (see `app/utils/sequences.py`)"""
+
+from app.utils.sequences import Sequences
+from trust_rewards.database import client1
+
+sequences = Sequences(client1["trust_rewards"]["counters"])
+
+# coupon_master.coupon_id: COU-1, COU-2, ...
+COUPON_MASTER_SEQUENCE = "coupon_master_coupon_id"
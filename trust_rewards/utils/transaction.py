@@ -1,13 +1,17 @@
 from bson import ObjectId
-from typing import Optional
+from typing import List, Optional
 from trust_rewards.database import client1
 from trust_rewards.utils.common import DateUtils, AuditUtils
+from trust_rewards.utils.leaderboard import Leaderboard
+from trust_rewards.utils.wallet import WalletStats
 
 
 class TransactionLogger:
     """Shared transaction ledger insertion utility.
 
     Ensures a single schema and consistent timestamps across services.
+    Every recorded entry is also folded into the worker's `wallet_stats` and
+    the Super30 `Leaderboard`.
     """
 
     @staticmethod
@@ -16,7 +20,7 @@ class TransactionLogger:
         return db['transaction_ledger']
 
     @staticmethod
-    def record(
+    def build(
         *,
         worker_id: str,
         transaction_type: str,
@@ -29,29 +33,47 @@ class TransactionLogger:
         redemption_id: Optional[str] = "",
         batch_number: Optional[str] = "",
         created_by: Optional[str] = None,
-    ) -> None:
-        try:
-            doc = {
-                "transaction_id": f"TXN_{ObjectId()}",
-                "worker_id": worker_id,
-                "transaction_type": transaction_type,
-                "amount": int(amount),
-                "description": description,
-                "reference_id": reference_id or "",
-                "reference_type": reference_type or "",
-                "batch_number": batch_number or "",
-                "redemption_id": redemption_id or "",
-                "previous_balance": int(previous_balance),
-                "new_balance": int(new_balance),
-                "transaction_date": DateUtils.get_current_date(),
-                "transaction_time": DateUtils.get_current_time(),
-                "transaction_datetime": DateUtils.get_current_datetime(),
-                "status": "completed",
-                **AuditUtils.build_create_meta(created_by or worker_id),
-            }
+    ) -> dict:
+        """Ledger document with the shared schema (not inserted)"""
+        return {
+            "transaction_id": f"TXN_{ObjectId()}",
+            "worker_id": worker_id,
+            "transaction_type": transaction_type,
+            "amount": int(amount),
+            "description": description,
+            "reference_id": reference_id or "",
+            "reference_type": reference_type or "",
+            "batch_number": batch_number or "",
+            "redemption_id": redemption_id or "",
+            "previous_balance": int(previous_balance),
+            "new_balance": int(new_balance),
+            "transaction_date": DateUtils.get_current_date(),
+            "transaction_time": DateUtils.get_current_time(),
+            "transaction_datetime": DateUtils.get_current_datetime(),
+            "status": "completed",
+            **AuditUtils.build_create_meta(created_by or worker_id),
+        }
+
+    @staticmethod
+    def record(**fields) -> None:
+        """Insert one ledger entry; takes the keyword arguments of `build`"""
+        TransactionLogger.record_many([TransactionLogger.build(**fields)])
 
-            TransactionLogger._collection().insert_one(doc)
+    @staticmethod
+    def record_many(docs: List[dict]) -> None:
+        """Insert entries from `build` in one ordered round trip"""
+        if not docs:
+            return
+        try:
+            TransactionLogger._collection().insert_many(docs, ordered=True)
         except Exception as e:
             print(f"TransactionLogger error: {str(e)}")
-
-
+            return
+        try:
+            WalletStats.apply_ledger_entries(docs)
+        except Exception as e:
+            print(f"WalletStats error: {str(e)}")
+        try:
+            Leaderboard.apply_ledger_entries(docs)
+        except Exception as e:
+            print(f"Leaderboard error: {str(e)}")
@@ -0,0 +1,315 @@
+from collections import defaultdict
+from bson import ObjectId
+from typing import Any, Dict, Iterable, List, Optional
+from pymongo import ReturnDocument, UpdateOne
+from app.utils.cursor_pagination import paginate_sources
+from trust_rewards.database import client1
+from trust_rewards.utils.common import DateUtils
+from trust_rewards.utils.ledger_archive import LedgerPartitions
+
+
+class Wallet:
+    """Single place that reads and mutates `skilled_workers.wallet_points`.
+
+    Every mutation is one atomic `$inc` (a debit is conditional on
+    `wallet_points >= amount`), so concurrent scans, redemptions and
+    cancellations never overwrite each other. Mutations return the
+    balances taken from the post-image of the update, which is what the
+    ledger entry for that mutation should record:
+
+        change = Wallet.debit(worker_id, 500)
+        if change is None:
+            ...  # insufficient balance
+        TransactionLogger.record(..., previous_balance=change["previous_balance"],
+                                 new_balance=change["new_balance"])
+    """
+
+    @staticmethod
+    def _collection():
+        db = client1['trust_rewards']
+        return db['skilled_workers']
+
+    @staticmethod
+    def _as_int(value: Any) -> int:
+        try:
+            return int(value or 0)
+        except (ValueError, TypeError):
+            print(f"Warning: Invalid wallet_points value: {value}, defaulting to 0")
+            return 0
+
+    @staticmethod
+    def balance(worker_id: str) -> int:
+        """Current wallet balance of a worker (0 if not found)"""
+        try:
+            worker = Wallet._collection().find_one({"_id": ObjectId(worker_id)}, {"wallet_points": 1})
+            return Wallet._as_int(worker.get('wallet_points')) if worker else 0
+        except Exception as e:
+            print(f"Error getting worker balance: {str(e)}")
+            return 0
+
+    @staticmethod
+    def _apply(query: Dict[str, Any], amount: int, inc: Optional[Dict[str, int]]) -> Optional[Dict[str, Any]]:
+        update_inc = {"wallet_points": amount, **(inc or {})}
+        worker = Wallet._collection().find_one_and_update(
+            query,
+            {"$inc": update_inc, "$set": {"last_activity": DateUtils.get_current_date()}},
+            projection={field: 1 for field in update_inc},
+            return_document=ReturnDocument.AFTER
+        )
+        if worker is None:
+            return None
+        new_balance = Wallet._as_int(worker.get('wallet_points'))
+        return {
+            "previous_balance": new_balance - amount,
+            "new_balance": new_balance,
+            "worker": worker
+        }
+
+    @staticmethod
+    def credit(worker_id: str, amount: int, inc: Optional[Dict[str, int]] = None) -> Optional[Dict[str, Any]]:
+        """Add `amount` points; `inc` adds other counters in the same update.
+
+        Returns {"previous_balance", "new_balance", "worker"} or None if the
+        worker does not exist.
+        """
+        return Wallet._apply({"_id": ObjectId(worker_id)}, int(amount), inc)
+
+    @staticmethod
+    def debit(worker_id: str, amount: int, inc: Optional[Dict[str, int]] = None) -> Optional[Dict[str, Any]]:
+        """Take `amount` points only if the balance covers it.
+
+        Returns {"previous_balance", "new_balance", "worker"} or None if the
+        balance is insufficient (or the worker does not exist).
+        """
+        amount = int(amount)
+        return Wallet._apply({"_id": ObjectId(worker_id), "wallet_points": {"$gte": amount}}, -amount, inc)
+
+
+# Redemption statuses counted in wallet_stats
+_REDEMPTION_STATUS_COUNTERS = {"pending": "redeem_pending", "redeemed": "redeems"}
+RECENT_TRANSACTIONS_LIMIT = 10
+_STAT_COUNTERS = ("earned", "redeemed", "coupon_scans", "redeems", "redeem_pending")
+
+
+class WalletStats:
+    """Wallet screen totals materialized on the worker document.
+
+    `skilled_workers.wallet_stats` holds
+
+        earned, redeemed (negative sum), coupon_scans   <- ledger entries
+        redeems, redeem_pending                         <- redemption statuses
+        recent_transactions                             <- last 10 ledger entries
+
+    `TransactionLogger` applies ledger entries and the redemption services call
+    `redemption_status_changed`, so the wallet screen is a single read of the
+    worker. `rebuild` corrects everything from the ledger and redemptions
+    (see `scripts/reconcile_wallet_stats.py`); the wallet screen also rebuilds
+    a worker that has no stats yet (or whose first rebuild did not finish).
+    """
+
+    FIELD = "wallet_stats"
+
+    @staticmethod
+    def _collection():
+        db = client1['trust_rewards']
+        return db['skilled_workers']
+
+    @staticmethod
+    def _worker_filter(worker_id: str, with_stats: bool = False) -> Dict[str, Any]:
+        try:
+            query = {"_id": ObjectId(worker_id)}
+        except Exception:
+            query = {"worker_id": worker_id}
+        if with_stats:
+            # Counters only move on stats that exist; a worker without them is
+            # rebuilt in full on its first read
+            query[WalletStats.FIELD] = {"$exists": True}
+        return query
+
+    @staticmethod
+    def recent_entry(doc: Dict[str, Any]) -> Dict[str, Any]:
+        """The part of a ledger entry the wallet screen shows"""
+        return {
+            "transaction_id": doc.get("transaction_id", ""),
+            "transaction_type": doc.get("transaction_type", ""),
+            "description": doc.get("description", ""),
+            "amount": int(doc.get("amount", 0) or 0),
+            "transaction_date": doc.get("transaction_date"),
+            "transaction_time": doc.get("transaction_time", ""),
+            "transaction_datetime": doc.get("transaction_datetime"),
+        }
+
+    @staticmethod
+    def apply_ledger_entries(docs: Iterable[Dict[str, Any]]) -> None:
+        """Fold new ledger entries into their workers' stats (one update per worker)"""
+        by_worker = defaultdict(list)
+        for doc in docs:
+            by_worker[doc["worker_id"]].append(doc)
+
+        ops = []
+        for worker_id, entries in by_worker.items():
+            amounts = [int(e.get("amount", 0) or 0) for e in entries]
+            ops.append(UpdateOne(
+                WalletStats._worker_filter(worker_id, with_stats=True),
+                {
+                    "$inc": {
+                        "wallet_stats.earned": sum(a for a in amounts if a > 0),
+                        "wallet_stats.redeemed": sum(a for a in amounts if a < 0),
+                        "wallet_stats.coupon_scans": sum(1 for e in entries if e.get("transaction_type") == "COUPON_SCAN"),
+                    },
+                    "$push": {
+                        "wallet_stats.recent_transactions": {
+                            "$each": [WalletStats.recent_entry(e) for e in entries],
+                            "$slice": -RECENT_TRANSACTIONS_LIMIT
+                        }
+                    }
+                }
+            ))
+        if ops:
+            WalletStats._collection().bulk_write(ops, ordered=False)
+
+    @staticmethod
+    def redemption_status_changed(worker_id: str, old_status: Optional[str], new_status: Optional[str]) -> None:
+        """Move a redemption between the counted statuses (old_status None = new redemption)"""
+        inc = {}
+        if old_status in _REDEMPTION_STATUS_COUNTERS:
+            inc[f"wallet_stats.{_REDEMPTION_STATUS_COUNTERS[old_status]}"] = -1
+        if new_status in _REDEMPTION_STATUS_COUNTERS:
+            inc[f"wallet_stats.{_REDEMPTION_STATUS_COUNTERS[new_status]}"] = 1
+        if inc:
+            WalletStats._collection().update_one(
+                WalletStats._worker_filter(worker_id, with_stats=True), {"$inc": inc}
+            )
+
+    @staticmethod
+    def get(worker_id: str) -> Optional[Dict[str, Any]]:
+        """Balance and wallet_stats in one read; rebuilds stats the worker does not have yet"""
+        query = WalletStats._worker_filter(worker_id)
+        worker = WalletStats._collection().find_one(query, {"wallet_points": 1, "wallet_stats": 1})
+        if worker is None:
+            return None
+        if (worker.get(WalletStats.FIELD) or {}).get("reconciled_at") is None:
+            WalletStats.rebuild([worker_id])
+            worker = WalletStats._collection().find_one(query, {"wallet_points": 1, "wallet_stats": 1})
+            if worker is None:
+                return None
+        worker["wallet_points"] = Wallet._as_int(worker.get("wallet_points"))
+        return worker
+
+    @staticmethod
+    def rebuild(worker_ids: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """Recompute wallet_stats from the ledger (hot and archived) and gift_redemptions.
+
+        All workers when `worker_ids` is None. Returns {worker_id: stats} as
+        counted at the rebuild's cutoff.
+
+        Ledger entries and redemptions keep landing while this runs, so the
+        stored stats are corrected rather than overwritten: workers without
+        stats first get empty ones (so `apply_ledger_entries` stops skipping
+        them), then a cutoff is taken and the current stats snapshotted, the
+        ledger is counted up to the cutoff, and each counter gets `$inc` of
+        (rebuilt - snapshot). Recent transactions before the cutoff are
+        replaced and later ones kept. A worker whose stats another rebuild
+        corrected after the snapshot is left to that rebuild.
+        """
+        workers = WalletStats._collection()
+        db = workers.database
+        if worker_ids is not None:
+            worker_ids = list(worker_ids)
+            if not worker_ids:
+                return {}
+            match = {"worker_id": {"$in": worker_ids}}
+            worker_query = {"$or": [WalletStats._worker_filter(worker_id) for worker_id in worker_ids]}
+        else:
+            match = {}
+            worker_query = {}
+
+        workers.update_many(
+            {**worker_query, WalletStats.FIELD: {"$exists": False}},
+            {"$set": {WalletStats.FIELD: {**WalletStats._empty_stats(), "reconciled_at": None}}}
+        )
+        cutoff = DateUtils.get_cutoff_datetime()
+        rebuild_id = str(ObjectId())
+
+        snapshot = {}
+        for worker in workers.find(worker_query, {WalletStats.FIELD: 1, "worker_id": 1}):
+            current = worker.get(WalletStats.FIELD) or {}
+            snapshot[str(worker["_id"])] = current
+            if worker.get("worker_id"):
+                snapshot[str(worker["worker_id"])] = current
+        stats = defaultdict(WalletStats._empty_stats)
+        for worker_id in (worker_ids if worker_ids is not None else snapshot):
+            stats[worker_id]
+
+        # Hot ledger plus the monthly summaries of archived months
+        for worker_id, totals in LedgerPartitions.worker_totals(match, end=cutoff).items():
+            stats[worker_id].update(totals)
+
+        for row in db["gift_redemptions"].aggregate([
+            {"$match": {**match, "status": {"$in": list(_REDEMPTION_STATUS_COUNTERS)}}},
+            {"$group": {"_id": {"worker_id": "$worker_id", "status": "$status"}, "count": {"$sum": 1}}}
+        ]):
+            stats[row["_id"]["worker_id"]][_REDEMPTION_STATUS_COUNTERS[row["_id"]["status"]]] = row["count"]
+
+        reconciled_at = DateUtils.get_current_datetime()
+        ops = []
+        for worker_id, worker_stats in stats.items():
+            current = snapshot.get(worker_id)
+            if current is None:
+                # Ledger or redemptions of a worker that no longer exists
+                continue
+            ops.append(UpdateOne(
+                {**WalletStats._worker_filter(worker_id), "wallet_stats.rebuild_id": current.get("rebuild_id")},
+                {
+                    "$inc": {
+                        f"wallet_stats.{name}": worker_stats[name] - int(current.get(name, 0) or 0)
+                        for name in _STAT_COUNTERS
+                    },
+                    "$set": {"wallet_stats.reconciled_at": reconciled_at, "wallet_stats.rebuild_id": rebuild_id}
+                }
+            ))
+            if len(ops) >= 500:
+                workers.bulk_write(ops, ordered=False)
+                ops = []
+        if ops:
+            workers.bulk_write(ops, ordered=False)
+
+        corrected = set()
+        for worker in workers.find({**worker_query, "wallet_stats.rebuild_id": rebuild_id}, {"worker_id": 1}):
+            corrected.add(str(worker["_id"]))
+            if worker.get("worker_id"):
+                corrected.add(str(worker["worker_id"]))
+
+        ops = []
+        for worker_id, worker_stats in stats.items():
+            if worker_id not in corrected:
+                continue
+            # worker_id_transaction_datetime index; archives only if the hot ledger has too few
+            recent, _ = paginate_sources(
+                LedgerPartitions.sources({"worker_id": worker_id, "transaction_datetime": {"$lt": cutoff}}),
+                [("transaction_datetime", -1)], RECENT_TRANSACTIONS_LIMIT
+            )
+            worker_stats["recent_transactions"] = [WalletStats.recent_entry(doc) for doc in reversed(recent)]
+            # Two updates, in order: entries pushed after the cutoff stay, sorted in after the rebuilt ones
+            ops.append(UpdateOne(
+                WalletStats._worker_filter(worker_id),
+                {"$pull": {"wallet_stats.recent_transactions": {"transaction_datetime": {"$lt": cutoff}}}}
+            ))
+            ops.append(UpdateOne(
+                WalletStats._worker_filter(worker_id),
+                {"$push": {"wallet_stats.recent_transactions": {
+                    "$each": worker_stats["recent_transactions"],
+                    "$sort": {"transaction_datetime": 1},
+                    "$slice": -RECENT_TRANSACTIONS_LIMIT
+                }}}
+            ))
+            if len(ops) >= 500:
+                workers.bulk_write(ops, ordered=True)
+                ops = []
+        if ops:
+            workers.bulk_write(ops, ordered=True)
+        return dict(stats)
+
+    @staticmethod
+    def _empty_stats() -> Dict[str, Any]:
+        return {**{name: 0 for name in _STAT_COUNTERS}, "recent_transactions": []}
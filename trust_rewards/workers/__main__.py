@@ -0,0 +1,4 @@
+from app.utils.jobs import main
+
+if __name__ == "__main__":
+    main("trust_rewards.workers.tasks", "Run Trust Rewards background job workers")
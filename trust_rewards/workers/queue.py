@@ -0,0 +1,13 @@
+"""Trust Rewards job queue (see `app/utils/jobs.py`)"""
+
+from app.utils.jobs import JobQueue
+from trust_rewards.database import client1
+
+job_queue = JobQueue(client1["trust_rewards"]["jobs"])
+
+COUPON_GENERATION_JOB = "coupon_generation"
+COUPON_CSV_EXPORT_JOB = "coupon_csv_export"
+WALLET_STATS_RECONCILE_JOB = "wallet_stats_reconcile"
+LEADERBOARD_REBUILD_JOB = "leaderboard_rebuild"
+ANALYTICS_ROLLUP_REBUILD_JOB = "analytics_rollup_rebuild"
+LEDGER_ARCHIVE_JOB = "ledger_archive"
@@ -0,0 +1,73 @@
+"""
+Trust Rewards background job handlers.
+
+Run the workers with `python -m trust_rewards.workers --processes 2`.
+"""
+
+from app.utils.jobs import job_handler
+from trust_rewards.services.web_coupon_services import CouponService
+from trust_rewards.utils.leaderboard import ALL_TIME, Leaderboard
+from trust_rewards.utils.ledger_archive import LedgerPartitions
+from trust_rewards.utils.rollups import AnalyticsRollups
+from trust_rewards.utils.wallet import WalletStats
+from trust_rewards.workers.queue import (
+    ANALYTICS_ROLLUP_REBUILD_JOB, COUPON_CSV_EXPORT_JOB, COUPON_GENERATION_JOB, LEADERBOARD_REBUILD_JOB,
+    LEDGER_ARCHIVE_JOB, WALLET_STATS_RECONCILE_JOB, job_queue
+)
+
+HANDLERS = {}
+
+
+@job_handler(HANDLERS, COUPON_GENERATION_JOB)
+def generate_coupons(ctx):
+    """Insert a batch's coupon codes; resumes from what a failed attempt inserted"""
+    payload = ctx.payload
+    number_of_coupons = payload["number_of_coupons"]
+    result = CouponService().run_coupon_generation(
+        payload["coupon_master_id"],
+        payload.get("chunk_size"),
+        on_progress=lambda generated: ctx.progress(generated * 100.0 / number_of_coupons),
+    )
+    if not result["success"]:
+        raise RuntimeError(result["message"])
+    return result["data"]
+
+
+@job_handler(HANDLERS, COUPON_CSV_EXPORT_JOB)
+def export_coupon_csv(ctx):
+    result = CouponService().build_coupon_code_csv(ctx.payload["coupon_master_id"], on_progress=ctx.progress,
+                                                   compress=bool(ctx.payload.get("compress", False)))
+    if not result["success"]:
+        raise RuntimeError(result["message"])
+    return result["data"]
+
+
+@job_handler(HANDLERS, WALLET_STATS_RECONCILE_JOB)
+def reconcile_wallet_stats(ctx):
+    """Rebuild wallet_stats from the ledger; payload worker_ids limits it to those workers"""
+    rebuilt = WalletStats.rebuild(ctx.payload.get("worker_ids"))
+    return {"workers": len(rebuilt)}
+
+
+@job_handler(HANDLERS, LEADERBOARD_REBUILD_JOB)
+def rebuild_leaderboard(ctx):
+    """Rebuild leaderboard periods from the ledger; payload periods defaults to all_time and this month"""
+    periods = ctx.payload.get("periods") or [ALL_TIME, Leaderboard.month_key()]
+    return {period: Leaderboard.rebuild(period) for period in periods}
+
+
+@job_handler(HANDLERS, ANALYTICS_ROLLUP_REBUILD_JOB)
+def rebuild_analytics_rollups(ctx):
+    """Recompute the coupon dashboard rollups from coupon_code"""
+    return AnalyticsRollups.rebuild()
+
+
+@job_handler(HANDLERS, LEDGER_ARCHIVE_JOB)
+def archive_ledger(ctx):
+    """Move ledger months older than the hot window to their monthly archives"""
+    months = LedgerPartitions.archive(ctx.payload.get("hot_months"),
+                                      on_progress=lambda percent, month: ctx.progress(percent, month=month))
+    return {"months": months}
+
+
+__all__ = ["HANDLERS", "job_queue"]